@@ -69,8 +69,12 @@ def hex_to_rgba(hex_color: str, alpha: float) -> str:
 # Chat history persistence
 # ──────────────────────────────────────────────────────────
 from src.chat_storage import (
+    CHAT_HISTORY_WINDOW,
+    CHAT_PAGE_SIZE,
     save_chat_history,
     load_chat_history,
+    load_older_messages,
+    clear_chat_history,
     is_persistent as is_chat_persistent,
 )
 from src.task_extractor import (
@@ -837,6 +841,7 @@ def main():
         # Initialize chat history (try loading from persistent storage first)
         if "messages" not in st.session_state:
             saved = load_chat_history()
+            st.session_state.chat_has_older = len(saved) >= CHAT_HISTORY_WINDOW
             if saved:
                 st.session_state.messages = saved
             else:
@@ -874,6 +879,8 @@ def main():
                 c_yes, c_no = st.columns(2)
                 with c_yes:
                     if st.button("Да", key="confirm_yes"):
+                        clear_chat_history()
+                        st.session_state.chat_has_older = False
                         st.session_state.messages = [
                             {
                                 "role": "assistant",
@@ -897,6 +904,15 @@ def main():
                     st.session_state.confirm_clear = True
                     st.rerun()
 
+        # Older history is paged in on demand (only the last window is loaded at start)
+        first_id = st.session_state.messages[0].get("msg_id") if st.session_state.messages else None
+        if st.session_state.get("chat_has_older") and first_id is not None:
+            if st.button("⬆️ Показать более ранние сообщения", key="load_older"):
+                older = load_older_messages(first_id)
+                st.session_state.chat_has_older = len(older) >= CHAT_PAGE_SIZE
+                st.session_state.messages = older + st.session_state.messages
+                st.rerun()
+
         # Render chat messages as modern HTML
         chat_html = render_chat_html(st.session_state.messages)
 
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message Crew setup overhead in flows._execute_crew().
+
+Runs the same single-agent task repeatedly against a stub LLM that sleeps
+--llm-ms per call, and splits wall time into LLM time (inside the stub)
+and everything else (Task/Crew construction, memory + embedder +
+knowledge setup, executor overhead). "cold" rebuilds the Crew for every
+message, as before the crew cache; "warm" reuses the cached crew.
+
+    python benchmarks/bench_crew_setup.py [--n 10] [--llm-ms 50] [--no-memory]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_STORAGE_DIR", tempfile.mkdtemp(prefix="crew_bench_"))
+
+from crewai import Agent  # noqa: E402
+from crewai.llms.base_llm import BaseLLM  # noqa: E402
+
+from src import flows  # noqa: E402
+
+
+class StubLLM(BaseLLM):
+    """Answers immediately after a fixed delay; accumulates time spent."""
+
+    delay: float = 0.05
+    spent: float = 0.0
+
+    def call(self, messages, *args, **kwargs):
+        start = time.perf_counter()
+        time.sleep(self.delay)
+        self.spent += time.perf_counter() - start
+        return "Thought: I know the answer.\nFinal Answer: Готово."
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 32000
+
+
+def run(agent, llm: StubLLM, n: int, use_memory: bool, cold: bool) -> tuple[float, float]:
+    """Returns (setup seconds per message, LLM seconds per message)."""
+    flows._crews.clear()
+    llm.spent = 0.0
+    total = 0.0
+    for i in range(n):
+        if cold:
+            flows._crews.clear()
+        start = time.perf_counter()
+        flows._execute_crew(agent, f"Сообщение {i}: как дела?", "smm", use_memory=use_memory)
+        total += time.perf_counter() - start
+    return (total - llm.spent) / n, llm.spent / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--llm-ms", type=float, default=50)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    llm = StubLLM(model="stub", delay=args.llm_ms / 1000)
+    agent = Agent(role="SMM", goal="Отвечать", backstory="Бенчмарк", llm=llm, verbose=False)
+    use_memory = not args.no_memory
+
+    with contextlib.redirect_stdout(io.StringIO()):  # crews run with verbose=True
+        flows._execute_crew(agent, "warm up", "smm", use_memory=use_memory)  # load embedder once
+    print(f"{args.n} messages, stub LLM {args.llm_ms:.0f} ms/call, memory={use_memory}, "
+          f"knowledge sources={len(flows.KNOWLEDGE_SOURCES)}")
+    for label, cold in (("cold (new Crew per message)", True), ("warm (cached Crew)", False)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup, llm_time = run(agent, llm, args.n, use_memory, cold)
+        print(f"  {label:<30} setup {setup * 1000:8.1f} ms/msg   LLM {llm_time * 1000:7.1f} ms/msg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: fast_router.route_message() throughput.
+
+route_message() runs on every CEO bot message. Mixes intent hits, agent
+mentions, tag fallbacks and misses; distinct messages defeat the scan
+cache, the repeated set shows the cached path.
+
+    python benchmarks/bench_fast_router.py [--n 20000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.telegram_ceo.fast_router import route_message  # noqa: E402
+
+MESSAGES = [
+    "покажи баланс",
+    "что с задачами на сегодня?",
+    "Маттиас, посчитай бюджет на следующий квартал",
+    "Юки, напиши пост про запуск нового продукта в LinkedIn",
+    "нужно задеплоить фикс и проверить webhook",
+    "сделай инфографику по выручке за месяц",
+    "привет, как дела? есть минутка обсудить стратегию?",
+    "Какие у нас планы по роадмапу и спринту?",
+]
+
+
+def run(n: int, distinct: bool) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        text = MESSAGES[i % len(MESSAGES)]
+        route_message(f"{text} #{i}" if distinct else text)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # route_message logs every decision
+
+    route_message("warm up")  # compile phrase tables
+    print(f"distinct messages: {run(args.n, True):>10,.0f} msg/s")
+    print(f"repeated messages: {run(args.n, False):>10,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
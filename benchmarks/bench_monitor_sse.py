@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: monitor SSE CPU use vs number of connected clients.
+
+Compares the old per-client loop (every client rebuilds the snapshot and
+MD5-hashes it each tick) with the shared SnapshotHub (one build per tick,
+deltas fanned out to all clients). The snapshot builder re-parses
+fixture data of dashboard size to stand in for the disk reads of the
+real _build_snapshot().
+
+    python benchmarks/bench_monitor_sse.py [--seconds 2] [--interval 0.05]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.monitor.snapshot_hub import SnapshotHub  # noqa: E402
+
+CLIENT_COUNTS = (1, 10, 50, 200)
+
+_AGENTS = ["manager", "accountant", "automator", "smm", "designer", "cpo"]
+_FIXTURE = json.dumps({
+    "activity": [
+        {"agent": random.choice(_AGENTS), "type": "task_end", "task": "x" * 120,
+         "timestamp": f"2026-10-16T12:{i % 60:02d}:00"}
+        for i in range(2000)
+    ],
+    "tasks": [
+        {"id": f"t{i}", "title": "task " * 10, "status": "TODO", "priority": i % 4}
+        for i in range(300)
+    ],
+})
+
+
+def build_snapshot() -> dict:
+    data = json.loads(_FIXTURE)  # stands in for reloading logs / pool from disk
+    events = data["activity"][-50:]
+    if random.random() < 0.2:  # occasional change, like a real dashboard
+        events[-1] = dict(events[-1], task=str(random.random()))
+    return {
+        "timestamp": time.time(),
+        "agents": {a: {"status": "idle", "task": None} for a in _AGENTS},
+        "events": events,
+        "active_tasks": data["tasks"][:20],
+        "task_pool": {"total": len(data["tasks"])},
+    }
+
+
+async def legacy(clients: int, seconds: float, interval: float) -> int:
+    sent = 0
+
+    async def client():
+        nonlocal sent
+        last_hash = ""
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = build_snapshot()
+            raw = json.dumps(snapshot, sort_keys=True, default=str)
+            current = hashlib.md5(raw.encode()).hexdigest()
+            if current != last_hash:
+                last_hash = current
+                json.dumps(snapshot, default=str, ensure_ascii=False)
+                sent += 1
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await asyncio.sleep(seconds)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return sent
+
+
+async def shared(clients: int, seconds: float, interval: float) -> int:
+    hub = SnapshotHub(build_snapshot, interval=interval, wake_on=())
+    sent = 0
+
+    async def client():
+        nonlocal sent
+        queue = await hub.subscribe()
+        try:
+            while True:
+                await queue.get()
+                sent += 1
+        finally:
+            hub.unsubscribe(queue)
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await asyncio.sleep(seconds)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return sent
+
+
+def measure(fn, clients: int, seconds: float, interval: float) -> tuple[float, int]:
+    start = time.process_time()
+    sent = asyncio.run(fn(clients, seconds, interval))
+    return (time.process_time() - start) / seconds * 100, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} | {'legacy CPU %':>12} {'msgs':>6} | {'shared CPU %':>12} {'msgs':>6}")
+    for n in CLIENT_COUNTS:
+        old_cpu, old_sent = measure(legacy, n, args.seconds, args.interval)
+        new_cpu, new_sent = measure(shared, n, args.seconds, args.interval)
+        print(f"{n:>8} | {old_cpu:>12.1f} {old_sent:>6} | {new_cpu:>12.1f} {new_sent:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Tinkoff CSV statement import into transaction_storage.
+
+Generates a multi-year statement, then times: parsing, the first upload
+into an empty store, re-uploading the same file plus one new month
+(overlapping statements are the common case), get_summary() and a
+recent-transactions query. Uses the local file backend of
+persistent_storage in a temporary directory (no DATABASE_URL).
+
+    python benchmarks/bench_tinkoff_import.py [--years 3] [--per-day 15]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HEADER = (
+    '"Дата операции";"Дата платежа";"Номер карты";"Статус";"Сумма операции";"Валюта операции";'
+    '"Сумма платежа";"Валюта платежа";"Кэшбэк";"Категория";"MCC";"Описание";'
+    '"Бонусы (включая кэшбэк)";"Округление на инвесткопилку";"Сумма операции с округлением"\n'
+)
+CATEGORIES = ["Супермаркеты", "Рестораны", "Такси", "ЖКХ", "Переводы", "Мобильная связь", "Аптеки"]
+
+
+def make_statement(start: datetime, days: int, per_day: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    lines = [HEADER]
+    for d in range(days):
+        for k in range(per_day):
+            ts = start + timedelta(days=d, seconds=k * 97)
+            amount = rng.choice([-1, -1, -1, 1]) * rng.randint(100, 50000) / 100
+            value = f"{amount:.2f}".replace(".", ",")
+            lines.append(
+                f'"{ts:%d.%m.%Y %H:%M:%S}";"{ts:%d.%m.%Y}";"*{rng.choice([1234, 5678])}";"OK";'
+                f'"{value}";"RUB";"{value}";"RUB";"";"{rng.choice(CATEGORIES)}";"5411";'
+                f'"Покупка {rng.randint(1, 500)}";"0,00";"0,00";"{value}"\n'
+            )
+    return "".join(lines)
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<34} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=15)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix="tinkoff_bench_")
+    os.chdir(workdir)
+    os.environ.pop("DATABASE_URL", None)
+
+    from src.telegram.tinkoff_parser import parse_tinkoff_csv
+    from src.telegram.transaction_storage import get_summary, load_transactions, save_statement
+
+    days = 365 * args.years
+    start = datetime(2023, 1, 1)
+    history = make_statement(start, days, args.per_day)
+    print(f"{days * args.per_day} rows, {len(history) / 1e6:.1f} MB CSV (data dir: {workdir})")
+
+    parsed = timed("parse", lambda: parse_tinkoff_csv(history))
+    added = timed("first upload", lambda: save_statement(parsed))
+    extended = parse_tinkoff_csv(history + make_statement(start + timedelta(days=days), 30, args.per_day, seed=2)[len(HEADER):])
+    added_again = timed("re-upload + 1 new month", lambda: save_statement(extended))
+    timed("get_summary", get_summary)
+    timed("load_transactions(limit=20)", lambda: load_transactions(limit=20))
+    print(f"  new rows: {added} then {added_again}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,40 @@
 Tracks agent activities, tasks, and inter-agent communication
 """
 
+import atexit
 import json
 import os
 import logging
+import tempfile
 import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — non-POSIX
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
 # ──────────────────────────────────────────────────────────
 # Activity log file
 # ──────────────────────────────────────────────────────────
+# Writes are buffered in memory and flushed by a background thread
+# every FLUSH_INTERVAL_SEC or FLUSH_BATCH records to an append-only
+# journal (activity_log.jsonl). The journal is compacted into the
+# activity_log.json snapshot every COMPACT_EVERY records.
+MAX_EVENTS = 500
+FLUSH_INTERVAL_SEC = 0.5
+FLUSH_BATCH = 50
+COMPACT_EVERY = 500
+REFRESH_INTERVAL_SEC = 1.0  # how often to look for other processes' writes
+
+
 def _log_path() -> str:
     for p in ["/app/data/activity_log.json", "data/activity_log.json"]:
         parent = os.path.dirname(p)
@@ -23,25 +45,290 @@ def _log_path() -> str:
     return "data/activity_log.json"
 
 
-def _load_log() -> dict:
-    path = _log_path()
-    if os.path.exists(path):
+class _ActivityLog:
+    """In-memory activity log (ring buffer + agent status) for one path.
+
+    Bots and the monitor run as separate processes sharing the files:
+    each journal record carries a writer id, so a process replays only
+    other writers' records when it picks up new journal bytes. Journal
+    appends and compaction (reload → snapshot → truncate) hold an flock
+    on `<log>.lock`, so compaction never drops another process's records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + ".jsonl"
+        self._lock = threading.RLock()
+        self._writer = f"{os.getpid()}:{uuid4().hex[:6]}"
+        self.events: deque[dict] = deque(maxlen=MAX_EVENTS)
+        self.agent_status: dict[str, dict] = {}
+        self._pending: list[dict] = []
+        self._snapshot_sig: Optional[tuple] = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._last_refresh = 0.0
+        self._reload()
+
+    # ── reading disk state ────────────────────────────────
+
+    @staticmethod
+    def _stat_sig(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _reload(self):
+        data = {"events": [], "agent_status": {}}
+        self._snapshot_sig = self._stat_sig(self.path)
+        if self._snapshot_sig is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                pass
+        self.events.clear()
+        self.events.extend(data.get("events", []))
+        self.agent_status = dict(data.get("agent_status", {}))
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._replay(skip_own=False)
+        for rec in self._pending:
+            self._apply(rec)
+        self._last_refresh = time.monotonic()
+
+    def _replay(self, skip_own: bool):
+        """Apply complete journal lines after the last read offset."""
+        try:
+            f = open(self.journal_path, "rb")
+        except OSError:
+            return
+        with f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # record still being written
+                self._journal_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn record from a crashed writer
+                if skip_own and rec.get("w") == self._writer:
+                    continue
+                self._apply(rec)
+                self._journal_records += 1
+
+    def _apply(self, rec: dict):
+        if rec.get("event"):
+            self.events.append(rec["event"])
+        if rec.get("agent_status"):
+            self.agent_status.update(rec["agent_status"])
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_refresh < REFRESH_INTERVAL_SEC:
+            return
+        self._last_refresh = now
+        if self._stat_sig(self.path) != self._snapshot_sig:
+            self._reload()
+            return
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            size = 0
+        if size > self._journal_offset:
+            self._replay(skip_own=True)
+        elif size < self._journal_offset:
+            self._reload()
+
+    # ── public ────────────────────────────────────────────
+
+    def record(self, event: Optional[dict] = None, agent_status: Optional[dict] = None):
+        """Apply a change in memory and queue it for the journal."""
+        rec = {"w": self._writer}
+        if event:
+            rec["event"] = event
+        if agent_status:
+            rec["agent_status"] = agent_status
+        with self._lock:
+            self._apply(rec)
+            self._pending.append(rec)
+            pending = len(self._pending)
+        _ensure_flusher()
+        if pending >= FLUSH_BATCH:
+            _flush_wakeup.set()
+
+    def snapshot(self) -> dict:
+        """Copy of the current log: {"events": [...], "agent_status": {...}}."""
+        with self._lock:
+            self._refresh()
+            return {
+                "events": [dict(e) for e in self.events],
+                "agent_status": {k: dict(v) for k, v in self.agent_status.items()},
+            }
+
+    def recent_events(self, cutoff: str) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            return [dict(e) for e in self.events if e.get("timestamp", "") >= cutoff]
+
+    def status_of(self, agent_key: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            status = self.agent_status.get(agent_key)
+            return dict(status) if status is not None else None
+
+    @contextmanager
+    def _file_lock(self):
+        """Inter-process lock for journal writes (hold self._lock first)."""
+        if fcntl is None:
+            yield
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(self.path + ".lock", "a")
+        except OSError as e:
+            logger.warning(f"Activity log lock unavailable: {e}")
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def flush(self):
+        """Append buffered records to the journal; compact when it grows."""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._file_lock():
+                if self._write_pending() and self._journal_records >= COMPACT_EVERY:
+                    self._refresh(force=True)
+                    self._write_snapshot()
+
+    def compact(self):
+        """Rewrite the JSON snapshot from memory and truncate the journal."""
+        with self._lock, self._file_lock():
+            self._write_pending()
+            self._refresh(force=True)
+            self._write_snapshot()
+
+    def _write_pending(self) -> bool:
+        if not self._pending:
+            return False
+        batch, self._pending = self._pending, []
+        payload = "".join(
+            json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch
+        ).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "a+b") as f:
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        payload = b"\n" + payload  # never glue onto a torn line
+                f.write(payload)
+        except Exception as e:
+            logger.error(f"Failed to save activity log: {e}")
+            self._pending = batch + self._pending
+            return False
+        self._journal_records += len(batch)
+        return True
+
+    def replace(self, data: dict):
+        """Replace the whole log (legacy _save_log semantics)."""
+        with self._lock:
+            _trim_events(data, max_events=MAX_EVENTS)
+            self.events.clear()
+            self.events.extend(data.get("events", []))
+            self.agent_status = dict(data.get("agent_status", {}))
+            self._pending = []
+            with self._file_lock():
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Write memory as the snapshot and truncate the journal (hold _file_lock)."""
+        tmp = None
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return {"events": [], "agent_status": {}}
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"events": list(self.events), "agent_status": self.agent_status},
+                          f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp, self.path)
+            tmp = None
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+        except Exception as e:
+            logger.error(f"Failed to save activity log: {e}")
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return
+        self._snapshot_sig = self._stat_sig(self.path)
+        self._journal_offset = 0
+        self._journal_records = 0
+
+
+_logs: dict[str, _ActivityLog] = {}
+_logs_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+
+def _activity_log() -> _ActivityLog:
+    """Get the in-memory log for the current _log_path()."""
+    path = _log_path()
+    log = _logs.get(path)
+    if log is None:
+        with _logs_lock:
+            log = _logs.get(path)
+            if log is None:
+                log = _logs[path] = _ActivityLog(path)
+    return log
+
+
+def _flusher_loop():
+    while True:
+        _flush_wakeup.wait(FLUSH_INTERVAL_SEC)
+        _flush_wakeup.clear()
+        flush()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None:
+        with _logs_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(
+                    target=_flusher_loop, name="activity-log-flusher", daemon=True,
+                )
+                _flusher.start()
+                atexit.register(flush)
+
+
+def flush():
+    """Write all buffered activity records to disk now."""
+    for log in list(_logs.values()):
+        log.flush()
+
+
+def _load_log() -> dict:
+    return _activity_log().snapshot()
 
 
 def _save_log(data: dict):
-    path = _log_path()
-    try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-    except Exception as e:
-        logger.error(f"Failed to save activity log: {e}")
+    _activity_log().replace(data)
 
 
 _lock = threading.Lock()
@@ -74,38 +361,31 @@ AGENT_EMOJI = {
 # ──────────────────────────────────────────────────────────
 def log_task_start(agent_key: str, task_description: str):
     """Log that an agent started working on a task."""
-    with _lock:
-        data = _load_log()
-        now = datetime.now().isoformat()
-
-        # Update agent status
-        data["agent_status"][agent_key] = {
-            "status": "working",
-            "task": task_description[:120],
-            "started_at": now,
-            "communicating_with": None,
-        }
-
-        # Add event
-        data["events"].append({
+    now = datetime.now().isoformat()
+    _activity_log().record(
+        event={
             "type": "task_start",
             "agent": agent_key,
             "task": task_description[:120],
             "timestamp": now,
-        })
-
-        _trim_events(data)
-        _save_log(data)
+        },
+        agent_status={agent_key: {
+            "status": "working",
+            "task": task_description[:120],
+            "started_at": now,
+            "communicating_with": None,
+        }},
+    )
 
 
 def log_task_end(agent_key: str, task_description: str, success: bool = True):
     """Log that an agent finished a task."""
+    log = _activity_log()
     with _lock:
-        data = _load_log()
         now = datetime.now().isoformat()
 
         # Calculate duration
-        status = data.get("agent_status", {}).get(agent_key, {})
+        status = log.status_of(agent_key) or {}
         started = status.get("started_at")
         duration_sec = 0
         if started:
@@ -115,156 +395,137 @@ def log_task_end(agent_key: str, task_description: str, success: bool = True):
             except Exception:
                 pass
 
-        # Update agent status
-        data["agent_status"][agent_key] = {
-            "status": "idle",
-            "task": None,
-            "started_at": None,
-            "communicating_with": None,
-            "last_task": task_description[:120],
-            "last_task_time": now,
-            "last_task_success": success,
-            "last_task_duration_sec": duration_sec,
-        }
-
-        # Add event
-        data["events"].append({
-            "type": "task_end",
-            "agent": agent_key,
-            "task": task_description[:120],
-            "success": success,
-            "duration_sec": duration_sec,
-            "timestamp": now,
-        })
-
-        _trim_events(data)
-        _save_log(data)
+        log.record(
+            event={
+                "type": "task_end",
+                "agent": agent_key,
+                "task": task_description[:120],
+                "success": success,
+                "duration_sec": duration_sec,
+                "timestamp": now,
+            },
+            agent_status={agent_key: {
+                "status": "idle",
+                "task": None,
+                "started_at": None,
+                "communicating_with": None,
+                "last_task": task_description[:120],
+                "last_task_time": now,
+                "last_task_success": success,
+                "last_task_duration_sec": duration_sec,
+            }},
+        )
 
 
 def log_communication(from_agent: str, to_agent: str, description: str = ""):
     """Log inter-agent communication (context passing)."""
+    log = _activity_log()
     with _lock:
-        data = _load_log()
         now = datetime.now().isoformat()
 
         # Update both agents' communication status
+        updates = {}
         for agent_key in [from_agent, to_agent]:
-            if agent_key in data.get("agent_status", {}):
+            status = log.status_of(agent_key)
+            if status is not None:
                 other = to_agent if agent_key == from_agent else from_agent
-                data["agent_status"][agent_key]["communicating_with"] = other
-
-        # Add event
-        data["events"].append({
-            "type": "communication",
-            "from_agent": from_agent,
-            "to_agent": to_agent,
-            "description": description[:120],
-            "timestamp": now,
-        })
-
-        _trim_events(data)
-        _save_log(data)
+                status["communicating_with"] = other
+                updates[agent_key] = status
+
+        log.record(
+            event={
+                "type": "communication",
+                "from_agent": from_agent,
+                "to_agent": to_agent,
+                "description": description[:120],
+                "timestamp": now,
+            },
+            agent_status=updates,
+        )
 
 
 def log_delegation(from_agent: str, to_agent: str, task_desc: str):
     """Log that one agent delegated a task to another."""
-    with _lock:
-        data = _load_log()
-        now = datetime.now().isoformat()
-
-        data["events"].append({
-            "type": "delegation",
-            "from_agent": from_agent,
-            "to_agent": to_agent,
-            "description": task_desc[:120],
-            "timestamp": now,
-        })
-
-        _trim_events(data)
-        _save_log(data)
+    _activity_log().record(event={
+        "type": "delegation",
+        "from_agent": from_agent,
+        "to_agent": to_agent,
+        "description": task_desc[:120],
+        "timestamp": datetime.now().isoformat(),
+    })
 
 
 def log_quality_score(agent_key: str, task_description: str, score: float,
                       details: Optional[dict] = None):
     """Log quality score from LLM judge for an agent response."""
-    with _lock:
-        data = _load_log()
-        now = datetime.now().isoformat()
-
-        data["events"].append({
-            "type": "quality_score",
-            "agent": agent_key,
-            "task": task_description[:120],
-            "score": round(score, 2),
-            "details": details or {},
-            "timestamp": now,
-        })
-
-        _trim_events(data)
-        _save_log(data)
+    _activity_log().record(event={
+        "type": "quality_score",
+        "agent": agent_key,
+        "task": task_description[:120],
+        "score": round(score, 2),
+        "details": details or {},
+        "timestamp": datetime.now().isoformat(),
+    })
 
 
 def log_communication_end(agent_key: str):
     """Clear communication indicator for an agent."""
+    log = _activity_log()
     with _lock:
-        data = _load_log()
-        if agent_key in data.get("agent_status", {}):
-            data["agent_status"][agent_key]["communicating_with"] = None
-            _save_log(data)
+        status = log.status_of(agent_key)
+        if status is not None:
+            status["communicating_with"] = None
+            log.record(agent_status={agent_key: status})
+
+
+def _delegations_to(events: list[dict], agent_key: str) -> int:
+    """Count delegations to agent_key among events."""
+    return sum(
+        1 for e in events
+        if e.get("type") == "delegation" and e.get("to_agent") == agent_key
+    )
 
 
 def get_agent_status(agent_key: str) -> dict:
     """Get current status for one agent, including queued_tasks count."""
-    data = _load_log()
-    status = data.get("agent_status", {}).get(agent_key, {
+    log = _activity_log()
+    status = log.status_of(agent_key) or {
         "status": "idle",
         "task": None,
         "started_at": None,
         "communicating_with": None,
-    })
+    }
 
     # Count queued (delegated) tasks for this agent
     cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
-    queued = sum(
-        1 for e in data.get("events", [])
-        if e.get("type") == "delegation"
-        and e.get("to_agent") == agent_key
-        and e.get("timestamp", "") >= cutoff
-    )
-    status["queued_tasks"] = queued
+    status["queued_tasks"] = _delegations_to(log.recent_events(cutoff), agent_key)
 
     return status
 
 
 def get_all_statuses() -> dict:
     """Get current status for all agents, including queued_tasks."""
-    data = _load_log()
+    log = _activity_log()
     cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
+    events = log.recent_events(cutoff)
     result = {}
     for key in AGENT_NAMES:
-        status = data.get("agent_status", {}).get(key, {
+        status = log.status_of(key) or {
             "status": "idle",
             "task": None,
             "started_at": None,
             "communicating_with": None,
-        })
+        }
         # Count queued (delegated) tasks
-        queued = sum(
-            1 for e in data.get("events", [])
-            if e.get("type") == "delegation"
-            and e.get("to_agent") == key
-            and e.get("timestamp", "") >= cutoff
-        )
-        status["queued_tasks"] = queued
+        status["queued_tasks"] = _delegations_to(events, key)
         result[key] = status
     return result
 
 
 def get_recent_events(hours: int = 24, limit: int = 50) -> list:
-    """Get events from the last N hours."""
-    data = _load_log()
+    """Get events from the last N hours (served from memory)."""
     cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
-    events = [e for e in data.get("events", []) if e.get("timestamp", "") >= cutoff]
+    events = _activity_log().recent_events(cutoff)
     return events[-limit:]
 
 
@@ -273,7 +534,7 @@ def get_agent_task_count(agent_key: str, hours: int = 24) -> int:
 
     Includes both completed tasks (task_end) and delegated tasks (delegation).
     """
-    events = get_recent_events(hours=hours, limit=500)
+    events = get_recent_events(hours=hours, limit=MAX_EVENTS)
     return sum(
         1 for e in events
         if (e.get("type") == "task_end" and e.get("agent") == agent_key)
@@ -323,12 +584,10 @@ def get_task_progress(agent_key: str) -> Optional[float]:
 
 def get_quality_scores(hours: int = 168, limit: int = 50) -> list[dict]:
     """Get quality_score events from last N hours (default 7 days)."""
-    with _lock:
-        data = _load_log()
     cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
     scores = [
-        e for e in data.get("events", [])
-        if e.get("type") == "quality_score" and e.get("timestamp", "") >= cutoff
+        e for e in _activity_log().recent_events(cutoff)
+        if e.get("type") == "quality_score"
     ]
     return scores[-limit:]
 
@@ -364,7 +623,7 @@ def get_quality_summary() -> dict:
 # ──────────────────────────────────────────────────────────
 # Internal
 # ──────────────────────────────────────────────────────────
-def _trim_events(data: dict, max_events: int = 500):
+def _trim_events(data: dict, max_events: int = MAX_EVENTS):
     """Keep only the last N events."""
     if len(data.get("events", [])) > max_events:
         data["events"] = data["events"][-max_events:]
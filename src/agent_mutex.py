@@ -28,8 +28,12 @@ def is_busy(agent_key: str) -> bool:
 
 
 def get_busy_agents() -> list[str]:
-    """Return list of agent keys that are currently busy."""
-    return [k for k, lock in _locks.items() if lock.locked()]
+    """Return list of agent keys that are currently busy.
+
+    Safe to call from other threads (auto_start workers) while the event
+    loop adds locks: iterates over a snapshot of the dict.
+    """
+    return [k for k, lock in list(_locks.items()) if lock.locked()]
 
 
 def set_active(agent_key: str):
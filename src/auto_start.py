@@ -1,39 +1,238 @@
 """
-⚡ Zinin Corp — Auto-Start (v1.1)
+⚡ Zinin Corp — Auto-Start (v2.0)
 
 Automatically executes agents when tasks get unblocked by the Dependency Engine.
 Subscribes to EventBus "task.unblocked" and "task.approved" events.
 
+Execution model:
+- Events enqueue work; a fixed pool of MAX_CONCURRENT_AUTO daemon workers
+  runs it (nothing is dropped because all slots are busy)
+- Dispatch order: PoolTask.priority (CRITICAL first), then age; waiting
+  tasks are promoted one priority level per AGING_SEC so LOW work is not
+  starved
+- Per-agent limit MAX_PER_AGENT (1, like agent_mutex); agents busy in an
+  interactive request (agent_mutex.is_busy) are skipped until free
+- Queued tasks can be cancelled; shutdown_auto_start() drains gracefully
+
 Safety mechanisms:
-- Semaphore limits concurrent auto-executions (default: 3)
-- Duplicate task prevention via active set
-- Agent mutex integration (skip if agent is busy)
-- Daemon threads (won't block shutdown)
+- Duplicate task prevention (queued or running)
 - Checkpoint logging to GitHub Issues (via github_sync)
 - Retry on failure (max 2 retries)
 """
 
+import itertools
 import logging
 import threading
+import time
+from dataclasses import dataclass, field
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 # Safety: max concurrent auto-executions
 MAX_CONCURRENT_AUTO = 3
+MAX_PER_AGENT = 1
 MAX_RETRIES = 2
+# A waiting task gains one priority level per AGING_SEC
+AGING_SEC = 300.0
+# How often idle workers re-check agents held by agent_mutex
+BUSY_RECHECK_SEC = 2.0
+
+DEFAULT_PRIORITY = 3  # TaskPriority.MEDIUM
+
+
+@dataclass
+class _QueuedTask:
+    task_id: str
+    assignee: str
+    title: str
+    priority: int
+    seq: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def sort_key(self, now: float) -> tuple:
+        aged = self.priority - (now - self.enqueued_at) / AGING_SEC
+        return (aged, self.seq)
+
+
+class AutoStartExecutor:
+    """Priority queue + worker threads for auto-started tasks."""
+
+    def __init__(self, workers: int = MAX_CONCURRENT_AUTO, per_agent: int = MAX_PER_AGENT):
+        self.workers = workers
+        self.per_agent = per_agent
+        self._cond = threading.Condition()
+        self._queue: list[_QueuedTask] = []
+        self._running: dict[str, _QueuedTask] = {}
+        self._per_agent: dict[str, int] = {}
+        self._threads: list[threading.Thread] = []
+        self._seq = itertools.count()
+        self._closed = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self._total_wait = 0.0
+
+    # ── public API ──
+
+    def submit(self, task_id: str, assignee: str, title: str,
+               priority: int = DEFAULT_PRIORITY) -> bool:
+        """Queue a task. False if it is already queued/running or the pool is shut down."""
+        with self._cond:
+            if self._closed:
+                logger.warning(f"Auto-start skipped: executor shut down (task {task_id})")
+                return False
+            if task_id in self._running or any(q.task_id == task_id for q in self._queue):
+                logger.warning(f"Auto-start skipped: task {task_id} already queued or executing")
+                return False
+            self._queue.append(_QueuedTask(task_id, assignee, title, priority, next(self._seq)))
+            self._stats["submitted"] += 1
+            self._ensure_workers()
+            self._cond.notify()
+        logger.info(f"Auto-start: queued {assignee} task {task_id} (priority {priority}): {title[:60]}")
+        return True
+
+    def cancel(self, task_id: str) -> bool:
+        """Remove a queued task. Running tasks cannot be interrupted (returns False)."""
+        with self._cond:
+            for i, q in enumerate(self._queue):
+                if q.task_id == task_id:
+                    del self._queue[i]
+                    self._stats["cancelled"] += 1
+                    logger.info(f"Auto-start: cancelled queued task {task_id}")
+                    return True
+        return False
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> list[str]:
+        """Stop accepting work and drop the queue (tasks stay ASSIGNED in the pool).
+
+        Running tasks finish; with wait=True this blocks until they do
+        (or timeout). Returns the ids of the dropped queued tasks.
+        """
+        with self._cond:
+            self._closed = True
+            dropped = [q.task_id for q in self._queue]
+            self._queue.clear()
+            self._stats["cancelled"] += len(dropped)
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for t in threads:
+                t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return dropped
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            queued = sorted(self._queue, key=lambda q: q.sort_key(now))
+            by_priority: dict[int, int] = {}
+            for q in queued:
+                by_priority[q.priority] = by_priority.get(q.priority, 0) + 1
+            started = self._stats["completed"] + self._stats["failed"] + len(self._running)
+            return {
+                "active_tasks": list(self._running),
+                "active_count": len(self._running),
+                "max_concurrent": self.workers,
+                "available_slots": self.workers - len(self._running),
+                "max_per_agent": self.per_agent,
+                "running_by_agent": dict(self._per_agent),
+                "queue_depth": len(queued),
+                "queued_tasks": [
+                    {"task_id": q.task_id, "assignee": q.assignee, "priority": q.priority,
+                     "waiting_sec": round(now - q.enqueued_at, 1)}
+                    for q in queued
+                ],
+                "queued_by_priority": by_priority,
+                "oldest_wait_sec": round(max((now - q.enqueued_at for q in queued), default=0.0), 1),
+                "avg_wait_sec": round(self._total_wait / started, 2) if started else 0.0,
+                "shutdown": self._closed,
+                **self._stats,
+            }
+
+    # ── workers ──
+
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        for i in range(len(self._threads), self.workers):
+            t = threading.Thread(target=self._worker, daemon=True, name=f"auto-start-{i}")
+            t.start()
+            self._threads.append(t)
+
+    def _next_eligible(self) -> Optional[_QueuedTask]:
+        """Most urgent queued task whose agent has capacity (call with _cond held)."""
+        busy = _busy_agents()
+        now = time.monotonic()
+        best = None
+        for q in self._queue:
+            if self._per_agent.get(q.assignee, 0) >= self.per_agent or q.assignee in busy:
+                continue
+            if best is None or q.sort_key(now) < best.sort_key(now):
+                best = q
+        return best
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                item = None
+                while not self._closed:
+                    item = self._next_eligible()
+                    if item is not None:
+                        break
+                    # Agents held by agent_mutex don't notify us: poll while work waits
+                    self._cond.wait(BUSY_RECHECK_SEC if self._queue else None)
+                if item is None:
+                    return
+                self._queue.remove(item)
+                self._running[item.task_id] = item
+                self._per_agent[item.assignee] = self._per_agent.get(item.assignee, 0) + 1
+                self._total_wait += time.monotonic() - item.enqueued_at
+
+            ok = False
+            try:
+                ok = _execute_auto_task(item.task_id, item.assignee, item.title)
+            finally:
+                with self._cond:
+                    self._running.pop(item.task_id, None)
+                    self._per_agent[item.assignee] -= 1
+                    if not self._per_agent[item.assignee]:
+                        del self._per_agent[item.assignee]
+                    self._stats["completed" if ok else "failed"] += 1
+                    self._cond.notify_all()
+            if not ok:
+                _maybe_retry(item.task_id, item.assignee, item.title)
+
+
+def _busy_agents() -> set[str]:
+    try:
+        from .agent_mutex import get_busy_agents
+        return set(get_busy_agents())
+    except ImportError:
+        return set()
+    except Exception as e:  # never let a worker thread die on this check
+        logger.warning(f"Auto-start: busy-agent check failed: {e}")
+        return set()
+
 
-_semaphore = threading.Semaphore(MAX_CONCURRENT_AUTO)
-_active_auto_tasks: set[str] = set()
-_active_lock = threading.Lock()
+_executor = AutoStartExecutor()
+
+
+def _task_priority(task_id: str, payload: dict) -> int:
+    priority = payload.get("priority")
+    if priority is None:
+        try:
+            from .task_pool import get_task
+            task = get_task(task_id)
+            priority = task.priority if task else None
+        except Exception as e:
+            logger.debug(f"Priority lookup failed for {task_id}: {e}")
+    return int(priority) if priority is not None else DEFAULT_PRIORITY
 
 
 def _on_task_unblocked(event) -> None:
-    """Sync callback for task.unblocked events.
+    """Sync callback for task.unblocked events: queue the task for a worker.
 
-    Spawns a daemon thread to run the agent because:
-    1. emit() is called from sync context (task_pool)
-    2. Agent execution is blocking (CrewAI runs synchronously)
+    emit() is called from sync context (task_pool) and agent execution is
+    blocking (CrewAI runs synchronously), so execution happens on the
+    executor's worker threads.
     """
     payload = event.payload
     task_id = payload.get("task_id", "")
@@ -44,44 +243,17 @@ def _on_task_unblocked(event) -> None:
         logger.info(f"Auto-start skipped: task {task_id} has no assignee")
         return
 
-    # Prevent duplicate execution
-    with _active_lock:
-        if task_id in _active_auto_tasks:
-            logger.warning(f"Auto-start skipped: task {task_id} already executing")
-            return
+    _executor.submit(task_id, assignee, title, _task_priority(task_id, payload))
 
-    # Check if agent is busy
-    try:
-        from .agent_mutex import is_busy
-        if is_busy(assignee):
-            logger.info(
-                f"Auto-start deferred: agent {assignee} is busy "
-                f"(task {task_id} stays ASSIGNED)"
-            )
-            return
-    except ImportError:
-        pass
 
-    # Check semaphore (non-blocking)
-    if not _semaphore.acquire(blocking=False):
-        logger.warning(
-            f"Auto-start skipped: max concurrent ({MAX_CONCURRENT_AUTO}) reached "
-            f"for task {task_id}"
-        )
-        return
+def cancel_auto_task(task_id: str) -> bool:
+    """Cancel a queued auto-start task. Returns False if not queued (or already running)."""
+    return _executor.cancel(task_id)
 
-    with _active_lock:
-        _active_auto_tasks.add(task_id)
 
-    # Spawn background thread for execution
-    thread = threading.Thread(
-        target=_execute_auto_task,
-        args=(task_id, assignee, title),
-        daemon=True,
-        name=f"auto-start-{task_id}",
-    )
-    thread.start()
-    logger.info(f"Auto-start: launched {assignee} for task {task_id}: {title[:60]}")
+def shutdown_auto_start(wait: bool = True, timeout: Optional[float] = None) -> list[str]:
+    """Stop auto-start: drop queued tasks, let running ones finish."""
+    return _executor.shutdown(wait=wait, timeout=timeout)
 
 
 # ──────────────────────────────────────────────────────────
@@ -112,8 +284,12 @@ def _log_checkpoint(task_id: str, stage: str, message: str) -> None:
 # Execution with checkpoints
 # ──────────────────────────────────────────────────────────
 
-def _execute_auto_task(task_id: str, assignee: str, title: str) -> None:
-    """Run agent execution in a background thread with checkpoint logging."""
+def _execute_auto_task(task_id: str, assignee: str, title: str) -> bool:
+    """Run agent execution with checkpoint logging. Returns True on success.
+
+    Called on an executor worker; a failed run is retried by the worker
+    (_maybe_retry) once the task has left the running set.
+    """
     try:
         from .task_pool import start_task, complete_task
         from .flows import run_task
@@ -122,7 +298,7 @@ def _execute_auto_task(task_id: str, assignee: str, title: str) -> None:
         task = start_task(task_id)
         if not task:
             logger.warning(f"Auto-start: could not start task {task_id}")
-            return
+            return True
         _set_checkpoint(task_id, "started")
         _log_checkpoint(task_id, "started", f"Agent {assignee} начал выполнение")
 
@@ -141,16 +317,13 @@ def _execute_auto_task(task_id: str, assignee: str, title: str) -> None:
         _set_checkpoint(task_id, "done")
         _log_checkpoint(task_id, "done", "Задача завершена")
         logger.info(f"Auto-start completed: task {task_id} by {assignee}")
+        return True
 
     except Exception as e:
         logger.error(f"Auto-start failed for task {task_id}: {e}", exc_info=True)
         _set_checkpoint(task_id, f"failed:{str(e)[:100]}")
         _log_checkpoint(task_id, "failed", str(e)[:200])
-        _maybe_retry(task_id, assignee, title)
-    finally:
-        _semaphore.release()
-        with _active_lock:
-            _active_auto_tasks.discard(task_id)
+        return False
 
 
 def _maybe_retry(task_id: str, assignee: str, title: str) -> None:
@@ -213,12 +386,10 @@ def unregister_auto_start() -> None:
 
 
 def get_auto_start_status() -> dict:
-    """Return current auto-start status for monitoring."""
-    with _active_lock:
-        active = list(_active_auto_tasks)
-    return {
-        "active_tasks": active,
-        "active_count": len(active),
-        "max_concurrent": MAX_CONCURRENT_AUTO,
-        "available_slots": MAX_CONCURRENT_AUTO - len(active),
-    }
+    """Return current auto-start status for monitoring.
+
+    Running tasks and free slots, plus queue metrics: queue_depth,
+    queued_tasks (dispatch order), queued_by_priority, oldest/avg wait
+    and submitted/completed/failed/cancelled counters.
+    """
+    return _executor.status()
@@ -1,52 +1,89 @@
 """
 💾 Zinin Corp — Persistent Chat Storage
 
-Stores chat history in PostgreSQL (if DATABASE_URL is set),
-with automatic fallback to local JSON file.
+Stores chat history one message per row in PostgreSQL (if DATABASE_URL
+is set), with automatic fallback to a local append-only JSONL log.
+
+Saving is append-only: save_chat_history() writes only the messages that
+do not carry a "msg_id" yet, so the cost of a save does not grow with the
+length of the conversation. Loading is windowed — the last
+CHAT_HISTORY_WINDOW messages, with older pages fetched on demand via
+load_older_messages().
 """
 
 import json
 import os
 import logging
+import threading
+from contextlib import contextmanager
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "200"))
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "100"))
+DB_POOL_MAX_CONN = int(os.getenv("CHAT_DB_POOL_MAX", "4"))
+
+MSG_ID = "msg_id"  # set on messages once they are persisted
+# With DATABASE_URL, messages held in the local log (PostgreSQL outage) get
+# msg_id "log:<line>" so they are never mistaken for PostgreSQL row ids
+FALLBACK_ID_PREFIX = "log:"
+
 # ──────────────────────────────────────────────────────────
 # PostgreSQL storage
 # ──────────────────────────────────────────────────────────
 
 _CREATE_TABLE = """
-CREATE TABLE IF NOT EXISTS chat_history (
-    id SERIAL PRIMARY KEY,
-    messages JSONB NOT NULL DEFAULT '[]'::jsonb,
-    updated_at TIMESTAMP DEFAULT NOW()
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id BIGSERIAL PRIMARY KEY,
+    message JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
 );
 """
 
-_UPSERT = """
-INSERT INTO chat_history (id, messages, updated_at)
-VALUES (1, %s, NOW())
-ON CONFLICT (id) DO UPDATE SET messages = EXCLUDED.messages, updated_at = NOW();
+_INSERT = """
+INSERT INTO chat_messages (message) VALUES (%s) RETURNING id;
+"""
+
+_SELECT_LAST = """
+SELECT id, message FROM chat_messages ORDER BY id DESC LIMIT %s;
+"""
+
+_SELECT_BEFORE = """
+SELECT id, message FROM chat_messages WHERE id < %s ORDER BY id DESC LIMIT %s;
 """
 
-_SELECT = """
+_DELETE_ALL = """
+DELETE FROM chat_messages;
+"""
+
+# Pre-message-per-row schema: the whole conversation as one JSONB blob in
+# chat_history row id = 1. Copied into chat_messages once, on first use,
+# then renamed so a later clear does not bring it back.
+_HAS_LEGACY = """
+SELECT to_regclass('chat_history') IS NOT NULL;
+"""
+
+_SELECT_LEGACY = """
 SELECT messages FROM chat_history WHERE id = 1;
 """
 
+_RETIRE_LEGACY = """
+ALTER TABLE chat_history RENAME TO chat_history_legacy;
+"""
+
+_pool = None
+_pool_lock = threading.Lock()
+_schema_ready = False
+
 
 def _get_db_url() -> Optional[str]:
     """Get DATABASE_URL from environment."""
     return os.getenv("DATABASE_URL")
 
 
-def _get_connection():
-    """Create a PostgreSQL connection."""
-    import psycopg2
-    url = _get_db_url()
-    if not url:
-        return None
-    # Normalize Railway hostname case (Postgres.railway.internal → lowercase)
+def _normalize_db_url(url: str) -> str:
+    """Normalize Railway hostname case (Postgres.railway.internal → lowercase)."""
     if ".railway.internal" in url.lower() and ".railway.internal" not in url:
         import re
         url = re.sub(
@@ -54,58 +91,394 @@ def _get_connection():
             lambda m: "@" + m.group(1).lower(),
             url, flags=re.IGNORECASE,
         )
-    return psycopg2.connect(url)
+    return url
 
 
-def _ensure_table(conn):
-    """Create the chat_history table if it doesn't exist."""
+def _get_pool():
+    """Shared connection pool, created on first use. None without DATABASE_URL."""
+    global _pool
+    if _pool is None:
+        url = _get_db_url()
+        if not url:
+            return None
+        with _pool_lock:
+            if _pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                _pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONN, _normalize_db_url(url))
+    return _pool
+
+
+def close_pool():
+    """Close all pooled connections (shutdown / tests)."""
+    global _pool, _schema_ready
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                _pool.closeall()
+            except Exception as e:
+                logger.warning(f"PostgreSQL pool close failed: {e}")
+        _pool = None
+        _schema_ready = False
+
+
+@contextmanager
+def _connection():
+    """Borrow a pooled connection; commit on success, roll back on error.
+
+    Yields None when DATABASE_URL is not set. Connections that failed are
+    discarded instead of being returned to the pool.
+    """
+    pool = _get_pool()
+    if pool is None:
+        yield None
+        return
+    conn = pool.getconn()
+    broken = False
+    try:
+        _ensure_schema(conn)
+        yield conn
+        conn.commit()
+    except Exception:
+        broken = True
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+def _ensure_schema(conn):
+    """Create chat_messages and migrate the legacy blob — once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
     with conn.cursor() as cur:
         cur.execute(_CREATE_TABLE)
+        cur.execute("SELECT EXISTS (SELECT 1 FROM chat_messages);")
+        has_rows = cur.fetchone()[0]
+        cur.execute(_HAS_LEGACY)
+        has_legacy = cur.fetchone()[0]
+        if has_legacy:
+            if not has_rows:
+                cur.execute(_SELECT_LEGACY)
+                row = cur.fetchone()
+                legacy = row[0] if row else None
+                if isinstance(legacy, str):
+                    legacy = json.loads(legacy)
+                for msg in legacy or []:
+                    cur.execute(_INSERT, (_dump(msg),))
+                if legacy:
+                    logger.info(f"Migrated {len(legacy)} messages from chat_history to chat_messages")
+            cur.execute(_RETIRE_LEGACY)
     conn.commit()
+    _schema_ready = True
+
+
+def _dump(msg: dict) -> str:
+    return json.dumps(
+        {k: v for k, v in msg.items() if k != MSG_ID},
+        ensure_ascii=False, default=str,
+    )
+
+
+def _rows_to_messages(rows) -> list:
+    """(id, message) rows, newest first → messages in chat order."""
+    messages = []
+    for row_id, data in reversed(rows):
+        if isinstance(data, str):
+            data = json.loads(data)
+        messages.append({**data, MSG_ID: row_id})
+    return messages
 
 
 def save_to_postgres(messages: list) -> bool:
-    """Save messages to PostgreSQL. Returns True on success."""
+    """Append messages to PostgreSQL, setting msg_id on each. Returns True on success."""
     try:
-        conn = _get_connection()
-        if conn is None:
-            return False
-        _ensure_table(conn)
-        with conn.cursor() as cur:
-            cur.execute(_UPSERT, (json.dumps(messages, ensure_ascii=False, default=str),))
-        conn.commit()
-        conn.close()
+        with _connection() as conn:
+            if conn is None:
+                return False
+            ids = []
+            with conn.cursor() as cur:
+                for msg in messages:
+                    cur.execute(_INSERT, (_dump(msg),))
+                    ids.append(cur.fetchone()[0])
+        for msg, row_id in zip(messages, ids):
+            msg[MSG_ID] = row_id
         return True
     except Exception as e:
         logger.warning(f"PostgreSQL save failed: {e}")
         return False
 
 
-def load_from_postgres() -> Optional[list]:
-    """Load messages from PostgreSQL. Returns None if unavailable."""
+def load_from_postgres(limit: Optional[int] = None,
+                       before_id: Optional[int] = None) -> Optional[list]:
+    """Load the last `limit` messages (older than before_id, if given).
+
+    Returns None if PostgreSQL is unavailable.
+    """
+    limit = limit or CHAT_HISTORY_WINDOW
     try:
-        conn = _get_connection()
-        if conn is None:
-            return None
-        _ensure_table(conn)
-        with conn.cursor() as cur:
-            cur.execute(_SELECT)
-            row = cur.fetchone()
-        conn.close()
-        if row and row[0]:
-            data = row[0]
-            if isinstance(data, str):
-                data = json.loads(data)
-            if isinstance(data, list) and len(data) > 0:
-                return data
-        return []
+        with _connection() as conn:
+            if conn is None:
+                return None
+            with conn.cursor() as cur:
+                if before_id is None:
+                    cur.execute(_SELECT_LAST, (limit,))
+                else:
+                    cur.execute(_SELECT_BEFORE, (before_id, limit))
+                rows = cur.fetchall()
+        return _rows_to_messages(rows)
     except Exception as e:
         logger.warning(f"PostgreSQL load failed: {e}")
         return None
 
 
+def clear_postgres() -> bool:
+    """Delete all messages from PostgreSQL. Returns True on success."""
+    try:
+        with _connection() as conn:
+            if conn is None:
+                return False
+            with conn.cursor() as cur:
+                cur.execute(_DELETE_ALL)
+        return True
+    except Exception as e:
+        logger.warning(f"PostgreSQL clear failed: {e}")
+        return False
+
+
 # ──────────────────────────────────────────────────────────
-# Local JSON fallback
+# Local JSONL log (fallback without DATABASE_URL)
+# ──────────────────────────────────────────────────────────
+
+_log_lock = threading.Lock()
+_log_counts: dict[str, tuple[int, int]] = {}  # path → (size, line count)
+
+
+def _log_path() -> str:
+    """Get path for the local append-only chat log (one message per line)."""
+    for p in ["/app/data/chat_messages.jsonl", "data/chat_messages.jsonl"]:
+        parent = os.path.dirname(p)
+        if os.path.isdir(parent):
+            return p
+    return "data/chat_messages.jsonl"
+
+
+def _line_count(path: str) -> int:
+    """Lines in the log; cached by size so appends don't rescan the file."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 0
+    cached = _log_counts.get(path)
+    if cached and cached[0] == size:
+        return cached[1]
+    with open(path, "rb") as f:
+        count = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 16), b""))
+    _log_counts[path] = (size, count)
+    return count
+
+
+def _migrate_legacy_json(path: str):
+    """Seed a missing log from the legacy chat_history.json snapshot."""
+    if os.path.exists(path):
+        return
+    legacy = load_from_json()
+    if not legacy:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for msg in legacy:
+            f.write(_dump(msg) + "\n")
+    logger.info(f"Migrated {len(legacy)} messages from chat_history.json to {path}")
+
+
+def append_to_log(messages: list) -> bool:
+    """Append messages to the local log, setting msg_id (line number) on each."""
+    path = _log_path()
+    try:
+        with _log_lock:
+            _migrate_legacy_json(path)
+            first_id = _line_count(path) + 1
+            with open(path, "a", encoding="utf-8") as f:
+                for msg in messages:
+                    f.write(_dump(msg) + "\n")
+            _log_counts[path] = (os.path.getsize(path), first_id - 1 + len(messages))
+        for offset, msg in enumerate(messages):
+            msg[MSG_ID] = first_id + offset
+        return True
+    except Exception as e:
+        logger.warning(f"Chat log append failed: {e}")
+        return False
+
+
+# With DATABASE_URL the log only takes messages PostgreSQL refused. The
+# sidecar file holds the number of log lines already in PostgreSQL; lines
+# after it are pushed on the next successful save. Their msg_ids live in
+# their own "log:<line>" id space until then.
+
+def _fallback_ids(messages: list) -> list:
+    """Turn log line numbers into fallback msg_ids (in place)."""
+    for msg in messages:
+        if isinstance(msg.get(MSG_ID), int):
+            msg[MSG_ID] = f"{FALLBACK_ID_PREFIX}{msg[MSG_ID]}"
+    return messages
+
+
+def _fallback_line(msg_id) -> Optional[int]:
+    """Log line number of a fallback msg_id, None for a PostgreSQL id."""
+    if isinstance(msg_id, str) and msg_id.startswith(FALLBACK_ID_PREFIX):
+        try:
+            return int(msg_id[len(FALLBACK_ID_PREFIX):])
+        except ValueError:
+            return None
+    return None
+
+
+def _unsynced_path(path: str) -> str:
+    return path + ".unsynced"
+
+
+def _clear_unsynced(path: str):
+    try:
+        os.remove(_unsynced_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def append_unsynced(messages: list) -> bool:
+    """Append messages PostgreSQL could not take to the local log and
+    remember where they start, so sync_unsynced() can push them later.
+    The messages get fallback msg_ids."""
+    path = _log_path()
+    with _log_lock:
+        marker = _unsynced_path(path)
+        if not os.path.exists(marker):
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                _migrate_legacy_json(path)
+                with open(marker, "w", encoding="utf-8") as f:
+                    f.write(str(_line_count(path)))
+            except Exception as e:
+                logger.warning(f"Chat log sync marker failed: {e}")
+                return False
+    if not append_to_log(messages):
+        return False
+    _fallback_ids(messages)
+    return True
+
+
+def sync_unsynced(session: Optional[list] = None) -> bool:
+    """Push log lines written during a PostgreSQL outage. True if none remain.
+
+    Messages in `session` that carry the fallback msg_id of a pushed line
+    get its PostgreSQL id, so paging from them queries the right rows.
+    """
+    path = _log_path()
+    with _log_lock:
+        marker = _unsynced_path(path)
+        if not os.path.exists(marker):
+            return True
+        try:
+            with open(marker, encoding="utf-8") as f:
+                synced = int(f.read().strip() or 0)
+            with open(path, "rb") as f:
+                lines = [raw.rstrip(b"\n") for line_no, raw in enumerate(f, start=1) if line_no > synced]
+        except Exception as e:
+            logger.warning(f"Chat log sync read failed: {e}")
+            return False
+        messages = _parse_lines(lines, synced + 1)
+        fallback_ids = [f"{FALLBACK_ID_PREFIX}{msg.pop(MSG_ID)}" for msg in messages]
+        if messages and not save_to_postgres(messages):
+            return False
+        _clear_unsynced(path)
+    if messages:
+        new_ids = dict(zip(fallback_ids, (msg[MSG_ID] for msg in messages)))
+        for msg in session or ():
+            if msg.get(MSG_ID) in new_ids:
+                msg[MSG_ID] = new_ids[msg[MSG_ID]]
+        logger.info(f"Synced {len(messages)} chat messages from the local log to PostgreSQL")
+    return True
+
+
+def _tail_lines(path: str, n: int) -> tuple[list[bytes], int]:
+    """Last n lines of a file and the 1-based number of the first one returned."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(1 << 16, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    if pos > 0:
+        lines = lines[1:]  # first line may be partial
+    lines = lines[-n:]
+    return lines, _line_count(path) - len(lines) + 1
+
+
+def _parse_lines(lines: list[bytes], first_id: int) -> list:
+    messages = []
+    for offset, raw in enumerate(lines):
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            continue  # torn write — skip, but keep numbering stable
+        if isinstance(msg, dict):
+            msg[MSG_ID] = first_id + offset
+            messages.append(msg)
+    return messages
+
+
+def load_from_log(limit: Optional[int] = None, before_id: Optional[int] = None) -> list:
+    """Load the last `limit` messages from the local log (older than before_id)."""
+    limit = limit or CHAT_HISTORY_WINDOW
+    path = _log_path()
+    try:
+        with _log_lock:
+            _migrate_legacy_json(path)
+            if not os.path.exists(path):
+                return []
+            if before_id is None:
+                lines, first_id = _tail_lines(path, limit)
+                return _parse_lines(lines, first_id)
+            first_id = max(1, before_id - limit)
+            page = []
+            with open(path, "rb") as f:
+                for line_no, raw in enumerate(f, start=1):
+                    if line_no >= before_id:
+                        break
+                    if line_no >= first_id:
+                        page.append(raw.rstrip(b"\n"))
+            return _parse_lines(page, first_id)
+    except Exception as e:
+        logger.warning(f"Chat log load failed: {e}")
+        return []
+
+
+def clear_log() -> bool:
+    """Truncate the local log."""
+    path = _log_path()
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            open(path, "w", encoding="utf-8").close()
+            _log_counts.pop(path, None)
+            _clear_unsynced(path)
+        return True
+    except Exception as e:
+        logger.warning(f"Chat log clear failed: {e}")
+        return False
+
+
+# ──────────────────────────────────────────────────────────
+# Legacy JSON snapshot (whole conversation in one file)
 # ──────────────────────────────────────────────────────────
 
 def _chat_path() -> str:
@@ -145,28 +518,78 @@ def load_from_json() -> list:
 
 
 # ──────────────────────────────────────────────────────────
-# Public API: PostgreSQL first, JSON fallback
+# Public API: PostgreSQL first, local log fallback
 # ──────────────────────────────────────────────────────────
 
+_save_lock = threading.Lock()
+
+
+def _unsaved_tail(messages: list) -> list:
+    """Messages after the last persisted one (those without msg_id)."""
+    start = len(messages)
+    while start > 0 and MSG_ID not in messages[start - 1]:
+        start -= 1
+    return messages[start:]
+
+
 def save_chat_history(messages: list):
-    """Save chat history. Tries PostgreSQL first, falls back to local JSON."""
-    if _get_db_url():
-        if save_to_postgres(messages):
-            # Also save to JSON as local cache
-            save_to_json(messages)
+    """Persist new messages of the conversation (append-only).
+
+    Only the trailing messages without msg_id are written; they get a
+    msg_id once stored. If PostgreSQL is configured but unreachable, the
+    messages go to the local log and are pushed to PostgreSQL on the next
+    successful save.
+    """
+    with _save_lock:
+        pending = _unsaved_tail(messages)
+        if not pending:
+            return
+        if _get_db_url():
+            if sync_unsynced(messages) and save_to_postgres(pending):
+                return
+            logger.warning(f"PostgreSQL save failed, {len(pending)} messages saved to local log")
+            append_unsynced(pending)
             return
-        logger.warning("PostgreSQL save failed, falling back to JSON")
-    save_to_json(messages)
+        append_to_log(pending)
+
 
+def load_chat_history(limit: Optional[int] = None) -> list:
+    """Load the last `limit` (default CHAT_HISTORY_WINDOW) messages.
 
-def load_chat_history() -> list:
-    """Load chat history. Tries PostgreSQL first, falls back to local JSON."""
+    Tries PostgreSQL first, falls back to the local log.
+    """
     if _get_db_url():
-        data = load_from_postgres()
+        data = load_from_postgres(limit)
         if data is not None:
             return data
-        logger.warning("PostgreSQL load failed, falling back to JSON")
-    return load_from_json()
+        logger.warning("PostgreSQL load failed, falling back to local log")
+        return _fallback_ids(load_from_log(limit))
+    return load_from_log(limit)
+
+
+def load_older_messages(before_id, limit: Optional[int] = None) -> list:
+    """Page of up to `limit` (default CHAT_PAGE_SIZE) messages before msg_id.
+
+    With PostgreSQL, a fallback msg_id pages through the local log and a
+    row id through PostgreSQL; the two id spaces are never mixed.
+    """
+    limit = limit or CHAT_PAGE_SIZE
+    if _get_db_url():
+        line = _fallback_line(before_id)
+        if line is not None:
+            return _fallback_ids(load_from_log(limit, before_id=line))
+        data = load_from_postgres(limit, before_id=before_id)
+        return data if data is not None else []
+    return load_from_log(limit, before_id=before_id)
+
+
+def clear_chat_history() -> bool:
+    """Delete the stored conversation."""
+    if _get_db_url():
+        cleared = clear_postgres()
+        clear_log()  # drop unsynced fallback messages too
+        return cleared
+    return clear_log()
 
 
 def is_persistent() -> bool:
@@ -72,27 +72,20 @@ os.environ.setdefault("CREWAI_STORAGE_DIR", "ai_corporation")
 # Knowledge Sources — business documents for RAG
 # ──────────────────────────────────────────────────────────
 def _load_knowledge_sources() -> list:
-    """Load knowledge sources from knowledge/ directory."""
-    knowledge_dir_candidates = [
-        os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge"),
-        "/app/knowledge",
-        "knowledge",
-    ]
-    knowledge_dir = None
-    for d in knowledge_dir_candidates:
-        if os.path.isdir(d):
-            knowledge_dir = d
-            break
-    if not knowledge_dir:
+    """Load knowledge sources from knowledge/ directory.
+
+    File discovery goes through the shared knowledge index, the same one
+    the KB MCP server searches.
+    """
+    from .knowledge_index import get_index
+    index = get_index()
+    if index is None:
         logger.info("No knowledge/ directory found — skipping knowledge sources")
         return []
+    knowledge_dir = index.directory
     try:
         from crewai.knowledge.sources import TextFileKnowledgeSource
-        md_files = [
-            os.path.join(knowledge_dir, f)
-            for f in sorted(os.listdir(knowledge_dir))
-            if f.endswith((".md", ".txt"))
-        ]
+        md_files = index.file_paths
         if not md_files:
             logger.info("No .md/.txt files in knowledge/ — skipping")
             return []
@@ -287,43 +280,38 @@ class AICorporation:
 
     def __init__(self):
         self.config = load_crew_config()
-        self.manager = None
-        self.accountant = None
-        self.smm = None
-        self.automator = None
-        self.designer = None
-        self.cpo = None
         self.crew = None
         self._initialized = False
         self._pool = None  # flows._AgentPool ref
 
+    # Agents resolve through the shared pool, which creates each on first use
+    def _agent(self, name: str):
+        return self._pool.get(name) if self._pool else None
+
+    manager = property(lambda self: self._agent("manager"))
+    accountant = property(lambda self: self._agent("accountant"))
+    smm = property(lambda self: self._agent("smm"))
+    automator = property(lambda self: self._agent("automator"))
+    designer = property(lambda self: self._agent("designer"))
+    cpo = property(lambda self: self._agent("cpo"))
+
     def initialize(self) -> bool:
-        """Initialize all agents via the shared AgentPool and crew"""
+        """Attach to the shared AgentPool; only the manager is created up front."""
         try:
             from .flows import get_agent_pool
             pool = get_agent_pool()
             if not pool.is_ready:
                 logger.error("Agent pool failed to initialize")
                 return False
-
-            # Expose agents as instance attrs for backward compat
-            self.manager = pool.get("manager")
-            self.accountant = pool.get("accountant")
-            self.smm = pool.get("smm")
-            self.automator = pool.get("automator")
-            self.designer = pool.get("designer")
-            self.cpo = pool.get("cpo")
             self._pool = pool
 
-            if not all([self.manager, self.accountant, self.automator]):
-                logger.error("Core agents failed to initialize")
+            if not self.manager:
+                logger.error("Manager agent failed to initialize")
                 return False
 
             # Create crew reference for backward compat (is_ready check)
-            all_agents = [a for a in [self.manager, self.accountant, self.automator,
-                                       self.smm, self.designer, self.cpo] if a]
             self.crew = Crew(
-                agents=all_agents,
+                agents=[self.manager],
                 process=Process.sequential,
                 verbose=True,
                 memory=False,
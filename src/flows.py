@@ -6,7 +6,14 @@ Replaces direct Crew instantiation with a structured Flow[CorporationState].
 Each flow run has typed Pydantic state, deterministic routing, and optional persistence.
 """
 
+import atexit
 import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass
 from typing import Optional
 from pydantic import BaseModel, Field
 from crewai import Crew, Task, Process
@@ -87,44 +94,40 @@ class CorporationState(BaseModel):
 
 
 # ──────────────────────────────────────────────────────────
-# Agent Pool (shared across flow instances, lazy-initialized)
+# Agent Pool (shared across flow instances, agents built on first use)
 # ──────────────────────────────────────────────────────────
 
+_AGENT_FACTORIES = {
+    "manager": create_manager_agent,
+    "accountant": create_accountant_agent,
+    "automator": create_automator_agent,
+    "smm": create_smm_agent,
+    "designer": create_designer_agent,
+    "cpo": create_cpo_agent,
+}
+
+
 class _AgentPool:
-    """Lazy-initialized agent pool. Created once, reused by all flow runs."""
+    """Agent pool shared by all flow runs.
+
+    initialize() only checks the API key; each agent is created the first
+    time it is requested and then reused. A Telegram reply that needs one
+    agent no longer pays for building all six.
+    """
 
     def __init__(self):
         self._agents = {}
+        self._locks = {name: threading.Lock() for name in _AGENT_FACTORIES}
         self._initialized = False
 
     def initialize(self) -> bool:
-        import os
         api_key = os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             logger.error("OPENROUTER_API_KEY not set")
             return False
 
-        self._agents["manager"] = create_manager_agent()
-        self._agents["accountant"] = create_accountant_agent()
-        self._agents["automator"] = create_automator_agent()
-        self._agents["smm"] = create_smm_agent()
-        self._agents["designer"] = create_designer_agent()
-        self._agents["cpo"] = create_cpo_agent()
-
-        core_ok = all(self._agents.get(k) for k in ("manager", "accountant", "automator"))
-        if not core_ok:
-            logger.error("Core agents failed to initialize")
-            return False
-
-        if not self._agents.get("smm"):
-            logger.warning("SMM agent (Юки) failed to init — continuing without her")
-        if not self._agents.get("designer"):
-            logger.warning("Designer agent (Райан) failed to init — continuing without him")
-        if not self._agents.get("cpo"):
-            logger.warning("CPO agent (Софи) failed to init — continuing without her")
-
         self._initialized = True
-        logger.info("Agent pool initialized")
+        logger.info("Agent pool initialized (agents are created on first use)")
         return True
 
     @property
@@ -132,9 +135,30 @@ class _AgentPool:
         return self._initialized
 
     def get(self, name: str):
-        return self._agents.get(name)
+        if not self._initialized or name not in _AGENT_FACTORIES:
+            return None
+        if name in self._agents:
+            return self._agents[name]
+        with self._locks[name]:
+            if name not in self._agents:
+                self._agents[name] = self._build(name)
+            return self._agents[name]
+
+    def _build(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            agent = _AGENT_FACTORIES[name]()
+        except Exception as e:
+            logger.error(f"Agent {name} failed to initialize: {e}")
+            agent = None
+        if agent is None:
+            logger.warning(f"Agent {name} unavailable — continuing without it")
+        else:
+            logger.info(f"Agent {name} created in {time.perf_counter() - t0:.2f}s")
+        return agent
 
     def all_agents(self) -> list:
+        """Agents created so far (does not build the rest)."""
         return [a for a in self._agents.values() if a is not None]
 
 
@@ -148,6 +172,148 @@ def get_agent_pool() -> _AgentPool:
     return _pool
 
 
+# ──────────────────────────────────────────────────────────
+# Crew cache: one reusable single-agent Crew per agent
+# ──────────────────────────────────────────────────────────
+
+MEMORY_RETRY_SEC = 600
+"""After a memory-enabled crew fails to build, run without memory this long."""
+
+
+class _CrewCache:
+    """Reusable single-agent crews keyed by (agent name, memory on/off).
+
+    Building a Crew with memory sets up the ONNX embedder, the memory store
+    and the knowledge sources — the bulk of the per-message setup cost. A
+    cached crew is reused with a fresh Task on every run. Each crew is
+    leased to one run at a time; a concurrent run for the same agent gets
+    a throwaway crew instead of waiting.
+    """
+
+    def __init__(self):
+        self._crews: dict[tuple[str, bool], Crew] = {}
+        self._busy: set[tuple[str, bool]] = set()
+        self._memory_failed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "builds": 0, "reused": 0,
+                      "setup_sec": 0.0, "kickoff_sec": 0.0}
+
+    def memory_available(self, agent_name: str) -> bool:
+        failed_at = self._memory_failed_at.get(agent_name)
+        return failed_at is None or time.monotonic() - failed_at > MEMORY_RETRY_SEC
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats, cached=len(self._crews))
+
+    def clear(self):
+        with self._lock:
+            self._crews.clear()
+            self._busy.clear()
+            self._memory_failed_at.clear()
+
+    def run(self, agent, task: Task, agent_name: str, memory: bool) -> str:
+        """Kick off `task` on the cached crew for this agent. Returns the output.
+
+        A memory crew that fails to build marks memory unavailable for the
+        agent for MEMORY_RETRY_SEC. A crew whose kickoff raised is dropped.
+        """
+        key = (agent_name, memory)
+        t0 = time.perf_counter()
+        with self._lock:
+            crew = self._crews.get(key)
+            leased = key not in self._busy
+            if leased:
+                self._busy.add(key)
+        try:
+            if crew is None or not leased or crew.agents[0] is not agent:
+                try:
+                    crew = _build_crew(agent, task, memory)
+                except Exception:
+                    if memory:
+                        self._memory_failed_at[agent_name] = time.monotonic()
+                    raise
+                reused = False
+                if leased:
+                    with self._lock:
+                        self._crews[key] = crew
+            else:
+                crew.tasks = [task]
+                reused = True
+            _reset_agent(agent, crew)
+            t1 = time.perf_counter()
+            try:
+                return str(crew.kickoff())
+            except Exception:
+                with self._lock:
+                    if self._crews.get(key) is crew:
+                        del self._crews[key]
+                raise
+            finally:
+                t2 = time.perf_counter()
+                with self._lock:
+                    self.stats["runs"] += 1
+                    self.stats["reused" if reused else "builds"] += 1
+                    self.stats["setup_sec"] += t1 - t0
+                    self.stats["kickoff_sec"] += t2 - t1
+        finally:
+            if leased:
+                with self._lock:
+                    self._busy.discard(key)
+
+
+def _reset_agent(agent, crew: Crew):
+    """Clear per-run agent state before a kickoff.
+
+    The executor keeps its message history between runs, which used to grow
+    the context without bound, so it was dropped before every run. Building
+    a new executor is most of the per-message setup on current CrewAI, so
+    it is now kept while it belongs to `crew` and only its history and
+    iteration counter are cleared.
+    """
+    executor = getattr(agent, "agent_executor", None)
+    if executor is not None and getattr(executor, "crew", None) is crew:
+        try:
+            executor.messages = []
+            if hasattr(executor, "iterations"):
+                executor.iterations = 0
+        except Exception:
+            agent.agent_executor = None
+    else:
+        agent.agent_executor = None
+    agent.tools_results = []
+    if hasattr(agent, '_times_executed'):
+        agent._times_executed = 0
+
+
+def _build_crew(agent, task: Task, memory: bool) -> Crew:
+    if not memory:
+        return Crew(
+            agents=[agent], tasks=[task],
+            process=Process.sequential, verbose=True, memory=False,
+        )
+    crew_kwargs = {
+        "agents": [agent], "tasks": [task],
+        "process": Process.sequential, "verbose": True,
+        "memory": True, "embedder": EMBEDDER_CONFIG,
+    }
+    if KNOWLEDGE_SOURCES:
+        crew_kwargs["knowledge_sources"] = KNOWLEDGE_SOURCES
+    return Crew(**crew_kwargs)
+
+
+_crews = _CrewCache()
+
+
+def get_crew_stats() -> dict:
+    """Per-process crew reuse counters and setup vs kickoff (LLM) time."""
+    stats = _crews.snapshot()
+    runs = stats["runs"] or 1
+    stats["avg_setup_ms"] = round(stats["setup_sec"] / runs * 1000, 1)
+    stats["avg_kickoff_ms"] = round(stats["kickoff_sec"] / runs * 1000, 1)
+    return stats
+
+
 # ──────────────────────────────────────────────────────────
 # Helper: run a single agent as Crew (preserves existing logic)
 # ──────────────────────────────────────────────────────────
@@ -155,6 +321,34 @@ def get_agent_pool() -> _AgentPool:
 REFLECTION_SCORE_THRESHOLD = 2.5
 """Minimum judge score to accept response without reflection retry."""
 
+REFLECTION_JUDGE_DEADLINE_SEC = float(os.getenv("REFLECTION_JUDGE_DEADLINE_SEC", "8"))
+"""How long the reply may wait for the inline judge; later verdicts are not used."""
+
+_inline_judge_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="judge-inline")
+
+
+def _reflection_verdict(task_description: str, result: str, agent_name: str):
+    """Judge verdict for the reflection decision, or None to accept as is.
+
+    Responses without rule-based red flags skip the LLM judge; the rest
+    are judged within REFLECTION_JUDGE_DEADLINE_SEC. A verdict is handed
+    to the judge queue so analytics scoring does not repeat the call.
+    """
+    from .tools.llm_judge import judge_response, prefilter_flags
+    flags = prefilter_flags(result)
+    if not flags:
+        return None
+    future = _inline_judge_pool.submit(judge_response, task_description, result, agent_name)
+    try:
+        verdict = future.result(timeout=REFLECTION_JUDGE_DEADLINE_SEC)
+    except FuturesTimeout:
+        logger.info(f"Reflection judge for {agent_name} missed the "
+                    f"{REFLECTION_JUDGE_DEADLINE_SEC:.0f}s deadline (flags: {flags})")
+        return None
+    if verdict is not None:
+        _judges().prime(result, verdict)
+    return verdict
+
 
 def _run_agent_crew(agent, task_description: str, agent_name: str = "",
                     use_memory: bool = True, guardrail=None,
@@ -188,8 +382,7 @@ def _run_agent_crew(agent, task_description: str, agent_name: str = "",
 
         # Reflection: judge the result and retry once if low quality
         try:
-            from .tools.llm_judge import judge_response
-            verdict = judge_response(task_description, result, agent_name)
+            verdict = _reflection_verdict(task_description, result, agent_name)
             if verdict and not verdict.passed and verdict.overall < REFLECTION_SCORE_THRESHOLD:
                 logger.info(
                     f"Reflection triggered for {agent_name}: "
@@ -228,13 +421,10 @@ def _run_agent_crew(agent, task_description: str, agent_name: str = "",
 def _execute_crew(agent, task_description: str, agent_name: str = "",
                   use_memory: bool = True, guardrail=None,
                   output_pydantic=None) -> str:
-    """Execute a single Crew run (inner helper for _run_agent_crew)."""
-    # Reset agent state
-    agent.agent_executor = None
-    agent.tools_results = []
-    if hasattr(agent, '_times_executed'):
-        agent._times_executed = 0
+    """Execute a single Crew run (inner helper for _run_agent_crew).
 
+    Runs on the agent's cached crew (see _CrewCache); only the Task is new.
+    """
     wrapper = TASK_WRAPPER if agent_name == "manager" else TASK_WRAPPER_AGENT
     full_description = f"{task_description}{wrapper}"
     output_fmt = EXPECTED_OUTPUT_SHORT if agent_name in ("accountant", "automator") else EXPECTED_OUTPUT
@@ -247,23 +437,11 @@ def _execute_crew(agent, task_description: str, agent_name: str = "",
         output_pydantic=output_pydantic,
     )
 
-    if not use_memory:
-        crew = Crew(
-            agents=[agent], tasks=[task],
-            process=Process.sequential, verbose=True, memory=False,
-        )
-        return str(crew.kickoff())
+    if not use_memory or not _crews.memory_available(agent_name):
+        return _crews.run(agent, task, agent_name, memory=False)
 
     try:
-        crew_kwargs = {
-            "agents": [agent], "tasks": [task],
-            "process": Process.sequential, "verbose": True,
-            "memory": True, "embedder": EMBEDDER_CONFIG,
-        }
-        if KNOWLEDGE_SOURCES:
-            crew_kwargs["knowledge_sources"] = KNOWLEDGE_SOURCES
-        crew = Crew(**crew_kwargs)
-        return str(crew.kickoff())
+        return _crews.run(agent, task, agent_name, memory=True)
     except Exception as e:
         logger.warning(f"_execute_crew({agent_name}) memory failed: {e}, retrying without memory")
         task_retry = create_task(
@@ -271,14 +449,164 @@ def _execute_crew(agent, task_description: str, agent_name: str = "",
             expected_output=output_fmt,
             agent=agent,
         )
-        crew_fallback = Crew(
-            agents=[agent], tasks=[task_retry],
-            process=Process.sequential, verbose=True, memory=False,
-        )
-        result = crew_fallback.kickoff()
+        # Same fallback as before: a single-agent crew with memory=False
+        result = _crews.run(agent, task_retry, agent_name, memory=False)
         return f"⚠️ _(восстановлено)_\n\n{result}"
 
 
+# ──────────────────────────────────────────────────────────
+# Fan-out / fan-in: independent specialist tasks in parallel → CEO
+# ──────────────────────────────────────────────────────────
+
+FAN_OUT_MAX_WORKERS = int(os.getenv("FAN_OUT_MAX_WORKERS", "3"))
+FAN_OUT_BRANCH_TIMEOUT_SEC = float(os.getenv("FAN_OUT_BRANCH_TIMEOUT_SEC", "300"))
+_FAN_OUT_POLL_SEC = 0.5
+
+
+@dataclass
+class FanOutBranch:
+    """One independent specialist sub-task of a multi-agent flow."""
+    key: str              # agent key in the pool
+    activity: str         # activity tracker label
+    description: str
+    expected_output: str
+    done_message: str     # progress text when the branch finishes
+    handoff: str = ""     # communication label towards the manager
+
+
+def _run_branch(agent, branch: FanOutBranch) -> str:
+    """Run one branch on the agent's cached single-task Crew."""
+    task = create_task(
+        description=branch.description + TASK_WRAPPER,
+        expected_output=branch.expected_output,
+        agent=agent,
+    )
+    return _crews.run(agent, task, branch.key, memory=False)
+
+
+def _fan_out(branches: list[FanOutBranch], max_workers: Optional[int] = None,
+             timeout: Optional[float] = None) -> dict[str, AgentResult]:
+    """Run branches concurrently in a bounded pool. Never raises.
+
+    Each branch gets `timeout` seconds from the moment it starts running;
+    a branch that fails or times out yields AgentResult(success=False).
+    A timed-out thread cannot be killed — it is abandoned and its result
+    ignored. Results keep the order of `branches`.
+    """
+    if not branches:
+        return {}
+    pool = get_agent_pool()
+    max_workers = max_workers or FAN_OUT_MAX_WORKERS
+    timeout = timeout or FAN_OUT_BRANCH_TIMEOUT_SEC
+    started: dict[str, float] = {}
+    results: dict[str, AgentResult] = {}
+
+    def _job(branch: FanOutBranch) -> str:
+        started[branch.key] = time.monotonic()
+        log_task_start(branch.key, branch.activity)
+        return _run_branch(pool.get(branch.key), branch)
+
+    def _finish(branch: FanOutBranch, output: str = "", error: str = ""):
+        label = AGENT_LABELS.get(branch.key, branch.key)
+        results[branch.key] = AgentResult(
+            agent_name=branch.key, success=not error, output=output, error=error,
+        )
+        log_task_end(branch.key, branch.activity, success=not error)
+        if error:
+            logger.error(f"Fan-out branch {branch.key} failed: {error}")
+            _send_progress(f"⚠️ {label}: {error[:200]}")
+        else:
+            _send_progress(f"✅ {label}: {branch.done_message}")
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(branches))),
+        thread_name_prefix="fan-out",
+    )
+    futures = {executor.submit(_job, b): b for b in branches}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=_FAN_OUT_POLL_SEC,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                branch = futures[future]
+                try:
+                    _finish(branch, output=future.result())
+                except Exception as e:
+                    _finish(branch, error=f"ошибка — {e}")
+            now = time.monotonic()
+            for future in list(pending):
+                branch = futures[future]
+                t0 = started.get(branch.key)
+                if t0 is not None and now - t0 > timeout:
+                    pending.discard(future)
+                    _finish(branch, error=f"таймаут {timeout:.0f}с")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {b.key: results[b.key] for b in branches}
+
+
+def _branch_context(branches: list[FanOutBranch],
+                    results: dict[str, AgentResult]) -> str:
+    blocks = []
+    for branch in branches:
+        res = results[branch.key]
+        label = AGENT_LABELS.get(branch.key, branch.key)
+        body = res.output if res.success else f"❌ Данные недоступны ({res.error})"
+        blocks.append(f"--- Данные: {label} ---\n{body}\n--- Конец данных ---")
+    return "\n\n".join(blocks)
+
+
+def _fan_out_fan_in(branches: list[FanOutBranch], synthesis_prompt: str,
+                    synthesis_activity: str, expected_output: str,
+                    ) -> tuple[dict[str, AgentResult], AgentResult]:
+    """Fan specialist branches out, then feed their outputs to the manager.
+
+    Returns (branch results, manager synthesis result). Failed branches are
+    passed to the manager as unavailable data instead of aborting the run.
+    """
+    results = _fan_out(branches)
+
+    for branch in branches:
+        if results[branch.key].success:
+            log_communication(branch.key, "manager", branch.handoff or branch.activity)
+
+    _send_progress("👑 Алексей анализирует...")
+    log_task_start("manager", synthesis_activity)
+    manager = get_agent_pool().get("manager")
+    try:
+        task = create_task(
+            description=(
+                f"{_branch_context(branches, results)}\n\n"
+                f"{synthesis_prompt}{TASK_WRAPPER}"
+            ),
+            expected_output=expected_output,
+            agent=manager,
+            guardrail=_manager_guardrail,
+        )
+        output = _crews.run(manager, task, "manager", memory=False)
+        log_task_end("manager", synthesis_activity, success=True)
+        synthesis = AgentResult(agent_name="manager", success=True, output=output)
+    except Exception as e:
+        logger.error(f"Fan-in synthesis failed: {e}", exc_info=True)
+        log_task_end("manager", synthesis_activity, success=False)
+        synthesis = AgentResult(agent_name="manager", success=False, error=str(e))
+    finally:
+        for branch in branches:
+            log_communication_end(branch.key)
+
+    return results, synthesis
+
+
+def _fan_in_fallback(branches: list[FanOutBranch], results: dict[str, AgentResult],
+                     error_message: str) -> str:
+    """Without a CEO synthesis, return the raw specialist outputs if any."""
+    if not any(results[b.key].success for b in branches):
+        return error_message
+    return f"{error_message}\n\n{_branch_context(branches, results)}"
+
+
 # ──────────────────────────────────────────────────────────
 # Delegation detection (extracted from AICorporation)
 # ──────────────────────────────────────────────────────────
@@ -336,49 +664,76 @@ def detect_delegation(text: str) -> Optional[str]:
 # LLM-as-Judge helper (non-blocking)
 # ──────────────────────────────────────────────────────────
 
+JUDGE_FLUSH_ON_EXIT_SEC = 5.0
+
+_judge_queue = None
+_judge_queue_lock = threading.Lock()
+
+
+def _judges():
+    """The process-wide JudgeQueue (created on first use)."""
+    global _judge_queue
+    if _judge_queue is None:
+        with _judge_queue_lock:
+            if _judge_queue is None:
+                from .tools.llm_judge import JudgeQueue
+                _judge_queue = JudgeQueue(_log_verdict)
+                atexit.register(_judge_queue.flush, timeout=JUDGE_FLUSH_ON_EXIT_SEC)
+    return _judge_queue
+
+
 def _judge_and_log(agent_name: str, short_desc: str,
                    task_description: str, result: str):
-    """Run LLM judge on agent response and log score. Never raises.
+    """Queue an agent response for background LLM judging. Never raises.
 
-    If score < REFLECTION_SCORE_THRESHOLD, auto-creates a lesson learned.
+    The score is logged by _log_verdict once the batch it lands in has
+    been judged; the caller does not wait for it.
     """
     try:
-        from .tools.llm_judge import judge_response
-        verdict = judge_response(task_description, result, agent_name)
-        if verdict:
-            log_quality_score(agent_name, short_desc, verdict.overall, {
-                "relevance": verdict.relevance,
-                "completeness": verdict.completeness,
-                "accuracy": verdict.accuracy,
-                "format_score": verdict.format_score,
-                "feedback": verdict.feedback,
-                "passed": verdict.passed,
-            })
-
-            # EventBus: quality scored
-            from .event_bus import get_event_bus, QUALITY_SCORED
-            get_event_bus().emit(QUALITY_SCORED, {
-                "agent_name": agent_name, "task": short_desc,
-                "score": verdict.overall, "passed": verdict.passed,
-            })
-
-            # Auto-lesson on low quality
-            if not verdict.passed and verdict.overall < REFLECTION_SCORE_THRESHOLD:
-                try:
-                    add_lesson(
-                        summary=f"Низкое качество ({verdict.overall:.1f}/5): {short_desc[:100]}",
-                        agent=agent_name,
-                        category="quality",
-                        detail=verdict.feedback or "",
-                        action=f"Улучшить: rel={verdict.relevance}, comp={verdict.completeness}, acc={verdict.accuracy}, fmt={verdict.format_score}",
-                        task_context=short_desc[:200],
-                    )
-                except Exception:
-                    pass
+        _judges().submit(task_description, result, agent_name, short_desc=short_desc)
     except Exception as e:
         logger.warning(f"_judge_and_log failed for {agent_name}: {e}")
 
 
+def _log_verdict(item: dict, verdict):
+    """Log a judge score. If score < REFLECTION_SCORE_THRESHOLD, auto-creates a lesson learned."""
+    agent_name, short_desc = item["agent_name"], item["short_desc"]
+    log_quality_score(agent_name, short_desc, verdict.overall, {
+        "relevance": verdict.relevance,
+        "completeness": verdict.completeness,
+        "accuracy": verdict.accuracy,
+        "format_score": verdict.format_score,
+        "feedback": verdict.feedback,
+        "passed": verdict.passed,
+    })
+
+    # EventBus: quality scored
+    from .event_bus import get_event_bus, QUALITY_SCORED
+    get_event_bus().emit(QUALITY_SCORED, {
+        "agent_name": agent_name, "task": short_desc,
+        "score": verdict.overall, "passed": verdict.passed,
+    })
+
+    # Auto-lesson on low quality
+    if not verdict.passed and verdict.overall < REFLECTION_SCORE_THRESHOLD:
+        try:
+            add_lesson(
+                summary=f"Низкое качество ({verdict.overall:.1f}/5): {short_desc[:100]}",
+                agent=agent_name,
+                category="quality",
+                detail=verdict.feedback or "",
+                action=f"Улучшить: rel={verdict.relevance}, comp={verdict.completeness}, acc={verdict.accuracy}, fmt={verdict.format_score}",
+                task_context=short_desc[:200],
+            )
+        except Exception:
+            pass
+
+
+def get_judge_stats() -> dict:
+    """Judge queue counters: queued, scored, batches, reused, dropped, pending."""
+    return _judges().stats()
+
+
 # ──────────────────────────────────────────────────────────
 # Shared State helpers
 # ──────────────────────────────────────────────────────────
@@ -417,8 +772,8 @@ class CorporationFlow(Flow[CorporationState]):
     Flow types:
       - "single": run one agent directly
       - "delegated": specialist → CEO synthesis
-      - "strategic_review": accountant + automator [+ smm] → CEO
-      - "full_report": accountant + automator [+ smm] → CEO (comprehensive)
+      - "strategic_review": accountant + automator [+ smm] in parallel → CEO
+      - "full_report": accountant + automator [+ smm] in parallel → CEO (comprehensive)
     """
 
     # ── Step 1: classify task ──
@@ -571,86 +926,63 @@ class CorporationFlow(Flow[CorporationState]):
     # ── Strategic review: accountant + automator [+ smm] → CEO ──
     @listen("strategic_review")
     def run_strategic_review(self):
-        """Multi-agent strategic review."""
-        pool = get_agent_pool()
-        has_smm = pool.get("smm") is not None
-
-        log_task_start("accountant", "Финансовая сводка (стратобзор)")
-        log_task_start("automator", "Проверка систем (стратобзор)")
-        if has_smm:
-            log_task_start("smm", "Контент-сводка (стратобзор)")
-
-        _send_progress(
-            "📋 Стратегический обзор запущен\n"
-            "🏦 Маттиас готовит финансовую сводку...\n"
-            "⚙️ Мартин проверяет системы..."
-            + ("\n📱 Юки готовит контент-сводку..." if has_smm else "")
-        )
-
-        # Build multi-agent crew with context passing
-        agents = []
-        tasks = []
-
-        accountant = pool.get("accountant")
-        automator = pool.get("automator")
-        for a in [accountant, automator]:
-            a.agent_executor = None
-            a.tools_results = []
-            if hasattr(a, '_times_executed'):
-                a._times_executed = 0
-
-        task_finance = create_task(
-            description=(
-                "Подготовь краткую финансовую сводку:\n"
-                "1. Используй full_portfolio для общей картины\n"
-                "2. Используй openrouter_usage, elevenlabs_usage, openai_usage для расходов на AI\n"
-                "3. Используй tribute_revenue для доходов\n"
-                "Дай сводку: активы, доходы, расходы на AI."
-                + TASK_WRAPPER
+        """Multi-agent strategic review: specialists in parallel → CEO."""
+        branches = [
+            FanOutBranch(
+                key="accountant",
+                activity="Финансовая сводка (стратобзор)",
+                description=(
+                    "Подготовь краткую финансовую сводку:\n"
+                    "1. Используй full_portfolio для общей картины\n"
+                    "2. Используй openrouter_usage, elevenlabs_usage, openai_usage для расходов на AI\n"
+                    "3. Используй tribute_revenue для доходов\n"
+                    "Дай сводку: активы, доходы, расходы на AI."
+                ),
+                expected_output="Краткая финансовая сводка с реальными данными из инструментов.",
+                done_message="финансовая сводка готова",
+                handoff="Передача финансовых данных",
             ),
-            expected_output="Краткая финансовая сводка с реальными данными из инструментов.",
-            agent=accountant,
-        )
-        tasks.append(task_finance)
-        agents.append(accountant)
-
-        task_health = create_task(
-            description=(
-                "Проверь здоровье систем:\n"
-                "1. Вызови System Health Checker с action='status'\n"
-                "2. Вызови Integration Manager с action='list'\n"
-                "Дай сводку: что работает, что нет."
-                + TASK_WRAPPER
+            FanOutBranch(
+                key="automator",
+                activity="Проверка систем (стратобзор)",
+                description=(
+                    "Проверь здоровье систем:\n"
+                    "1. Вызови System Health Checker с action='status'\n"
+                    "2. Вызови Integration Manager с action='list'\n"
+                    "Дай сводку: что работает, что нет."
+                ),
+                expected_output="Краткий отчёт о состоянии систем и интеграций.",
+                done_message="техотчёт готов",
+                handoff="Передача техотчёта",
             ),
-            expected_output="Краткий отчёт о состоянии систем и интеграций.",
-            agent=automator,
-        )
-        tasks.append(task_health)
-        agents.append(automator)
-
-        if has_smm:
-            smm = pool.get("smm")
-            smm.agent_executor = None
-            task_smm = create_task(
+            FanOutBranch(
+                key="smm",
+                activity="Контент-сводка (стратобзор)",
                 description=(
                     "Подготовь краткую сводку по контенту и SMM:\n"
                     "1. Используй Yuki Memory с action='get_stats' для статистики генераций\n"
                     "2. Используй LinkedIn Publisher с action='status' для статуса LinkedIn\n"
                     "Дай сводку: что опубликовано, что запланировано, статус LinkedIn."
-                    + TASK_WRAPPER
                 ),
                 expected_output="Краткая контент-сводка с данными из инструментов.",
-                agent=smm,
-            )
-            tasks.append(task_smm)
-            agents.append(smm)
+                done_message="контент-сводка готова",
+                handoff="Передача контент-сводки",
+            ),
+        ]
+        pool = get_agent_pool()
+        branches = [b for b in branches if pool.get(b.key) is not None]
 
-        # CEO synthesis
-        context_agents = "Маттиаса, Мартина" + (" и Юки" if has_smm else "")
-        manager = pool.get("manager")
-        manager.agent_executor = None
-        task_strategy = create_task(
-            description=(
+        _send_progress(
+            "📋 Стратегический обзор запущен\n"
+            "🏦 Маттиас готовит финансовую сводку...\n"
+            "⚙️ Мартин проверяет системы..."
+            + ("\n📱 Юки готовит контент-сводку..." if pool.get("smm") else "")
+        )
+
+        context_agents = "Маттиаса, Мартина" + (" и Юки" if pool.get("smm") else "")
+        results, synthesis = _fan_out_fan_in(
+            branches,
+            synthesis_prompt=(
                 f"На основе данных от {context_agents} "
                 "подготовь стратегический обзор:\n"
                 "- Статус каждого проекта\n"
@@ -660,150 +992,83 @@ class CorporationFlow(Flow[CorporationState]):
                 "⛔ НЕ ПИШИ 'запускаю сбор данных'. "
                 f"Данные от {context_agents} уже ПОЛУЧЕНЫ. "
                 "Проанализируй их и дай КОНКРЕТНЫЙ стратегический обзор."
-                + TASK_WRAPPER
             ),
+            synthesis_activity="Стратегический обзор (синтез)",
             expected_output=EXPECTED_OUTPUT,
-            agent=manager,
-            context=tasks,
-            guardrail=_manager_guardrail,
         )
-        tasks.append(task_strategy)
-        agents.append(manager)
-
-        # Progress messages
-        if has_smm:
-            step_msgs = [
-                "✅ 🏦 Маттиас: финансовая сводка готова\n⚙️ Мартин работает...",
-                "✅ ⚙️ Мартин: техотчёт готов\n📱 Юки работает...",
-                "✅ 📱 Юки: контент-сводка готова\n👑 Алексей анализирует...",
-                None,
-            ]
-        else:
-            step_msgs = [
-                "✅ 🏦 Маттиас: финансовая сводка готова\n⚙️ Мартин работает...",
-                "✅ ⚙️ Мартин: техотчёт готов\n👑 Алексей анализирует...",
-                None,
-            ]
-        step_idx = [0]
-
-        def _on_task_done(output):
-            idx = step_idx[0]
-            step_idx[0] += 1
-            if idx < len(step_msgs) and step_msgs[idx]:
-                _send_progress(step_msgs[idx])
+        self._store_branch_results(results, synthesis)
 
-        try:
-            crew = Crew(
-                agents=agents, tasks=tasks,
-                process=Process.sequential, verbose=True,
-                memory=False, task_callback=_on_task_done,
-            )
-            result = crew.kickoff()
-
-            log_task_end("accountant", "Финансовая сводка (стратобзор)", success=True)
-            log_task_end("automator", "Проверка систем (стратобзор)", success=True)
-            log_communication("accountant", "manager", "Передача финансовых данных")
-            log_communication("automator", "manager", "Передача техотчёта")
-            if has_smm:
-                log_task_end("smm", "Контент-сводка (стратобзор)", success=True)
-                log_communication("smm", "manager", "Передача контент-сводки")
-            log_task_start("manager", "Стратегический обзор (синтез)")
-            log_task_end("manager", "Стратегический обзор (синтез)", success=True)
-            log_communication_end("accountant")
-            log_communication_end("automator")
-            if has_smm:
-                log_communication_end("smm")
-
-            self.state.final_output = str(result)
-
-            # Update shared state timestamp
+        if synthesis.success:
+            self.state.final_output = synthesis.output
             _update_shared_state_review()
-
-        except Exception as e:
-            logger.error(f"Strategic review failed: {e}", exc_info=True)
-            log_task_end("accountant", "Финансовая сводка (стратобзор)", success=False)
-            log_task_end("automator", "Проверка систем (стратобзор)", success=False)
-            self.state.final_output = f"❌ Ошибка стратегического обзора: {e}"
+        else:
+            logger.error(f"Strategic review failed: {synthesis.error}")
+            self.state.final_output = _fan_in_fallback(
+                branches, results,
+                f"❌ Ошибка стратегического обзора: {synthesis.error}",
+            )
 
         return self.state.final_output
 
     # ── Full corporation report ──
     @listen("full_report")
     def run_full_report(self):
-        """Full weekly report: all agents → CEO synthesis."""
-        pool = get_agent_pool()
-        has_smm = pool.get("smm") is not None
-
-        log_task_start("accountant", "Финансовый отчёт (полный)")
-        log_task_start("automator", "Техотчёт (полный)")
-        _send_progress(
-            "📊 Полный отчёт корпорации запущен\n"
-            "🏦 Маттиас готовит финансовый отчёт...\n"
-            "⚙️ Мартин проверяет системы...\n"
-            "📱 Юки готовит отчёт по контенту..."
-        )
-
-        agents = []
-        tasks = []
-
-        accountant = pool.get("accountant")
-        automator = pool.get("automator")
-        manager = pool.get("manager")
-        for a in [accountant, automator, manager]:
-            a.agent_executor = None
-            a.tools_results = []
-            if hasattr(a, '_times_executed'):
-                a._times_executed = 0
-
-        task_fin = create_task(
-            description=(
-                "Подготовь полный финансовый отчёт:\n"
-                "1. full_portfolio — общая картина активов\n"
-                "2. tribute_revenue — доходы от подписок\n"
-                "3. openrouter_usage, elevenlabs_usage, openai_usage — расходы на AI\n"
-                "Включи: активы, доходы, расходы на AI + Claude Code $200/мес."
-                + TASK_WRAPPER
+        """Full weekly report: all agents in parallel → CEO synthesis."""
+        branches = [
+            FanOutBranch(
+                key="accountant",
+                activity="Финансовый отчёт (полный)",
+                description=(
+                    "Подготовь полный финансовый отчёт:\n"
+                    "1. full_portfolio — общая картина активов\n"
+                    "2. tribute_revenue — доходы от подписок\n"
+                    "3. openrouter_usage, elevenlabs_usage, openai_usage — расходы на AI\n"
+                    "Включи: активы, доходы, расходы на AI + Claude Code $200/мес."
+                ),
+                expected_output="Полный финансовый отчёт с данными из инструментов.",
+                done_message="финансовый отчёт готов",
+                handoff="Передача финотчёта",
             ),
-            expected_output="Полный финансовый отчёт с данными из инструментов.",
-            agent=accountant,
-        )
-        tasks.append(task_fin)
-        agents.append(accountant)
-
-        task_tech = create_task(
-            description=(
-                "Проведи полную проверку систем:\n"
-                "1. System Health Checker action='status'\n"
-                "2. Integration Manager action='list'\n"
-                "Включи: статус каждого сервиса, время отклика, ошибки."
-                + TASK_WRAPPER
+            FanOutBranch(
+                key="automator",
+                activity="Техотчёт (полный)",
+                description=(
+                    "Проведи полную проверку систем:\n"
+                    "1. System Health Checker action='status'\n"
+                    "2. Integration Manager action='list'\n"
+                    "Включи: статус каждого сервиса, время отклика, ошибки."
+                ),
+                expected_output="Полный технический отчёт с реальными данными.",
+                done_message="техотчёт готов",
+                handoff="Передача техотчёта",
             ),
-            expected_output="Полный технический отчёт с реальными данными.",
-            agent=automator,
-        )
-        tasks.append(task_tech)
-        agents.append(automator)
-
-        if has_smm:
-            smm = pool.get("smm")
-            smm.agent_executor = None
-            log_task_start("smm", "Отчёт по контенту (полный)")
-            task_smm = create_task(
+            FanOutBranch(
+                key="smm",
+                activity="Отчёт по контенту (полный)",
                 description=(
                     "Подготовь отчёт по контенту:\n"
                     "1. Yuki Memory action='get_stats'\n"
                     "2. LinkedIn Publisher action='status'\n"
                     "Включи: кол-во генераций, публикаций, статус LinkedIn."
-                    + TASK_WRAPPER
                 ),
                 expected_output="Краткий отчёт по контенту и LinkedIn.",
-                agent=smm,
-            )
-            tasks.append(task_smm)
-            agents.append(smm)
+                done_message="контент-отчёт готов",
+                handoff="Передача контент-отчёта",
+            ),
+        ]
+        pool = get_agent_pool()
+        branches = [b for b in branches if pool.get(b.key) is not None]
 
-        task_ceo = create_task(
-            description=(
+        _send_progress(
+            "📊 Полный отчёт корпорации запущен\n"
+            "🏦 Маттиас готовит финансовый отчёт...\n"
+            "⚙️ Мартин проверяет системы...\n"
+            "📱 Юки готовит отчёт по контенту..."
+        )
+
+        results, synthesis = _fan_out_fan_in(
+            branches,
+            synthesis_prompt=(
                 "На основе данных от всех агентов подготовь еженедельный отчёт для Тима:\n"
                 "- Общее состояние корпорации\n"
                 "- Финансовые показатели (от Маттиаса)\n"
@@ -815,70 +1080,31 @@ class CorporationFlow(Flow[CorporationState]):
                 "⛔ НЕ ПИШИ 'запускаю сбор данных'. "
                 "Данные от агентов уже ПОЛУЧЕНЫ. "
                 "Проанализируй их и дай КОНКРЕТНЫЙ отчёт."
-                + TASK_WRAPPER
             ),
+            synthesis_activity="Еженедельный отчёт CEO (синтез)",
             expected_output="Полный еженедельный отчёт CEO. Минимум 400 слов.",
-            agent=manager,
-            context=tasks[:-1] if len(tasks) > 1 else tasks,
-            guardrail=_manager_guardrail,
         )
-        tasks.append(task_ceo)
-        agents.append(manager)
-
-        # Progress messages
-        report_steps = [
-            "✅ 🏦 Маттиас: финансовый отчёт готов\n⚙️ Мартин работает...",
-            ("✅ ⚙️ Мартин: техотчёт готов\n📱 Юки работает..." if has_smm
-             else "✅ ⚙️ Мартин: техотчёт готов\n👑 Алексей анализирует..."),
-            ("✅ 📱 Юки: контент-отчёт готов\n👑 Алексей готовит синтез..." if has_smm
-             else None),
-            None,
-        ]
-        step_idx = [0]
-
-        def _on_report_done(output):
-            idx = step_idx[0]
-            step_idx[0] += 1
-            if idx < len(report_steps) and report_steps[idx]:
-                _send_progress(report_steps[idx])
+        self._store_branch_results(results, synthesis)
 
-        try:
-            crew = Crew(
-                agents=agents, tasks=tasks,
-                process=Process.sequential, verbose=True,
-                memory=False, task_callback=_on_report_done,
-            )
-            result = crew.kickoff()
-
-            log_task_end("accountant", "Финансовый отчёт (полный)", success=True)
-            log_task_end("automator", "Техотчёт (полный)", success=True)
-            if has_smm:
-                log_task_end("smm", "Отчёт по контенту (полный)", success=True)
-                log_communication("smm", "manager", "Передача контент-отчёта")
-
-            log_communication("accountant", "manager", "Передача финотчёта")
-            log_communication("automator", "manager", "Передача техотчёта")
-            log_task_start("manager", "Еженедельный отчёт CEO (синтез)")
-            log_task_end("manager", "Еженедельный отчёт CEO (синтез)", success=True)
-
-            for agent_key in ["accountant", "automator", "smm"]:
-                log_communication_end(agent_key)
-
-            self.state.final_output = str(result)
-
-            # Update shared state timestamp
+        if synthesis.success:
+            self.state.final_output = synthesis.output
             _update_shared_state_report()
-
-        except Exception as e:
-            logger.error(f"Full corporation report failed: {e}", exc_info=True)
-            log_task_end("accountant", "Финансовый отчёт (полный)", success=False)
-            log_task_end("automator", "Техотчёт (полный)", success=False)
-            if has_smm:
-                log_task_end("smm", "Отчёт по контенту (полный)", success=False)
-            self.state.final_output = f"❌ Ошибка при формировании отчёта: {e}"
+        else:
+            logger.error(f"Full corporation report failed: {synthesis.error}")
+            self.state.final_output = _fan_in_fallback(
+                branches, results,
+                f"❌ Ошибка при формировании отчёта: {synthesis.error}",
+            )
 
         return self.state.final_output
 
+    def _store_branch_results(self, results: dict[str, AgentResult],
+                              synthesis: AgentResult):
+        for key, result in results.items():
+            if key in ("accountant", "automator", "smm"):
+                setattr(self.state, f"{key}_result", result)
+        self.state.manager_result = synthesis
+
     # ── Error handler ──
     @listen("error")
     def handle_error(self):
@@ -0,0 +1,324 @@
+"""
+📚 Zinin Corp — In-memory knowledge base index
+
+Inverted index over knowledge/*.md|*.txt, shared by the KB MCP server
+(kb_search) and crew.py's KNOWLEDGE_SOURCES.
+
+- Paragraphs (blocks between blank lines) are the retrieval unit
+- Tokens are lowercased, ё → е, and stemmed with a light suffix stemmer
+  (Russian or English, picked by script)
+- Ranking is BM25; "quoted phrases" must match consecutive tokens
+- Postings keep token positions and char offsets, so snippets are cut
+  without rescanning the text
+- The index is rebuilt when a file is added, removed or its mtime/size
+  changes (checked at most every CHECK_INTERVAL_SEC)
+"""
+
+import bisect
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_EXTENSIONS = (".md", ".txt")
+CHECK_INTERVAL_SEC = 1.0
+BM25_K1 = 1.5
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+
+_KB_DIRS = [
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge"),
+    "/app/knowledge",
+    "knowledge",
+]
+
+
+def knowledge_dir() -> Optional[str]:
+    """First existing knowledge/ directory, or None."""
+    for d in _KB_DIRS:
+        if os.path.isdir(d):
+            return d
+    return None
+
+
+# ──────────────────────────────────────────────────────────
+# Tokenizer + stemmers
+# ──────────────────────────────────────────────────────────
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+_RU_VOWELS = set("аеиоуыэюя")
+_RU_ENDINGS = sorted({
+    # reflexive / verb
+    "ться", "тся", "ешься", "ется", "ются", "ишь", "ешь", "ете", "ите",
+    "ать", "ять", "ить", "еть", "уть", "ет", "ют", "ут", "ит", "ат", "ят",
+    "ала", "ала", "ила", "ыла", "ела", "али", "или", "ыли", "ели", "ал", "ил", "ыл", "ел",
+    # noun
+    "ениями", "ением", "ения", "ение", "ений", "остью", "ости", "ость",
+    "иями", "ями", "ами", "иях", "ях", "ах", "ием", "ем", "ом", "ам", "ям",
+    "ией", "ей", "ой", "ий", "ия", "ья", "ию", "ью", "ии", "ов", "ев",
+    # adjective / participle
+    "ыми", "ими", "ого", "его", "ому", "ему", "ая", "яя", "ое", "ее",
+    "ие", "ые", "ый", "ую", "юю", "ых", "их",
+    # single letters
+    "а", "я", "о", "е", "ы", "у", "ю", "и", "ь", "й",
+}, key=len, reverse=True)
+
+_EN_SUFFIXES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"),
+    ("iveness", "ive"), ("ies", "y"), ("ing", ""), ("edly", ""), ("ed", ""),
+    ("ly", ""), ("ment", ""), ("ness", ""), ("es", ""), ("s", ""),
+)
+
+
+def _stem_ru(word: str) -> str:
+    # Endings are only stripped inside RV (the part after the first vowel)
+    rv = next((i + 1 for i, ch in enumerate(word) if ch in _RU_VOWELS), len(word))
+    for ending in _RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= rv:
+            return word[:-len(ending)]
+    return word
+
+
+def _stem_en(word: str) -> str:
+    if len(word) <= 3:
+        return word
+    for suffix, repl in _EN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith("ss"):
+                return word
+            return word[:-len(suffix)] + repl
+    return word
+
+
+def normalize(token: str) -> str:
+    """Lowercase, fold ё, and stem one token."""
+    token = token.lower().replace("ё", "е")
+    if _CYRILLIC_RE.search(token):
+        return _stem_ru(token)
+    return _stem_en(token)
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """(term, start, end) for every word in text."""
+    return [(normalize(m.group()), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+
+
+# ──────────────────────────────────────────────────────────
+# Index
+# ──────────────────────────────────────────────────────────
+
+@dataclass
+class Passage:
+    filename: str
+    line: int  # 1-based line of the passage start
+    text: str
+    spans: list[tuple[int, int]]  # char span of each token, by position
+    line_starts: list[int]  # char offset of each line within text
+    length: int = 0
+
+
+@dataclass
+class SearchHit:
+    filename: str
+    line: int
+    score: float
+    snippet: str
+
+
+@dataclass
+class KnowledgeIndex:
+    """BM25 index over the files of one knowledge directory."""
+
+    directory: str
+    passages: list[Passage] = field(default_factory=list)
+    postings: dict[str, dict[int, list[int]]] = field(default_factory=dict)
+    avg_length: float = 0.0
+    _signature: dict = field(default_factory=dict)
+    _checked_at: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    # ── building ──
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        sig = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for e in entries:
+                    if e.is_file() and e.name.endswith(KNOWLEDGE_EXTENSIONS):
+                        st = e.stat()
+                        sig[e.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return sig
+
+    def refresh(self, force: bool = False) -> None:
+        """Rebuild if files changed since the last build."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < CHECK_INTERVAL_SEC:
+            return
+        with self._lock:
+            self._checked_at = now
+            sig = self._scan()
+            if sig == self._signature and not force:
+                return
+            self._build(sig)
+
+    def _build(self, sig: dict) -> None:
+        passages: list[Passage] = []
+        postings: dict[str, dict[int, list[int]]] = {}
+        for filename in sorted(sig):
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    content = f.read()
+            except OSError as e:
+                logger.warning(f"Knowledge index: cannot read {filename}: {e}")
+                continue
+            for line_no, text in _split_passages(content):
+                tokens = tokenize(text)
+                if not tokens:
+                    continue
+                pid = len(passages)
+                line_starts = [0] + [i + 1 for i, ch in enumerate(text) if ch == "\n"]
+                passages.append(Passage(
+                    filename=filename, line=line_no, text=text,
+                    spans=[(s, e) for _, s, e in tokens],
+                    line_starts=line_starts, length=len(tokens),
+                ))
+                for pos, (term, _, _) in enumerate(tokens):
+                    postings.setdefault(term, {}).setdefault(pid, []).append(pos)
+        self.passages = passages
+        self.postings = postings
+        self.avg_length = sum(p.length for p in passages) / len(passages) if passages else 0.0
+        self._signature = sig
+        logger.info(f"Knowledge index: {len(sig)} files, {len(passages)} passages, {len(postings)} terms")
+
+    @property
+    def file_paths(self) -> list[str]:
+        self.refresh()
+        return [os.path.join(self.directory, f) for f in sorted(self._signature)]
+
+    # ── querying ──
+
+    def _expand(self, term: str) -> list[str]:
+        """Indexed terms for a query term; prefix matches if it has no postings."""
+        if term in self.postings:
+            return [term]
+        if len(term) < 3:
+            return []
+        return [t for t in self.postings if t.startswith(term)]
+
+    def _phrase_positions(self, terms: list[str]) -> dict[int, list[int]]:
+        """Passages containing the terms consecutively → start positions."""
+        first = self.postings.get(terms[0], {})
+        result = {}
+        for pid, starts in first.items():
+            hits = [
+                s for s in starts
+                if all(s + i in self.postings.get(t, {}).get(pid, ()) for i, t in enumerate(terms[1:], 1))
+            ]
+            if hits:
+                result[pid] = hits
+        return result
+
+    def search(self, query: str, limit: int = 10) -> list[SearchHit]:
+        """Passages ranked by BM25. Phrases in double quotes must match exactly."""
+        self.refresh()
+        phrases = [p for p in re.findall(r'"([^"]+)"', query)]
+        loose = re.sub(r'"[^"]*"', " ", query)
+
+        required: Optional[set[int]] = None
+        anchors: dict[int, list[int]] = {}
+        units: list[dict[int, list[int]]] = []  # one {pid: positions} per query unit
+
+        for phrase in phrases:
+            terms = [t for t, _, _ in tokenize(phrase)]
+            if not terms:
+                continue
+            matched = self._phrase_positions(terms) if len(terms) > 1 else \
+                self.postings.get(terms[0], {})
+            required = set(matched) if required is None else required & set(matched)
+            units.append(matched)
+        for term, _, _ in tokenize(loose):
+            merged: dict[int, list[int]] = {}
+            for t in self._expand(term):
+                for pid, positions in self.postings[t].items():
+                    merged.setdefault(pid, []).extend(positions)
+            units.append(merged)
+
+        n = len(self.passages)
+        scores: dict[int, float] = {}
+        for unit in units:
+            if not unit:
+                continue
+            idf = math.log(1 + (n - len(unit) + 0.5) / (len(unit) + 0.5))
+            for pid, positions in unit.items():
+                if required is not None and pid not in required:
+                    continue
+                tf = len(positions)
+                norm = 1 - BM25_B + BM25_B * self.passages[pid].length / (self.avg_length or 1)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                anchors.setdefault(pid, positions)
+
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])[:limit]
+        return [self._hit(pid, score, min(anchors[pid])) for pid, score in ranked]
+
+    def _hit(self, pid: int, score: float, position: int) -> SearchHit:
+        p = self.passages[pid]
+        start, end = p.spans[position]
+        lo = max(0, start - SNIPPET_CHARS // 2)
+        hi = min(len(p.text), end + SNIPPET_CHARS // 2)
+        snippet = p.text[lo:hi].replace("\n", " ").strip()
+        if lo > 0:
+            snippet = "…" + snippet
+        if hi < len(p.text):
+            snippet += "…"
+        line = p.line + bisect.bisect_right(p.line_starts, start) - 1
+        return SearchHit(filename=p.filename, line=line, score=score, snippet=snippet)
+
+
+def _split_passages(content: str) -> list[tuple[int, str]]:
+    """Blank-line separated blocks with their 1-based starting line."""
+    passages = []
+    block: list[str] = []
+    start = 1
+    for i, line in enumerate(content.split("\n"), 1):
+        if line.strip():
+            if not block:
+                start = i
+            block.append(line)
+        elif block:
+            passages.append((start, "\n".join(block)))
+            block = []
+    if block:
+        passages.append((start, "\n".join(block)))
+    return passages
+
+
+# ──────────────────────────────────────────────────────────
+# Shared instances
+# ──────────────────────────────────────────────────────────
+
+_indexes: dict[str, KnowledgeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(directory: Optional[str] = None) -> Optional[KnowledgeIndex]:
+    """Shared index for a knowledge directory (default: knowledge_dir())."""
+    directory = directory or knowledge_dir()
+    if not directory:
+        return None
+    key = os.path.abspath(directory)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = KnowledgeIndex(directory)
+    index.refresh()
+    return index
@@ -3,15 +3,25 @@
 
 Stores, retrieves, and manages operational insights from agent tasks.
 Persisted to disk as JSON. Queryable by agent, category, and recency.
+
+The store is kept in memory with an index by agent, category and term;
+it is rebuilt on our own writes and when the file's mtime/size changes.
+Prompt context ranks lessons by BM25 relevance to the task text plus
+recency and useful_count.
 """
 
 import json
 import logging
+import math
 import os
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from .knowledge_index import tokenize
+
 logger = logging.getLogger(__name__)
 
 # ──────────────────────────────────────────────────────────
@@ -65,8 +75,7 @@ def _store_path() -> str:
     return "data/lessons_learned.json"
 
 
-def _load_store() -> LessonsStore:
-    path = _store_path()
+def _read_store(path: str) -> LessonsStore:
     if os.path.exists(path):
         try:
             with open(path, "r", encoding="utf-8") as f:
@@ -77,7 +86,116 @@ def _load_store() -> LessonsStore:
     return LessonsStore()
 
 
+def _file_signature(path: str) -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+# ──────────────────────────────────────────────────────────
+# In-memory index
+# ──────────────────────────────────────────────────────────
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RELEVANCE_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.25
+USEFUL_WEIGHT = 0.15
+CONTEXT_CACHE_SIZE = 256
+
+
+class _LessonIndex:
+    """Lessons by agent/category plus BM25 term statistics.
+
+    Term statistics are built on first ranking, so bursts of writes
+    (each replacing the index) don't re-tokenize the whole store.
+    """
+
+    def __init__(self, store: LessonsStore):
+        self.store = store
+        self.lessons = store.lessons
+        self.by_agent: dict[str, list[int]] = {}
+        self.by_category: dict[str, list[int]] = {}
+        for i, lesson in enumerate(self.lessons):
+            self.by_agent.setdefault(lesson.agent, []).append(i)
+            self.by_category.setdefault(lesson.category, []).append(i)
+        self.term_freqs: Optional[list[Counter]] = None
+        self.context_cache: OrderedDict = OrderedDict()
+
+    def _build_terms(self):
+        term_freqs, doc_freq = [], Counter()
+        for lesson in self.lessons:
+            text = " ".join((lesson.summary, lesson.detail, lesson.action, lesson.task_context))
+            tf = Counter(term for term, _, _ in tokenize(text))
+            term_freqs.append(tf)
+            doc_freq.update(tf.keys())
+        self.lengths = [sum(tf.values()) for tf in term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        self.doc_freq = doc_freq
+        self.term_freqs = term_freqs
+
+    def bm25(self, i: int, query_terms: tuple[str, ...]) -> float:
+        tf, n = self.term_freqs[i], len(self.lessons)
+        norm = 1 - BM25_B + BM25_B * self.lengths[i] / (self.avg_length or 1)
+        score = 0.0
+        for term in query_terms:
+            f = tf.get(term)
+            if f:
+                df = self.doc_freq[term]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * f * (BM25_K1 + 1) / (f + BM25_K1 * norm)
+        return score
+
+    def rank(self, candidates: list[int], query_terms: tuple[str, ...]) -> list[int]:
+        """Candidates ordered by relevance + recency + usefulness, best first."""
+        if not candidates:
+            return []
+        if query_terms and self.term_freqs is None:
+            self._build_terms()
+        relevance = [self.bm25(i, query_terms) for i in candidates] if query_terms else []
+        top_relevance = max(relevance, default=0.0) or 1.0
+        top_useful = math.log1p(max(self.lessons[i].useful_count for i in candidates)) or 1.0
+        # Candidates are in store order (oldest first), so position is recency
+        n = len(candidates)
+        scored = []
+        for pos, i in enumerate(candidates):
+            score = (
+                RELEVANCE_WEIGHT * (relevance[pos] / top_relevance if relevance else 0.0)
+                + RECENCY_WEIGHT * (pos + 1) / n
+                + USEFUL_WEIGHT * math.log1p(self.lessons[i].useful_count) / top_useful
+            )
+            scored.append((score, pos, i))
+        scored.sort(reverse=True)
+        return [i for _, _, i in scored]
+
+
+_index_lock = threading.Lock()
+_index: Optional[_LessonIndex] = None
+_index_key: Optional[tuple] = None  # (path, file signature) the index reflects
+
+
+def _current_index() -> _LessonIndex:
+    """Index of the store on disk; reparsed only if the file changed."""
+    global _index, _index_key
+    path = _store_path()
+    key = (path, _file_signature(path))
+    with _index_lock:
+        if _index is None or _index_key != key:
+            _index = _LessonIndex(_read_store(path))
+            _index_key = key
+        return _index
+
+
+def _load_store() -> LessonsStore:
+    """Private copy of the store, for read-modify-write callers."""
+    return _current_index().store.model_copy(deep=True)
+
+
 def _save_store(store: LessonsStore):
+    """Write the store and make it the cached copy (callers hand it over)."""
+    global _index, _index_key
     path = _store_path()
     try:
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -85,6 +203,10 @@ def _save_store(store: LessonsStore):
             json.dump(store.model_dump(), f, indent=2, ensure_ascii=False, default=str)
     except Exception as e:
         logger.error(f"Failed to save lessons store: {e}")
+        return
+    with _index_lock:
+        _index = _LessonIndex(store)
+        _index_key = (path, _file_signature(path))
 
 
 # ──────────────────────────────────────────────────────────
@@ -132,61 +254,73 @@ def get_lessons(
     limit: int = 10,
 ) -> list[Lesson]:
     """Get lessons, optionally filtered by agent and/or category."""
-    store = _load_store()
-    results = store.lessons
-
+    index = _current_index()
+    positions = range(len(index.lessons))
     if agent:
-        results = [l for l in results if l.agent == agent]
+        positions = index.by_agent.get(agent, [])
     if category:
-        results = [l for l in results if l.category == category]
+        in_category = set(index.by_category.get(category, []))
+        positions = [i for i in positions if i in in_category]
 
-    return results[-limit:]
+    return [index.lessons[i].model_copy() for i in list(positions)[-limit:]]
 
 
 def get_lessons_for_context(agent: str = "", task_text: str = "", limit: int = 5) -> str:
     """Get lessons as formatted text for injection into agent prompts.
 
+    Lessons for the agent plus general ones, the most relevant to
+    task_text first (recency and useful_count also count). Results are
+    cached per (agent, task terms, limit) until the store changes.
+
     Returns a compact string suitable for prepending to task descriptions.
     If no relevant lessons found, returns empty string.
     """
-    store = _load_store()
-    if not store.lessons:
+    index = _current_index()
+    if not index.lessons:
         return ""
 
-    # Filter by agent if provided
-    candidates = store.lessons
-    if agent:
-        agent_lessons = [l for l in candidates if l.agent == agent]
-        # Also include general lessons (no agent)
-        general_lessons = [l for l in candidates if not l.agent]
-        candidates = agent_lessons + general_lessons
-
-    if not candidates:
-        return ""
-
-    # Take most recent lessons
-    selected = candidates[-limit:]
+    query_terms = tuple(sorted({term for term, _, _ in tokenize(task_text)}))
+    cache_key = (agent, query_terms, limit)
+    with _index_lock:
+        cached = index.context_cache.get(cache_key)
+        if cached is not None:
+            index.context_cache.move_to_end(cache_key)
+            return cached
 
-    lines = ["📝 УРОКИ ИЗ ПРОШЛОГО ОПЫТА:"]
-    for lesson in selected:
-        lines.append(f"• {lesson.summary}")
-        if lesson.action:
-            lines.append(f"  → {lesson.action}")
-    lines.append("")
-
-    return "\n".join(lines)
+    # Filter by agent if provided; also include general lessons (no agent)
+    if agent:
+        candidates = sorted(index.by_agent.get(agent, []) + index.by_agent.get("", []))
+    else:
+        candidates = list(range(len(index.lessons)))
+
+    selected = index.rank(candidates, query_terms)[:limit]
+    if not selected:
+        context = ""
+    else:
+        lines = ["📝 УРОКИ ИЗ ПРОШЛОГО ОПЫТА:"]
+        for i in selected:
+            lesson = index.lessons[i]
+            lines.append(f"• {lesson.summary}")
+            if lesson.action:
+                lines.append(f"  → {lesson.action}")
+        lines.append("")
+        context = "\n".join(lines)
+
+    with _index_lock:
+        index.context_cache[cache_key] = context
+        if len(index.context_cache) > CONTEXT_CACHE_SIZE:
+            index.context_cache.popitem(last=False)
+    return context
 
 
 def get_all_lessons() -> list[Lesson]:
     """Get all lessons (for admin/dashboard)."""
-    store = _load_store()
-    return store.lessons
+    return [lesson.model_copy() for lesson in _current_index().lessons]
 
 
 def get_lesson_stats() -> dict:
     """Get statistics about lessons."""
-    store = _load_store()
-    lessons = store.lessons
+    lessons = _current_index().lessons
 
     by_category = {}
     by_agent = {}
@@ -0,0 +1,612 @@
+"""
+🔀 Zinin Corp — LLM Gateway
+
+One client for the ad-hoc LLM calls made outside CrewAI (post generation,
+prompt writing, image generation, screenshot OCR).
+
+- One pooled httpx.AsyncClient with keep-alive connections, owned by a
+  background event-loop thread; the sync shim and callers on other event
+  loops submit coroutines to that loop, so every caller shares the pool.
+- Ordered failover across routes (provider + model). A route is skipped
+  when its provider has no API key or its token budget is spent.
+- Per-provider concurrency limits and per-minute token budgets.
+- 429s never block for a minute: a short Retry-After is honoured once,
+  anything longer moves on to the next route.
+- Opt-in hedging for latency-critical calls: when the first route is
+  slower than its recent p90, the next provider is asked too and the
+  first valid answer wins; duplicates are capped at HEDGE_BUDGET_PCT.
+- Every attempt is recorded in rate_monitor (status, latency, tokens).
+
+    text = complete_sync(prompt, system, routes=TEXT_ROUTES, agent="smm")
+    resp = await chat(messages, routes=IMAGE_ROUTES, extra={"modalities": [...]})
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ──────────────────────────────────────────────────────────
+# Configuration — providers and routes
+# ──────────────────────────────────────────────────────────
+
+PROVIDERS = {
+    "openrouter": {
+        "url": "https://openrouter.ai/api/v1/chat/completions",
+        "key_env": "OPENROUTER_API_KEY",
+        "headers": {"HTTP-Referer": "https://zinin.corp"},
+        "concurrency": 8,
+        "tokens_per_minute": 0,  # 0 = no budget
+    },
+    "groq": {
+        "url": "https://api.groq.com/openai/v1/chat/completions",
+        "key_env": "GROQ_API_KEY",
+        "headers": {},
+        "concurrency": 4,
+        "tokens_per_minute": 12000,  # free tier, llama-3.3-70b-versatile
+    },
+}
+
+CONNECT_TIMEOUT_SEC = 5.0
+DEFAULT_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "45"))
+RETRY_AFTER_CAP_SEC = 5.0  # longer Retry-After → fail over instead of waiting
+BACKOFF_SEC = 1.0
+POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=90)
+
+# Hedging (opt-in per call): duplicate a slow request to the next route
+LATENCY_SAMPLES = 50  # recent successful latencies kept per route
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_SAMPLES = 5
+HEDGE_DEFAULT_DELAY_SEC = 8.0  # until a route has HEDGE_MIN_SAMPLES
+HEDGE_MIN_DELAY_SEC = 0.5
+HEDGE_BUDGET_PCT = 10  # duplicate requests, % of hedge-enabled calls
+HEDGE_BURST = 2
+HEDGE_WINDOW_SEC = 600
+
+
+@dataclass(frozen=True)
+class Route:
+    """One provider + model to try; system=False merges the system prompt
+    into the user message (Gemma rejects system messages)."""
+    provider: str
+    model: str
+    system: bool = True
+
+
+TEXT_ROUTES = (
+    Route("openrouter", "meta-llama/llama-3.3-70b-instruct:free"),
+    Route("groq", "llama-3.3-70b-versatile"),
+)
+TECH_ROUTES = (
+    Route("openrouter", "meta-llama/llama-3.3-70b-instruct:free"),
+    Route("openrouter", "google/gemma-3-27b-it:free", system=False),
+    Route("openrouter", "google/gemma-3-12b-it:free", system=False),
+    Route("groq", "llama-3.3-70b-versatile"),
+)
+IMAGE_ROUTES = (Route("openrouter", "google/gemini-2.5-flash-image"),)
+VISION_ROUTES = (Route("openrouter", "anthropic/claude-sonnet-4"),)
+
+
+class LLMUnavailable(RuntimeError):
+    """Every route failed or was skipped; the message has the last error."""
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    provider: str
+    model: str
+    latency_ms: int
+    tokens_in: int
+    tokens_out: int
+    data: dict = field(repr=False, default_factory=dict)  # raw JSON body
+
+
+def build_messages(prompt: str, system: str = "", system_role: bool = True) -> list[dict]:
+    """Chat messages for a prompt; without system_role the system prompt is prepended."""
+    if system and system_role:
+        return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+    if system:
+        return [{"role": "user", "content": f"{system}\n\n---\n\n{prompt}"}]
+    return [{"role": "user", "content": prompt}]
+
+
+def _estimate_tokens(messages: list[dict]) -> int:
+    chars = 0
+    for m in messages:
+        content = m.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return chars // 4 + 1
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# ──────────────────────────────────────────────────────────
+# Token budget
+# ──────────────────────────────────────────────────────────
+
+class _TokenBudget:
+    """Sliding one-minute token budget. Reservations use an estimate
+    (prompt + max_tokens) and are settled with the reported usage."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._spent: deque[tuple[float, int]] = deque()
+        self._used = 0
+
+    def _expire(self, now: float):
+        while self._spent and now - self._spent[0][0] >= 60:
+            self._used -= self._spent.popleft()[1]
+
+    def used(self, now: Optional[float] = None) -> int:
+        self._expire(time.monotonic() if now is None else now)
+        return self._used
+
+    def try_reserve(self, tokens: int, now: Optional[float] = None) -> bool:
+        if not self.per_minute:
+            return True
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if self._used and self._used + tokens > self.per_minute:
+            return False
+        self._spent.append((now, tokens))
+        self._used += tokens
+        return True
+
+    def settle(self, reserved: int, actual: int, now: Optional[float] = None):
+        if not self.per_minute or reserved == actual:
+            return
+        self._spent.append((time.monotonic() if now is None else now, actual - reserved))
+        self._used += actual - reserved
+
+
+class _HedgeBudget:
+    """Caps duplicate requests at `ratio` of hedge-enabled calls over the
+    last HEDGE_WINDOW_SEC (plus HEDGE_BURST)."""
+
+    def __init__(self, ratio: float):
+        self.ratio = ratio
+        self._calls: deque[float] = deque()
+        self._spent: deque[float] = deque()
+
+    def _expire(self, now: float):
+        for q in (self._calls, self._spent):
+            while q and now - q[0] >= HEDGE_WINDOW_SEC:
+                q.popleft()
+
+    def note_call(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        self._calls.append(now)
+
+    def try_spend(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if len(self._spent) >= HEDGE_BURST + self.ratio * len(self._calls):
+            return False
+        self._spent.append(now)
+        return True
+
+
+# ──────────────────────────────────────────────────────────
+# Gateway
+# ──────────────────────────────────────────────────────────
+
+class LLMGateway:
+    """Pooled LLM client running on its own event-loop thread."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._budgets = {
+            name: _TokenBudget(_env_int(f"LLM_TPM_{name.upper()}", cfg["tokens_per_minute"]))
+            for name, cfg in PROVIDERS.items()
+        }
+        self._inflight = {name: 0 for name in PROVIDERS}
+        self._latency: dict[tuple[str, str], deque[int]] = {}
+        self._hedges = _HedgeBudget(_env_int("LLM_HEDGE_BUDGET_PCT", HEDGE_BUDGET_PCT) / 100)
+        self._stats = {"calls": 0, "failovers": 0, "budget_skips": 0, "unavailable": 0,
+                       "hedges": 0, "hedge_wins": 0}
+
+    # ── loop thread ───────────────────────────────────────
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="llm-gateway", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=POOL_LIMITS,
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT_SEC, connect=CONNECT_TIMEOUT_SEC),
+                transport=self._transport,
+            )
+        return self._client
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(provider)
+        if sem is None:
+            limit = _env_int(f"LLM_CONCURRENCY_{provider.upper()}", PROVIDERS[provider]["concurrency"])
+            sem = self._semaphores[provider] = asyncio.Semaphore(max(1, limit))
+        return sem
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the gateway loop (thread-safe)."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    # ── public API ────────────────────────────────────────
+
+    async def chat(self, messages: list[dict], *, routes: Sequence[Route] = TEXT_ROUTES,
+                   max_tokens: Optional[int] = 2000, temperature: Optional[float] = 0.7,
+                   timeout: Optional[float] = None, retries: int = 1,
+                   extra: Optional[dict] = None, headers: Optional[dict] = None,
+                   agent: str = "", hedge: bool = False) -> LLMResponse:
+        """Send a chat completion, failing over along `routes`.
+
+        hedge=True also fires the next route when the first one is slower
+        than usual and keeps the first valid answer (see _hedged).
+        Can be awaited from any event loop; raises LLMUnavailable.
+        """
+        loop = self._ensure_loop()
+        coro = self._chat(messages, routes, max_tokens, temperature, timeout,
+                          retries, extra or {}, headers or {}, agent, hedge)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def chat_sync(self, messages: list[dict], **kwargs) -> LLMResponse:
+        """Blocking chat() for threads without an event loop."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("chat_sync() called from the gateway loop; await chat() instead")
+        return asyncio.run_coroutine_threadsafe(self.chat(messages, **kwargs), loop).result()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "providers": {
+                name: {
+                    "configured": bool(os.getenv(cfg["key_env"], "")),
+                    "inflight": self._inflight[name],
+                    "tokens_last_minute": self._budgets[name].used(now),
+                    "tokens_per_minute": self._budgets[name].per_minute,
+                }
+                for name, cfg in PROVIDERS.items()
+            },
+            **self._stats,
+        }
+
+    def shutdown(self):
+        """Close pooled connections and stop the loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(timeout=5)
+            except Exception as e:
+                logger.debug(f"LLM gateway close failed: {e}")
+            self._client = None
+        self._semaphores.clear()
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    # ── internals (gateway loop) ──────────────────────────
+
+    def _take(self, remaining: list[Route], request: dict, errors: list[str],
+              avoid: frozenset = frozenset()) -> Optional[tuple]:
+        """Pop the next usable route (preferring providers not in `avoid`)
+        and reserve its token budget. Returns (route, cfg, api_key, payload,
+        reserved) or None."""
+        ordered = ([r for r in remaining if r.provider not in avoid]
+                   + [r for r in remaining if r.provider in avoid])
+        for route in ordered:
+            remaining.remove(route)
+            cfg = PROVIDERS.get(route.provider)
+            api_key = os.getenv(cfg["key_env"], "") if cfg else ""
+            if not api_key:
+                continue
+            msgs = request["messages"] if route.system else _merge_system(request["messages"])
+            reserved = _estimate_tokens(msgs) + (request["max_tokens"] or 0)
+            if not self._budgets[route.provider].try_reserve(reserved):
+                self._stats["budget_skips"] += 1
+                errors.append(f"{route.provider} token budget exhausted")
+                logger.info(f"LLM gateway: {errors[-1]}, skipping {route.model}")
+                continue
+            payload = {"model": route.model, "messages": msgs, **request["extra"]}
+            if request["max_tokens"] is not None:
+                payload["max_tokens"] = request["max_tokens"]
+            if request["temperature"] is not None:
+                payload["temperature"] = request["temperature"]
+            return route, cfg, api_key, payload, reserved
+        return None
+
+    async def _run(self, taken: tuple, timeout, retries, headers, agent) -> LLMResponse:
+        route, cfg, api_key, payload, reserved = taken
+        budget = self._budgets[route.provider]
+        try:
+            resp = await self._attempt(route, cfg, api_key, payload, timeout, retries,
+                                       headers, agent)
+        except _RouteFailed as e:
+            budget.settle(reserved, 0)
+            logger.warning(f"LLM call failed ({route.model}): {e}")
+            raise
+        # A cancelled hedge keeps its reservation: the provider may have spent it
+        budget.settle(reserved, resp.tokens_in + resp.tokens_out)
+        return resp
+
+    async def _chat(self, messages, routes, max_tokens, temperature, timeout,
+                    retries, extra, headers, agent, hedge) -> LLMResponse:
+        self._stats["calls"] += 1
+        request = {"messages": messages, "max_tokens": max_tokens,
+                   "temperature": temperature, "extra": extra}
+        remaining = list(routes)
+        errors: list[str] = []
+        if hedge:
+            resp = await self._hedged(remaining, request, errors, timeout, retries, headers, agent)
+            if resp is not None:
+                return resp
+        tried = 0
+        while (taken := self._take(remaining, request, errors)) is not None:
+            if tried:
+                self._stats["failovers"] += 1
+            tried += 1
+            try:
+                return await self._run(taken, timeout, retries, headers, agent)
+            except _RouteFailed as e:
+                errors.append(str(e))
+        self._stats["unavailable"] += 1
+        raise LLMUnavailable(errors[-1] if errors else "no LLM provider configured")
+
+    async def _hedged(self, remaining, request, errors, timeout, retries,
+                      headers, agent) -> Optional[LLMResponse]:
+        """Run the first route; if it is still pending after its learned
+        latency percentile, fire the next route (another provider if
+        possible) as well and keep whichever answers first. Returns None
+        when every started route failed, leaving the rest to failover."""
+        loop = asyncio.get_running_loop()
+        taken = self._take(remaining, request, errors)
+        if taken is None:
+            return None
+        self._hedges.note_call()
+        primary = taken[0]
+        pending = {asyncio.ensure_future(self._run(taken, timeout, retries, headers, agent)): primary}
+        hedge_at = loop.time() + self._hedge_delay(primary, timeout)
+        hedged = False
+        try:
+            while pending:
+                wait = None if hedged else max(0.0, hedge_at - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=wait,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if not self._hedges.try_spend():
+                        continue
+                    taken = self._take(remaining, request, errors,
+                                       avoid=frozenset(r.provider for r in pending.values()))
+                    if taken is not None:
+                        self._stats["hedges"] += 1
+                        task = asyncio.ensure_future(self._run(taken, timeout, retries, headers, agent))
+                        pending[task] = taken[0]
+                    continue
+                for task in done:
+                    route = pending.pop(task)
+                    try:
+                        resp = task.result()
+                    except _RouteFailed as e:
+                        errors.append(str(e))
+                        continue
+                    if route is not primary:
+                        self._stats["hedge_wins"] += 1
+                    return resp
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, route: Route, timeout: Optional[float]) -> float:
+        """Seconds to wait for `route` before hedging: the HEDGE_PERCENTILE of
+        its recent successful latencies (HEDGE_DEFAULT_DELAY_SEC until
+        enough samples)."""
+        samples = self._latency.get((route.provider, route.model))
+        if samples and len(samples) >= HEDGE_MIN_SAMPLES:
+            ordered = sorted(samples)
+            delay = ordered[min(len(ordered) - 1, int(HEDGE_PERCENTILE * len(ordered)))] / 1000
+        else:
+            delay = HEDGE_DEFAULT_DELAY_SEC
+        return min(max(delay, HEDGE_MIN_DELAY_SEC), timeout or DEFAULT_TIMEOUT_SEC)
+
+    async def _attempt(self, route, cfg, api_key, payload, timeout, retries,
+                       headers, agent) -> LLMResponse:
+        req_headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            **cfg["headers"],
+            **headers,
+        }
+        for attempt in range(retries + 1):
+            start = time.monotonic()
+            status = 0
+            async with self._semaphore(route.provider):
+                self._inflight[route.provider] += 1
+                try:
+                    r = await self._http().post(
+                        cfg["url"], json=payload, headers=req_headers,
+                        timeout=httpx.Timeout(timeout or DEFAULT_TIMEOUT_SEC,
+                                              connect=CONNECT_TIMEOUT_SEC),
+                    )
+                    status = r.status_code
+                    data = r.json() if status == 200 else {}
+                except (httpx.HTTPError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                    data, r = None, None
+                finally:
+                    self._inflight[route.provider] -= 1
+            latency_ms = int((time.monotonic() - start) * 1000)
+
+            if data is not None and status == 200:
+                text, error = _parse(data)
+                if error is None:
+                    usage = data.get("usage") or {}
+                    resp = LLMResponse(
+                        text=text, provider=route.provider, model=route.model,
+                        latency_ms=latency_ms,
+                        tokens_in=int(usage.get("prompt_tokens") or 0),
+                        tokens_out=int(usage.get("completion_tokens") or 0),
+                        data=data,
+                    )
+                    _record(route, agent, True, status, latency_ms, resp.tokens_in, resp.tokens_out)
+                    self._latency.setdefault(
+                        (route.provider, route.model), deque(maxlen=LATENCY_SAMPLES),
+                    ).append(latency_ms)
+                    return resp
+            elif r is not None:
+                error = f"HTTP {status}"
+            _record(route, agent, False, status, latency_ms)
+
+            if attempt >= retries or status in (400, 401, 402, 403, 404):
+                break
+            if status == 429:
+                delay = _retry_after(r)
+                if delay is None or delay > RETRY_AFTER_CAP_SEC:
+                    break  # a long cool-down: let the next route take it
+            else:
+                delay = BACKOFF_SEC * (2 ** attempt)
+            await asyncio.sleep(delay)
+        raise _RouteFailed(error)
+
+
+class _RouteFailed(Exception):
+    pass
+
+
+def _merge_system(messages: list[dict]) -> list[dict]:
+    system = "\n\n".join(m["content"] for m in messages if m.get("role") == "system")
+    rest = [m for m in messages if m.get("role") != "system"]
+    if not system or not rest or not isinstance(rest[0].get("content"), str):
+        return rest or messages
+    first = {**rest[0], "content": f"{system}\n\n---\n\n{rest[0]['content']}"}
+    return [first] + rest[1:]
+
+
+def _parse(data: dict) -> tuple[str, Optional[str]]:
+    """(text, error) from a chat completion body; error is None on success."""
+    if not isinstance(data, dict):
+        return "", "non-object response"
+    if "error" in data and not data.get("choices"):
+        err = data["error"]
+        return "", err.get("message", "API error") if isinstance(err, dict) else str(err)
+    choices = data.get("choices") or []
+    if not choices:
+        return "", "Empty choices in response"
+    content = (choices[0].get("message") or {}).get("content") or ""
+    if isinstance(content, list):
+        content = "".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return content, None
+
+
+def _retry_after(r: Optional[httpx.Response]) -> Optional[float]:
+    if r is None:
+        return None
+    try:
+        return float(r.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+def _record(route: Route, agent: str, success: bool, status: int, latency_ms: int,
+            tokens_in: int = 0, tokens_out: int = 0):
+    try:
+        from .rate_monitor import record_api_call
+        record_api_call(route.provider, agent=agent, success=success, status_code=status,
+                        latency_ms=latency_ms, model=route.model,
+                        tokens_in=tokens_in, tokens_out=tokens_out)
+    except Exception as e:
+        logger.debug(f"rate_monitor record failed: {e}")
+
+
+# ──────────────────────────────────────────────────────────
+# Module-level API
+# ──────────────────────────────────────────────────────────
+
+_gateway = LLMGateway()
+atexit.register(lambda: _gateway.shutdown())
+
+
+async def chat(messages: list[dict], **kwargs) -> LLMResponse:
+    """Chat completion with failover (see LLMGateway.chat). Raises LLMUnavailable."""
+    return await _gateway.chat(messages, **kwargs)
+
+
+def chat_sync(messages: list[dict], **kwargs) -> LLMResponse:
+    """Blocking chat(). Raises LLMUnavailable."""
+    return _gateway.chat_sync(messages, **kwargs)
+
+
+async def complete(prompt: str, system: str = "", **kwargs) -> Optional[str]:
+    """Text of the first successful route, or None when all fail."""
+    try:
+        return (await chat(build_messages(prompt, system), **kwargs)).text
+    except LLMUnavailable as e:
+        logger.warning(f"LLM unavailable: {e}")
+        return None
+
+
+def complete_sync(prompt: str, system: str = "", **kwargs) -> Optional[str]:
+    """Blocking complete()."""
+    try:
+        return chat_sync(build_messages(prompt, system), **kwargs).text
+    except LLMUnavailable as e:
+        logger.warning(f"LLM unavailable: {e}")
+        return None
+
+
+def get_gateway_status() -> dict:
+    """Per-provider in-flight requests and token budget use, plus counters."""
+    return _gateway.status()
+
+
+def shutdown_gateway():
+    _gateway.shutdown()
@@ -1,8 +1,9 @@
 """
 Knowledge Base MCP Server — search and read knowledge/ files.
 
-Provides simple text search across the corporation's knowledge base
-files (company info, team, content guidelines).
+Provides ranked search across the corporation's knowledge base files
+(company info, team, content guidelines) via the shared in-memory index
+in src/knowledge_index.py.
 
 Run: python run_kb_mcp.py
 """
@@ -12,6 +13,8 @@ import os
 
 from mcp.server.fastmcp import FastMCP
 
+from ..knowledge_index import get_index
+
 logger = logging.getLogger(__name__)
 
 mcp = FastMCP(
@@ -40,42 +43,29 @@ def _list_kb_files() -> list[str]:
 
 @mcp.tool()
 def kb_search(query: str) -> str:
-    """Search across all knowledge base files for a query string.
+    """Search across all knowledge base files, best matches first.
 
     Args:
-        query: Search term (case-insensitive substring match)
+        query: Search words (case-insensitive, word forms are matched);
+            put a phrase in double quotes to match it exactly
     """
     kb = _kb_dir()
     if not os.path.isdir(kb):
         return "Knowledge base directory not found."
 
-    query_lower = query.lower()
-    results = []
-
-    for filename in _list_kb_files():
-        filepath = os.path.join(kb, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-        except Exception:
-            continue
-
-        lines = content.split("\n")
-        matches = []
-        for i, line in enumerate(lines, 1):
-            if query_lower in line.lower():
-                # Show context: line before, match, line after
-                start = max(0, i - 2)
-                end = min(len(lines), i + 1)
-                context = "\n".join(lines[start:end])
-                matches.append(f"  Line {i}: {context.strip()}")
-
-        if matches:
-            results.append(f"📄 {filename} ({len(matches)} matches):\n" + "\n".join(matches[:5]))
-
-    if not results:
+    hits = get_index(kb).search(query, limit=20)
+    if not hits:
         return f"No matches for '{query}' in knowledge base."
 
+    by_file: dict[str, list] = {}
+    for hit in hits:  # ranked order; the first hit of a file places the file
+        by_file.setdefault(hit.filename, []).append(hit)
+
+    results = []
+    for filename, file_hits in by_file.items():
+        matches = [f"  Line {h.line}: {h.snippet}" for h in file_hits[:5]]
+        results.append(f"📄 {filename} ({len(file_hits)} matches):\n" + "\n".join(matches))
+
     return "\n\n".join(results)
 
 
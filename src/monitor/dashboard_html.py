@@ -342,6 +342,7 @@ const EVENT_ICONS = {
 };
 
 let STATE = {agents:{}, events:[], quality:{}, api_usage:{}, task_pool:{}, active_tasks:[], alerts:[]};
+let RAW = {};  // last snapshot as received; SSE patches apply to it
 
 // ── Clock ──
 function updateClock() {
@@ -376,6 +377,12 @@ function connectSSE() {
     } catch(err) { console.error("SSE parse error:", err); }
   });
 
+  es.addEventListener("patch", (e) => {
+    try {
+      applySnapshot(applyPatch(RAW, JSON.parse(e.data)));
+    } catch(err) { console.error("SSE patch error:", err); }
+  });
+
   es.onopen = () => {
     dot.className = "conn-dot connected";
     dot.title = "Connected";
@@ -387,8 +394,28 @@ function connectSSE() {
   };
 }
 
+// ── Apply JSON patch (add / remove / replace) ──
+function applyPatch(doc, ops) {
+  for (const op of ops) {
+    if (op.path === "") { doc = op.value; continue; }
+    const tokens = op.path.split("/").slice(1)
+      .map(t => t.replace(/~1/g, "/").replace(/~0/g, "~"));
+    const last = tokens.pop();
+    let target = doc;
+    for (const t of tokens) target = target[t];
+    if (op.op === "remove") {
+      if (Array.isArray(target)) target.splice(Number(last), 1);
+      else delete target[last];
+    } else {
+      target[last] = op.value;
+    }
+  }
+  return doc;
+}
+
 // ── Apply snapshot ──
 function applySnapshot(data) {
+  RAW = data;
   STATE.agents = data.agents || {};
   STATE.events = data.events || [];
   STATE.quality = data.quality || {};
@@ -3,12 +3,10 @@ Zinin Corp — Real-Time Agent Monitoring Dashboard
 
 Starlette ASGI app with SSE for live updates.
 Reads from existing activity_tracker, rate_monitor, task_pool.
+All SSE clients share one snapshot producer (see snapshot_hub.py).
 Zero new dependencies (starlette/sse-starlette/uvicorn via mcp).
 """
 
-import asyncio
-import hashlib
-import json
 import logging
 from datetime import datetime
 
@@ -28,12 +26,11 @@ from ..activity_tracker import (
 from ..rate_monitor import get_all_usage, get_rate_alerts
 from ..task_pool import get_pool_summary, get_all_tasks, TaskStatus
 from .dashboard_html import render_dashboard_html
+from .snapshot_hub import SnapshotHub
 from .webhook_tribute import tribute_webhook
 
 logger = logging.getLogger(__name__)
 
-SSE_POLL_INTERVAL = 3  # seconds
-
 
 # ── Endpoints ──────────────────────────────────────────────
 
@@ -44,7 +41,7 @@ async def index(request):
 
 async def api_snapshot(request):
     """Full state snapshot (used on initial page load)."""
-    return JSONResponse(_build_snapshot())
+    return JSONResponse(_hub.latest() or _build_snapshot())
 
 
 async def api_agents(request):
@@ -64,24 +61,15 @@ async def api_events(request):
 
 
 async def event_stream(request):
-    """SSE stream — pushes snapshot every 3s when data changes."""
+    """SSE stream — full snapshot on connect ("update"), then deltas ("patch")."""
     async def generate():
-        last_hash = ""
-        while True:
-            await asyncio.sleep(SSE_POLL_INTERVAL)
-            try:
-                snapshot = _build_snapshot()
-                current_hash = _hash_snapshot(snapshot)
-                if current_hash != last_hash:
-                    last_hash = current_hash
-                    yield {
-                        "event": "update",
-                        "data": json.dumps(
-                            snapshot, default=str, ensure_ascii=False
-                        ),
-                    }
-            except Exception as e:
-                logger.warning(f"SSE snapshot error: {e}")
+        queue = await _hub.subscribe()
+        try:
+            while True:
+                event, data = await queue.get()
+                yield {"event": event, "data": data}
+        finally:
+            _hub.unsubscribe(queue)
 
     return EventSourceResponse(generate())
 
@@ -139,10 +127,7 @@ def _build_snapshot() -> dict:
     }
 
 
-def _hash_snapshot(snapshot: dict) -> str:
-    """Quick MD5 hash to detect data changes."""
-    raw = json.dumps(snapshot, sort_keys=True, default=str)
-    return hashlib.md5(raw.encode()).hexdigest()
+_hub = SnapshotHub(lambda: _build_snapshot())
 
 
 # ── App factory ────────────────────────────────────────────
@@ -0,0 +1,234 @@
+"""
+Zinin Corp — Shared snapshot producer for the monitor SSE stream
+
+One producer task per process builds the dashboard snapshot and fans it
+out to every connected client: the full snapshot on connect ("update"),
+then JSON-patch style deltas ("patch"). The cost of a refresh no longer
+grows with the number of open tabs.
+
+The producer wakes on EventBus events (task lifecycle, agent execution,
+quality scores). The bots usually run in other processes, so it also
+refreshes every SSE_POLL_INTERVAL seconds. It only runs while at least
+one client is connected.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SSE_POLL_INTERVAL = 3  # seconds, fallback when no EventBus event arrives
+DEBOUNCE_SEC = 0.25  # coalesce bursts of events into one refresh
+CLIENT_QUEUE_SIZE = 16  # a client this far behind gets a full resync
+
+
+def _wake_events() -> tuple:
+    from ..event_bus import (
+        TASK_CREATED, TASK_ASSIGNED, TASK_STARTED, TASK_COMPLETED,
+        TASK_UNBLOCKED, TASK_APPROVED, TASK_REJECTED, TASK_RETRY,
+        TASK_APPROVAL_REQUIRED,
+        AGENT_EXECUTION_STARTED, AGENT_EXECUTION_COMPLETED,
+        QUALITY_SCORED,
+    )
+    return (
+        TASK_CREATED, TASK_ASSIGNED, TASK_STARTED, TASK_COMPLETED,
+        TASK_UNBLOCKED, TASK_APPROVED, TASK_REJECTED, TASK_RETRY,
+        TASK_APPROVAL_REQUIRED,
+        AGENT_EXECUTION_STARTED, AGENT_EXECUTION_COMPLETED,
+        QUALITY_SCORED,
+    )
+
+
+# ── JSON patch (RFC 6902 subset: add / remove / replace) ───
+
+def _escape(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    """Patch operations turning `old` into `new`.
+
+    Objects are diffed key by key; lists and scalars that differ are
+    replaced whole (dashboard lists are short and mostly shift by one).
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(doc: Any, ops: list[dict]) -> Any:
+    """Apply operations from json_diff() to `doc` (mutated) and return it."""
+    for op in ops:
+        if op["path"] == "":
+            doc = op.get("value")
+            continue
+        *parents, last = [_unescape(t) for t in op["path"].split("/")[1:]]
+        target = doc
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            last = int(last)
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return doc
+
+
+def snapshot_patch(old: dict, new: dict) -> list[dict]:
+    """Delta between two snapshots; empty if only the timestamp moved."""
+    ops = json_diff(
+        {k: v for k, v in old.items() if k != "timestamp"},
+        {k: v for k, v in new.items() if k != "timestamp"},
+    )
+    if ops and "timestamp" in new:
+        ops.append({"op": "replace", "path": "/timestamp", "value": new["timestamp"]})
+    return ops
+
+
+# ── Hub ────────────────────────────────────────────────────
+
+class SnapshotHub:
+    """Builds snapshots once and fans them out to SSE client queues.
+
+    Clients receive ("update", full_snapshot_json) on subscribe and after
+    falling behind, otherwise ("patch", ops_json).
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], dict],
+        interval: float = SSE_POLL_INTERVAL,
+        debounce: float = DEBOUNCE_SEC,
+        wake_on: Optional[tuple] = None,
+    ):
+        self._build = build
+        self._interval = interval
+        self._debounce = debounce
+        self._wake_on = _wake_events() if wake_on is None else wake_on
+        self._clients: set[asyncio.Queue] = set()
+        self._snapshot: Optional[dict] = None
+        self._snapshot_json: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.builds = 0
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def latest(self) -> Optional[dict]:
+        """Last built snapshot while the producer is running, else None."""
+        return self._snapshot if self._task is not None else None
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Register a client; its queue starts with the full snapshot."""
+        if self._task is None:
+            self._start()
+        if self._snapshot_json is None:
+            await self._refresh(only_if_missing=True)
+            if self._task is None:  # last other client left while we waited
+                self._start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        queue.put_nowait(("update", self._snapshot_json))
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Drop a client; the producer stops with the last one."""
+        self._clients.discard(queue)
+        if not self._clients and self._task is not None:
+            self._stop()
+
+    def notify(self, event=None) -> None:
+        """Request a refresh. Safe to call from any thread (EventBus callback)."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(wake.set)
+
+    # ── internals ──
+
+    def _start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._refresh_lock = asyncio.Lock()
+        self._task = self._loop.create_task(self._run())
+        from ..event_bus import get_event_bus
+        bus = get_event_bus()
+        for event_type in self._wake_on:
+            bus.on(event_type, self.notify)
+
+    def _stop(self) -> None:
+        from ..event_bus import get_event_bus
+        bus = get_event_bus()
+        for event_type in self._wake_on:
+            bus.off(event_type, self.notify)
+        self._task.cancel()
+        self._task = None
+        self._loop = None
+        self._wake = None
+        self._snapshot = None
+        self._snapshot_json = None
+
+    async def _run(self) -> None:
+        wake = self._wake
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                await asyncio.sleep(self._debounce)
+            wake.clear()
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.warning(f"SSE snapshot error: {e}")
+
+    async def _refresh(self, only_if_missing: bool = False) -> None:
+        async with self._refresh_lock:
+            if only_if_missing and self._snapshot_json is not None:
+                return  # another subscriber built it while we waited
+            raw = await asyncio.to_thread(
+                lambda: json.dumps(self._build(), default=str, ensure_ascii=False)
+            )
+            self.builds += 1
+            snapshot = json.loads(raw)
+            previous = self._snapshot
+            self._snapshot, self._snapshot_json = snapshot, raw
+            if previous is None:
+                return
+            ops = snapshot_patch(previous, snapshot)
+            if ops:
+                self._publish(("patch", json.dumps(ops, ensure_ascii=False)))
+
+    def _publish(self, message: tuple) -> None:
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client is behind: replace its backlog with one full snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("update", self._snapshot_json))
@@ -13,6 +13,7 @@ Env vars (per-project keys, fallback to TRIBUTE_API_KEY):
   TRIBUTE_API_KEY_KRMKTL, TRIBUTE_API_KEY_SBORKA, TRIBUTE_API_KEY_BOTANICA
 """
 
+import asyncio
 import json
 import logging
 import os
@@ -106,10 +107,10 @@ def _get_display_name(project: Optional[str]) -> str:
 # ── Revenue Auto-Update ──────────────────────────────────
 
 def _update_revenue_from_event(event_data: dict, channel: str):
-    """Recalculate channel MRR after a subscription event."""
+    """Apply a subscription event to the channel's subscriber table and MRR."""
     try:
-        from ..revenue_tracker import recalculate_channel_from_events
-        result = recalculate_channel_from_events(channel)
+        from ..revenue_tracker import apply_subscription_event
+        result = apply_subscription_event(event_data, channel)
         logger.info(
             "Revenue auto-updated for %s: MRR=$%.2f, members=%d",
             channel,
@@ -231,11 +232,12 @@ async def tribute_webhook(request: Request) -> JSONResponse:
     if channel:
         event_data["_channel"] = channel
 
-    TributeWebhookVerifier.process_event(event_data)
+    stored = TributeWebhookVerifier.process_event(event_data)
 
-    # 5. Auto-update revenue (for subscription events)
-    if event_type in SUBSCRIPTION_EVENTS and channel:
-        _update_revenue_from_event(event_data, channel)
+    # 5. Auto-update revenue (for new subscription events; retries are skipped).
+    # Off the event loop: file I/O and, with a cold forex cache, an HTTP fetch
+    if event_type in SUBSCRIPTION_EVENTS and channel and stored:
+        await asyncio.to_thread(_update_revenue_from_event, event_data, channel)
 
     # 6. Send notifications (async, non-blocking for response)
     await _send_notifications(event_data, project, channel)
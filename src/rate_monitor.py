@@ -4,15 +4,30 @@
 Tracks API call counts per provider and time window.
 Alerts when usage approaches configured limits.
 Persisted to disk as JSON for cross-restart continuity.
+
+Calls are aggregated into per-provider, per-minute buckets (totals,
+failures, latency histogram, prompt/completion tokens). Recording a call only touches memory;
+a background thread merges the buckets into a compact on-disk snapshot
+every SNAPSHOT_INTERVAL_SEC.
 """
 
+import atexit
 import json
 import logging
 import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional
 from pydantic import BaseModel, Field
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — non-POSIX
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 # ──────────────────────────────────────────────────────────
@@ -65,6 +80,9 @@ class ApiCall(BaseModel):
     success: bool = True
     status_code: int = 0
     latency_ms: int = 0
+    model: str = ""
+    tokens_in: int = 0
+    tokens_out: int = 0
 
 
 class RateLimitAlert(BaseModel):
@@ -78,19 +96,101 @@ class RateLimitAlert(BaseModel):
 
 
 class RateMonitorStore(BaseModel):
-    """Persistent store for API call tracking."""
+    """On-disk snapshot: minute buckets per provider + recent calls/alerts.
+
+    buckets[provider][str(epoch_minute)] is a counter row, see _TOTAL etc.
+    calls holds only the last MAX_CALLS raw calls, for debugging.
+    """
+    version: int = 2
+    buckets: dict[str, dict[str, list[int]]] = Field(default_factory=dict)
     calls: list[ApiCall] = Field(default_factory=list)
     alerts: list[RateLimitAlert] = Field(default_factory=list)
 
 
 # ──────────────────────────────────────────────────────────
-# Persistence
+# Buckets
 # ──────────────────────────────────────────────────────────
 
-MAX_CALLS = 10000  # Keep last 10K calls
+MAX_CALLS = 200  # Raw calls kept for debugging; counts come from buckets
 MAX_ALERTS = 200
+RETENTION_MINUTES = 7 * 24 * 60
+SNAPSHOT_INTERVAL_SEC = 30.0
+REFRESH_INTERVAL_SEC = 5.0  # how often readers look for other processes' snapshots
+
+# Latency histogram bin upper bounds (ms); the last bin is "slower than 30s"
+LATENCY_BOUNDS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Counter row layout; token counters come last so older rows pad with zeros
+_TOTAL, _FAILED, _LAT_SUM, _LAT_N, _HIST = 0, 1, 2, 3, 4
+_TOK_IN = _HIST + len(LATENCY_BOUNDS_MS) + 1
+_TOK_OUT = _TOK_IN + 1
+_ROW_LEN = _TOK_OUT + 1
+
+Buckets = dict[str, dict[int, list[int]]]
+
+
+def _new_row() -> list[int]:
+    return [0] * _ROW_LEN
+
+
+def _add_call(row: list[int], success: bool, latency_ms: int,
+              tokens_in: int = 0, tokens_out: int = 0):
+    row[_TOTAL] += 1
+    row[_TOK_IN] += tokens_in
+    row[_TOK_OUT] += tokens_out
+    if not success:
+        row[_FAILED] += 1
+    if latency_ms > 0:
+        row[_LAT_SUM] += latency_ms
+        row[_LAT_N] += 1
+        row[_HIST + bisect_left(LATENCY_BOUNDS_MS, latency_ms)] += 1
+
+
+def _merge_row(into: list[int], row: list[int]):
+    for i, v in enumerate(row[:_ROW_LEN]):
+        into[i] += v
 
 
+def _merge_buckets(into: Buckets, other: Buckets):
+    for provider, rows in other.items():
+        target = into.setdefault(provider, {})
+        for minute, row in rows.items():
+            _merge_row(target.setdefault(minute, _new_row()), row)
+
+
+def _percentile(row: list[int], q: float) -> int:
+    """Latency percentile estimated from the histogram (bin upper bound)."""
+    n = row[_LAT_N]
+    if not n:
+        return 0
+    rank = q * n
+    seen = 0
+    for i, bound in enumerate(LATENCY_BOUNDS_MS):
+        seen += row[_HIST + i]
+        if seen >= rank:
+            return bound
+    return LATENCY_BOUNDS_MS[-1]
+
+
+def _calls_to_buckets(calls: list[dict]) -> Buckets:
+    """Aggregate raw call records (pre-bucket store format) into buckets."""
+    buckets: Buckets = {}
+    for c in calls:
+        try:
+            minute = int(datetime.fromisoformat(c["timestamp"]).timestamp() // 60)
+            provider = c["provider"]
+        except (KeyError, ValueError, TypeError):
+            continue
+        row = buckets.setdefault(provider, {}).setdefault(minute, _new_row())
+        _add_call(row, bool(c.get("success", True)), int(c.get("latency_ms") or 0),
+                  int(c.get("tokens_in") or 0), int(c.get("tokens_out") or 0))
+    return buckets
+
+
+# ──────────────────────────────────────────────────────────
+# Persistence
+# ──────────────────────────────────────────────────────────
+
 def _store_path() -> str:
     for p in ["/app/data/rate_monitor.json", "data/rate_monitor.json"]:
         parent = os.path.dirname(p)
@@ -100,26 +200,283 @@ def _store_path() -> str:
     return "data/rate_monitor.json"
 
 
-def _load_store() -> RateMonitorStore:
-    path = _store_path()
-    if os.path.exists(path):
+class _RateState:
+    """In-memory counters for one snapshot path.
+
+    `base` mirrors the last snapshot read from disk; `delta` holds this
+    process's calls since its last flush. Bots run as separate processes,
+    so a flush re-reads the snapshot under a file lock, adds the delta
+    and writes the result back — counters are additive, nothing is lost.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self.base: Buckets = {}
+        self.base_calls: list[dict] = []
+        self.base_alerts: list[dict] = []
+        self.delta: Buckets = {}
+        self.delta_calls: deque[dict] = deque(maxlen=MAX_CALLS)
+        self.delta_alerts: list[dict] = []
+        self._day_cache: dict[str, tuple[int, int]] = {}
+        self._sig: Optional[tuple] = None
+        self._last_refresh = 0.0
+        self._reload()
+
+    # ── disk ──────────────────────────────────────────────
+
+    def _stat_sig(self) -> Optional[tuple]:
         try:
-            with open(path, "r", encoding="utf-8") as f:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_disk(self) -> tuple[Buckets, list[dict], list[dict]]:
+        try:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                return {}, [], []
+            with open(self.path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-            return RateMonitorStore.model_validate(data)
         except Exception as e:
             logger.warning(f"Failed to load rate monitor store: {e}")
-    return RateMonitorStore()
+            return {}, [], []
+        if not isinstance(data, dict):
+            return {}, [], []
+
+        calls = [c for c in data.get("calls", []) if isinstance(c, dict)]
+        alerts = [a for a in data.get("alerts", []) if isinstance(a, dict)]
+        if "version" not in data:
+            # Old format: every call stored individually
+            return _calls_to_buckets(calls), calls[-MAX_CALLS:], alerts[-MAX_ALERTS:]
+
+        buckets: Buckets = {}
+        for provider, rows in (data.get("buckets") or {}).items():
+            parsed = buckets.setdefault(provider, {})
+            for minute, row in rows.items():
+                try:
+                    parsed[int(minute)] = (list(row) + [0] * _ROW_LEN)[:_ROW_LEN]
+                except (ValueError, TypeError):
+                    continue
+        return buckets, calls, alerts
+
+    def _write_disk(self, buckets: Buckets, calls: list[dict], alerts: list[dict]):
+        data = {
+            "version": 2,
+            "buckets": {
+                p: {str(m): row for m, row in sorted(rows.items())}
+                for p, rows in buckets.items() if rows
+            },
+            "calls": calls,
+            "alerts": alerts,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"), default=str)
+        os.replace(tmp, self.path)
+
+    def _reload(self):
+        self._sig = self._stat_sig()
+        self.base, self.base_calls, self.base_alerts = self._read_disk()
+        self._day_cache.clear()
+        self._last_refresh = time.monotonic()
+
+    def refresh(self, force: bool = False):
+        """Pick up snapshots written by other processes (stat-throttled)."""
+        if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL_SEC:
+            return
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            if self._stat_sig() != self._sig:
+                self._reload()
+
+    def flush(self):
+        """Merge this process's delta into the on-disk snapshot."""
+        with self._lock:
+            if not self.delta and not self.delta_calls and not self.delta_alerts:
+                return
+            lock_file = None
+            try:
+                if fcntl is not None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    lock_file = open(self.path + ".lock", "a")
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                buckets, calls, alerts = self._read_disk()
+                _merge_buckets(buckets, self.delta)
+                oldest = int(time.time() // 60) - RETENTION_MINUTES
+                for rows in buckets.values():
+                    for minute in [m for m in rows if m < oldest]:
+                        del rows[minute]
+                calls = (calls + list(self.delta_calls))[-MAX_CALLS:]
+                alerts = (alerts + self.delta_alerts)[-MAX_ALERTS:]
+                self._write_disk(buckets, calls, alerts)
+            except Exception as e:
+                logger.error(f"Failed to save rate monitor store: {e}")
+                return
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+            self.base, self.base_calls, self.base_alerts = buckets, calls, alerts
+            self.delta = {}
+            self.delta_calls.clear()
+            self.delta_alerts = []
+            self._day_cache.clear()
+            self._sig = self._stat_sig()
+
+    def replace(self, store: RateMonitorStore):
+        """Overwrite the snapshot with `store` and drop unflushed calls."""
+        with self._lock:
+            data = store.model_dump()
+            try:
+                self._write_disk(
+                    {p: {int(m): row for m, row in rows.items()}
+                     for p, rows in data["buckets"].items()},
+                    data["calls"][-MAX_CALLS:],
+                    data["alerts"][-MAX_ALERTS:],
+                )
+            except Exception as e:
+                logger.error(f"Failed to save rate monitor store: {e}")
+            self.delta = {}
+            self.delta_calls.clear()
+            self.delta_alerts = []
+            self._reload()
+
+    # ── hot path ──────────────────────────────────────────
+
+    def record(self, provider: str, agent: str, success: bool,
+               status_code: int, latency_ms: int, now: float,
+               model: str = "", tokens_in: int = 0,
+               tokens_out: int = 0) -> Optional[RateLimitAlert]:
+        minute = int(now // 60)
+        with self._lock:
+            rows = self.delta.setdefault(provider, {})
+            row = rows.get(minute)
+            if row is None:
+                row = rows[minute] = _new_row()
+            _add_call(row, success, latency_ms, tokens_in, tokens_out)
+            self.delta_calls.append({
+                "provider": provider,
+                "timestamp": datetime.fromtimestamp(now).isoformat(),
+                "agent": agent,
+                "success": success,
+                "status_code": status_code,
+                "latency_ms": latency_ms,
+                "model": model,
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+            })
+            alert = _check_limits(self, provider, now)
+            if alert:
+                self.delta_alerts.append(alert.model_dump())
+        _ensure_flusher()
+        return alert
+
+    # ── queries ───────────────────────────────────────────
+
+    def total_at(self, provider: str, minute: int) -> int:
+        total = 0
+        for buckets in (self.base, self.delta):
+            row = buckets.get(provider, {}).get(minute)
+            if row:
+                total += row[_TOTAL]
+        return total
+
+    def window(self, provider: str, minutes: int, now_minute: int) -> list[int]:
+        """Sum of the `minutes` buckets ending at now_minute (inclusive)."""
+        agg = _new_row()
+        with self._lock:
+            for buckets in (self.base, self.delta):
+                rows = buckets.get(provider)
+                if not rows:
+                    continue
+                for minute in range(now_minute - minutes + 1, now_minute + 1):
+                    row = rows.get(minute)
+                    if row:
+                        _merge_row(agg, row)
+        return agg
+
+    def day_count(self, provider: str, now_minute: int) -> int:
+        """Calls over the last 1440 buckets; the closed 1439 are cached per minute."""
+        cached = self._day_cache.get(provider)
+        if cached is None or cached[0] != now_minute:
+            closed = self.window(provider, 24 * 60 - 1, now_minute - 1)[_TOTAL]
+            cached = self._day_cache[provider] = (now_minute, closed)
+        return cached[1] + self.total_at(provider, now_minute)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets: Buckets = {}
+            _merge_buckets(buckets, self.base)
+            _merge_buckets(buckets, self.delta)
+            return {
+                "version": 2,
+                "buckets": {p: {str(m): row for m, row in sorted(rows.items())}
+                            for p, rows in buckets.items()},
+                "calls": (self.base_calls + list(self.delta_calls))[-MAX_CALLS:],
+                "alerts": (self.base_alerts + self.delta_alerts)[-MAX_ALERTS:],
+            }
+
+    def alerts(self) -> list[dict]:
+        with self._lock:
+            return self.base_alerts + self.delta_alerts
+
+
+_states: dict[str, _RateState] = {}
+_states_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+
+def _rate_state() -> _RateState:
+    """Get the in-memory counters for the current _store_path()."""
+    path = _store_path()
+    state = _states.get(path)
+    if state is None:
+        with _states_lock:
+            state = _states.get(path)
+            if state is None:
+                state = _states[path] = _RateState(path)
+    return state
 
 
-def _save_store(store: RateMonitorStore):
-    path = _store_path()
+def _flusher_loop():
+    while True:
+        _flush_wakeup.wait(SNAPSHOT_INTERVAL_SEC)
+        _flush_wakeup.clear()
+        flush()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None:
+        with _states_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(
+                    target=_flusher_loop, name="rate-monitor-flusher", daemon=True,
+                )
+                _flusher.start()
+                atexit.register(flush)
+
+
+def flush():
+    """Write all buffered counters to disk now."""
+    for state in list(_states.values()):
+        state.flush()
+
+
+def _load_store() -> RateMonitorStore:
+    state = _rate_state()
+    state.refresh(force=True)
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(store.model_dump(), f, indent=2, ensure_ascii=False, default=str)
+        return RateMonitorStore.model_validate(state.snapshot())
     except Exception as e:
-        logger.error(f"Failed to save rate monitor store: {e}")
+        logger.warning(f"Failed to load rate monitor store: {e}")
+        return RateMonitorStore()
+
+
+def _save_store(store: RateMonitorStore):
+    _rate_state().replace(store)
 
 
 # ──────────────────────────────────────────────────────────
@@ -132,60 +489,31 @@ def record_api_call(
     success: bool = True,
     status_code: int = 200,
     latency_ms: int = 0,
+    model: str = "",
+    tokens_in: int = 0,
+    tokens_out: int = 0,
 ) -> Optional[RateLimitAlert]:
     """Record an API call and check rate limits.
 
+    tokens_in/tokens_out are the prompt/completion tokens reported by LLM
+    providers (0 for other APIs).
     Returns a RateLimitAlert if usage exceeds warning threshold, else None.
     """
-    store = _load_store()
-
-    call = ApiCall(
-        provider=provider,
-        agent=agent,
-        success=success,
-        status_code=status_code,
-        latency_ms=latency_ms,
+    return _rate_state().record(
+        provider, agent, success, status_code, latency_ms, time.time(),
+        model, tokens_in, tokens_out,
     )
-    store.calls.append(call)
-
-    # Trim old calls
-    if len(store.calls) > MAX_CALLS:
-        store.calls = store.calls[-MAX_CALLS:]
-
-    # Check rate limits
-    alert = _check_limits(store, provider)
-    if alert:
-        store.alerts.append(alert)
-        if len(store.alerts) > MAX_ALERTS:
-            store.alerts = store.alerts[-MAX_ALERTS:]
-
-    _save_store(store)
-    return alert
 
 
 def get_provider_usage(provider: str, minutes: int = 60) -> dict:
     """Get usage stats for a provider over the given time window."""
-    store = _load_store()
-    cutoff = datetime.now() - timedelta(minutes=minutes)
+    state = _rate_state()
+    state.refresh()
+    row = state.window(provider, minutes, int(time.time() // 60))
 
-    calls = []
-    for c in store.calls:
-        if c.provider != provider:
-            continue
-        try:
-            ts = datetime.fromisoformat(c.timestamp)
-            if ts >= cutoff:
-                calls.append(c)
-        except (ValueError, TypeError):
-            continue
-
-    total = len(calls)
-    success = sum(1 for c in calls if c.success)
-    failed = total - success
-    avg_latency = 0
-    if calls:
-        latencies = [c.latency_ms for c in calls if c.latency_ms > 0]
-        avg_latency = sum(latencies) // len(latencies) if latencies else 0
+    total = row[_TOTAL]
+    failed = row[_FAILED]
+    avg_latency = row[_LAT_SUM] // row[_LAT_N] if row[_LAT_N] else 0
 
     limits = PROVIDER_LIMITS.get(provider, {})
 
@@ -193,9 +521,13 @@ def get_provider_usage(provider: str, minutes: int = 60) -> dict:
         "provider": provider,
         "window_minutes": minutes,
         "total_calls": total,
-        "success": success,
+        "success": total - failed,
         "failed": failed,
         "avg_latency_ms": avg_latency,
+        "p50_latency_ms": _percentile(row, 0.5),
+        "p95_latency_ms": _percentile(row, 0.95),
+        "tokens_in": row[_TOK_IN],
+        "tokens_out": row[_TOK_OUT],
         "rpm_limit": limits.get("requests_per_minute", 0),
         "daily_limit": limits.get("requests_per_day", 0),
     }
@@ -211,16 +543,17 @@ def get_all_usage(minutes: int = 60) -> dict:
 
 def get_rate_alerts(hours: int = 24) -> list[RateLimitAlert]:
     """Get recent rate limit alerts."""
-    store = _load_store()
+    state = _rate_state()
+    state.refresh()
     cutoff = datetime.now() - timedelta(hours=hours)
 
     alerts = []
-    for a in store.alerts:
+    for a in state.alerts():
         try:
-            ts = datetime.fromisoformat(a.timestamp)
+            ts = datetime.fromisoformat(a["timestamp"])
             if ts >= cutoff:
-                alerts.append(a)
-        except (ValueError, TypeError):
+                alerts.append(RateLimitAlert.model_validate(a))
+        except (KeyError, ValueError, TypeError):
             continue
     return alerts
 
@@ -239,7 +572,9 @@ def get_usage_summary() -> str:
         failed = usage["failed"]
         avg_lat = usage["avg_latency_ms"]
         fail_str = f" | ❌ {failed} ошибок" if failed else ""
-        lines.append(f"  {name}: {total} запросов{fail_str} | ~{avg_lat}ms")
+        tokens = usage["tokens_in"] + usage["tokens_out"]
+        tok_str = f" | {tokens:,} токенов" if tokens else ""
+        lines.append(f"  {name}: {total} запросов{fail_str} | ~{avg_lat}ms{tok_str}")
 
     if not any(all_usage[p]["total_calls"] for p in all_usage):
         lines.append("  Нет API-вызовов за последний час")
@@ -257,18 +592,21 @@ def get_usage_summary() -> str:
 # Internal helpers
 # ──────────────────────────────────────────────────────────
 
-def _check_limits(store: RateMonitorStore, provider: str) -> Optional[RateLimitAlert]:
+def _check_limits(state: _RateState, provider: str, now: float) -> Optional[RateLimitAlert]:
     """Check if provider usage exceeds warning thresholds."""
     limits = PROVIDER_LIMITS.get(provider)
     if not limits:
         return None
 
-    now = datetime.now()
+    minute = int(now // 60)
     warn_pct = limits.get("warn_pct", 80) / 100.0
 
-    # Check per-minute
-    minute_ago = now - timedelta(minutes=1)
-    minute_calls = _count_calls(store, provider, minute_ago)
+    # Check per-minute: sliding window estimated from the current and
+    # previous bucket, the latter weighted by how much of it is still in range
+    elapsed = (now % 60) / 60
+    minute_calls = state.total_at(provider, minute) + int(
+        state.total_at(provider, minute - 1) * (1 - elapsed)
+    )
     rpm_limit = limits.get("requests_per_minute", 0)
     if rpm_limit and minute_calls >= rpm_limit * warn_pct:
         pct = (minute_calls / rpm_limit) * 100
@@ -281,8 +619,7 @@ def _check_limits(store: RateMonitorStore, provider: str) -> Optional[RateLimitA
         )
 
     # Check per-day
-    day_ago = now - timedelta(hours=24)
-    day_calls = _count_calls(store, provider, day_ago)
+    day_calls = state.day_count(provider, minute)
     daily_limit = limits.get("requests_per_day", 0)
     if daily_limit and day_calls >= daily_limit * warn_pct:
         pct = (day_calls / daily_limit) * 100
@@ -298,15 +635,13 @@ def _check_limits(store: RateMonitorStore, provider: str) -> Optional[RateLimitA
 
 
 def _count_calls(store: RateMonitorStore, provider: str, since: datetime) -> int:
-    """Count calls for a provider since a given time."""
+    """Count calls for a provider in snapshot buckets from `since` onwards."""
+    first = int(since.timestamp() // 60)
     count = 0
-    for c in store.calls:
-        if c.provider != provider:
-            continue
+    for minute, row in store.buckets.get(provider, {}).items():
         try:
-            ts = datetime.fromisoformat(c.timestamp)
-            if ts >= since:
-                count += 1
-        except (ValueError, TypeError):
+            if int(minute) >= first:
+                count += row[_TOTAL]
+        except (ValueError, TypeError, IndexError):
             continue
     return count
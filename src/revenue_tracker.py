@@ -3,6 +3,11 @@
 
 Thread-safe JSON persistence for MRR per channel, gap tracking, daily snapshots.
 Used by Proactive Planner to generate morning touchpoint actions.
+
+Tribute subscription events are applied incrementally: revenue.json keeps
+a per-channel subscriber table ({user_id: monthly USD}) that each webhook
+event updates in O(1). recalculate_channel_from_events() replays the full
+event history and is meant for audits (and to seed a missing table).
 """
 
 import json
@@ -10,6 +15,7 @@ import logging
 import os
 import threading
 from datetime import datetime, date
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,15 @@ DEFAULT_CHANNELS = {
 }
 
 
+# Subscriber table: recently applied event ids kept per channel (idempotency)
+APPLIED_EVENT_IDS_KEEP = 1000
+# Used only when live forex rates are unavailable (units per 1 USD)
+FALLBACK_USD_RATES = {"RUB": 90.0}
+
+SUBSCRIBE_EVENTS = ("newSubscription", "renewedSubscription")
+CANCEL_EVENTS = ("cancelledSubscription",)
+
+
 _DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 _REVENUE_PATH = os.path.join(_DATA_DIR, "revenue.json")
 
@@ -199,77 +214,173 @@ def format_revenue_summary() -> str:
     return "\n".join(lines)
 
 
+# ── Tribute subscriber table ─────────────────────────────
+
+def _to_usd(amount: float, currency: str) -> float:
+    """Convert to USD with the cached forex rates (fallback rate if offline)."""
+    if currency == "USD":
+        return amount
+    try:
+        from src.tools.financial.forex import convert
+        return convert(amount, currency, "USD")
+    except Exception as e:
+        rate = FALLBACK_USD_RATES.get(currency)
+        logger.warning(f"Forex rate for {currency} unavailable ({e}), using fallback {rate}")
+        return amount / rate if rate else amount
+
+
+def _event_user_id(event: dict) -> str:
+    return str(
+        event.get("telegram_user_id",
+        event.get("user_id",
+        event.get("subscriber_id", "unknown")))
+    )
+
+
+def _event_amount_usd(event: dict) -> float:
+    """Monthly subscription price of an event in USD."""
+    raw_amount = event.get("amount", event.get("price", 0))
+    currency = event.get("currency", "USD").upper()
+    # Tribute may return minor units (kopecks/cents)
+    amount = float(raw_amount)
+    if amount > 1000 and currency in ("RUB", "KZT"):
+        # Likely already in major units for RUB
+        pass
+    elif amount > 100:
+        amount = amount / 100  # Convert cents to dollars
+    return _to_usd(amount, currency)
+
+
+def _apply_to_table(table: dict, event: dict, amount_usd: Optional[float] = None) -> bool:
+    """Apply one subscription event to a channel table. Returns True if applied.
+
+    amount_usd, if given, is the event's precomputed _event_amount_usd().
+    """
+    event_id = event.get("id", event.get("event_id"))
+    applied = table.setdefault("applied_ids", [])
+    if event_id and event_id in applied:
+        return False
+
+    active = table.setdefault("active", {})
+    user_id = _event_user_id(event)
+    previous = active.get(user_id, 0.0)
+    event_type = event.get("event", "")
+    if event_type in SUBSCRIBE_EVENTS:
+        active[user_id] = amount_usd if amount_usd is not None else _event_amount_usd(event)
+    elif event_type in CANCEL_EVENTS:
+        active.pop(user_id, None)
+    else:
+        return False
+
+    table["mrr"] = table.get("mrr", 0.0) - previous + active.get(user_id, 0.0)
+    table["events"] = table.get("events", 0) + 1
+    if event_id:
+        applied.append(event_id)
+        del applied[:-APPLIED_EVENT_IDS_KEEP]
+    return True
+
+
+def _table_mrr(table: dict) -> float:
+    """Display MRR of a channel table, rounded to cents.
+
+    The table keeps the unrounded running sum so that rounding error does
+    not build up across events.
+    """
+    return round(max(table.get("mrr", 0.0), 0.0), 2)
+
+
+def _store_table(data: dict, channel: str, table: dict):
+    """Put a channel table into revenue data and mirror MRR/members to the channel."""
+    data.setdefault("subscribers", {})[channel] = table
+    channels = data.setdefault("channels", {})
+    ch = channels.setdefault(channel, {"name": channel, "mrr": 0.0, "members": 0, "target": 0.0})
+    ch["mrr"] = _table_mrr(table)
+    ch["members"] = len(table.get("active", {}))
+    data["updated_at"] = datetime.now().isoformat()
+
+
+def apply_subscription_event(event: dict, channel: str) -> dict:
+    """
+    Update a channel's subscriber table and MRR from one Tribute event.
+
+    Duplicate event ids (recent APPLIED_EVENT_IDS_KEEP per channel) are
+    ignored. If the channel has no table yet, it is seeded by a full replay
+    of the stored events (which include this one).
+
+    Blocking (file I/O, possibly a forex fetch): call it off the event loop.
+
+    Returns: {"mrr": float, "members": int, "applied": bool}
+    """
+    # Convert before taking the lock: a cold forex cache means an HTTP fetch
+    amount_usd = _event_amount_usd(event) if event.get("event") in SUBSCRIBE_EVENTS else None
+    with _lock:
+        data = _load_revenue()
+        table = data.get("subscribers", {}).get(channel)
+        if table is not None:
+            applied = _apply_to_table(table, event, amount_usd)
+            if applied:
+                _store_table(data, channel, table)
+                _save_revenue(data)
+            return {"mrr": _table_mrr(table), "members": len(table.get("active", {})), "applied": applied}
+
+    result = recalculate_channel_from_events(channel)
+    return {"mrr": result["mrr"], "members": result["members"], "applied": True}
+
+
 def recalculate_channel_from_events(channel: str) -> dict:
     """
-    Recalculate a channel's MRR from stored Tribute webhook events.
+    Rebuild a channel's subscriber table by replaying stored Tribute events.
 
     Loads tribute_payments from persistent_storage, filters by _channel tag,
-    counts active subscribers, estimates MRR.
+    and replays them in order. Meant for audits: webhooks use
+    apply_subscription_event(). "drift" is the difference between the
+    replayed MRR and the incrementally maintained one.
 
-    Returns: {"mrr": float, "members": int, "events_counted": int}
+    Returns: {"mrr": float, "members": int, "events_counted": int, "drift": float}
     """
+    empty = {"mrr": 0.0, "members": 0, "events_counted": 0, "drift": 0.0}
     try:
         from src.tools.financial.tribute import _load_payments
     except ImportError:
         logger.warning("tribute module not available")
-        return {"mrr": 0.0, "members": 0, "events_counted": 0}
+        return empty
 
     payments = _load_payments()
     if not payments:
-        return {"mrr": 0.0, "members": 0, "events_counted": 0}
+        return empty
 
     # Filter by channel
     channel_events = [
         p for p in payments
         if p.get("_channel") == channel
-        and p.get("event") in ("newSubscription", "renewedSubscription", "cancelledSubscription")
+        and p.get("event") in SUBSCRIBE_EVENTS + CANCEL_EVENTS
     ]
 
     if not channel_events:
-        return {"mrr": 0.0, "members": 0, "events_counted": 0}
+        return empty
 
-    # Build active subscriber set (ordered by timestamp)
-    active_subs: dict[str, float] = {}  # user_id -> last known price
+    table: dict = {}
     for event in sorted(channel_events, key=lambda x: x.get("received_at", x.get("timestamp", ""))):
-        user_id = str(
-            event.get("telegram_user_id",
-            event.get("user_id",
-            event.get("subscriber_id", "unknown")))
-        )
-        event_type = event.get("event", "")
-
-        if event_type in ("newSubscription", "renewedSubscription"):
-            # Extract subscription price
-            raw_amount = event.get("amount", event.get("price", 0))
-            currency = event.get("currency", "USD").upper()
-            # Tribute may return minor units (kopecks/cents)
-            amount = float(raw_amount)
-            if amount > 1000 and currency in ("RUB", "KZT"):
-                # Likely already in major units for RUB
-                pass
-            elif amount > 100:
-                amount = amount / 100  # Convert cents to dollars
-
-            # Convert RUB to USD (~$1 = 90 RUB)
-            if currency == "RUB":
-                amount = amount / 90.0
-
-            active_subs[user_id] = amount
-        elif event_type == "cancelledSubscription":
-            active_subs.pop(user_id, None)
-
-    members = len(active_subs)
-    mrr = sum(active_subs.values())
-
-    # Update revenue tracker
-    update_channel(channel, mrr=round(mrr, 2), members=members)
+        _apply_to_table(table, event)
+
+    with _lock:
+        data = _load_revenue()
+        previous = data.get("subscribers", {}).get(channel)
+        _store_table(data, channel, table)
+        _save_revenue(data)
+
+    members = len(table["active"])
+    mrr = _table_mrr(table)
+    drift = round(mrr - _table_mrr(previous), 2) if previous is not None else 0.0
+    if drift:
+        logger.warning("Tribute replay for %s: MRR drift $%.2f vs incremental", channel, drift)
 
     logger.info(
         "Recalculated %s: MRR=$%.2f, members=%d from %d events",
         channel, mrr, members, len(channel_events),
     )
 
-    return {"mrr": round(mrr, 2), "members": members, "events_counted": len(channel_events)}
+    return {"mrr": mrr, "members": members, "events_counted": len(channel_events), "drift": drift}
 
 
 def seed_revenue_data() -> bool:
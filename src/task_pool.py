@@ -1,5 +1,5 @@
 """
-📋 Zinin Corp — Shared Task Pool with Dependency Engine (v2.3)
+📋 Zinin Corp — Shared Task Pool with Dependency Engine (v2.4)
 
 CEO Алексей — единственный назначающий. Каждая задача проходит через него.
 Agent Tag Router подсказывает оптимального исполнителя по тегам.
@@ -7,6 +7,7 @@ Dependency Engine автоматически разблокирует задач
 """
 
 import glob as glob_mod
+import heapq
 import json
 import logging
 import os
@@ -20,6 +21,8 @@ from uuid import uuid4
 
 from pydantic import BaseModel, Field
 
+from .task_store import TaskStore, open_store
+
 logger = logging.getLogger(__name__)
 
 # ──────────────────────────────────────────────────────────
@@ -164,11 +167,15 @@ def suggest_assignee(tags: list[str]) -> list[tuple[str, float]]:
 
 
 # ──────────────────────────────────────────────────────────
-# Persistence (JSON, thread-safe)
+# Persistence (pluggable store, thread-safe)
 # ──────────────────────────────────────────────────────────
 
 _lock = threading.Lock()
 
+# "json" — task_pool.json snapshot + append-only WAL (default)
+# "sqlite" — task_pool.sqlite3, migrates task_pool.json on first start
+TASK_POOL_BACKEND = os.getenv("TASK_POOL_BACKEND", "json")
+
 
 def _pool_path() -> str:
     """Get path for task pool JSON file."""
@@ -179,25 +186,29 @@ def _pool_path() -> str:
     return "data/task_pool.json"
 
 
-def _load_pool() -> list[dict]:
+def _store() -> TaskStore:
+    """Get the storage backend for the current pool path."""
     path = _pool_path()
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    return data
-        except Exception as e:
-            logger.warning(f"Failed to load task pool: {e}")
-    return []
+    if TASK_POOL_BACKEND == "sqlite":
+        return open_store(
+            os.path.splitext(path)[0] + ".sqlite3", "sqlite", legacy_json_path=path,
+        )
+    return open_store(path)
+
+
+def _load_pool() -> list[dict]:
+    """Snapshot of the whole pool (copies) in creation order."""
+    try:
+        return _store().all()
+    except Exception as e:
+        logger.warning(f"Failed to load task pool: {e}")
+        return []
 
 
 def _save_pool(tasks: list[dict]) -> bool:
-    path = _pool_path()
+    """Replace the whole pool. Prefer targeted store().put() for updates."""
     try:
-        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(tasks, f, ensure_ascii=False, indent=2, default=str)
+        _store().replace_all(tasks)
         return True
     except Exception as e:
         logger.warning(f"Failed to save task pool: {e}")
@@ -255,16 +266,18 @@ def create_task(
         task.status = TaskStatus.BLOCKED
 
     with _lock:
-        pool = _load_pool()
+        store = _store()
 
         # Set up reverse `blocks` on dependencies
+        changed = []
         for dep_id in task.blocked_by:
-            dep = _find_task(pool, dep_id)
+            dep = store.get(dep_id)
             if dep and task.id not in dep.get("blocks", []):
                 dep.setdefault("blocks", []).append(task.id)
+                changed.append(dep)
 
-        pool.append(task.model_dump())
-        _save_pool(pool)
+        changed.append(task.model_dump())
+        store.put_many(changed)
 
     logger.info(f"Created task {task.id}: {title} [{task.status}]")
 
@@ -281,8 +294,8 @@ def create_task(
 def assign_task(task_id: str, assignee: str, assigned_by: str = "ceo-alexey") -> Optional[PoolTask]:
     """Assign a task to an agent. TODO → ASSIGNED (or BLOCKED if dependencies unmet)."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             logger.warning(f"Task {task_id} not found")
             return None
@@ -298,13 +311,12 @@ def assign_task(task_id: str, assignee: str, assigned_by: str = "ceo-alexey") ->
         raw["updated_at"] = now_iso
 
         # Check if all dependencies are DONE
-        unmet = _get_unmet_deps(pool, raw)
-        if unmet:
+        if store.unmet_count(task_id):
             raw["status"] = TaskStatus.BLOCKED
         else:
             raw["status"] = TaskStatus.ASSIGNED
 
-        _save_pool(pool)
+        store.put(raw)
 
     task = PoolTask(**raw)
     logger.info(f"Assigned {task_id} → {assignee} [{task.status}]")
@@ -320,8 +332,8 @@ def assign_task(task_id: str, assignee: str, assigned_by: str = "ceo-alexey") ->
 def start_task(task_id: str) -> Optional[PoolTask]:
     """Move task to IN_PROGRESS. ASSIGNED → IN_PROGRESS."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             return None
 
@@ -331,7 +343,7 @@ def start_task(task_id: str) -> Optional[PoolTask]:
 
         raw["status"] = TaskStatus.IN_PROGRESS
         raw["updated_at"] = datetime.now().isoformat()
-        _save_pool(pool)
+        store.put(raw)
 
     task = PoolTask(**raw)
     logger.info(f"Started {task_id} [{task.status}]")
@@ -347,8 +359,8 @@ def start_task(task_id: str) -> Optional[PoolTask]:
 def complete_task(task_id: str, result: str = "") -> Optional[PoolTask]:
     """Complete a task. IN_PROGRESS → DONE. Triggers Dependency Engine."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             return None
 
@@ -362,22 +374,23 @@ def complete_task(task_id: str, result: str = "") -> Optional[PoolTask]:
         raw["updated_at"] = now_iso
         raw["result"] = result
 
+        store.put(raw)
+
         # Dependency Engine: unblock dependent tasks
-        unblocked = _run_dependency_engine(pool, task_id)
+        unblocked = _run_dependency_engine(store, task_id)
 
         # Capture unblocked task data before releasing lock (for EventBus)
-        unblocked_data = []
-        for uid in unblocked:
-            ut = _find_task(pool, uid)
-            if ut:
-                unblocked_data.append({
-                    "task_id": uid,
-                    "assignee": ut.get("assignee", ""),
-                    "title": ut.get("title", ""),
-                    "unblocked_by": task_id,
-                })
-
-        _save_pool(pool)
+        unblocked_data = [
+            {
+                "task_id": ut["id"],
+                "assignee": ut.get("assignee", ""),
+                "title": ut.get("title", ""),
+                "priority": ut.get("priority", TaskPriority.MEDIUM),
+                "unblocked_by": task_id,
+            }
+            for ut in unblocked
+        ]
+        unblocked = [ut["id"] for ut in unblocked]
 
     task = PoolTask(**raw)
     if unblocked:
@@ -398,14 +411,14 @@ def complete_task(task_id: str, result: str = "") -> Optional[PoolTask]:
 def block_task(task_id: str) -> Optional[PoolTask]:
     """Manually block a task."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             return None
 
         raw["status"] = TaskStatus.BLOCKED
         raw["updated_at"] = datetime.now().isoformat()
-        _save_pool(pool)
+        store.put(raw)
 
     return PoolTask(**raw)
 
@@ -427,36 +440,116 @@ def _get_unmet_deps(pool: list[dict], task: dict) -> list[str]:
     return unmet
 
 
-def _run_dependency_engine(pool: list[dict], completed_id: str) -> list[str]:
+def _run_dependency_engine(store: TaskStore, completed_id: str) -> list[dict]:
     """When a task completes, unblock dependents.
 
+    Walks only the reverse edges of `completed_id` (O(out-degree)).
     For each task that has `completed_id` in `blocked_by`:
     - Remove it from blocked_by
-    - If blocked_by is now empty and task has assignee → ASSIGNED
-    - If blocked_by is now empty and no assignee → TODO
+    - If no unmet deps remain and task has assignee → ASSIGNED
+    - If no unmet deps remain and no assignee → TODO
 
-    Returns list of unblocked task IDs.
+    `completed_id` must already be stored as DONE.
+    Returns the unblocked task dicts.
     """
-    unblocked: list[str] = []
-
-    for t in pool:
-        bb = t.get("blocked_by", [])
-        if completed_id in bb:
-            bb.remove(completed_id)
-            t["blocked_by"] = bb
-
-            # Check if all remaining deps are DONE
-            remaining_unmet = _get_unmet_deps(pool, t)
-            if not remaining_unmet and t.get("status") == TaskStatus.BLOCKED:
-                if t.get("assignee"):
-                    t["status"] = TaskStatus.ASSIGNED
-                else:
-                    t["status"] = TaskStatus.TODO
-                unblocked.append(t["id"])
+    changed: list[dict] = []
+    unblocked: list[dict] = []
+
+    for t in store.dependents(completed_id):
+        t["blocked_by"] = [d for d in t.get("blocked_by", []) if d != completed_id]
+        changed.append(t)
+
+        # Unmet counter is maintained by the store; completed dep no longer counts
+        if not store.unmet_count(t["id"]) and t.get("status") == TaskStatus.BLOCKED:
+            t["status"] = TaskStatus.ASSIGNED if t.get("assignee") else TaskStatus.TODO
+            unblocked.append(t)
 
+    store.put_many(changed)
     return unblocked
 
 
+def find_dependency_cycles() -> list[list[str]]:
+    """Find dependency cycles among unfinished tasks.
+
+    Returns a list of cycles, each as a list of task IDs.
+    """
+    with _lock:
+        store = _store()
+        open_tasks = {t["id"]: t for t in store.by_status(
+            *(s.value for s in TaskStatus if s != TaskStatus.DONE)
+        )}
+
+    # Iterative DFS with colors: 0 = new, 1 = on stack, 2 = done
+    color: dict[str, int] = {}
+    cycles: list[list[str]] = []
+    for root in open_tasks:
+        if color.get(root):
+            continue
+        stack = [(root, iter(open_tasks[root].get("blocked_by", [])))]
+        path = [root]
+        color[root] = 1
+        while stack:
+            node, deps = stack[-1]
+            dep = next(deps, None)
+            if dep is None:
+                stack.pop()
+                path.pop()
+                color[node] = 2
+            elif dep in open_tasks:
+                if color.get(dep) == 1:
+                    cycles.append(path[path.index(dep):])
+                elif not color.get(dep):
+                    color[dep] = 1
+                    path.append(dep)
+                    stack.append((dep, iter(open_tasks[dep].get("blocked_by", []))))
+    return cycles
+
+
+def get_execution_order(task_ids: Optional[list[str]] = None) -> list[PoolTask]:
+    """Topological execution order of unfinished tasks (Kahn's algorithm).
+
+    Ties are broken by priority, then creation order. Tasks stuck in a
+    dependency cycle (or behind one) are left out and logged.
+    If task_ids is given, only those tasks are ordered.
+    """
+    with _lock:
+        store = _store()
+        open_tasks = store.by_status(
+            *(s.value for s in TaskStatus if s != TaskStatus.DONE)
+        )
+
+    if task_ids is not None:
+        wanted = set(task_ids)
+        open_tasks = [t for t in open_tasks if t["id"] in wanted]
+
+    by_id = {t["id"]: t for t in open_tasks}
+    seq = {tid: i for i, tid in enumerate(by_id)}
+    indegree: dict[str, int] = {}
+    dependents: dict[str, list[str]] = {}
+    for tid, t in by_id.items():
+        deps = {d for d in t.get("blocked_by", []) if d in by_id}
+        indegree[tid] = len(deps)
+        for d in deps:
+            dependents.setdefault(d, []).append(tid)
+
+    heap = [(by_id[t].get("priority", TaskPriority.MEDIUM), seq[t], t)
+            for t, deg in indegree.items() if deg == 0]
+    heapq.heapify(heap)
+    order: list[PoolTask] = []
+    while heap:
+        _, _, tid = heapq.heappop(heap)
+        order.append(PoolTask(**by_id[tid]))
+        for dep in dependents.get(tid, []):
+            indegree[dep] -= 1
+            if indegree[dep] == 0:
+                heapq.heappush(heap, (by_id[dep].get("priority", TaskPriority.MEDIUM), seq[dep], dep))
+
+    if len(order) < len(by_id):
+        stuck = sorted(set(by_id) - {t.id for t in order}, key=seq.get)
+        logger.warning(f"Dependency cycle: {len(stuck)} task(s) cannot be ordered: {stuck}")
+    return order
+
+
 # ──────────────────────────────────────────────────────────
 # Query helpers
 # ──────────────────────────────────────────────────────────
@@ -471,8 +564,7 @@ def get_all_tasks() -> list[PoolTask]:
 def get_task(task_id: str) -> Optional[PoolTask]:
     """Get a single task by ID."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        raw = _store().get(task_id)
     if raw:
         return PoolTask(**raw)
     return None
@@ -480,28 +572,22 @@ def get_task(task_id: str) -> Optional[PoolTask]:
 
 def get_tasks_by_status(*statuses: TaskStatus) -> list[PoolTask]:
     """Get tasks filtered by one or more statuses."""
-    status_set = set(s.value for s in statuses)
     with _lock:
-        pool = _load_pool()
-    return [PoolTask(**t) for t in pool if t.get("status") in status_set]
+        tasks = _store().by_status(*(s.value for s in statuses))
+    return [PoolTask(**t) for t in tasks]
 
 
 def get_tasks_by_assignee(assignee: str) -> list[PoolTask]:
     """Get all tasks assigned to a specific agent."""
     with _lock:
-        pool = _load_pool()
-    return [PoolTask(**t) for t in pool if t.get("assignee") == assignee]
+        tasks = _store().by_assignee(assignee)
+    return [PoolTask(**t) for t in tasks]
 
 
 def get_ready_tasks() -> list[PoolTask]:
     """Get TODO tasks with no unmet dependencies (ready for assignment)."""
     with _lock:
-        pool = _load_pool()
-        ready = []
-        for t in pool:
-            if t.get("status") == TaskStatus.TODO:
-                if not _get_unmet_deps(pool, t):
-                    ready.append(PoolTask(**t))
+        ready = [PoolTask(**t) for t in _store().ready(TaskStatus.TODO.value)]
     return sorted(ready, key=lambda t: t.priority)
 
 
@@ -513,12 +599,8 @@ def get_blocked_tasks() -> list[PoolTask]:
 def get_pool_summary() -> dict[str, int]:
     """Get count of tasks by status."""
     with _lock:
-        pool = _load_pool()
-    summary: dict[str, int] = {}
-    for t in pool:
-        s = t.get("status", "TODO")
-        summary[s] = summary.get(s, 0) + 1
-    summary["total"] = len(pool)
+        summary = _store().count_by_status()
+    summary["total"] = sum(summary.values())
     return summary
 
 
@@ -529,46 +611,49 @@ def get_pool_summary() -> dict[str, int]:
 def set_checkpoint(task_id: str, checkpoint: str) -> bool:
     """Update checkpoint field on a task. Used by auto-start for resume."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             return False
         raw["checkpoint"] = checkpoint
         raw["updated_at"] = datetime.now().isoformat()
-        _save_pool(pool)
+        store.put(raw)
     return True
 
 
 def increment_retry(task_id: str) -> int:
     """Increment retry_count and return new value. Returns -1 if not found."""
     with _lock:
-        pool = _load_pool()
-        raw = _find_task(pool, task_id)
+        store = _store()
+        raw = store.get(task_id)
         if not raw:
             return -1
         raw["retry_count"] = raw.get("retry_count", 0) + 1
         raw["updated_at"] = datetime.now().isoformat()
-        _save_pool(pool)
+        store.put(raw)
         return raw["retry_count"]
 
 
 def delete_task(task_id: str) -> bool:
     """Remove a task from the pool entirely."""
     with _lock:
-        pool = _load_pool()
-        original_len = len(pool)
-        pool = [t for t in pool if t.get("id") != task_id]
-        if len(pool) == original_len:
+        store = _store()
+        raw = store.get(task_id)
+        if not raw:
             return False
-
-        # Clean up references
-        for t in pool:
-            if task_id in t.get("blocked_by", []):
-                t["blocked_by"].remove(task_id)
-            if task_id in t.get("blocks", []):
-                t["blocks"].remove(task_id)
-
-        _save_pool(pool)
+        store.delete(task_id)
+
+        # Clean up references: dependents (blocked_by) and dependencies (blocks)
+        changed = []
+        for t in store.dependents(task_id):
+            t["blocked_by"].remove(task_id)
+            changed.append(t)
+        for dep_id in raw.get("blocked_by", []):
+            dep = store.get(dep_id)
+            if dep and task_id in dep.get("blocks", []):
+                dep["blocks"].remove(task_id)
+                changed.append(dep)
+        store.put_many(changed)
     logger.info(f"Deleted task {task_id}")
     return True
 
@@ -635,22 +720,21 @@ def archive_done_tasks(keep_recent_days: int = 1) -> int:
     archived_count = 0
 
     with _lock:
-        pool = _load_pool()
-        to_keep = []
+        store = _store()
         to_archive: dict[str, list[dict]] = {}  # date_str → tasks
+        archived_ids: list[str] = []
 
-        for t in pool:
-            if t.get("status") == TaskStatus.DONE and t.get("completed_at"):
+        for t in store.by_status(TaskStatus.DONE.value):
+            if t.get("completed_at"):
                 try:
                     completed = datetime.fromisoformat(t["completed_at"])
                     if completed < cutoff:
                         date_str = completed.strftime("%Y-%m-%d")
                         to_archive.setdefault(date_str, []).append(t)
+                        archived_ids.append(t["id"])
                         archived_count += 1
-                        continue
                 except (ValueError, TypeError):
                     pass
-            to_keep.append(t)
 
         if not to_archive:
             return 0
@@ -671,8 +755,8 @@ def archive_done_tasks(keep_recent_days: int = 1) -> int:
             with open(arc_path, "w", encoding="utf-8") as f:
                 json.dump(existing, f, ensure_ascii=False, indent=2, default=str)
 
-        # Save cleaned pool
-        _save_pool(to_keep)
+        # Drop archived tasks from the pool
+        store.delete_many(archived_ids)
 
     logger.info(f"Archived {archived_count} DONE tasks to {len(to_archive)} file(s)")
     return archived_count
@@ -721,15 +805,11 @@ def get_archive_stats() -> dict:
 def get_stale_tasks(stale_days: int = 3) -> list[PoolTask]:
     """Get tasks in ASSIGNED/IN_PROGRESS not updated in stale_days days."""
     cutoff = datetime.now() - timedelta(days=stale_days)
-    active_statuses = {TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS}
-
     with _lock:
-        pool = _load_pool()
+        active = _store().by_status(TaskStatus.ASSIGNED.value, TaskStatus.IN_PROGRESS.value)
 
     stale = []
-    for t in pool:
-        if t.get("status") not in active_statuses:
-            continue
+    for t in active:
         # Use updated_at, fall back to assigned_at, then created_at
         ts_str = t.get("updated_at") or t.get("assigned_at") or t.get("created_at", "")
         if not ts_str:
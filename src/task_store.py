@@ -0,0 +1,720 @@
+"""
+🗄 Zinin Corp — Task Pool Storage Engine (v1.0)
+
+Pluggable storage backends for the Shared Task Pool (src/task_pool.py).
+
+- JsonWalTaskStore — JSON snapshot + append-only write-ahead log (default).
+  Every mutation appends one JSON line to `<pool>.json.wal`; the snapshot
+  is rewritten only on periodic compaction. The snapshot keeps the legacy
+  `task_pool.json` format, so existing pools are picked up as-is.
+- SqliteTaskStore — one row per task with indexes on status and assignee.
+  Imports the legacy JSON pool on first open (migration path).
+
+Both backends answer get / by_status / by_assignee from an index
+(O(1) / O(k)) instead of parsing and scanning the whole pool.
+
+Usage:
+    store = open_store("data/task_pool.json")            # JSON + WAL
+    store = open_store("data/task_pool.sqlite3", "sqlite",
+                       legacy_json_path="data/task_pool.json")
+    store.put({"id": "abc", "title": "...", "status": "TODO"})
+    store.by_status("TODO")
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from enum import Enum
+from typing import Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover — non-POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Compact the WAL into the snapshot after this many appended records
+COMPACT_EVERY = 200
+
+BACKENDS = ("json", "sqlite")
+
+
+def _plain(task: dict) -> dict:
+    """Copy a task dict, turning enum values into plain JSON values."""
+    out = {}
+    for key, value in task.items():
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, list):
+            value = list(value)
+        out[key] = value
+    return out
+
+
+def _status_of(task: dict) -> str:
+    status = task.get("status", "TODO")
+    return status.value if isinstance(status, Enum) else str(status)
+
+
+# ──────────────────────────────────────────────────────────
+# Base API
+# ──────────────────────────────────────────────────────────
+
+class TaskStore(ABC):
+    """Storage API shared by all Task Pool backends.
+
+    All read methods return copies — callers may mutate them freely
+    and write them back with put()/put_many().
+    """
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def all(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def by_status(self, *statuses: str) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def by_assignee(self, assignee: str) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def count_by_status(self) -> dict[str, int]:
+        ...
+
+    @abstractmethod
+    def put_many(self, tasks: Iterable[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    def replace_all(self, tasks: list[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def dependents(self, task_id: str) -> list[dict]:
+        """Tasks that list `task_id` in their blocked_by (reverse edges)."""
+
+    @abstractmethod
+    def unmet_count(self, task_id: str) -> int:
+        """Number of existing blocked_by tasks that are not DONE yet."""
+
+    @abstractmethod
+    def ready(self, status: str = "TODO") -> list[dict]:
+        """Tasks in `status` whose dependencies are all met."""
+
+    def put(self, task: dict) -> None:
+        """Insert or update a single task (keyed by its id)."""
+        self.put_many([task])
+
+    def delete(self, task_id: str) -> bool:
+        """Delete a task. Returns False if it did not exist."""
+        return self.delete_many([task_id]) > 0
+
+    def import_json(self, json_path: str) -> int:
+        """Import tasks from a legacy task_pool.json file. Returns count."""
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read legacy task pool {json_path}: {e}")
+            return 0
+        if not isinstance(data, list):
+            return 0
+        tasks = [t for t in data if isinstance(t, dict) and t.get("id")]
+        self.put_many(tasks)
+        return len(tasks)
+
+
+# ──────────────────────────────────────────────────────────
+# In-memory index
+# ──────────────────────────────────────────────────────────
+
+class _TaskIndex:
+    """Tasks by id plus secondary indexes by status and assignee.
+
+    `by_id` keeps insertion (pool) order; subsets are re-sorted by
+    insertion sequence so results match the order of the legacy list.
+
+    Dependency graph is maintained incrementally:
+    - `_dependents`: dep_id → ids of tasks with dep_id in blocked_by
+    - `_unmet`: task_id → count of existing, not-DONE dependencies
+      (missing dependencies count as met, like the legacy engine)
+    A status change touches only the task's dependents (out-degree).
+    """
+
+    def __init__(self):
+        self.by_id: dict[str, dict] = {}
+        self._seq: dict[str, int] = {}
+        self._next_seq = 0
+        self._status: dict[str, set[str]] = {}
+        self._assignee: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._unmet: dict[str, int] = {}
+
+    def clear(self) -> None:
+        self.by_id.clear()
+        self._seq.clear()
+        self._status.clear()
+        self._assignee.clear()
+        self._dependents.clear()
+        self._unmet.clear()
+        self._next_seq = 0
+
+    def put(self, task: dict) -> None:
+        task_id = task["id"]
+        old = self.by_id.get(task_id)
+        was_unmet = self._is_unmet(old)
+        if old is not None:
+            self._unindex(task_id, old)
+        else:
+            self._seq[task_id] = self._next_seq
+            self._next_seq += 1
+        self.by_id[task_id] = task
+        self._status.setdefault(_status_of(task), set()).add(task_id)
+        self._assignee.setdefault(task.get("assignee", ""), set()).add(task_id)
+
+        deps = set(task.get("blocked_by") or [])
+        for dep_id in deps:
+            self._dependents.setdefault(dep_id, set()).add(task_id)
+        self._unmet[task_id] = sum(1 for d in deps if self._is_unmet(self.by_id.get(d)))
+        self._propagate(task_id, self._is_unmet(task) - was_unmet)
+
+    def remove(self, task_id: str) -> bool:
+        old = self.by_id.pop(task_id, None)
+        if old is None:
+            return False
+        self._unindex(task_id, old)
+        self._seq.pop(task_id, None)
+        self._unmet.pop(task_id, None)
+        self._propagate(task_id, -self._is_unmet(old))
+        return True
+
+    def _unindex(self, task_id: str, task: dict) -> None:
+        self._status.get(_status_of(task), set()).discard(task_id)
+        self._assignee.get(task.get("assignee", ""), set()).discard(task_id)
+        for dep_id in set(task.get("blocked_by") or []):
+            dependents = self._dependents.get(dep_id)
+            if dependents is not None:
+                dependents.discard(task_id)
+                if not dependents:
+                    del self._dependents[dep_id]
+
+    @staticmethod
+    def _is_unmet(task: Optional[dict]) -> int:
+        return int(task is not None and _status_of(task) != "DONE")
+
+    def _propagate(self, task_id: str, delta: int) -> None:
+        if delta:
+            for dependent in self._dependents.get(task_id, ()):
+                self._unmet[dependent] = self._unmet.get(dependent, 0) + delta
+
+    def dependent_ids(self, task_id: str) -> set[str]:
+        return self._dependents.get(task_id, set())
+
+    def unmet_count(self, task_id: str) -> int:
+        return self._unmet.get(task_id, 0)
+
+    def ordered(self, ids: Iterable[str]) -> list[dict]:
+        return [_plain(self.by_id[i]) for i in sorted(ids, key=self._seq.__getitem__)]
+
+    def status_ids(self, status: str) -> set[str]:
+        return self._status.get(status, set())
+
+    def assignee_ids(self, assignee: str) -> set[str]:
+        return self._assignee.get(assignee, set())
+
+    def status_counts(self) -> dict[str, int]:
+        return {s: len(ids) for s, ids in self._status.items() if ids}
+
+
+# ──────────────────────────────────────────────────────────
+# JSON snapshot + write-ahead log
+# ──────────────────────────────────────────────────────────
+
+class JsonWalTaskStore(TaskStore):
+    """JSON snapshot with an append-only write-ahead log.
+
+    - Mutations append `{"op": "put"|"del", ...}` lines to the WAL
+    - After `compact_every` records the index is written to the snapshot
+      (tmp file + os.replace) and the WAL is truncated
+    - Replaying the WAL is idempotent (full-record upserts), so a crash
+      between snapshot replace and WAL truncate loses nothing; a torn
+      last line from a crash mid-append is skipped
+    - Other processes (bots, monitor, dashboard) writing the same pool
+      are picked up via a cheap stat() check: new WAL bytes are replayed
+      incrementally, a new snapshot triggers a full reload
+    - Mutations and compaction hold an flock on `<pool>.json.lock`, so
+      refresh → append (or refresh → snapshot) is atomic across processes
+      and never drops records another process appended
+    """
+
+    def __init__(self, path: str, compact_every: int = COMPACT_EVERY):
+        self.path = path
+        self.wal_path = path + ".wal"
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._index = _TaskIndex()
+        self._snapshot_sig: Optional[tuple] = None
+        self._wal_offset = 0
+        self._wal_records = 0
+        self._flock_depth = 0
+        self._reload()
+
+    # ── disk state ────────────────────────────────────────
+
+    @staticmethod
+    def _stat_sig(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _wal_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _reload(self) -> None:
+        """Full reload: snapshot + whole WAL."""
+        self._index.clear()
+        self._snapshot_sig = self._stat_sig(self.path)
+        if self._snapshot_sig is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    for t in data:
+                        if isinstance(t, dict) and t.get("id"):
+                            self._index.put(t)
+            except Exception as e:
+                logger.warning(f"Failed to load task pool: {e}")
+        self._wal_offset = 0
+        self._wal_records = 0
+        self._replay_wal()
+
+    def _replay_wal(self) -> None:
+        """Apply WAL records after the last known offset."""
+        if not os.path.exists(self.wal_path):
+            self._wal_offset = 0
+            return
+        with open(self.wal_path, "rb") as f:
+            f.seek(self._wal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write — retry on the next refresh
+                self._wal_offset += len(line)
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping corrupt WAL record in {self.wal_path}")
+                    continue
+                self._apply(rec)
+                self._wal_records += 1
+
+    def _apply(self, rec: dict) -> None:
+        op = rec.get("op")
+        if op == "put" and isinstance(rec.get("task"), dict):
+            self._index.put(rec["task"])
+        elif op == "del":
+            self._index.remove(rec.get("id", ""))
+
+    def _refresh(self) -> None:
+        """Pick up changes written by other processes (or by hand)."""
+        if self._stat_sig(self.path) != self._snapshot_sig:
+            self._reload()
+            return
+        wal_size = self._wal_size(self.wal_path)
+        if wal_size > self._wal_offset:
+            self._replay_wal()
+        elif wal_size < self._wal_offset:
+            self._reload()
+
+    @contextmanager
+    def _exclusive(self):
+        """Thread lock + inter-process flock (re-entrant within this store)."""
+        with self._lock:
+            if self._flock_depth or fcntl is None:
+                self._flock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._flock_depth -= 1
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._flock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._flock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _settle_tail(self) -> None:
+        """Handle WAL bytes after the last complete line (caller holds the flock).
+
+        A tail that parses is a record whose newline never made it — keep it
+        and apply it; anything else is a torn write and is truncated.
+        """
+        if self._wal_size(self.wal_path) <= self._wal_offset:
+            return
+        with open(self.wal_path, "rb+") as f:
+            f.seek(self._wal_offset)
+            tail = f.read()
+            try:
+                json.loads(tail)
+            except ValueError:
+                logger.warning(f"Dropping torn WAL tail ({len(tail)} bytes) in {self.wal_path}")
+                f.truncate(self._wal_offset)
+                return
+            f.write(b"\n")
+        self._replay_wal()
+
+    def _append(self, records: list[dict]) -> None:
+        """Append records to the WAL (caller holds the flock and has refreshed)."""
+        os.makedirs(os.path.dirname(self.wal_path) or ".", exist_ok=True)
+        payload = "".join(
+            json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records
+        ).encode("utf-8")
+        self._settle_tail()
+        with open(self.wal_path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            self._wal_offset = f.tell()
+        self._wal_records += len(records)
+        if self._wal_records >= self.compact_every:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Write the index as the snapshot and truncate the WAL (caller holds the flock)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(list(self._index.by_id.values()), f,
+                      ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, self.path)
+        with open(self.wal_path, "w", encoding="utf-8"):
+            pass
+        self._snapshot_sig = self._stat_sig(self.path)
+        self._wal_offset = 0
+        self._wal_records = 0
+
+    def compact(self) -> None:
+        """Write the current pool as the snapshot and truncate the WAL."""
+        with self._exclusive():
+            self._refresh()
+            self._settle_tail()
+            self._write_snapshot()
+
+    # ── TaskStore API ─────────────────────────────────────
+
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            task = self._index.by_id.get(task_id)
+            return _plain(task) if task is not None else None
+
+    def all(self) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            return [_plain(t) for t in self._index.by_id.values()]
+
+    def by_status(self, *statuses: str) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            ids: set[str] = set()
+            for s in statuses:
+                ids |= self._index.status_ids(s.value if isinstance(s, Enum) else s)
+            return self._index.ordered(ids)
+
+    def by_assignee(self, assignee: str) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            return self._index.ordered(self._index.assignee_ids(assignee))
+
+    def count_by_status(self) -> dict[str, int]:
+        with self._lock:
+            self._refresh()
+            return self._index.status_counts()
+
+    def put_many(self, tasks: Iterable[dict]) -> None:
+        with self._exclusive():
+            self._refresh()
+            records = []
+            for t in tasks:
+                t = _plain(t)
+                self._index.put(t)
+                records.append({"op": "put", "task": t})
+            if records:
+                self._append(records)
+
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        with self._exclusive():
+            self._refresh()
+            records = [{"op": "del", "id": i} for i in task_ids if self._index.remove(i)]
+            if records:
+                self._append(records)
+            return len(records)
+
+    def replace_all(self, tasks: list[dict]) -> None:
+        with self._exclusive():
+            self._index.clear()
+            for t in tasks:
+                if isinstance(t, dict) and t.get("id"):
+                    self._index.put(_plain(t))
+            self._write_snapshot()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index.by_id)
+
+    def dependents(self, task_id: str) -> list[dict]:
+        with self._lock:
+            self._refresh()
+            return self._index.ordered(self._index.dependent_ids(task_id))
+
+    def unmet_count(self, task_id: str) -> int:
+        with self._lock:
+            self._refresh()
+            return self._index.unmet_count(task_id)
+
+    def ready(self, status: str = "TODO") -> list[dict]:
+        with self._lock:
+            self._refresh()
+            ids = [i for i in self._index.status_ids(status) if not self._index.unmet_count(i)]
+            return self._index.ordered(ids)
+
+
+# ──────────────────────────────────────────────────────────
+# SQLite
+# ──────────────────────────────────────────────────────────
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'TODO',
+    assignee TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks(assignee, seq);
+CREATE TABLE IF NOT EXISTS task_deps (
+    task_id TEXT NOT NULL,
+    dep_id TEXT NOT NULL,
+    PRIMARY KEY (task_id, dep_id)
+);
+CREATE INDEX IF NOT EXISTS idx_task_deps_dep ON task_deps(dep_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SqliteTaskStore(TaskStore):
+    """One row per task; status/assignee are indexed columns.
+
+    Dependency edges live in `task_deps` (indexed by dep_id), so
+    dependents and unmet counts are O(degree) index lookups.
+
+    On first open the legacy JSON pool at `legacy_json_path` is imported
+    once (recorded in the meta table; the JSON file is left untouched).
+    """
+
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._conn.commit()
+        if legacy_json_path:
+            self._migrate_once(legacy_json_path)
+
+    def _migrate_once(self, legacy_json_path: str) -> None:
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'legacy_json_imported'"
+            ).fetchone()
+            if done:
+                return
+            migrated = self.import_json(legacy_json_path)
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('legacy_json_imported', ?)",
+                (legacy_json_path,),
+            )
+            self._conn.commit()
+        if migrated:
+            logger.info(f"Migrated {migrated} tasks from {legacy_json_path} to {self.path}")
+
+    def _rows(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get(self, task_id: str) -> Optional[dict]:
+        rows = self._rows("SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return rows[0] if rows else None
+
+    def all(self) -> list[dict]:
+        return self._rows("SELECT data FROM tasks ORDER BY seq")
+
+    def by_status(self, *statuses: str) -> list[dict]:
+        if not statuses:
+            return []
+        values = tuple(s.value if isinstance(s, Enum) else s for s in statuses)
+        marks = ",".join("?" * len(values))
+        return self._rows(
+            f"SELECT data FROM tasks WHERE status IN ({marks}) ORDER BY seq", values,
+        )
+
+    def by_assignee(self, assignee: str) -> list[dict]:
+        return self._rows(
+            "SELECT data FROM tasks WHERE assignee = ? ORDER BY seq", (assignee,),
+        )
+
+    def count_by_status(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def put_many(self, tasks: Iterable[dict]) -> None:
+        with self._lock:
+            next_seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM tasks"
+            ).fetchone()[0]
+            rows, edges = [], []
+            for i, t in enumerate(tasks):
+                t = _plain(t)
+                rows.append((
+                    t["id"], next_seq + i, _status_of(t), t.get("assignee", ""),
+                    json.dumps(t, ensure_ascii=False, default=str),
+                ))
+                edges.extend((t["id"], d) for d in set(t.get("blocked_by") or []))
+            self._conn.executemany(
+                "INSERT INTO tasks (id, seq, status, assignee, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, "
+                "assignee = excluded.assignee, data = excluded.data",
+                rows,
+            )
+            self._conn.executemany(
+                "DELETE FROM task_deps WHERE task_id = ?", [(r[0],) for r in rows],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO task_deps (task_id, dep_id) VALUES (?, ?)", edges,
+            )
+            self._conn.commit()
+
+    def delete_many(self, task_ids: Iterable[str]) -> int:
+        with self._lock:
+            ids = [(i,) for i in task_ids]
+            cur = self._conn.executemany("DELETE FROM tasks WHERE id = ?", ids)
+            deleted = cur.rowcount
+            self._conn.executemany("DELETE FROM task_deps WHERE task_id = ?", ids)
+            self._conn.commit()
+            return deleted
+
+    def replace_all(self, tasks: list[dict]) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.execute("DELETE FROM task_deps")
+            self.put_many(t for t in tasks if isinstance(t, dict) and t.get("id"))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    _UNMET_SQL = (
+        "SELECT COUNT(*) FROM task_deps d JOIN tasks dep ON dep.id = d.dep_id "
+        "WHERE d.task_id = {task} AND dep.status != 'DONE'"
+    )
+
+    def dependents(self, task_id: str) -> list[dict]:
+        return self._rows(
+            "SELECT t.data FROM task_deps d JOIN tasks t ON t.id = d.task_id "
+            "WHERE d.dep_id = ? ORDER BY t.seq", (task_id,),
+        )
+
+    def unmet_count(self, task_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                self._UNMET_SQL.format(task="?"), (task_id,),
+            ).fetchone()[0]
+
+    def ready(self, status: str = "TODO") -> list[dict]:
+        return self._rows(
+            "SELECT t.data FROM tasks t WHERE t.status = ? AND ("
+            + self._UNMET_SQL.format(task="t.id") + ") = 0 ORDER BY t.seq", (status,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ──────────────────────────────────────────────────────────
+# Store registry
+# ──────────────────────────────────────────────────────────
+
+_stores: dict[tuple[str, str], TaskStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(
+    path: str,
+    backend: str = "json",
+    *,
+    legacy_json_path: Optional[str] = None,
+) -> TaskStore:
+    """Get (or open) the store for `path`. One instance per (backend, path)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown task store backend: {backend!r} (expected one of {BACKENDS})")
+    key = (backend, os.path.abspath(path))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                if backend == "sqlite":
+                    store = SqliteTaskStore(path, legacy_json_path=legacy_json_path)
+                else:
+                    store = JsonWalTaskStore(path)
+                _stores[key] = store
+    return store
+
+
+def reset_stores() -> None:
+    """Drop all open stores. For testing only."""
+    with _stores_lock:
+        for store in _stores.values():
+            if isinstance(store, SqliteTaskStore):
+                store.close()
+        _stores.clear()
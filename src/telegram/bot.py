@@ -100,6 +100,13 @@ async def main():
     except ImportError:
         logger.warning("APScheduler not available — proactive messages disabled")
 
+    # Chart rendering workers (matplotlib pre-imported, off the event loop)
+    try:
+        from .charts import start_renderer
+        await asyncio.to_thread(start_renderer)
+    except Exception as e:
+        logger.warning(f"Chart renderer warm-up failed: {e}")
+
     # Force-disconnect any previous polling session
     try:
         await bot.delete_webhook(drop_pending_updates=True)
@@ -113,6 +120,8 @@ async def main():
     finally:
         if scheduler:
             scheduler.shutdown(wait=False)
+        from .charts import shutdown_renderer
+        shutdown_renderer(wait=False)
 
 
 if __name__ == "__main__":
@@ -2,13 +2,28 @@
 
 Includes a comprehensive HTML dashboard renderer (html2image + Chromium)
 with matplotlib fallback.
+
+The chart functions are synchronous and CPU-heavy. Bot handlers should use
+render_chart(), which runs them in a warm worker process and caches the
+PNG bytes by input data, style version and resolution profile.
 """
 
+import asyncio
 import base64
+import contextvars
+import hashlib
 import io
+import json
 import logging
 import os
 import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional
 
 import matplotlib
 matplotlib.use("Agg")  # Non-interactive backend for server
@@ -29,6 +44,42 @@ GRID_COLOR = "#333355"
 # Sparkline characters for SVG-free inline rendering
 _SPARK = "▁▂▃▄▅▆▇█"
 
+# Bump when chart code or palette changes so cached PNGs are not reused
+STYLE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Output resolution: base DPI, optionally capped by pixel size."""
+    dpi: int
+    max_px: int = 0  # longer side of the figure in pixels (0 = no cap)
+
+    def dpi_for(self, figsize: tuple[float, float]) -> int:
+        if not self.max_px:
+            return self.dpi
+        return max(50, min(self.dpi, int(self.max_px / max(figsize))))
+
+
+# Telegram downscales photos to 1280 px on the longer side, so "telegram"
+# renders at most that many pixels; "full" keeps the original 200 DPI.
+PROFILES = {
+    "full": RenderProfile(dpi=200),
+    "telegram": RenderProfile(
+        dpi=int(os.getenv("CHART_PREVIEW_DPI", "200")),
+        max_px=int(os.getenv("CHART_PREVIEW_MAX_PX", "1280")),
+    ),
+}
+DEFAULT_PROFILE = "telegram"
+
+_profile: contextvars.ContextVar[RenderProfile] = contextvars.ContextVar(
+    "chart_profile", default=PROFILES["full"],
+)
+
+
+def _fig_args(figsize: tuple[float, float]) -> dict:
+    """figsize/dpi kwargs for plt.figure()/plt.subplots() under the active profile."""
+    return {"figsize": figsize, "dpi": _profile.get().dpi_for(figsize)}
+
 
 def _setup_style():
     plt.style.use("dark_background")
@@ -43,7 +94,7 @@ def portfolio_pie(data: dict[str, float], title: str = "Портфель") -> by
     if not data:
         return b""
 
-    fig, ax = plt.subplots(figsize=(8, 6), dpi=200)
+    fig, ax = plt.subplots(**_fig_args((8, 6)))
     fig.patch.set_facecolor(BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
@@ -87,7 +138,7 @@ def expense_bars(categories: dict[str, float], title: str = "Расходы") ->
     cats = [item[0] for item in sorted_items]
     vals = [item[1] for item in sorted_items]
 
-    fig, ax = plt.subplots(figsize=(8, max(3, len(cats) * 0.55)), dpi=200)
+    fig, ax = plt.subplots(**_fig_args((8, max(3, len(cats) * 0.55))))
     fig.patch.set_facecolor(BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
@@ -120,7 +171,7 @@ def balance_history(dates: list, values: list[float], title: str = "Истори
     if len(dates) < 2:
         return b""
 
-    fig, ax = plt.subplots(figsize=(10, 5), dpi=200)
+    fig, ax = plt.subplots(**_fig_args((10, 5)))
     fig.patch.set_facecolor(BG_COLOR)
     ax.set_facecolor(BG_COLOR)
 
@@ -160,7 +211,7 @@ def dashboard(
     if not has_expenses and not has_history:
         return portfolio_pie(portfolio, "Портфель Zinin Corp")
 
-    fig = plt.figure(figsize=(12, 10), dpi=200)
+    fig = plt.figure(**_fig_args((12, 10)))
     fig.patch.set_facecolor(BG_COLOR)
 
     if has_expenses and has_history:
@@ -560,7 +611,7 @@ def _render_donut_fallback(
     _setup_style()
     import matplotlib.gridspec as gridspec
 
-    fig = plt.figure(figsize=(10, 6), dpi=200)
+    fig = plt.figure(**_fig_args((10, 6)))
     fig.patch.set_facecolor(BG_COLOR)
 
     gs = gridspec.GridSpec(1, 2, figure=fig, width_ratios=[1, 1.2], wspace=0.05)
@@ -636,3 +687,258 @@ def _render_donut_fallback(
     plt.close(fig)
     buf.seek(0)
     return buf.getvalue()
+
+
+# ═══════════════════════════════════════════════════════════
+# Rendering service (off the event loop, content-addressed cache)
+# ═══════════════════════════════════════════════════════════
+
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "1"))
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MB", "32")) * 1024 * 1024
+CHART_RENDERER = os.getenv("CHART_RENDERER", "process")  # "process" or "thread"
+
+_RENDERERS = {
+    "portfolio_pie": portfolio_pie,
+    "expense_bars": expense_bars,
+    "balance_history": balance_history,
+    "dashboard": dashboard,
+    "render_financial_dashboard": render_financial_dashboard,
+}
+
+
+def _warm_worker():
+    """Process pool initializer: load matplotlib, style and the font cache."""
+    _setup_style()
+    fig = plt.figure(figsize=(1, 1), dpi=50)
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def _render_job(chart: str, args: tuple, kwargs: dict, profile: str) -> bytes:
+    """Runs in the worker: render one chart under the given profile."""
+    token = _profile.set(PROFILES[profile])
+    try:
+        return _RENDERERS[chart](*args, **kwargs)
+    finally:
+        _profile.reset(token)
+
+
+def chart_cache_key(chart: str, args: tuple, kwargs: dict, profile: str) -> str:
+    """Content address of a chart: renderer, inputs, style version and profile.
+
+    Dict order is kept (it decides wedge/bar order), so equal data given in a
+    different order is a different image.
+    """
+    payload = json.dumps(
+        [chart, STYLE_VERSION, profile, list(args), kwargs],
+        default=str, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChartRenderer:
+    """Renders charts in a warm process pool with an in-memory PNG cache.
+
+    Identical concurrent requests share one render. Falls back to a single
+    background thread when worker processes cannot be started.
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS,
+                 cache_max_bytes: int = CHART_CACHE_MAX_BYTES,
+                 mode: str = CHART_RENDERER):
+        self.workers = max(1, workers)
+        self.cache_max_bytes = cache_max_bytes
+        self.mode = mode
+        self._executor = None
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: dict[str, Future] = {}
+        self._breaks = 0
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "renders": 0,
+                      "errors": 0, "render_sec": 0.0}
+
+    def start(self):
+        """Start the workers now instead of on the first chart."""
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            executor.submit(_warm_worker).result(timeout=60)
+        except BrokenProcessPool as e:
+            logger.warning(f"Chart worker warm-up failed: {e}")
+            with self._lock:
+                self._reset_executor()
+        except Exception as e:
+            logger.warning(f"Chart worker warm-up failed: {e}")
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == "process":
+                try:
+                    import multiprocessing
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=_warm_worker,
+                    )
+                    logger.info(f"Chart renderer: {self.workers} worker process(es)")
+                except Exception as e:
+                    logger.warning(f"Chart process pool unavailable ({e}), using a thread")
+                    self.mode = "thread"
+            if self._executor is None:
+                # pyplot is not thread-safe: one thread renders at a time
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+        return self._executor
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        png = self._cache.get(key)
+        if png is not None:
+            self._cache.move_to_end(key)
+        return png
+
+    def _cache_put(self, key: str, png: bytes):
+        if key in self._cache or len(png) > self.cache_max_bytes:
+            return
+        self._cache[key] = png
+        self._cache_bytes += len(png)
+        while self._cache_bytes > self.cache_max_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= len(old)
+
+    @staticmethod
+    def _follow(shared: Future) -> Future:
+        """A caller's own Future that mirrors `shared`.
+
+        Cancelling it (e.g. asyncio.wait_for timing out) leaves the shared
+        render and its other waiters untouched.
+        """
+        waiter: Future = Future()
+
+        def _copy(f: Future):
+            if not waiter.set_running_or_notify_cancel():
+                return  # this caller gave up
+            if f.cancelled():
+                waiter.set_exception(CancelledError())
+            elif f.exception() is not None:
+                waiter.set_exception(f.exception())
+            else:
+                waiter.set_result(f.result())
+
+        shared.add_done_callback(_copy)
+        return waiter
+
+    def submit(self, chart: str, args: tuple, kwargs: dict,
+               profile: str = DEFAULT_PROFILE) -> Future:
+        """Cached bytes or an in-flight/new render, as a concurrent Future.
+
+        Each caller gets its own Future, so cancelling one waiter does not
+        cancel a render other callers share.
+        """
+        if chart not in _RENDERERS:
+            raise ValueError(f"Unknown chart: {chart}")
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown render profile: {profile}")
+        key = chart_cache_key(chart, args, kwargs, profile)
+
+        with self._lock:
+            png = self._cache_get(key)
+            if png is not None:
+                self.stats["hits"] += 1
+                done: Future = Future()
+                done.set_result(png)
+                return done
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["shared"] += 1
+                return self._follow(future)
+            self.stats["misses"] += 1
+            try:
+                future = self._get_executor().submit(_render_job, chart, args, kwargs, profile)
+            except BrokenProcessPool:
+                self._reset_executor()
+                future = self._get_executor().submit(_render_job, chart, args, kwargs, profile)
+            self._inflight[key] = future
+
+        started = time.perf_counter()
+
+        def _done(f: Future):
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.stats["render_sec"] += time.perf_counter() - started
+                if f.cancelled():
+                    self.stats["errors"] += 1
+                    return
+                if f.exception() is not None:
+                    self.stats["errors"] += 1
+                    if isinstance(f.exception(), BrokenProcessPool):
+                        self._reset_executor()
+                    return
+                self.stats["renders"] += 1
+                self._cache_put(key, f.result())
+
+        future.add_done_callback(_done)
+        return self._follow(future)
+
+    def _reset_executor(self):
+        """Drop a broken process pool; the next submit starts a new one.
+
+        After repeated breaks (e.g. workers OOM-killed) renders move to a thread.
+        """
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        self._breaks += 1
+        if self._breaks >= 2 and self.mode == "process":
+            logger.warning("Chart worker pool keeps breaking — rendering in a thread")
+            self.mode = "thread"
+        else:
+            logger.warning("Chart worker pool broken — restarting")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, chart: str, *args, profile: str = DEFAULT_PROFILE, **kwargs) -> bytes:
+        """Render `chart` (a name from _RENDERERS) without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(chart, args, kwargs, profile))
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "mode": self.mode,
+                "workers": self.workers,
+                "cached": len(self._cache),
+                "cache_bytes": self._cache_bytes,
+                "inflight": len(self._inflight),
+            }
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_renderer = ChartRenderer()
+
+
+async def render_chart(chart: str, *args, profile: str = DEFAULT_PROFILE, **kwargs) -> bytes:
+    """Render a chart off the event loop, e.g.
+    ``await render_chart("portfolio_pie", data, "Портфель")``. Returns PNG bytes."""
+    return await _renderer.render(chart, *args, profile=profile, **kwargs)
+
+
+def start_renderer():
+    """Start and warm the chart workers (call once at bot startup)."""
+    _renderer.start()
+
+
+def shutdown_renderer(wait: bool = True):
+    _renderer.shutdown(wait=wait)
+
+
+def get_renderer_status() -> dict:
+    return _renderer.status()
@@ -99,12 +99,12 @@ async def cmd_report(message: Message):
             if portfolio and sum(portfolio.values()) > 1:
                 from ..transaction_storage import get_summary
                 expenses = None
-                tinkoff = get_summary()
+                tinkoff = await asyncio.to_thread(get_summary)
                 if tinkoff and tinkoff.get("top_categories"):
                     expenses = dict(tinkoff["top_categories"][:8])
 
-                from ..charts import dashboard
-                png = dashboard(portfolio, expenses)
+                from ..charts import render_chart
+                png = await render_chart("dashboard", portfolio, expenses)
                 if png:
                     photo = BufferedInputFile(png, filename="dashboard.png")
                     await message.answer_photo(photo=photo, caption="Финансовый дашборд")
@@ -141,8 +141,8 @@ async def cmd_portfolio(message: Message):
         try:
             portfolio = await asyncio.to_thread(_collect_portfolio_data)
             if portfolio and sum(portfolio.values()) > 1:
-                from ..charts import portfolio_pie
-                png = portfolio_pie(portfolio, "Портфель Zinin Corp")
+                from ..charts import render_chart
+                png = await render_chart("portfolio_pie", portfolio, "Портфель Zinin Corp")
                 if png:
                     photo = BufferedInputFile(png, filename="portfolio.png")
                     total = sum(portfolio.values())
@@ -257,17 +257,16 @@ async def cmd_chart(message: Message):
             return
 
         logger.info("Chart: rendering dashboard...")
-        from ..charts import render_financial_dashboard
+        from ..charts import render_chart
         png = await asyncio.wait_for(
-            asyncio.to_thread(render_financial_dashboard, data),
+            render_chart("render_financial_dashboard", data),
             timeout=45,
         )
         logger.info(f"Chart: dashboard rendered, {len(png)} bytes")
 
         if not png:
             logger.info("Chart: dashboard empty, falling back to pie chart")
-            from ..charts import portfolio_pie
-            png = portfolio_pie(data.get("crypto", {}), "Портфель Zinin Corp")
+            png = await render_chart("portfolio_pie", data.get("crypto", {}), "Портфель Zinin Corp")
 
         if not png:
             await message.answer("Не удалось построить дашборд.")
@@ -389,15 +388,15 @@ def _build_chart_text(data: dict) -> str:
 async def cmd_expenses(message: Message):
     """Generate expense bar chart from Tinkoff data."""
     from ..transaction_storage import get_summary
-    summary = get_summary()
+    summary = await asyncio.to_thread(get_summary)
     if not summary or not summary.get("top_categories"):
         await message.answer("Нет данных по расходам. Пришлите CSV-выписку из Т-Банка.")
         return
 
     categories = dict(summary["top_categories"][:10])
 
-    from ..charts import expense_bars
-    png = expense_bars(categories, "Расходы — Т-Банк")
+    from ..charts import render_chart
+    png = await render_chart("expense_bars", categories, "Расходы — Т-Банк")
     if not png:
         await message.answer("Не удалось построить график расходов.")
         return
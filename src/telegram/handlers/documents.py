@@ -76,7 +76,7 @@ async def handle_document(message: Message, bot: Bot):
             return
 
         # Save to storage (merge + dedup)
-        new_count = save_statement(parsed)
+        new_count = await asyncio.to_thread(save_statement, parsed)
 
         # Format response
         summary = format_summary_text(parsed)
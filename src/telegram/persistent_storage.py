@@ -6,96 +6,172 @@ Data survives Railway container restarts.
 SECURITY: Sensitive keys (transactions, screenshots, payments) are
 encrypted via vault.py (AES-256, VAULT_PASSWORD env var).
 
+Connections come from a shared pool. Decoded values are kept in an
+in-process read-through cache (KV_CACHE_TTL_SEC) that every write in this
+process updates, so repeated loads skip the value transfer and the vault
+decrypt. Other processes (the monitor's webhooks, the other bots) write
+the same keys, so with PostgreSQL a cached value is only served after one
+primary-key lookup confirms its kv_store.updated_at is unchanged.
+
+Lists written with append_to_list() are stored one item per row (one line
+per item in dev), so appending does not re-encode or re-encrypt the whole
+list. Such keys hold LIST_MARKER in kv_store; save() on the same key turns
+it back into a plain blob.
+
 Tables auto-created on first use:
   kv_store(key TEXT PRIMARY KEY, value TEXT, updated_at TIMESTAMP)
+  kv_list(id BIGSERIAL PRIMARY KEY, key TEXT, value TEXT, created_at TIMESTAMP)
 """
 
+import copy
 import json
 import logging
 import os
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
 
 from . import vault
 
 logger = logging.getLogger(__name__)
 
+DB_POOL_MAX_CONN = int(os.getenv("KV_DB_POOL_MAX", "5"))
+CACHE_TTL_SEC = float(os.getenv("KV_CACHE_TTL_SEC", "60"))
+
+LIST_MARKER = "__kv_list__"  # kv_store value of keys stored in kv_list
+
 _db_url = None
 _use_db = False
 _engine = None
+_pool = None
+_pool_lock = threading.Lock()
+
+_MISSING = object()
+_cache: dict = {}  # key → (monotonic stored_at, decoded value or _MISSING, updated_at)
+_cache_lock = threading.Lock()
+_list_locks: dict = {}
+_list_locks_guard = threading.Lock()
 
 
 def _init_db():
-    """Initialize database connection (lazy, once)."""
-    global _db_url, _use_db, _engine
+    """Initialize the connection pool and tables (lazy, once)."""
+    global _db_url, _use_db, _engine, _pool
     if _engine is not None:
         return _use_db
 
-    _db_url = os.getenv("DATABASE_URL", "")
-    if not _db_url:
-        _use_db = False
-        return False
-
-    # Railway sometimes has uppercase hostnames (Postgres.railway.internal)
-    if ".railway.internal" in _db_url.lower() and ".railway.internal" not in _db_url:
-        import re
-        _db_url = re.sub(
-            r"@([A-Za-z0-9.-]+\.railway\.internal)",
-            lambda m: "@" + m.group(1).lower(),
-            _db_url,
-            flags=re.IGNORECASE,
-        )
+    with _pool_lock:
+        if _engine is not None:
+            return _use_db
+
+        _db_url = os.getenv("DATABASE_URL", "")
+        if not _db_url:
+            _use_db = False
+            return False
+
+        # Railway sometimes has uppercase hostnames (Postgres.railway.internal)
+        if ".railway.internal" in _db_url.lower() and ".railway.internal" not in _db_url:
+            import re
+            _db_url = re.sub(
+                r"@([A-Za-z0-9.-]+\.railway\.internal)",
+                lambda m: "@" + m.group(1).lower(),
+                _db_url,
+                flags=re.IGNORECASE,
+            )
 
+        try:
+            from psycopg2.pool import ThreadedConnectionPool
+            _pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONN, _db_url)
+            with _connection() as cur:
+                # Use TEXT for value column (encrypted data is not valid JSON)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS kv_store (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL DEFAULT '{}',
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS kv_list (
+                        id BIGSERIAL PRIMARY KEY,
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT NOW()
+                    )
+                """)
+                cur.execute("CREATE INDEX IF NOT EXISTS kv_list_key_id ON kv_list (key, id)")
+            _engine = True
+            _use_db = True
+            logger.info("Persistent storage: PostgreSQL initialized")
+            return True
+        except Exception as e:
+            logger.warning(f"Persistent storage: PostgreSQL unavailable ({e}), using local files")
+            _close_pool()
+            _engine = False
+            _use_db = False
+            return False
+
+
+@contextmanager
+def _connection():
+    """Borrow a pooled connection and yield a cursor.
+
+    Everything run on the cursor is one transaction: committed on success,
+    rolled back on error. Failed connections are dropped from the pool.
+    """
+    conn = _pool.getconn()
+    broken = False
     try:
-        import psycopg2
-        conn = psycopg2.connect(_db_url)
-        conn.autocommit = True
-        cur = conn.cursor()
-        # Use TEXT for value column (encrypted data is not valid JSON)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS kv_store (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL DEFAULT '{}',
-                updated_at TIMESTAMP DEFAULT NOW()
-            )
-        """)
-        cur.close()
-        conn.close()
-        _engine = True
-        _use_db = True
-        logger.info("Persistent storage: PostgreSQL initialized")
-        return True
-    except Exception as e:
-        logger.warning(f"Persistent storage: PostgreSQL unavailable ({e}), using local files")
-        _engine = False
-        _use_db = False
-        return False
+        with conn.cursor() as cur:
+            yield cur
+        conn.commit()
+    except Exception:
+        broken = True
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        _pool.putconn(conn, close=broken)
 
 
-def save(key: str, data) -> bool:
-    """Save data under a key. Encrypts sensitive keys. Returns True on success."""
-    if vault.is_sensitive(key):
-        blob = vault.encrypt(data)
-    else:
-        blob = json.dumps(data, ensure_ascii=False, default=str)
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        try:
+            _pool.closeall()
+        except Exception as e:
+            logger.warning(f"Persistent storage: pool close failed: {e}")
+    _pool = None
+
+
+def close():
+    """Close pooled connections and reset state (shutdown / tests)."""
+    global _engine, _use_db
+    with _pool_lock:
+        _close_pool()
+        _engine = None
+        _use_db = False
+    invalidate()
 
-    if _init_db():
-        return _db_save(key, blob)
-    return _file_save(key, blob)
 
+# ── Encoding ───────────────────────────────────────────────
+
+def _encode(key: str, data) -> str:
+    if vault.is_sensitive(key):
+        return vault.encrypt(data)
+    return json.dumps(data, ensure_ascii=False, default=str)
 
-def load(key: str, default=None):
-    """Load data by key. Decrypts sensitive keys. Returns default if not found."""
-    if _init_db():
-        blob = _db_load_raw(key)
-    else:
-        blob = _file_load_raw(key)
 
+def _decode(key: str, blob: Optional[str]):
+    """Decode a stored blob; _MISSING if absent or undecryptable."""
     if blob is None:
-        return default
+        return _MISSING
 
     if vault.is_sensitive(key):
         result = vault.decrypt(blob)
-        return result if result is not None else default
+        return result if result is not None else _MISSING
 
     # Non-sensitive: parse JSON
     if isinstance(blob, str):
@@ -106,68 +182,280 @@ def load(key: str, default=None):
     return blob
 
 
+# ── Cache ──────────────────────────────────────────────────
+
+def _cache_get(key: str):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > CACHE_TTL_SEC:
+            del _cache[key]
+            return None
+        return entry
+
+
+def _cache_put(key: str, value, version=None):
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), value, version)
+
+
+def invalidate(key: Optional[str] = None):
+    """Drop one key (or everything) from the in-process cache."""
+    with _cache_lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
+
+
+def _as_stored(data):
+    """What a later load would return for data (tuples → lists, dates → str)."""
+    return json.loads(json.dumps(data, ensure_ascii=False, default=str))
+
+
+def _public(value, default):
+    # Callers mutate what they load (load → append → save), so hand out copies
+    return default if value is _MISSING else copy.deepcopy(value)
+
+
+def _list_lock(key: str) -> threading.Lock:
+    with _list_locks_guard:
+        lock = _list_locks.get(key)
+        if lock is None:
+            lock = _list_locks[key] = threading.Lock()
+        return lock
+
+
+# ── Public API ─────────────────────────────────────────────
+
+def save(key: str, data) -> bool:
+    """Save data under a key. Encrypts sensitive keys. Returns True on success."""
+    blob = _encode(key, data)
+
+    versions: dict = {}
+    if _init_db():
+        ok = _db_save_many({key: blob}, versions)
+    else:
+        ok = _file_save(key, blob)
+    if ok:
+        _cache_put(key, _as_stored(data), versions.get(key))
+    else:
+        invalidate(key)
+    return ok
+
+
+def save_many(items: dict) -> bool:
+    """Save several keys in one round-trip. Returns True if all succeeded."""
+    if not items:
+        return True
+    blobs = {key: _encode(key, data) for key, data in items.items()}
+
+    versions: dict = {}
+    if _init_db():
+        ok = _db_save_many(blobs, versions)
+    else:
+        ok = all([_file_save(key, blob) for key, blob in blobs.items()])
+    for key, data in items.items():
+        if ok:
+            _cache_put(key, _as_stored(data), versions.get(key))
+        else:
+            invalidate(key)
+    return ok
+
+
+def load(key: str, default=None):
+    """Load data by key. Decrypts sensitive keys. Returns default if not found."""
+    return load_many([key], default)[key]
+
+
+def load_many(keys: Iterable[str], default=None) -> dict:
+    """Load several keys at once; cache misses are fetched in one query.
+
+    Returns {key: value}, with default for keys that are not stored.
+    With PostgreSQL, cached values are revalidated against updated_at
+    (written by any process) in one query. Values read from the local
+    fallback after a DB error are not cached.
+    """
+    use_db = _init_db()
+    result = {}
+    cached = {}
+    misses = []
+    for key in keys:
+        entry = _cache_get(key)
+        if entry is not None:
+            cached[key] = entry
+        else:
+            misses.append(key)
+
+    if cached and use_db:
+        current = _db_versions(list(cached))
+        for key, entry in list(cached.items()):
+            if current is None or current.get(key) != entry[2]:
+                del cached[key]
+                misses.append(key)
+    for key, entry in cached.items():
+        result[key] = _public(entry[1], default)
+    if not misses:
+        return result
+
+    versions: dict = {}
+    fetched = _db_load_many(misses, versions) if use_db else None
+    cacheable = fetched is not None
+    if fetched is None:
+        fetched = {key: _file_load(key) for key in misses}
+
+    for key in misses:
+        value = fetched.get(key, _MISSING)
+        if cacheable:
+            _cache_put(key, value, versions.get(key))
+        result[key] = _public(value, default)
+    return result
+
+
 def append_to_list(key: str, item: dict, max_items: int = 200) -> bool:
-    """Append item to a list stored under key (with max size limit)."""
-    data = load(key, [])
-    if not isinstance(data, list):
-        data = []
-    data.append(item)
-    if len(data) > max_items:
-        data = data[-max_items:]
-    return save(key, data)
+    """Append item to a list stored under key (with max size limit).
+
+    Only the new item is encoded and written; the oldest items beyond
+    max_items are dropped.
+    """
+    with _list_lock(key):
+        versions: dict = {}
+        if _init_db():
+            ok = _db_append(key, _encode(key, item), max_items, versions)
+        else:
+            ok = _file_append(key, item, max_items)
+
+        entry = _cache_get(key)
+        # Extend the cached list only if no other process wrote the key since
+        # it was cached; otherwise the next load fetches it again.
+        if ok and entry is not None and isinstance(entry[1], list) and \
+                (not versions or entry[2] == versions.get("previous")):
+            data = entry[1] + [_as_stored(item)]
+            _cache_put(key, data[-max_items:], versions.get(key))
+        else:
+            invalidate(key)
+        return ok
 
 
 # ── PostgreSQL backend ─────────────────────────────────────
 
-def _db_save(key: str, blob: str) -> bool:
+# clock_timestamp(), not NOW(): updated_at is the cache version, so two
+# writes in one transaction (or at one transaction start) must differ
+_UPSERT = """INSERT INTO kv_store (key, value, updated_at) VALUES (%s, %s, clock_timestamp())
+             ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = clock_timestamp()"""
+
+_VERSIONS = "SELECT key, updated_at FROM kv_store WHERE key = ANY(%s)"
+
+_TRIM_LIST = """DELETE FROM kv_list WHERE key = %s AND id <= (
+                    SELECT id FROM kv_list WHERE key = %s
+                    ORDER BY id DESC OFFSET %s LIMIT 1)"""
+
+
+def _db_versions(keys: list) -> Optional[dict]:
+    """{key: updated_at} for stored keys (one indexed lookup). None on error."""
     try:
-        import psycopg2
-        conn = psycopg2.connect(_db_url)
-        conn.autocommit = True
-        cur = conn.cursor()
-        cur.execute(
-            """INSERT INTO kv_store (key, value, updated_at) VALUES (%s, %s, NOW())
-               ON CONFLICT (key) DO UPDATE SET value = %s, updated_at = NOW()""",
-            (key, blob, blob),
-        )
-        cur.close()
-        conn.close()
+        with _connection() as cur:
+            cur.execute(_VERSIONS, (keys,))
+            return dict(cur.fetchall())
+    except Exception as e:
+        logger.error(f"DB version check {keys} failed: {e}")
+        return None
+
+
+def _db_save_many(blobs: dict, versions: dict) -> bool:
+    """Upsert blobs; fills `versions` with the new updated_at of each key."""
+    try:
+        with _connection() as cur:
+            cur.executemany(_UPSERT, list(blobs.items()))
+            cur.execute("DELETE FROM kv_list WHERE key = ANY(%s)", (list(blobs),))
+            cur.execute(_VERSIONS, (list(blobs),))
+            versions.update(cur.fetchall())
         return True
     except Exception as e:
-        logger.error(f"DB save '{key}' failed: {e}")
-        return _file_save(key, blob)  # fallback
+        logger.error(f"DB save {list(blobs)} failed: {e}")
+        versions.clear()
+        return all([_file_save(key, blob) for key, blob in blobs.items()])  # fallback
 
 
-def _db_load_raw(key: str) -> Optional[str]:
-    """Load raw string from PostgreSQL (may be encrypted)."""
+def _db_load_many(keys: list, versions: dict) -> Optional[dict]:
+    """Load and decode keys from PostgreSQL; absent keys are left out.
+
+    Fills `versions` with updated_at per key. Returns None if the query failed.
+    """
     try:
-        import psycopg2
-        conn = psycopg2.connect(_db_url)
-        cur = conn.cursor()
-        cur.execute("SELECT value FROM kv_store WHERE key = %s", (key,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        if row:
-            val = row[0]
-            if isinstance(val, (dict, list)):
-                return json.dumps(val, ensure_ascii=False, default=str)
-            return str(val) if val is not None else None
+        with _connection() as cur:
+            cur.execute("SELECT key, value, updated_at FROM kv_store WHERE key = ANY(%s)", (keys,))
+            fetched = cur.fetchall()
+            rows = {k: v for k, v, _ in fetched}
+            versions.update((k, updated) for k, _, updated in fetched)
+            list_keys = [k for k, v in rows.items() if v == LIST_MARKER]
+            items: dict = {k: [] for k in list_keys}
+            if list_keys:
+                cur.execute(
+                    "SELECT key, value FROM kv_list WHERE key = ANY(%s) ORDER BY id",
+                    (list_keys,),
+                )
+                for k, v in cur.fetchall():
+                    items[k].append(v)
+    except Exception as e:
+        logger.error(f"DB load {keys} failed: {e}")
         return None
+
+    result = {}
+    for key, val in rows.items():
+        if key in items:
+            decoded = (_decode(key, blob) for blob in items[key])
+            result[key] = [d for d in decoded if d is not _MISSING]
+            continue
+        if isinstance(val, (dict, list)):
+            val = json.dumps(val, ensure_ascii=False, default=str)
+        result[key] = _decode(key, str(val) if val is not None else None)
+    return result
+
+
+def _db_append(key: str, blob: str, max_items: int, versions: dict) -> bool:
+    """Append one kv_list row and bump updated_at.
+
+    Fills `versions` with the key's updated_at before ("previous") and after.
+    """
+    try:
+        with _connection() as cur:
+            cur.execute("SELECT value, updated_at FROM kv_store WHERE key = %s FOR UPDATE", (key,))
+            row = cur.fetchone()
+            versions["previous"] = row[1] if row else None
+            if row is None or row[0] != LIST_MARKER:
+                # First append: move an existing blob list into kv_list
+                legacy = _decode(key, row[0]) if row else _MISSING
+                if isinstance(legacy, list):
+                    cur.executemany(
+                        "INSERT INTO kv_list (key, value) VALUES (%s, %s)",
+                        [(key, _encode(key, old)) for old in legacy[-max_items:]],
+                    )
+                cur.execute(_UPSERT, (key, LIST_MARKER))
+            cur.execute("INSERT INTO kv_list (key, value) VALUES (%s, %s)", (key, blob))
+            cur.execute(_TRIM_LIST, (key, key, max_items))
+            cur.execute(
+                "UPDATE kv_store SET updated_at = clock_timestamp() WHERE key = %s RETURNING updated_at",
+                (key,),
+            )
+            versions[key] = cur.fetchone()[0]
+        return True
     except Exception as e:
-        logger.error(f"DB load '{key}' failed: {e}")
-        return _file_load_raw(key)  # fallback
+        logger.error(f"DB append '{key}' failed: {e}")
+        versions.clear()
+        return _file_append(key, _decode(key, blob), max_items)  # fallback
 
 
 # ── File backend (local dev) ──────────────────────────────
 
-def _file_path(key: str) -> str:
+def _file_path(key: str, ext: str = "json") -> str:
     safe_key = key.replace("/", "_").replace("\\", "_")
     for base in ["/app/data", "data"]:
         if os.path.isdir(base):
-            return os.path.join(base, f"{safe_key}.json")
+            return os.path.join(base, f"{safe_key}.{ext}")
     os.makedirs("data", exist_ok=True)
-    return f"data/{safe_key}.json"
+    return f"data/{safe_key}.{ext}"
 
 
 def _file_save(key: str, blob: str) -> bool:
@@ -176,16 +464,19 @@ def _file_save(key: str, blob: str) -> bool:
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
         with open(path, "w", encoding="utf-8") as f:
             f.write(blob)
+        list_path = _file_path(key, "jsonl")
+        if os.path.exists(list_path):
+            os.remove(list_path)
         return True
     except Exception as e:
         logger.error(f"File save '{key}' failed: {e}")
         return False
 
 
-def _file_load_raw(key: str) -> Optional[str]:
+def _file_load_raw(key: str, ext: str = "json") -> Optional[str]:
     """Load raw string from file (may be encrypted)."""
     try:
-        path = _file_path(key)
+        path = _file_path(key, ext)
         if not os.path.exists(path):
             return None
         with open(path, "r", encoding="utf-8") as f:
@@ -193,3 +484,36 @@ def _file_load_raw(key: str) -> Optional[str]:
     except Exception as e:
         logger.error(f"File load '{key}' failed: {e}")
         return None
+
+
+def _file_load(key: str):
+    blob = _file_load_raw(key)
+    if blob != LIST_MARKER:
+        return _decode(key, blob)
+    lines = (_file_load_raw(key, "jsonl") or "").splitlines()
+    decoded = (_decode(key, line) for line in lines if line)
+    return [d for d in decoded if d is not _MISSING]
+
+
+def _file_append(key: str, item, max_items: int) -> bool:
+    """Append one line; the oldest lines are trimmed once over max_items."""
+    try:
+        path = _file_path(key, "jsonl")
+        if _file_load_raw(key) != LIST_MARKER:
+            legacy = _decode(key, _file_load_raw(key))
+            lines = [_encode(key, old) for old in legacy] if isinstance(legacy, list) else []
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in lines[-max_items:])
+            with open(_file_path(key), "w", encoding="utf-8") as f:
+                f.write(LIST_MARKER)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(_encode(key, item) + "\n")
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if len(lines) > max_items:
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in lines[-max_items:])
+        return True
+    except Exception as e:
+        logger.error(f"File append '{key}' failed: {e}")
+        return False
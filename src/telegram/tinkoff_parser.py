@@ -4,7 +4,7 @@ import csv
 import io
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,29 @@ def is_tinkoff_csv(text: str) -> bool:
     return "Дата операции" in first_line and "Сумма операции" in first_line
 
 
+def iter_tinkoff_csv(
+    content: Union[str, Iterable[str]],
+    errors: Optional[list] = None,
+) -> Iterator[dict]:
+    """Yield parsed transactions row by row (file order).
+
+    content may be the whole CSV text or any iterable of lines (e.g. an
+    open file). Parsing errors are appended to `errors` if given.
+    """
+    lines = io.StringIO(content) if isinstance(content, str) else content
+    reader = csv.DictReader(lines, delimiter=";", quotechar='"')
+
+    for i, row in enumerate(reader):
+        try:
+            tx = _parse_row(row)
+        except Exception as e:
+            if errors is not None:
+                errors.append(f"Row {i + 2}: {e}")
+            continue
+        if tx:
+            yield tx
+
+
 def parse_tinkoff_csv(content: str) -> dict:
     """Parse a Tinkoff CSV statement into structured data.
 
@@ -44,22 +67,8 @@ def parse_tinkoff_csv(content: str) -> dict:
         period: dict with start/end dates
         errors: list of parsing errors
     """
-    transactions = []
-    errors = []
-
-    reader = csv.DictReader(
-        io.StringIO(content),
-        delimiter=";",
-        quotechar='"',
-    )
-
-    for i, row in enumerate(reader):
-        try:
-            tx = _parse_row(row)
-            if tx:
-                transactions.append(tx)
-        except Exception as e:
-            errors.append(f"Row {i + 2}: {e}")
+    errors: list[str] = []
+    transactions = list(iter_tinkoff_csv(content, errors))
 
     # Sort by date (newest first)
     transactions.sort(key=lambda x: x.get("date", ""), reverse=True)
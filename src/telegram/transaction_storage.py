@@ -2,74 +2,160 @@
 
 Uses persistent_storage (PostgreSQL on Railway, local files in dev).
 Data survives container restarts.
+
+Layout (all keys encrypted by the vault):
+  tinkoff_transactions          index: per-month aggregates (income,
+                                expenses, per-category sums, cards) and
+                                the dedup hashes of every stored row
+  tinkoff_transactions:YYYY-MM  rows of one month, newest first
+
+An upload only loads and rewrites the months that receive new rows;
+summaries and category/month totals are answered from the index without
+loading any rows. The legacy single-blob format is migrated on first use.
 """
 
+import hashlib
 import logging
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
 from . import persistent_storage as store
 
 logger = logging.getLogger(__name__)
 
 STORAGE_KEY = "tinkoff_transactions"
+INDEX_VERSION = 2
+UNDATED = "undated"  # partition for rows without an operation date
 
+EXPENSE_TYPES = ("debit", "transfer")
 
-def save_statement(parsed: dict) -> int:
-    """Save parsed CSV statement. Merges with existing data, deduplicates.
+_lock = threading.RLock()
+
+
+def _month_of(tx: dict) -> str:
+    return tx.get("date", "")[:7] or UNDATED
+
+
+def _month_key(month: str) -> str:
+    return f"{STORAGE_KEY}:{month}"
+
+
+def _new_month() -> dict:
+    return {"count": 0, "income": 0.0, "expenses": 0.0, "internal": 0.0,
+            "categories": {},  # expense sums per category
+            "category_names": [], "cards": [], "start": "", "end": "", "hashes": []}
+
+
+def _newest_first(months: Iterable[str]) -> list[str]:
+    """Month keys newest first, undated rows last (as a date sort would)."""
+    return sorted(months, key=lambda m: "" if m == UNDATED else m, reverse=True)
+
+
+def _add_to_month(meta: dict, tx: dict, tx_hash: str):
+    """Fold one row into a month's aggregates."""
+    amount = tx.get("amount", 0)
+    op_type = tx.get("op_type")
+    meta["count"] += 1
+    meta["hashes"].append(tx_hash)
+    if op_type == "credit":
+        meta["income"] += amount
+    elif op_type in EXPENSE_TYPES:
+        meta["expenses"] += abs(amount)
+        cat = tx.get("category", "Другое") or "Другое"
+        meta["categories"][cat] = meta["categories"].get(cat, 0) + abs(amount)
+    elif op_type == "internal_transfer":
+        meta["internal"] += abs(amount)
+    for field, value in (("cards", tx.get("card")), ("category_names", tx.get("category"))):
+        if value and value not in meta[field]:
+            meta[field].append(value)
+            meta[field].sort()
+    date = tx.get("date")
+    if date:
+        meta["start"] = min(meta["start"] or date, date)
+        meta["end"] = max(meta["end"], date)
+
+
+def _empty_index() -> dict:
+    return {"version": INDEX_VERSION, "months": {}, "total_count": 0}
+
+
+def _load_index() -> dict:
+    """Load the index, migrating a legacy single-blob store on first use."""
+    with _lock:
+        data = store.load(STORAGE_KEY, None)
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+            return data
+        index = _empty_index()
+        if isinstance(data, dict) and data.get("transactions"):
+            legacy = data["transactions"]
+            _ingest(index, legacy)
+            logger.info(f"Migrated {len(legacy)} Tinkoff transactions to monthly partitions")
+        return index
+
+
+def _ingest(index: dict, transactions: Iterable[dict]) -> int:
+    """Add new rows to the index and their month partitions. Returns new count.
+
+    Rows are grouped by month in one pass; only months that receive new
+    rows are loaded and rewritten. Saves the index last.
+    """
+    months = index["months"]
+    known = {m: set(meta["hashes"]) for m, meta in months.items()}
+    pending: dict[str, list[dict]] = {}
+
+    for tx in transactions:
+        month = _month_of(tx)
+        tx_hash = _tx_hash(tx)
+        seen = known.setdefault(month, set())
+        if tx_hash in seen:
+            continue
+        seen.add(tx_hash)
+        _add_to_month(months.setdefault(month, _new_month()), tx, tx_hash)
+        pending.setdefault(month, []).append(tx)
+
+    for month, rows in pending.items():
+        existing = store.load(_month_key(month), [])
+        if not isinstance(existing, list):
+            existing = []
+        merged = sorted(existing + rows, key=lambda x: x.get("date", ""), reverse=True)
+        store.save(_month_key(month), merged)
+
+    new_count = sum(len(rows) for rows in pending.values())
+    index["total_count"] = sum(meta["count"] for meta in months.values())
+    index["cards"] = sorted({c for meta in months.values() for c in meta["cards"]})
+    starts = [meta["start"] for meta in months.values() if meta["start"]]
+    if starts:
+        index["period"] = {"start": min(starts), "end": max(meta["end"] for meta in months.values())}
+    index["last_updated"] = datetime.now().isoformat()
+    store.save(STORAGE_KEY, index)
+    return new_count
+
+
+def save_transactions(transactions: Iterable[dict]) -> int:
+    """Store a stream of parsed transactions, skipping duplicates.
 
     Returns number of new transactions added.
     """
     try:
-        existing = store.load(STORAGE_KEY, {"transactions": [], "cards": [], "period": {}})
-        if not isinstance(existing, dict):
-            existing = {"transactions": [], "cards": [], "period": {}}
-
-        # Build dedup key set from existing transactions
-        existing_keys = set()
-        for tx in existing.get("transactions", []):
-            existing_keys.add(_tx_key(tx))
-
-        # Add only new transactions
-        new_count = 0
-        for tx in parsed.get("transactions", []):
-            key = _tx_key(tx)
-            if key not in existing_keys:
-                existing.setdefault("transactions", []).append(tx)
-                existing_keys.add(key)
-                new_count += 1
-
-        # Sort all transactions by date (newest first)
-        existing["transactions"] = sorted(
-            existing.get("transactions", []),
-            key=lambda x: x.get("date", ""),
-            reverse=True,
-        )
-
-        # Update metadata
-        existing["last_updated"] = datetime.now().isoformat()
-        existing["total_count"] = len(existing["transactions"])
-
-        # Update cards list
-        cards = sorted(set(
-            tx["card"] for tx in existing["transactions"] if tx.get("card")
-        ))
-        existing["cards"] = cards
-
-        # Update period
-        dates = [tx["date"] for tx in existing["transactions"] if tx.get("date")]
-        if dates:
-            existing["period"] = {"start": min(dates), "end": max(dates)}
-
-        store.save(STORAGE_KEY, existing)
-        logger.info(f"Saved {new_count} new transactions (total: {existing['total_count']})")
+        with _lock:
+            index = _load_index()
+            new_count = _ingest(index, transactions)
+        logger.info(f"Saved {new_count} new transactions (total: {index['total_count']})")
         return new_count
-
     except Exception as e:
         logger.error(f"Failed to save statement: {e}")
         return 0
 
 
+def save_statement(parsed: dict) -> int:
+    """Save parsed CSV statement. Merges with existing data, deduplicates.
+
+    Returns number of new transactions added.
+    """
+    return save_transactions(parsed.get("transactions", []))
+
+
 def load_transactions(
     limit: int = 50,
     card: Optional[str] = None,
@@ -77,75 +163,102 @@ def load_transactions(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
 ) -> list[dict]:
-    """Load transactions with optional filters."""
+    """Load transactions with optional filters (newest first).
+
+    Months are read newest first and only while fewer than `limit` rows
+    matched; months outside the date range or without the card/category
+    are skipped using the index.
+    """
     try:
-        data = store.load(STORAGE_KEY, {"transactions": []})
-        if not isinstance(data, dict):
-            data = {"transactions": []}
-        txs = data.get("transactions", [])
-
-        if card:
-            txs = [t for t in txs if card in t.get("card", "")]
-        if category:
-            cat_lower = category.lower()
-            txs = [t for t in txs if cat_lower in t.get("category", "").lower()]
-        if date_from:
-            txs = [t for t in txs if t.get("date", "") >= date_from]
-        if date_to:
-            txs = [t for t in txs if t.get("date", "") <= date_to]
-
-        return txs[:limit]
+        months = _load_index()["months"]
+        cat_lower = category.lower() if category else None
+        result: list[dict] = []
+
+        for month in _newest_first(months):
+            if len(result) >= limit:
+                break
+            meta = months[month]
+            if month != UNDATED:
+                if date_from and month < date_from[:7]:
+                    continue
+                if date_to and month > date_to[:7]:
+                    continue
+            if card and not any(card in c for c in meta["cards"]):
+                continue
+            if cat_lower and not any(cat_lower in c.lower() for c in meta["category_names"]):
+                continue
+            for t in store.load(_month_key(month), []):
+                if card and card not in t.get("card", ""):
+                    continue
+                if cat_lower and cat_lower not in t.get("category", "").lower():
+                    continue
+                if date_from and t.get("date", "") < date_from:
+                    continue
+                if date_to and t.get("date", "") > date_to:
+                    continue
+                result.append(t)
+                if len(result) >= limit:
+                    break
+
+        return result
     except Exception as e:
         logger.error(f"Failed to load transactions: {e}")
         return []
 
 
+def category_totals(
+    month_from: Optional[str] = None,
+    month_to: Optional[str] = None,
+) -> dict[str, dict[str, float]]:
+    """Expenses per category per month ({"YYYY-MM": {category: sum}}), from the index."""
+    months = _load_index()["months"]
+    return {
+        month: {cat: round(amt, 2) for cat, amt in months[month]["categories"].items()}
+        for month in sorted(months)
+        if month != UNDATED
+        and (not month_from or month >= month_from)
+        and (not month_to or month <= month_to)
+    }
+
+
 def get_summary() -> Optional[dict]:
-    """Get overall summary of stored transactions."""
+    """Get overall summary of stored transactions (from the index, no rows loaded)."""
     try:
-        data = store.load(STORAGE_KEY, {"transactions": []})
-        if not isinstance(data, dict):
-            return None
-        if not data.get("transactions"):
+        index = _load_index()
+        months = index["months"]
+        if not index.get("total_count"):
             return None
 
-        txs = data["transactions"]
-        income = sum(t["amount"] for t in txs if t.get("op_type") == "credit")
-        expenses = sum(abs(t["amount"]) for t in txs if t.get("op_type") in ("debit", "transfer"))
-        internal = sum(abs(t["amount"]) for t in txs if t.get("op_type") == "internal_transfer")
+        income = sum(m["income"] for m in months.values())
+        expenses = sum(m["expenses"] for m in months.values())
+        internal = sum(m["internal"] for m in months.values())
 
         # Category breakdown
         categories: dict[str, float] = {}
-        for t in txs:
-            if t.get("op_type") in ("debit", "transfer"):
-                cat = t.get("category", "Другое") or "Другое"
-                categories[cat] = categories.get(cat, 0) + abs(t["amount"])
+        for meta in months.values():
+            for cat, amt in meta["categories"].items():
+                categories[cat] = categories.get(cat, 0) + amt
 
         top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:15]
 
         # Monthly breakdown
-        monthly: dict[str, dict] = {}
-        for t in txs:
-            month = t.get("date", "")[:7]  # YYYY-MM
-            if not month:
-                continue
-            monthly.setdefault(month, {"income": 0, "expenses": 0})
-            if t.get("op_type") == "credit":
-                monthly[month]["income"] += t["amount"]
-            elif t.get("op_type") in ("debit", "transfer"):
-                monthly[month]["expenses"] += abs(t["amount"])
+        monthly = {
+            month: {"income": meta["income"], "expenses": meta["expenses"]}
+            for month, meta in sorted(months.items())
+            if month != UNDATED
+        }
 
         return {
-            "total_count": len(txs),
-            "period": data.get("period", {}),
-            "cards": data.get("cards", []),
+            "total_count": index["total_count"],
+            "period": index.get("period", {}),
+            "cards": index.get("cards", []),
             "income": round(income, 2),
             "expenses": round(expenses, 2),
             "internal_transfers": round(internal, 2),
             "net": round(income - expenses, 2),
             "top_categories": top_categories,
-            "monthly": dict(sorted(monthly.items())),
-            "last_updated": data.get("last_updated", ""),
+            "monthly": monthly,
+            "last_updated": index.get("last_updated", ""),
         }
     except Exception as e:
         logger.error(f"Failed to get summary: {e}")
@@ -155,3 +268,8 @@ def get_summary() -> Optional[dict]:
 def _tx_key(tx: dict) -> str:
     """Generate a deduplication key for a transaction."""
     return f"{tx.get('date', '')}|{tx.get('amount', '')}|{tx.get('description', '')}|{tx.get('card', '')}"
+
+
+def _tx_hash(tx: dict) -> str:
+    """Short stable hash of the dedup key (what the index stores)."""
+    return hashlib.sha1(_tx_key(tx).encode("utf-8")).hexdigest()[:16]
@@ -69,8 +69,11 @@ def _init_vault():
 
 
 def is_sensitive(key: str) -> bool:
-    """Check if a storage key contains sensitive data."""
-    return key in SENSITIVE_KEYS
+    """Check if a storage key contains sensitive data.
+
+    Partitions of a sensitive key ("tinkoff_transactions:2026-01") count too.
+    """
+    return key.split(":", 1)[0] in SENSITIVE_KEYS
 
 
 def encrypt(data) -> str:
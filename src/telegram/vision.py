@@ -5,7 +5,7 @@ import logging
 import os
 import re
 
-import httpx
+from .. import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -51,39 +51,25 @@ async def extract_financial_data(
     if user_hint:
         prompt += f"\n\nПодсказка от пользователя: {user_hint}"
 
-    payload = {
-        "model": "anthropic/claude-sonnet-4",
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{b64_image}",
-                        },
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{b64_image}",
                     },
-                    {"type": "text", "text": prompt},
-                ],
-            }
-        ],
-        "max_tokens": 2000,
-        "temperature": 0,
-    }
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-    content = data["choices"][0]["message"]["content"]
+                },
+                {"type": "text", "text": prompt},
+            ],
+        }
+    ]
+    response = await llm_gateway.chat(
+        messages, routes=llm_gateway.VISION_ROUTES, max_tokens=2000,
+        temperature=0, timeout=60, retries=0, agent="accountant",
+    )
+    content = response.text
 
     # Extract JSON from response
     json_match = re.search(r"\{[\s\S]*\}", content)
@@ -13,6 +13,9 @@ from .handlers import callbacks, commands, messages
 
 logger = logging.getLogger(__name__)
 
+# Running auto-start tasks get this long to finish when polling stops
+AUTO_START_SHUTDOWN_SEC = 30
+
 
 async def main():
     logging.basicConfig(
@@ -155,6 +158,11 @@ async def main():
     finally:
         if scheduler:
             scheduler.shutdown(wait=False)
+        try:
+            from ..auto_start import shutdown_auto_start
+            await asyncio.to_thread(shutdown_auto_start, True, AUTO_START_SHUTDOWN_SEC)
+        except Exception as e:
+            logger.warning(f"Auto-start shutdown failed: {e}")
 
 
 if __name__ == "__main__":
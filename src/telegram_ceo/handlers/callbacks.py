@@ -1298,6 +1298,7 @@ async def approval_callback(callback: CallbackQuery, callback_data: ApprovalCB):
                 "task_id": task_id,
                 "assignee": task.assignee,
                 "title": task.title,
+                "priority": task.priority,
             })
             await callback.message.edit_text(
                 f"✅ Задача одобрена: {task.title}\n"
@@ -1,15 +1,21 @@
 """NLU module for CEO bot — Russian intent detection.
 
 Detects user intent from Russian text and maps to bot commands.
-Keyword-based matching with normalization.
+Keyword-based matching with normalization. All phrase tables (intents,
+agent mentions, task_pool tag keywords) are compiled once into one
+PhraseMatcher, so a message is scanned in a single pass.
 """
 
 import re
 import logging
-from typing import Optional
+import threading
+from functools import lru_cache
+from typing import NamedTuple, Optional
 
 from pydantic import BaseModel
 
+from .phrase_matcher import PhraseMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,14 +94,106 @@ AGENT_INTENT_MAP: dict[str, list[str]] = {
 }
 
 
+_PUNCT_RE = re.compile(r"[.,!?;:]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
 def _normalize_text(text: str) -> str:
     """Normalize text for matching: lowercase, strip extra spaces."""
     text = text.lower().strip()
-    text = re.sub(r"[.,!?;:]+", "", text)
-    text = re.sub(r"\s+", " ", text)
+    text = _PUNCT_RE.sub("", text)
+    text = _SPACE_RE.sub(" ", text)
     return text
 
 
+# ──────────────────────────────────────────────────────────
+# Compiled phrase tables
+# ──────────────────────────────────────────────────────────
+
+_INTENT, _AGENT, _TAG = "intent", "agent", "tag"
+
+_matcher: Optional[PhraseMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+class _Candidates(NamedTuple):
+    """Everything one scan of a normalized message yields."""
+    exact_command: Optional[str]              # phrase equal to the whole text
+    best_command: Optional[tuple[str, float]]  # best starts-with / contains match
+    agent: Optional[str]                      # first agent (map order) mentioned
+    tags: tuple[str, ...]                     # task_pool tags, as auto_tag() would
+
+
+def _build_matcher() -> PhraseMatcher:
+    """Compile INTENT_MAP, AGENT_INTENT_MAP and task_pool tag keywords.
+
+    Payloads carry the table position so map order still breaks ties.
+    """
+    entries = []
+    order = 0
+    for command, phrases in INTENT_MAP.items():
+        for phrase in phrases:
+            entries.append((_normalize_text(phrase), (_INTENT, order, command)))
+            order += 1
+    for rank, (agent_key, phrases) in enumerate(AGENT_INTENT_MAP.items()):
+        for phrase in phrases:
+            entries.append((_normalize_text(phrase), (_AGENT, rank, agent_key)))
+    try:
+        from ..task_pool import _TAG_KEYWORDS
+        for tag, keywords in _TAG_KEYWORDS.items():
+            for kw in keywords:
+                entries.append((kw, (_TAG, 0, tag)))
+    except Exception as e:
+        logger.warning(f"Tag keywords unavailable for NLU matcher: {e}")
+    return PhraseMatcher(entries)
+
+
+def _get_matcher() -> PhraseMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = _build_matcher()
+    return _matcher
+
+
+@lru_cache(maxsize=256)
+def _candidates(normalized: str) -> _Candidates:
+    """Scan a normalized message once (cached: route_message asks twice)."""
+    n = max(len(normalized), 1)
+    exact: Optional[tuple[int, str]] = None
+    best: Optional[tuple[float, int, str]] = None  # (confidence, -order, command)
+    agent: Optional[tuple[int, str]] = None
+    tags: set[str] = set()
+
+    for start, end, (kind, order, label) in _get_matcher().find_all(normalized):
+        if kind == _INTENT:
+            length = end - start
+            if start == 0 and end == len(normalized):
+                if exact is None or order < exact[0]:
+                    exact = (order, label)
+            if start == 0:
+                conf = max(length / n, 0.8)  # starts-with is high confidence
+            elif length >= 4:
+                conf = max(length / n, 0.6)  # contained is medium confidence
+            else:
+                continue
+            if best is None or (conf, -order) > best[:2]:
+                best = (conf, -order, label)
+        elif kind == _AGENT:
+            if agent is None or order < agent[0]:
+                agent = (order, label)
+        else:
+            tags.add(label)
+
+    return _Candidates(
+        exact_command=exact[1] if exact else None,
+        best_command=(best[2], best[0]) if best else None,
+        agent=agent[1] if agent else None,
+        tags=tuple(sorted(tags)),
+    )
+
+
 def detect_intent(text: str) -> Optional[Intent]:
     """Detect intent from Russian text.
 
@@ -107,35 +205,13 @@ def detect_intent(text: str) -> Optional[Intent]:
     if not normalized or len(normalized) < 3:
         return None
 
-    best_command = None
-    best_confidence = 0.0
+    found = _candidates(normalized)
+    if found.exact_command:
+        return Intent(command=found.exact_command, confidence=1.0)
 
-    for command, phrases in INTENT_MAP.items():
-        for phrase in phrases:
-            phrase_norm = _normalize_text(phrase)
-
-            # Exact match
-            if normalized == phrase_norm:
-                return Intent(command=command, confidence=1.0)
-
-            # Text starts with phrase
-            if normalized.startswith(phrase_norm):
-                conf = len(phrase_norm) / max(len(normalized), 1)
-                conf = max(conf, 0.8)  # starts-with is high confidence
-                if conf > best_confidence:
-                    best_confidence = conf
-                    best_command = command
-
-            # Phrase is contained in text
-            if phrase_norm in normalized and len(phrase_norm) >= 4:
-                conf = len(phrase_norm) / max(len(normalized), 1)
-                conf = max(conf, 0.6)  # contained is medium confidence
-                if conf > best_confidence:
-                    best_confidence = conf
-                    best_command = command
-
-    if best_command and best_confidence >= 0.6:
-        return Intent(command=best_command, confidence=best_confidence)
+    if found.best_command and found.best_command[1] >= 0.6:
+        command, confidence = found.best_command
+        return Intent(command=command, confidence=confidence)
 
     return None
 
@@ -153,18 +229,17 @@ def detect_agent(text: str) -> Optional[tuple[str, float]]:
     if not normalized:
         return None
 
+    found = _candidates(normalized)
+
     # 1. Direct agent name/role mentions (high confidence)
-    for agent_key, phrases in AGENT_INTENT_MAP.items():
-        for phrase in phrases:
-            if _normalize_text(phrase) in normalized:
-                return (agent_key, 0.9)
+    if found.agent:
+        return (found.agent, 0.9)
 
     # 2. Tag-based matching via task_pool
     try:
-        from ..task_pool import auto_tag, suggest_assignee
-        tags = auto_tag(normalized)
-        if tags:
-            suggestions = suggest_assignee(tags)
+        from ..task_pool import suggest_assignee
+        if found.tags:
+            suggestions = suggest_assignee(list(found.tags))
             if suggestions and suggestions[0][1] >= 0.5:
                 return suggestions[0]
     except Exception as e:
@@ -0,0 +1,65 @@
+"""Aho-Corasick phrase matcher for the CEO bot NLU.
+
+Compiles a fixed set of phrases once; each lookup then finds every
+occurrence of every phrase in a single pass over the text.
+"""
+
+from collections import deque
+from typing import Hashable, Iterable
+
+
+class PhraseMatcher:
+    """Multi-pattern substring matcher (Aho-Corasick automaton).
+
+    Built from (phrase, payload) pairs. A phrase may carry several
+    payloads; empty phrases are ignored.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, entries: Iterable[tuple[str, Hashable]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # per state: (phrase_length, payload) for every phrase ending here
+        self._out: list[list[tuple[int, Hashable]]] = [[]]
+
+        for phrase, payload in entries:
+            if not phrase:
+                continue
+            state = 0
+            for ch in phrase:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(phrase), payload))
+
+        # BFS to fill failure links; outputs of the fallback state are merged in
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fb = self._fail[state]
+                while fb and ch not in self._goto[fb]:
+                    fb = self._fail[fb]
+                target = self._goto[fb].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[tuple[int, int, Hashable]]:
+        """Every (start, end, payload) occurrence in text, by end position."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                matches.append((i + 1 - length, i + 1, payload))
+        return matches
@@ -166,11 +166,14 @@ def setup_ceo_scheduler(bot: Bot, config: CeoTelegramConfig) -> AsyncIOScheduler
                 logger.info("API health check: all healthy")
                 return
 
-            # Collect detailed per-API results for failures
+            # Collect detailed per-API results for failures (reuse the sweep's results)
             failed_api_keys = []
             detailed_results = {}
+            swept = result.get("results", {})
             for api_key in _API_REGISTRY:
-                check = await asyncio.to_thread(_check_single_api, api_key)
+                check = swept.get(api_key)
+                if check is None:
+                    check = await asyncio.to_thread(_check_single_api, api_key)
                 if not check.get("ok") and check.get("configured", True):
                     failed_api_keys.append(api_key)
                     detailed_results[api_key] = check
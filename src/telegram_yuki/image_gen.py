@@ -4,15 +4,13 @@ Ported from СБОРКА gemini_image.py v6.0 — full scene library + full prom
 """
 
 import base64
-import json
 import logging
 import os
 import random
-import time
 from datetime import datetime
 from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+
+from ..llm_gateway import IMAGE_ROUTES, LLMUnavailable, chat_sync
 
 logger = logging.getLogger(__name__)
 
@@ -1013,43 +1011,20 @@ The result must look like a bold pictographic poster: instantly readable objects
 
 def _call_openrouter(prompt: str, max_retries: int = 3) -> dict:
     """Call OpenRouter API with Gemini 2.5 Flash Image."""
-    api_key = os.getenv("OPENROUTER_API_KEY", "")
-    if not api_key:
+    if not os.getenv("OPENROUTER_API_KEY", ""):
         logger.warning("OPENROUTER_API_KEY not set — image generation skipped")
         return {"error": "API key not configured"}
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    payload = {
-        "model": "google/gemini-2.5-flash-image",
-        "messages": [{"role": "user", "content": prompt}],
-        "modalities": ["image", "text"],
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-        "HTTP-Referer": "https://zinin.corp",
-        "X-Title": "Yuki SMM Bot",
-    }
-
-    for attempt in range(max_retries):
-        try:
-            req = Request(url, data=json.dumps(payload).encode(), headers=headers)
-            with urlopen(req, timeout=120) as resp:
-                return json.loads(resp.read().decode())
-        except HTTPError as e:
-            if e.code == 429:
-                time.sleep(60)
-            elif attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-            else:
-                return {"error": f"HTTP {e.code}"}
-        except (URLError, Exception) as e:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-            else:
-                return {"error": str(e)}
-
-    return {"error": "Max retries exceeded"}
+    try:
+        response = chat_sync(
+            [{"role": "user", "content": prompt}],
+            routes=IMAGE_ROUTES, max_tokens=None, temperature=None, timeout=90,
+            retries=max_retries - 1, extra={"modalities": ["image", "text"]},
+            headers={"X-Title": "Yuki SMM Bot"}, agent="smm",
+        )
+    except LLMUnavailable as e:
+        return {"error": str(e)}
+    return response.data
 
 
 def _extract_image(response: dict) -> bytes | None:
@@ -1,17 +1,28 @@
 """Podcast audio generation — ElevenLabs TTS + post-processing.
 
-Pipeline: script text → chunk → TTS API → concatenate → normalize → ID3 tags → MP3.
+Pipeline: script text → paragraph chunks → TTS API (parallel, cached)
+→ PCM spool on disk → normalize + encode (ffmpeg) → ID3 tags → MP3.
 Uses raw HTTP calls (same pattern as _call_llm in smm_tools.py).
+
+Synthesized chunks are cached by content hash, so re-generating an edited
+script only re-synthesizes the paragraphs that changed.
 """
 
+import hashlib
 import io
 import json
 import logging
+import math
 import os
 import re
+import subprocess
+import tempfile
+import time
 import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 from urllib.request import urlopen, Request
 from urllib.error import HTTPError
 
@@ -19,9 +30,27 @@ logger = logging.getLogger(__name__)
 
 PODCASTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "yuki_podcasts")
 AUDIO_DIR = os.path.join(PODCASTS_DIR, "audio")
+TTS_CACHE_DIR = os.path.join(PODCASTS_DIR, "tts_cache")
 
 MAX_CHUNK_CHARS = 4500  # ElevenLabs limit is 5000, leave margin
 
+TTS_MODEL_ID = "eleven_multilingual_v2"
+TTS_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.75,
+    "style": 0.0,
+    "use_speaker_boost": True,
+}
+TTS_CONCURRENCY = int(os.getenv("PODCAST_TTS_CONCURRENCY", "3"))
+TTS_ATTEMPTS = 3
+TTS_RETRY_BASE_SEC = 2.0
+TTS_NO_RETRY_CODES = (400, 401, 403, 422)
+TTS_CACHE_MAX_FILES = 1000
+
+CHUNK_GAP_MS = 300  # silence between chunks
+EDGE_PADDING_MS = 500  # silence at start and end
+TARGET_DBFS = -16.0  # podcast loudness target
+
 
 def _hard_split_words(text: str, max_chars: int) -> list[str]:
     """Last-resort split: break text at word boundaries to fit max_chars."""
@@ -87,19 +116,27 @@ def _split_text_chunks(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]
     return chunks
 
 
+def _split_script_chunks(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]:
+    """Split per paragraph, then at sentence boundaries.
+
+    Chunk boundaries follow paragraphs so that editing one paragraph does
+    not shift the text of every following chunk (and invalidate its cache).
+    """
+    chunks = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if paragraph.strip():
+            chunks.extend(_split_text_chunks(paragraph, max_chars))
+    return chunks
+
+
 def _tts_chunk(text: str, voice_id: str, api_key: str) -> Optional[bytes]:
     """Call ElevenLabs TTS API for one chunk. Returns MP3 bytes."""
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
 
     payload = json.dumps({
         "text": text,
-        "model_id": "eleven_multilingual_v2",
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.75,
-            "style": 0.0,
-            "use_speaker_boost": True,
-        },
+        "model_id": TTS_MODEL_ID,
+        "voice_settings": TTS_VOICE_SETTINGS,
     }).encode("utf-8")
 
     req = Request(
@@ -125,36 +162,219 @@ def _tts_chunk(text: str, voice_id: str, api_key: str) -> Optional[bytes]:
         raise
 
 
-def _concatenate_audio(chunks: list[bytes]) -> "AudioSegment":
-    """Concatenate MP3 byte chunks into single AudioSegment."""
-    from pydub import AudioSegment
+def _tts_chunk_with_retry(text: str, voice_id: str, api_key: str) -> bytes:
+    """_tts_chunk with exponential backoff; auth/validation errors fail fast."""
+    for attempt in range(1, TTS_ATTEMPTS + 1):
+        try:
+            audio_bytes = _tts_chunk(text, voice_id, api_key)
+            if audio_bytes:
+                return audio_bytes
+            error: Exception = RuntimeError("ElevenLabs TTS returned empty audio")
+        except Exception as e:
+            cause = e.__cause__
+            if isinstance(cause, HTTPError) and cause.code in TTS_NO_RETRY_CODES:
+                raise
+            error = e
+        if attempt < TTS_ATTEMPTS:
+            delay = TTS_RETRY_BASE_SEC * 2 ** (attempt - 1)
+            logger.warning(f"TTS attempt {attempt}/{TTS_ATTEMPTS} failed ({error}), retry in {delay:.0f}s")
+            time.sleep(delay)
+    raise error
+
+
+# ──────────────────────────────────────────────────────────
+# Chunk cache (content hash → MP3 bytes)
+# ──────────────────────────────────────────────────────────
+
+def _chunk_cache_key(text: str, voice_id: str) -> str:
+    raw = json.dumps([voice_id, TTS_MODEL_ID, TTS_VOICE_SETTINGS, text], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[bytes]:
+    path = os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # LRU: pruning drops the least recently used files
+        return data
+    except OSError:
+        return None
 
-    combined = AudioSegment.empty()
-    silence = AudioSegment.silent(duration=300)  # 300ms between chunks
 
-    for i, chunk_bytes in enumerate(chunks):
-        segment = AudioSegment.from_mp3(io.BytesIO(chunk_bytes))
-        if i > 0:
-            combined += silence
-        combined += segment
+def _cache_put(key: str, data: bytes):
+    try:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        path = os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+        tmp = f"{path}.{uuid.uuid4().hex[:6]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"TTS cache write failed: {e}")
+
+
+def _prune_tts_cache(max_files: int = TTS_CACHE_MAX_FILES):
+    """Keep the max_files most recently used chunks."""
+    try:
+        entries = [e for e in os.scandir(TTS_CACHE_DIR) if e.name.endswith(".mp3")]
+    except OSError:
+        return
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[max_files:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
 
-    return combined
 
+def _synthesize_chunks(
+    chunks_text: list[str],
+    voice_id: str,
+    api_key: str,
+    stats: Optional[dict] = None,
+) -> Iterator[bytes]:
+    """Yield MP3 bytes per chunk, in script order.
 
-def _postprocess(audio: "AudioSegment") -> "AudioSegment":
-    """Normalize loudness and add silence padding."""
-    from pydub import AudioSegment
+    Cached chunks are served from disk; the rest are synthesized in parallel
+    (at most TTS_CONCURRENCY requests in flight). Each chunk is yielded as
+    soon as it and all chunks before it are ready.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("cached", 0)
+    stats.setdefault("synthesized", 0)
+
+    def synthesize(i: int, text: str, key: str) -> bytes:
+        logger.info(f"TTS chunk {i + 1}/{len(chunks_text)} ({len(text)} chars)...")
+        audio_bytes = _tts_chunk_with_retry(text, voice_id, api_key)
+        _cache_put(key, audio_bytes)
+        return audio_bytes
+
+    executor = ThreadPoolExecutor(max_workers=max(1, TTS_CONCURRENCY), thread_name_prefix="podcast-tts")
+    try:
+        pending = []
+        for i, text in enumerate(chunks_text):
+            key = _chunk_cache_key(text, voice_id)
+            cached = _cache_get(key)
+            if cached is not None:
+                stats["cached"] += 1
+                pending.append(cached)
+            else:
+                stats["synthesized"] += 1
+                pending.append(executor.submit(synthesize, i, text, key))
+        for item in pending:
+            yield item if isinstance(item, bytes) else item.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    # Add 0.5s silence at start and end
-    padding = AudioSegment.silent(duration=500)
-    audio = padding + audio + padding
 
-    # Simple loudness normalization (target -16 dBFS for podcasts)
-    target_dbfs = -16.0
-    change = target_dbfs - audio.dBFS
-    audio = audio.apply_gain(change)
+# ──────────────────────────────────────────────────────────
+# Streaming assembly
+# ──────────────────────────────────────────────────────────
+
+class _PcmSpool:
+    """Append decoded chunks to a WAV file on disk, tracking loudness.
+
+    Only one chunk is decoded in memory at a time. The output format is
+    taken from the first chunk; later chunks are converted to match.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._wav: Optional[wave.Wave_write] = None
+        self.frame_rate = 0
+        self.channels = 0
+        self.sample_width = 0
+        self.max_amplitude = 1
+        self.frames = 0
+        self._sum_squares = 0.0
+        self._pending_silence_ms = 0
+
+    def append(self, segment: "AudioSegment"):
+        if self._wav is None:
+            self.frame_rate = segment.frame_rate
+            self.channels = segment.channels
+            self.sample_width = segment.sample_width
+            self.max_amplitude = segment.max_possible_amplitude
+            self._wav = wave.open(self.path, "wb")
+            self._wav.setnchannels(self.channels)
+            self._wav.setsampwidth(self.sample_width)
+            self._wav.setframerate(self.frame_rate)
+        else:
+            segment = (segment.set_frame_rate(self.frame_rate)
+                       .set_channels(self.channels)
+                       .set_sample_width(self.sample_width))
+        self._flush_silence()
+        self._wav.writeframes(segment.raw_data)
+        samples = len(segment.raw_data) // self.sample_width
+        self._sum_squares += float(segment.rms) ** 2 * samples
+        self.frames += int(segment.frame_count())
+
+    def append_silence(self, duration_ms: int):
+        """Silence is buffered until the format is known (first chunk)."""
+        self._pending_silence_ms += duration_ms
+        if self._wav is not None:
+            self._flush_silence()
+
+    def _flush_silence(self):
+        frames = int(self.frame_rate * self._pending_silence_ms / 1000)
+        self._pending_silence_ms = 0
+        if frames:
+            self._wav.writeframes(b"\0" * frames * self.channels * self.sample_width)
+            self.frames += frames
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    @property
+    def duration_sec(self) -> float:
+        return self.frames / self.frame_rate if self.frame_rate else 0.0
+
+    @property
+    def dbfs(self) -> float:
+        samples = self.frames * self.channels
+        if not samples or not self._sum_squares:
+            return -float("inf")
+        rms = math.sqrt(self._sum_squares / samples)
+        return 20 * math.log10(rms / self.max_amplitude)
+
+
+def _spool_chunks(chunks: Iterator[bytes], spool: _PcmSpool) -> int:
+    """Decode MP3 chunks one by one into the spool. Returns chunk count."""
+    from pydub import AudioSegment
 
-    return audio
+    count = 0
+    spool.append_silence(EDGE_PADDING_MS)
+    for chunk_bytes in chunks:
+        if count:
+            spool.append_silence(CHUNK_GAP_MS)
+        spool.append(AudioSegment.from_file(io.BytesIO(chunk_bytes), format="mp3"))
+        count += 1
+    if count:
+        spool.append_silence(EDGE_PADDING_MS)
+    spool.close()
+    return count
+
+
+def _encode_mp3(wav_path: str, mp3_path: str, gain_db: float, bitrate: str = "128k"):
+    """Apply gain and encode WAV → MP3 with ffmpeg, streaming file to file."""
+    from pydub.utils import get_encoder_name
+
+    cmd = [
+        get_encoder_name(), "-y", "-loglevel", "error",
+        "-i", wav_path,
+        "-af", f"volume={gain_db:.2f}dB",
+        "-codec:a", "libmp3lame", "-b:a", bitrate,
+        mp3_path,
+    ]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", errors="replace")[:300]
+        raise RuntimeError(f"MP3 encoding failed: {err}")
 
 
 def _set_id3_tags(filepath: str, title: str, episode_number: int = 1):
@@ -191,7 +411,7 @@ def generate_podcast_audio(
     """Full pipeline: script text → MP3 file.
 
     Returns (filepath, metadata_dict).
-    metadata_dict: duration_sec, file_size_bytes, chunks_count.
+    metadata_dict: duration_sec, file_size_bytes, chunks_count, chunks_cached.
     """
     api_key = os.getenv("ELEVENLABS_API_KEY", "")
     voice_id = os.getenv("ELEVENLABS_VOICE_ID", "")
@@ -207,46 +427,51 @@ def generate_podcast_audio(
         raise RuntimeError("Empty script — nothing to generate audio from")
 
     # Split into chunks
-    chunks_text = _split_text_chunks(clean_script)
+    chunks_text = _split_script_chunks(clean_script)
     logger.info(f"Podcast script split into {len(chunks_text)} chunks ({len(clean_script)} chars)")
 
-    # Generate audio for each chunk
-    audio_chunks = []
-    for i, chunk_text in enumerate(chunks_text):
-        logger.info(f"TTS chunk {i + 1}/{len(chunks_text)} ({len(chunk_text)} chars)...")
-        audio_bytes = _tts_chunk(chunk_text, voice_id, api_key)
-        if audio_bytes:
-            audio_chunks.append(audio_bytes)
-
-    if not audio_chunks:
-        raise RuntimeError("No audio generated — all TTS calls failed")
-
-    # Concatenate
-    combined = _concatenate_audio(audio_chunks)
-
-    # Post-process
-    final = _postprocess(combined)
-
-    # Save
     os.makedirs(AUDIO_DIR, exist_ok=True)
     post_id = uuid.uuid4().hex[:8]
     date_str = datetime.now().strftime("%Y-%m-%d")
     filename = f"{date_str}_{post_id}.mp3"
     filepath = os.path.join(AUDIO_DIR, filename)
 
-    final.export(filepath, format="mp3", bitrate="128k")
+    # Synthesize (parallel, cached) and spool to disk in script order
+    tts_stats: dict = {}
+    fd, wav_path = tempfile.mkstemp(suffix=".wav", dir=AUDIO_DIR)
+    os.close(fd)
+    spool = _PcmSpool(wav_path)
+    chunks = _synthesize_chunks(chunks_text, voice_id, api_key, tts_stats)
+    try:
+        chunk_count = _spool_chunks(chunks, spool)
+        if not chunk_count:
+            raise RuntimeError("No audio generated — all TTS calls failed")
+
+        # Normalize + encode
+        dbfs = spool.dbfs
+        gain = TARGET_DBFS - dbfs if math.isfinite(dbfs) else 0.0
+        _encode_mp3(wav_path, filepath, gain)
+    finally:
+        chunks.close()
+        spool.close()
+        try:
+            os.remove(wav_path)
+        except OSError:
+            pass
+    _prune_tts_cache()
 
     # ID3 tags
     _set_id3_tags(filepath, title, episode_number)
 
     # Metadata
-    duration_sec = len(final) / 1000.0
+    duration_sec = spool.duration_sec
     file_size = os.path.getsize(filepath)
 
     metadata = {
         "duration_sec": int(duration_sec),
         "file_size_bytes": file_size,
         "chunks_count": len(chunks_text),
+        "chunks_cached": tts_stats.get("cached", 0),
         "chars_total": len(clean_script),
         "filename": filename,
         "post_id": post_id,
@@ -254,7 +479,8 @@ def generate_podcast_audio(
 
     logger.info(
         f"Podcast audio generated: {filepath} "
-        f"({int(duration_sec)}s, {file_size // 1024}KB, {len(chunks_text)} chunks)"
+        f"({int(duration_sec)}s, {file_size // 1024}KB, {len(chunks_text)} chunks, "
+        f"{tts_stats.get('cached', 0)} from cache)"
     )
 
     return filepath, metadata
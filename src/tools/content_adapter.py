@@ -3,10 +3,22 @@
 Adapts a base post for different platforms (LinkedIn, Telegram, Threads).
 Uses free LLM (Llama 3.3 70B) for intelligent rewriting.
 Falls back to rule-based adaptation if LLM unavailable.
+
+adapt_for_all_platforms() adapts for every platform concurrently; a
+platform whose LLM call misses its deadline gets the rule-based version.
+LLM results are memoized by (text hash, platform, rules version), so
+re-approving or re-scheduling a draft does not re-adapt it.
 """
 
+import hashlib
+import json
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -90,6 +102,91 @@ _ADAPT_PROMPT_TEMPLATE = (
 )
 
 
+# ── Deadlines and cache ───────────────────────────────────
+
+ADAPTER_VERSION = 1  # bump to invalidate cached adaptations after prompt/logic changes
+
+ADAPT_DEADLINE_SEC = 30.0
+ADAPT_DEADLINES_SEC = {  # short formats should not wait as long as long-form ones
+    "threads": 20.0,
+    "twitter": 20.0,
+}
+
+CACHE_MAX_ENTRIES = 256
+
+_cache: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+_inflight: dict[tuple[str, str, str], Future] = {}
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "timeouts": 0}
+_pool = ThreadPoolExecutor(max_workers=len(PLATFORM_RULES), thread_name_prefix="adapt")
+
+
+def _rules_version(platform: str) -> str:
+    """Short hash of everything that shapes an adaptation for `platform`."""
+    blob = json.dumps(
+        [ADAPTER_VERSION, PLATFORM_RULES.get(platform), _ADAPT_SYSTEM, _ADAPT_PROMPT_TEMPLATE],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def _cache_key(original_text: str, platform: str) -> tuple[str, str, str]:
+    text_hash = hashlib.sha256(original_text.encode("utf-8")).hexdigest()
+    return text_hash, platform, _rules_version(platform)
+
+
+def _cache_get(key: tuple[str, str, str]) -> Optional[str]:
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+        else:
+            _cache_stats["misses"] += 1
+        return text
+
+
+def _cache_put(key: tuple[str, str, str], text: str):
+    with _cache_lock:
+        _cache[key] = text
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _start_llm_adapt(key: tuple[str, str, str], original_text: str, platform: str) -> Future:
+    """Run _llm_adapt in the pool, sharing an in-flight call for the same key.
+    A successful result is cached even if the caller stopped waiting."""
+    with _cache_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _inflight[key] = _pool.submit(
+            _llm_adapt, original_text, platform, PLATFORM_RULES[platform],
+        )
+
+    def done(f: Future):
+        with _cache_lock:
+            _inflight.pop(key, None)
+        if not f.cancelled() and f.exception() is None and f.result():
+            _cache_put(key, f.result())
+
+    future.add_done_callback(done)
+    return future
+
+
+def get_adapter_cache_stats() -> dict:
+    with _cache_lock:
+        return {**_cache_stats, "entries": len(_cache), "inflight": len(_inflight)}
+
+
+def clear_adapter_cache():
+    with _cache_lock:
+        _cache.clear()
+        for name in _cache_stats:
+            _cache_stats[name] = 0
+
+
 # ── Core adaptation ───────────────────────────────────────
 
 def adapt_content(original_text: str, target_platform: str,
@@ -107,9 +204,15 @@ def adapt_content(original_text: str, target_platform: str,
         logger.warning(f"Unknown platform: {target_platform}")
         return original_text
 
+    key = _cache_key(original_text, target_platform)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     # Try LLM adaptation first
     adapted = _llm_adapt(original_text, target_platform, rules)
     if adapted:
+        _cache_put(key, adapted)
         return adapted
 
     # Fallback: rule-based adaptation
@@ -121,15 +224,41 @@ def adapt_for_all_platforms(original_text: str,
     """Adapt content for all platforms at once.
 
     Returns dict: {platform_name: adapted_text}.
-    Source platform gets original text unchanged.
+    Source platform gets original text unchanged. Uncached platforms are
+    adapted concurrently; each waits at most its ADAPT_DEADLINES_SEC
+    (from the start of the call) before falling back to rules.
     """
-    result = {}
+    result: dict[str, str] = {}
+    pending: dict[str, Future] = {}
     for platform in PLATFORM_RULES:
         if platform == source_platform:
             result[platform] = original_text
+            continue
+        key = _cache_key(original_text, platform)
+        cached = _cache_get(key)
+        if cached is not None:
+            result[platform] = cached
         else:
-            result[platform] = adapt_content(original_text, platform, source_platform)
-    return result
+            pending[platform] = _start_llm_adapt(key, original_text, platform)
+
+    start = time.monotonic()
+    # Wait for the shortest deadlines first so each platform gets its own budget
+    for platform in sorted(pending, key=lambda p: ADAPT_DEADLINES_SEC.get(p, ADAPT_DEADLINE_SEC)):
+        deadline = ADAPT_DEADLINES_SEC.get(platform, ADAPT_DEADLINE_SEC)
+        adapted = None
+        try:
+            adapted = pending[platform].result(timeout=max(0.0, start + deadline - time.monotonic()))
+        except FuturesTimeout:
+            with _cache_lock:
+                _cache_stats["timeouts"] += 1
+            logger.info(f"LLM adaptation for {platform} missed its {deadline:.0f}s deadline")
+        except Exception as e:
+            logger.warning(f"LLM adaptation failed for {platform}: {e}")
+        result[platform] = adapted or _rule_based_adapt(
+            original_text, platform, PLATFORM_RULES[platform],
+        )
+
+    return {platform: result[platform] for platform in PLATFORM_RULES}
 
 
 # ── LLM adaptation ────────────────────────────────────────
@@ -157,7 +286,7 @@ def _llm_adapt(original_text: str, target_platform: str,
     )
 
     try:
-        result = _call_llm_tech(prompt, system=_ADAPT_SYSTEM, max_tokens=1500)
+        result = _call_llm_tech(prompt, system=_ADAPT_SYSTEM, max_tokens=1500, hedge=True)
         if result and len(result.strip()) > 20:
             adapted = result.strip()
             # Enforce max length
@@ -200,10 +329,9 @@ def _rule_based_adapt(original_text: str, target_platform: str,
         else:
             text = text[:rules["max_chars"]]
 
-    elif target_platform == "linkedin":
-        # Ensure not too long
-        if len(text) > rules["max_chars"]:
-            text = _truncate_smart(text, rules["max_chars"])
+    elif len(text) > rules["max_chars"]:
+        # LinkedIn, Facebook, Twitter/X: ensure not too long
+        text = _truncate_smart(text, rules["max_chars"])
 
     return text
 
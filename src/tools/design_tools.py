@@ -17,11 +17,12 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Type
 from urllib.request import urlopen, Request
-from urllib.error import HTTPError, URLError
 
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from ..llm_gateway import IMAGE_ROUTES, LLMUnavailable, chat_sync
+
 logger = logging.getLogger(__name__)
 
 # ── Directories ────────────────────────────────────────────
@@ -58,44 +59,20 @@ def _call_image_api(prompt: str, model: str = "gemini") -> Optional[bytes]:
 
 def _try_gemini(prompt: str) -> Optional[bytes]:
     """Call OpenRouter → Gemini 2.5 Flash Image (free, 500/day)."""
-    api_key = os.getenv("OPENROUTER_API_KEY", "")
-    if not api_key:
+    if not os.getenv("OPENROUTER_API_KEY", ""):
         return None
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    payload = {
-        "model": "google/gemini-2.5-flash-image",
-        "messages": [{"role": "user", "content": prompt}],
-        "modalities": ["image", "text"],
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-        "HTTP-Referer": "https://zinin.corp",
-        "X-Title": "Ryan Design Bot",
-    }
-
-    for attempt in range(3):
-        try:
-            req = Request(url, data=json.dumps(payload).encode(), headers=headers)
-            with urlopen(req, timeout=120) as resp:
-                data = json.loads(resp.read().decode())
-            return _extract_image_bytes(data)
-        except HTTPError as e:
-            if e.code == 429:
-                time.sleep(60)
-            elif attempt < 2:
-                time.sleep(2 ** attempt)
-            else:
-                logger.warning(f"Gemini image failed: HTTP {e.code}")
-                return None
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(2 ** attempt)
-            else:
-                logger.warning(f"Gemini image error: {e}")
-                return None
-    return None
+    try:
+        response = chat_sync(
+            [{"role": "user", "content": prompt}],
+            routes=IMAGE_ROUTES, max_tokens=None, temperature=None, timeout=90,
+            retries=2, extra={"modalities": ["image", "text"]},
+            headers={"X-Title": "Ryan Design Bot"}, agent="designer",
+        )
+    except LLMUnavailable as e:
+        logger.warning(f"Gemini image failed: {e}")
+        return None
+    return _extract_image_bytes(response.data)
 
 
 def _try_pollinations(prompt: str) -> Optional[bytes]:
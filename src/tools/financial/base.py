@@ -3,11 +3,18 @@ Base class for all financial tools.
 
 Security: Brokered Credentials pattern — LLM never sees API keys.
 Reliability: Retry with exponential backoff + jitter, rate limit handling.
+Transport: shared keep-alive connection pool per service, with per-service
+concurrency limits and token-bucket pacing (429 Retry-After pauses only
+the service that returned it).
 """
 
+import asyncio
+import email.utils
 import logging
 import os
+import threading
 import time
+import weakref
 from typing import Optional
 
 import httpx
@@ -139,6 +146,213 @@ def load_financial_config() -> dict:
     return {}
 
 
+# ──────────────────────────────────────────────────────────
+# HTTP transport — shared per-service pools
+# ──────────────────────────────────────────────────────────
+
+DEFAULT_SERVICE_LIMITS = {
+    "concurrency": 4,       # in-flight requests per service
+    "rate_per_sec": 5.0,    # token bucket refill rate
+    "burst": 10,            # token bucket size
+}
+
+SERVICE_LIMITS = {
+    "coingecko": {"concurrency": 2, "rate_per_sec": 0.5, "burst": 5},
+    "tonapi": {"concurrency": 2, "rate_per_sec": 1.0, "burst": 2},
+    "moralis": {"rate_per_sec": 3.0, "burst": 6},
+    "helius": {"rate_per_sec": 5.0, "burst": 10},
+}
+
+MAX_RETRY_AFTER_SEC = 120
+_POOL_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0,
+)
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; callers reserve a slot and sleep themselves."""
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = max(rate_per_sec, 0.001)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; return how long the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def block_for(self, seconds: float):
+        """Hold every caller of this bucket for `seconds` (Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    value = response.headers.get("Retry-After", "60")
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            seconds = 60.0
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SEC)
+
+
+def _backoff(attempt: int) -> float:
+    return min(2 ** attempt + 1, 30)
+
+
+class _ServiceGate:
+    """Concurrency limit + pacing shared by every client of one service."""
+
+    def __init__(self, service: str):
+        limits = {**DEFAULT_SERVICE_LIMITS, **SERVICE_LIMITS.get(service, {})}
+        self.service = service
+        self.concurrency = int(limits["concurrency"])
+        self.bucket = _TokenBucket(float(limits["rate_per_sec"]), int(limits["burst"]))
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self._async_slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def async_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._async_slots.get(loop)
+        if sem is None:
+            sem = self._async_slots[loop] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    def observe(self, response: httpx.Response):
+        if response.status_code == 429:
+            wait = _retry_after_seconds(response)
+            logger.warning(f"[{self.service}] Rate limited, pausing service for {wait:.0f}s")
+            self.bucket.block_for(wait)
+
+
+class _PooledTransport(httpx.BaseTransport):
+    """Per-service view of a shared keep-alive pool.
+
+    close() is a no-op so short-lived clients built on it can be closed
+    freely without tearing down the pool.
+    """
+
+    def __init__(self, gate: _ServiceGate, inner: httpx.HTTPTransport):
+        self.gate = gate
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self.gate.slots:
+            wait = self.gate.bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            response = self.inner.handle_request(request)
+        self.gate.observe(response)
+        return response
+
+    def close(self):
+        pass
+
+
+class _AsyncPooledTransport(httpx.AsyncBaseTransport):
+    """Async twin of _PooledTransport (one inner pool per event loop)."""
+
+    def __init__(self, gate: _ServiceGate, inner: httpx.AsyncHTTPTransport):
+        self.gate = gate
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async with self.gate.async_slots():
+            wait = self.gate.bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            response = await self.inner.handle_async_request(request)
+        self.gate.observe(response)
+        return response
+
+    async def aclose(self):
+        pass
+
+
+_gates: dict[str, _ServiceGate] = {}
+_transports: dict[str, _PooledTransport] = {}
+_async_transports: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+
+def _gate(service: str) -> _ServiceGate:
+    gate = _gates.get(service)
+    if gate is None:
+        with _pools_lock:
+            gate = _gates.get(service)
+            if gate is None:
+                gate = _gates[service] = _ServiceGate(service)
+    return gate
+
+
+def _transport(service: str) -> _PooledTransport:
+    transport = _transports.get(service)
+    if transport is None:
+        gate = _gate(service)
+        with _pools_lock:
+            transport = _transports.get(service)
+            if transport is None:
+                transport = _transports[service] = _PooledTransport(
+                    gate, httpx.HTTPTransport(limits=_POOL_LIMITS),
+                )
+    return transport
+
+
+def _async_transport(service: str) -> _AsyncPooledTransport:
+    per_loop = _async_transports.setdefault(asyncio.get_running_loop(), {})
+    transport = per_loop.get(service)
+    if transport is None:
+        transport = per_loop[service] = _AsyncPooledTransport(
+            _gate(service), httpx.AsyncHTTPTransport(limits=_POOL_LIMITS),
+        )
+    return transport
+
+
+def pooled_client(service: str, base_url: str = "", headers: Optional[dict] = None,
+                  timeout: float = 30.0) -> httpx.Client:
+    """Lightweight client on the service's shared keep-alive pool.
+
+    Cheap to create and safe to close — connections stay in the pool.
+    """
+    return httpx.Client(
+        base_url=base_url, headers=headers, timeout=timeout,
+        transport=_transport(service),
+    )
+
+
+def pooled_async_client(service: str, base_url: str = "", headers: Optional[dict] = None,
+                        timeout: float = 30.0) -> httpx.AsyncClient:
+    """Async twin of pooled_client(); must be called inside a running loop."""
+    return httpx.AsyncClient(
+        base_url=base_url, headers=headers, timeout=timeout,
+        transport=_async_transport(service),
+    )
+
+
+def close_pools():
+    """Close all shared sync pools (shutdown / tests)."""
+    with _pools_lock:
+        transports = list(_transports.values())
+        _transports.clear()
+    for t in transports:
+        try:
+            t.inner.close()
+        except Exception:
+            pass
+
+
 # ──────────────────────────────────────────────────────────
 # Base Financial Tool
 # ──────────────────────────────────────────────────────────
@@ -150,7 +364,8 @@ class FinancialBaseTool(BaseTool):
     Built-in:
     - Brokered credentials (CredentialBroker)
     - Retry with exponential backoff + jitter (up to 3 attempts)
-    - Rate limit handling (429 → wait Retry-After)
+    - Rate limit handling (429 → service paused for Retry-After)
+    - Shared keep-alive pool per service (_get_client / _arequest)
     - Logging (no secrets!)
     """
 
@@ -160,18 +375,37 @@ class FinancialBaseTool(BaseTool):
         """Get credentials for this tool's service."""
         return CredentialBroker.get(self.service_name)
 
-    def _get_client(self) -> httpx.Client:
-        """Create an HTTP client with auth headers."""
-        creds = self._get_credentials()
-        headers = {"Content-Type": "application/json"}
-        api_key = creds.get("api_key")
-        if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        return httpx.Client(
-            base_url=creds.get("base_url", ""),
-            headers=headers,
-            timeout=30.0,
-        )
+    def _get_client(self, headers: Optional[dict] = None,
+                    base_url: Optional[str] = None, timeout: float = 30.0) -> httpx.Client:
+        """HTTP client on this service's shared pool.
+
+        Without explicit headers, authenticates with a Bearer api_key.
+        """
+        if headers is None or base_url is None:
+            creds = self._get_credentials()
+            if base_url is None:
+                base_url = creds.get("base_url", "")
+            if headers is None:
+                headers = {"Content-Type": "application/json"}
+                api_key = creds.get("api_key")
+                if api_key:
+                    headers["Authorization"] = f"Bearer {api_key}"
+        return pooled_client(self.service_name, base_url, headers, timeout)
+
+    def _get_async_client(self, headers: Optional[dict] = None,
+                          base_url: Optional[str] = None,
+                          timeout: float = 30.0) -> httpx.AsyncClient:
+        """Async twin of _get_client()."""
+        if headers is None or base_url is None:
+            creds = self._get_credentials()
+            if base_url is None:
+                base_url = creds.get("base_url", "")
+            if headers is None:
+                headers = {"Content-Type": "application/json"}
+                api_key = creds.get("api_key")
+                if api_key:
+                    headers["Authorization"] = f"Bearer {api_key}"
+        return pooled_async_client(self.service_name, base_url, headers, timeout)
 
     def _request(
         self,
@@ -183,6 +417,9 @@ class FinancialBaseTool(BaseTool):
         """
         Make an HTTP request with retry and rate-limit handling.
 
+        On 429 the shared transport pauses this service for Retry-After;
+        the next attempt simply waits for its pacing slot.
+
         Args:
             method: HTTP method (get, post, etc.)
             path: URL path relative to base_url
@@ -190,20 +427,15 @@ class FinancialBaseTool(BaseTool):
             **kwargs: Passed to httpx request
         """
         last_error = None
+        client = self._get_client()
         for attempt in range(1, max_retries + 1):
             try:
-                client = self._get_client()
                 response = getattr(client, method)(path, **kwargs)
 
                 if response.status_code == 429:
-                    wait_time = int(
-                        response.headers.get("Retry-After", 60)
-                    )
                     logger.warning(
-                        f"[{self.service_name}] Rate limited, "
-                        f"waiting {wait_time}s (attempt {attempt})"
+                        f"[{self.service_name}] Rate limited (attempt {attempt})"
                     )
-                    time.sleep(min(wait_time, 120))
                     continue
 
                 response.raise_for_status()
@@ -218,8 +450,7 @@ class FinancialBaseTool(BaseTool):
                 if e.response.status_code in (401, 403):
                     raise  # Don't retry auth errors
                 if attempt < max_retries:
-                    wait = min(2 ** attempt + 1, 30)
-                    time.sleep(wait)
+                    time.sleep(_backoff(attempt))
 
             except (httpx.ConnectError, httpx.ReadTimeout) as e:
                 last_error = e
@@ -228,19 +459,84 @@ class FinancialBaseTool(BaseTool):
                     f"(attempt {attempt})"
                 )
                 if attempt < max_retries:
-                    wait = min(2 ** attempt + 1, 30)
-                    time.sleep(wait)
+                    time.sleep(_backoff(attempt))
 
-            finally:
+        raise last_error or Exception(
+            f"[{self.service_name}] Request failed after {max_retries} attempts"
+        )
+
+    async def _arequest(
+        self,
+        method: str,
+        path: str,
+        max_retries: int = 3,
+        **kwargs,
+    ) -> dict:
+        """Async twin of _request() — waits with asyncio.sleep, never blocks the loop."""
+        last_error = None
+        async with self._get_async_client() as client:
+            for attempt in range(1, max_retries + 1):
                 try:
-                    client.close()
-                except Exception:
-                    pass
+                    response = await getattr(client, method)(path, **kwargs)
+
+                    if response.status_code == 429:
+                        logger.warning(
+                            f"[{self.service_name}] Rate limited (attempt {attempt})"
+                        )
+                        continue
+
+                    response.raise_for_status()
+                    return response.json()
+
+                except httpx.HTTPStatusError as e:
+                    last_error = e
+                    logger.error(
+                        f"[{self.service_name}] HTTP {e.response.status_code} "
+                        f"on {method.upper()} {path} (attempt {attempt})"
+                    )
+                    if e.response.status_code in (401, 403):
+                        raise
+                    if attempt < max_retries:
+                        await asyncio.sleep(_backoff(attempt))
+
+                except (httpx.ConnectError, httpx.ReadTimeout) as e:
+                    last_error = e
+                    logger.warning(
+                        f"[{self.service_name}] Connection error: {e} "
+                        f"(attempt {attempt})"
+                    )
+                    if attempt < max_retries:
+                        await asyncio.sleep(_backoff(attempt))
 
         raise last_error or Exception(
             f"[{self.service_name}] Request failed after {max_retries} attempts"
         )
 
+    def _cached_json(self, client: httpx.Client, method: str, url: str, **kwargs):
+        """Send a request through the response cache and return parsed JSON.
+
+        Identical requests within the source's TTL (see cache.py) are served
+        from memory. Refreshes use a fresh client on the same pool, so the
+        caller may close `client` right after.
+        """
+        from .cache import cached, request_key
+
+        base_url = str(client.base_url)
+        headers = dict(client.headers)
+        timeout = client.timeout
+
+        def fetch():
+            fresh = pooled_client(self.service_name, base_url, headers, timeout)
+            try:
+                response = getattr(fresh, method)(url, **kwargs)
+                response.raise_for_status()
+                return response.json()
+            finally:
+                fresh.close()
+
+        key = request_key(method, base_url + url, **kwargs)
+        return cached(self.service_name, key, fetch)
+
     def _safe_run(self, func, *args, **kwargs) -> str:
         """Wrap tool execution with error handling."""
         try:
@@ -0,0 +1,230 @@
+"""
+Response cache for financial data sources.
+
+TTL cache with stale-while-revalidate, size-bounded LRU eviction and
+request coalescing (concurrent identical requests share one upstream
+call). Per-source TTLs come from the `cache:` section of
+config/financial_sources.yaml:
+
+    cache:
+      max_entries: 512
+      stale_seconds: 600
+      ttl_seconds:
+        coingecko: 300
+        forex: 3600
+
+Within ttl an entry is served as-is; for the following stale_seconds it
+is still served, but a background refresh is started. Older entries are
+refetched synchronously. Failed fetches are never cached.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .base import load_financial_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SEC = {
+    "coingecko": 300,
+    "forex": 3600,
+    "moralis": 600,
+    "helius": 600,
+    "tonapi": 600,
+    "tribute": 900,
+}
+FALLBACK_TTL_SEC = 300
+DEFAULT_STALE_SEC = 600
+DEFAULT_MAX_ENTRIES = 512
+REFRESH_WORKERS = 4
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "ttl", "stale")
+
+    def __init__(self, value: Any, ttl: float, stale: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+        self.stale = stale
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache with stale-while-revalidate and coalescing."""
+
+    def __init__(self, ttls: Optional[dict] = None, stale_seconds: float = DEFAULT_STALE_SEC,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttls = {**DEFAULT_TTL_SEC, **(ttls or {})}
+        self.stale_seconds = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[ThreadPoolExecutor] = None
+        self._stats: dict[str, dict[str, int]] = {}
+
+    # ── public API ────────────────────────────────────────
+
+    def get_or_fetch(self, source: str, key: str, fetch: Callable[[], Any],
+                     ttl: Optional[float] = None) -> Any:
+        """Return the cached value for (source, key), fetching it if needed."""
+        ck = (source, key)
+        with self._lock:
+            entry = self._entries.get(ck)
+            if entry is not None:
+                age = entry.age()
+                if age < entry.ttl:
+                    self._entries.move_to_end(ck)
+                    self._count(source, "hits")
+                    return entry.value
+                if age < entry.ttl + entry.stale:
+                    self._entries.move_to_end(ck)
+                    self._count(source, "stale")
+                    if ck not in self._inflight:
+                        self._inflight[ck] = Future()
+                        self._refresh_pool().submit(self._fill, source, key, fetch, ttl)
+                    return entry.value
+
+            future = self._inflight.get(ck)
+            if future is not None:
+                self._count(source, "coalesced")
+                owner = False
+            else:
+                future = self._inflight[ck] = Future()
+                self._count(source, "misses")
+                owner = True
+
+        if owner:
+            self._fill(source, key, fetch, ttl)
+        return future.result()
+
+    def invalidate(self, source: Optional[str] = None):
+        """Drop all entries, or only those of one source."""
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+            else:
+                for ck in [ck for ck in self._entries if ck[0] == source]:
+                    del self._entries[ck]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Per-source counters: hits, stale, misses, coalesced, errors, evictions."""
+        with self._lock:
+            result = {source: dict(counts) for source, counts in self._stats.items()}
+            for source, _ in self._entries:
+                result.setdefault(source, {}).setdefault("entries", 0)
+                result[source]["entries"] += 1
+            return result
+
+    def ttl_for(self, source: str) -> float:
+        return float(self.ttls.get(source, FALLBACK_TTL_SEC))
+
+    # ── internals ─────────────────────────────────────────
+
+    def _fill(self, source: str, key: str, fetch: Callable[[], Any],
+              ttl: Optional[float]):
+        """Run fetch and resolve the in-flight future for (source, key)."""
+        ck = (source, key)
+        future = self._inflight[ck]
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(ck, None)
+                self._count(source, "errors")
+            logger.warning(f"[cache] {source} refresh failed: {e}")
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[ck] = _Entry(
+                value, self.ttl_for(source) if ttl is None else ttl, self.stale_seconds,
+            )
+            self._entries.move_to_end(ck)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._count(evicted[0], "evictions")
+            self._inflight.pop(ck, None)
+        future.set_result(value)
+
+    def _refresh_pool(self) -> ThreadPoolExecutor:
+        if self._refresher is None:
+            self._refresher = ThreadPoolExecutor(
+                max_workers=REFRESH_WORKERS, thread_name_prefix="fin-cache",
+            )
+        return self._refresher
+
+    def _count(self, source: str, name: str):
+        counts = self._stats.setdefault(source, {})
+        counts[name] = counts.get(name, 0) + 1
+
+
+# ──────────────────────────────────────────────────────────
+# Shared instance
+# ──────────────────────────────────────────────────────────
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Shared cache, configured from financial_sources.yaml on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build_cache()
+    return _cache
+
+
+def reset_response_cache():
+    """Forget cached responses and re-read config on next use (for testing)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _build_cache() -> ResponseCache:
+    try:
+        config = load_financial_config()
+    except Exception as e:
+        logger.warning(f"[cache] could not read financial config: {e}")
+        config = {}
+    cache_cfg = config.get("cache") or {}
+    ttls = dict(cache_cfg.get("ttl_seconds") or {})
+    legacy_price_ttl = (config.get("prices") or {}).get("cache_ttl_seconds")
+    if legacy_price_ttl and "coingecko" not in ttls:
+        ttls["coingecko"] = legacy_price_ttl
+    return ResponseCache(
+        ttls={k: float(v) for k, v in ttls.items()},
+        stale_seconds=float(cache_cfg.get("stale_seconds", DEFAULT_STALE_SEC)),
+        max_entries=int(cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def cached(source: str, key: str, fetch: Callable[[], Any],
+           ttl: Optional[float] = None) -> Any:
+    """Shortcut for get_response_cache().get_or_fetch()."""
+    return get_response_cache().get_or_fetch(source, key, fetch, ttl)
+
+
+def request_key(method: str, url: str, **kwargs) -> str:
+    """Stable cache key for an HTTP request (hashed — URLs may carry API keys)."""
+    raw = json.dumps(
+        [method.upper(), url, kwargs.get("params"), kwargs.get("json")],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Hit/miss metrics of the shared cache."""
+    return get_response_cache().stats()
@@ -7,20 +7,15 @@ Used by other tools for USD conversion.
 
 import logging
 import os
-import time
 from typing import Optional, Type
 
 from pydantic import BaseModel, Field
 
-from .base import FinancialBaseTool
+from .base import FinancialBaseTool, pooled_client
+from .cache import cached
 
 logger = logging.getLogger(__name__)
 
-# In-memory price cache to respect rate limits
-_price_cache: dict[str, dict] = {}
-_cache_ts: float = 0
-_CACHE_TTL = 300  # 5 minutes
-
 
 class CryptoPriceInput(BaseModel):
     coin_ids: str = Field(
@@ -52,19 +47,9 @@ class CryptoPriceTool(FinancialBaseTool):
         return self._safe_run(self._fetch_prices, coin_ids, vs_currencies)
 
     def _fetch_prices(self, coin_ids: str, vs_currencies: str) -> str:
-        global _price_cache, _cache_ts
-
         if coin_ids.strip().lower() == "top":
             coin_ids = "bitcoin,ethereum,solana,the-open-network"
 
-        # Check cache
-        now = time.time()
-        cache_key = f"{coin_ids}:{vs_currencies}"
-        if now - _cache_ts < _CACHE_TTL and cache_key in _price_cache:
-            data = _price_cache[cache_key]
-            return self._format_prices(data, "(cached)")
-
-        # Fetch fresh data
         creds = self._get_credentials()
         params = {
             "ids": coin_ids.strip(),
@@ -73,27 +58,16 @@ class CryptoPriceTool(FinancialBaseTool):
             "include_market_cap": "true",
         }
         # CoinGecko uses x-cg-demo-key or x-cg-pro-key header
-        import httpx
         headers = {
             "Content-Type": "application/json",
             "x-cg-demo-key": creds.get("api_key", ""),
         }
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
         try:
-            response = client.get("/simple/price", params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached_json(client, "get", "/simple/price", params=params)
         finally:
             client.close()
 
-        # Update cache
-        _price_cache[cache_key] = data
-        _cache_ts = now
-
         return self._format_prices(data)
 
     @staticmethod
@@ -137,27 +111,14 @@ def get_usd_price(coin_id: str) -> Optional[float]:
     Used by other financial tools for conversion.
     Returns None if unavailable.
     """
-    global _price_cache, _cache_ts
-
-    now = time.time()
-    cache_key = f"{coin_id}:usd"
-
-    # Check cache first
-    if now - _cache_ts < _CACHE_TTL and cache_key in _price_cache:
-        data = _price_cache[cache_key]
-        return data.get(coin_id, {}).get("usd")
-
-    # Try fetching (CoinGecko free API works without key)
-    try:
-        import httpx
+    def _fetch() -> dict:
+        # CoinGecko free API works without key
         headers = {}
         api_key = os.environ.get("COINGECKO_API_KEY")
         if api_key:
             headers["x-cg-demo-key"] = api_key
-        client = httpx.Client(
-            base_url="https://api.coingecko.com/api/v3",
-            headers=headers,
-            timeout=15.0,
+        client = pooled_client(
+            "coingecko", "https://api.coingecko.com/api/v3", headers, timeout=15.0,
         )
         try:
             response = client.get(
@@ -165,12 +126,13 @@ def get_usd_price(coin_id: str) -> Optional[float]:
                 params={"ids": coin_id, "vs_currencies": "usd"},
             )
             response.raise_for_status()
-            data = response.json()
-            _price_cache[cache_key] = data
-            _cache_ts = now
-            return data.get(coin_id, {}).get("usd")
+            return response.json()
         finally:
             client.close()
+
+    try:
+        data = cached("coingecko", f"usd_price:{coin_id}", _fetch)
+        return data.get(coin_id, {}).get("usd")
     except Exception as e:
         logger.warning(f"Could not fetch price for {coin_id}: {e}")
         return None
@@ -4,9 +4,10 @@ import logging
 import os
 from datetime import datetime
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 ELEVENLABS_API = "https://api.elevenlabs.io/v1"
@@ -23,7 +24,7 @@ def get_elevenlabs_usage() -> dict:
     """Fetch subscription and usage data from ElevenLabs API."""
     headers = _get_headers()
 
-    resp = httpx.get(f"{ELEVENLABS_API}/user/subscription", headers=headers, timeout=15)
+    resp = pooled_client("elevenlabs").get(f"{ELEVENLABS_API}/user/subscription", headers=headers, timeout=15)
     resp.raise_for_status()
     data = resp.json()
 
@@ -6,9 +6,10 @@ Explorer runs Blockscout with public API — no key needed.
 
 import logging
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 EXPLORER_API = "https://explorer.evedex.com/api/v2"
@@ -25,7 +26,7 @@ def _load_eventum_addresses() -> list[str]:
 def get_eventum_balance(address: str) -> dict | None:
     """Get native ETH + token balances on Eventum."""
     # Native balance
-    resp = httpx.get(f"{EXPLORER_API}/addresses/{address}", timeout=10)
+    resp = pooled_client("eventum").get(f"{EXPLORER_API}/addresses/{address}", timeout=10)
     resp.raise_for_status()
     addr_data = resp.json()
 
@@ -33,7 +34,7 @@ def get_eventum_balance(address: str) -> dict | None:
     eth_balance = eth_raw / 1e18
 
     # Token balances
-    resp = httpx.get(f"{EXPLORER_API}/addresses/{address}/tokens", timeout=10)
+    resp = pooled_client("eventum").get(f"{EXPLORER_API}/addresses/{address}/tokens", timeout=10)
     resp.raise_for_status()
     token_data = resp.json()
 
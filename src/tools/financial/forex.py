@@ -5,47 +5,39 @@ Supports 166 currencies including RUB, GEL, TRY, THB.
 """
 
 import logging
-import time
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+from .cache import cached
+
 logger = logging.getLogger(__name__)
 
 API_URL = "https://open.er-api.com/v6/latest/{base}"
 
-# Cache rates for 1 hour (API updates daily)
-_cache: dict = {}
-_cache_ts: float = 0
-CACHE_TTL = 3600
-
 # Currencies relevant to Zinin Corp
 CORP_CURRENCIES = ["RUB", "GEL", "TRY", "THB", "EUR", "GBP", "BTC"]
 
 
 def get_rates(base: str = "USD") -> dict:
-    """Fetch exchange rates with caching."""
-    global _cache, _cache_ts
-
+    """Fetch exchange rates (cached, TTL from cache.ttl_seconds.forex)."""
     base = base.upper()
-    now = time.time()
-    if _cache.get("base") == base and (now - _cache_ts) < CACHE_TTL:
-        return _cache
-
-    resp = httpx.get(API_URL.format(base=base), timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-
-    if data.get("result") != "success":
-        raise ValueError(f"API error: {data}")
-
-    _cache = {
-        "base": base,
-        "rates": data["rates"],
-        "updated": data.get("time_last_update_utc", "?"),
-    }
-    _cache_ts = now
-    return _cache
+
+    def _fetch() -> dict:
+        resp = pooled_client("forex").get(API_URL.format(base=base), timeout=10)
+        resp.raise_for_status()
+        data = resp.json()
+
+        if data.get("result") != "success":
+            raise ValueError(f"API error: {data}")
+
+        return {
+            "base": base,
+            "rates": data["rates"],
+            "updated": data.get("time_last_update_utc", "?"),
+        }
+
+    return cached("forex", base, _fetch)
 
 
 def convert(amount: float, from_cur: str, to_cur: str) -> float:
@@ -16,7 +16,6 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Type
 
-import httpx
 from pydantic import BaseModel, Field
 
 from .base import FinancialBaseTool, load_financial_config
@@ -75,10 +74,11 @@ class SolanaPortfolioTool(FinancialBaseTool):
             addr_short = f"{addr[:4]}...{addr[-4:]}"
             lines = [f"  Wallet {addr_short}:"]
 
-            client = httpx.Client(timeout=30.0)
+            client = self._get_client(headers={}, base_url="")
             try:
                 # 1. Get SOL balance via RPC
-                sol_resp = client.post(
+                sol_data = self._cached_json(
+                    client, "post",
                     rpc_url,
                     json={
                         "jsonrpc": "2.0",
@@ -87,8 +87,6 @@ class SolanaPortfolioTool(FinancialBaseTool):
                         "params": [addr],
                     },
                 )
-                sol_resp.raise_for_status()
-                sol_data = sol_resp.json()
                 sol_lamports = sol_data.get("result", {}).get("value", 0)
                 sol_balance = Decimal(sol_lamports) / Decimal(10**9)
 
@@ -106,7 +104,8 @@ class SolanaPortfolioTool(FinancialBaseTool):
                 grand_total += sol_usd
 
                 # 2. Get token accounts via DAS API
-                das_resp = client.post(
+                das_data = self._cached_json(
+                    client, "post",
                     rpc_url,
                     json={
                         "jsonrpc": "2.0",
@@ -123,8 +122,6 @@ class SolanaPortfolioTool(FinancialBaseTool):
                         },
                     },
                 )
-                das_resp.raise_for_status()
-                das_data = das_resp.json()
                 assets = das_data.get("result", {}).get("items", [])
 
                 fungible_lines = []
@@ -225,7 +222,7 @@ class SolanaTransactionsTool(FinancialBaseTool):
         if tx_type:
             params["type"] = tx_type
 
-        client = httpx.Client(timeout=30.0)
+        client = self._get_client(headers={}, base_url="")
         try:
             response = client.get(url, params=params)
             response.raise_for_status()
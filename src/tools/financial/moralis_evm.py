@@ -17,7 +17,6 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional, Type
 
-import httpx
 from pydantic import BaseModel, Field
 
 from .base import FinancialBaseTool, load_financial_config
@@ -111,11 +110,7 @@ class EVMPortfolioTool(FinancialBaseTool):
             "X-API-Key": creds["api_key"],
             "Accept": "application/json",
         }
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
 
         all_results = []
         grand_total = Decimal("0")
@@ -129,15 +124,14 @@ class EVMPortfolioTool(FinancialBaseTool):
                     chain_name = CHAIN_NAMES.get(chain_id, chain_id)
                     try:
                         # Get token balances with prices
-                        response = client.get(
+                        data = self._cached_json(
+                            client, "get",
                             f"/wallets/{addr}/tokens",
                             params={
                                 "chain": chain_id,
                                 "exclude_spam": "true",
                             },
                         )
-                        response.raise_for_status()
-                        data = response.json()
                         tokens = data if isinstance(data, list) else data.get("result", [])
 
                         chain_total = Decimal("0")
@@ -226,11 +220,7 @@ class EVMTransactionsTool(FinancialBaseTool):
             "X-API-Key": creds["api_key"],
             "Accept": "application/json",
         }
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
 
         try:
             response = client.get(
@@ -7,6 +7,8 @@ import time
 import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 OPENAI_API = "https://api.openai.com/v1"
@@ -26,7 +28,7 @@ def get_openai_costs(days: int = 30) -> dict:
     now = int(time.time())
     start = now - (days * 86400)
 
-    resp = httpx.get(
+    resp = pooled_client("openai").get(
         f"{OPENAI_API}/organization/costs",
         headers=headers,
         params={
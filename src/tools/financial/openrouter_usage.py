@@ -4,9 +4,10 @@ import json
 import logging
 import os
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API = "https://openrouter.ai/api/v1"
@@ -25,12 +26,12 @@ def get_openrouter_usage() -> dict:
     headers = _get_headers()
 
     # Get key info (usage stats)
-    key_resp = httpx.get(f"{OPENROUTER_API}/auth/key", headers=headers, timeout=15)
+    key_resp = pooled_client("openrouter").get(f"{OPENROUTER_API}/auth/key", headers=headers, timeout=15)
     key_resp.raise_for_status()
     key_data = key_resp.json().get("data", {})
 
     # Get credits balance
-    credits_resp = httpx.get(f"{OPENROUTER_API}/credits", headers=headers, timeout=15)
+    credits_resp = pooled_client("openrouter").get(f"{OPENROUTER_API}/credits", headers=headers, timeout=15)
     credits_resp.raise_for_status()
     credits_data = credits_resp.json().get("data", {})
 
@@ -8,9 +8,10 @@ import logging
 import time
 from typing import Optional
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 # ── Precomputed function selectors (keccak256) ──────────────
@@ -80,7 +81,7 @@ def _eth_call(rpc_url: str, contract: str, data: str) -> str:
         "params": [{"to": contract, "data": data}, "latest"],
         "id": 1,
     }
-    resp = httpx.post(rpc_url, json=payload, timeout=10)
+    resp = pooled_client("papaya").post(rpc_url, json=payload, timeout=10)
     resp.raise_for_status()
     result = resp.json()
     if "error" in result:
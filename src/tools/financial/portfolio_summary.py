@@ -2,20 +2,28 @@
 Portfolio Summary — Aggregates ALL financial sources into one report.
 
 Calls each source tool internally and combines results.
-If a source is unavailable, shows remaining sources + warning.
+Sources are fetched concurrently under one deadline (portfolio.deadline_seconds);
+if a source is unavailable or too slow, shows remaining sources + warning.
 Used for morning reports and full financial overview.
 """
 
 import logging
-from typing import Type
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from importlib import import_module
+from typing import Callable, Iterator, NamedTuple, Optional, Type
 
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from .base import CredentialBroker, load_financial_config
+from .base import load_financial_config
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DEADLINE_SEC = 45.0
+MAX_WORKERS = 12
+_SECTION_ORDER = ("BANKS", "CRYPTO", "REVENUE")
+
 
 class PortfolioSummaryInput(BaseModel):
     include_transactions: bool = Field(
@@ -40,24 +48,21 @@ class PortfolioSummaryTool(BaseTool):
     args_schema: Type[BaseModel] = PortfolioSummaryInput
 
     def _run(self, include_transactions: bool = False) -> str:
-        sections = []
-        warnings = []
         config = load_financial_config()
+        warnings = []
+        collected: dict[str, list[tuple[int, str]]] = {
+            section: [] for section in _SECTION_ORDER
+        }
 
-        # ── BANKS ──
-        bank_section = self._collect_banks(config, warnings)
-        if bank_section:
-            sections.append(bank_section)
-
-        # ── CRYPTO ──
-        crypto_section = self._collect_crypto(config, warnings)
-        if crypto_section:
-            sections.append(crypto_section)
+        for source, text in self.iter_sources(config, warnings):
+            collected[source.section].append((source.order, text))
 
-        # ── REVENUE ──
-        revenue_section = self._collect_revenue(config, warnings)
-        if revenue_section:
-            sections.append(revenue_section)
+        sections = []
+        for section in _SECTION_ORDER:
+            # Sources arrive in completion order; print them in config order
+            results = [text for _, text in sorted(collected[section])]
+            if results:
+                sections.append(f"{section}:\n" + "\n".join(results))
 
         # ── WARNINGS ──
         if warnings:
@@ -79,161 +84,108 @@ class PortfolioSummaryTool(BaseTool):
             result = result[:4000] + "\n\n... [output truncated for brevity]"
         return result
 
-    def _collect_banks(self, config: dict, warnings: list) -> str:
-        """Collect bank balances."""
+    def iter_sources(self, config: dict, warnings: list,
+                     deadline: Optional[float] = None) -> Iterator[tuple["_Source", str]]:
+        """Fetch all enabled sources concurrently, yielding results as they arrive.
+
+        Yields (source, text) for every source that returned data. Failures,
+        empty results and sources still running at the deadline are appended
+        to `warnings` instead.
+        """
+        sources = self._sources(config, warnings)
+        if not sources:
+            return
+        if deadline is None:
+            deadline = float(
+                config.get("portfolio", {}).get("deadline_seconds", DEFAULT_DEADLINE_SEC)
+            )
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(sources), MAX_WORKERS),
+            thread_name_prefix="portfolio",
+        )
+        futures = {executor.submit(s.fetch): s for s in sources}
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                source = futures[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    warnings.append(f"{source.label}: {e}")
+                    continue
+                if source.empty_marker and source.empty_marker in text:
+                    continue
+                logger.info(f"full_portfolio: {source.label} ready")
+                yield source, text
+        except FuturesTimeout:
+            for future, source in futures.items():
+                if not future.done():
+                    warnings.append(f"{source.label}: no response within {deadline:.0f}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _sources(self, config: dict, warnings: list) -> list["_Source"]:
+        """Build the list of enabled sources in report order."""
         banks_config = config.get("banks", {})
-        results = []
+        crypto_config = config.get("crypto_wallets", {})
+        payments_config = config.get("payments", {})
+        sources: list[_Source] = []
+
+        def add(section: str, label: str, fetch: Callable[[], str], empty_marker: str = ""):
+            sources.append(_Source(section, label, fetch, empty_marker, len(sources)))
 
-        # T-Bank
+        # ── BANKS ──
         if banks_config.get("tbank", {}).get("enabled"):
-            try:
-                from .tbank import TBankBalanceTool
-                tool = TBankBalanceTool()
-                result = tool._run()
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"T-Bank: {e}")
-
-        # TBC Bank
+            add("BANKS", "T-Bank", lambda: _tool("tbank", "TBankBalanceTool")._run())
         if banks_config.get("tbc", {}).get("enabled"):
-            try:
-                from .tbc_bank import TBCBalanceTool
-                tool = TBCBalanceTool()
-                result = tool._run()
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"TBC Bank: {e}")
-
-        # Vakifbank
+            add("BANKS", "TBC Bank", lambda: _tool("tbc_bank", "TBCBalanceTool")._run())
         if banks_config.get("vakifbank", {}).get("enabled"):
-            try:
-                from .vakifbank import VakifbankBalanceTool
-                tool = VakifbankBalanceTool()
-                result = tool._run()
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"Vakıfbank: {e}")
-
-        # Krungsri
+            add("BANKS", "Vakıfbank", lambda: _tool("vakifbank", "VakifbankBalanceTool")._run())
         if banks_config.get("krungsri", {}).get("enabled"):
-            try:
-                from .krungsri import KrungsriBalanceTool
-                tool = KrungsriBalanceTool()
-                result = tool._run()
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"Krungsri: {e}")
-
-        if results:
-            return "BANKS:\n" + "\n".join(results)
-        return ""
-
-    def _collect_crypto(self, config: dict, warnings: list) -> str:
-        """Collect crypto portfolio data."""
-        crypto_config = config.get("crypto_wallets", {})
-        results = []
+            add("BANKS", "Krungsri", lambda: _tool("krungsri", "KrungsriBalanceTool")._run())
 
-        # EVM
-        if crypto_config.get("evm", {}).get("enabled"):
-            if crypto_config.get("evm", {}).get("addresses"):
-                try:
-                    from .moralis_evm import EVMPortfolioTool
-                    tool = EVMPortfolioTool()
-                    result = tool._run()
-                    results.append(result)
-                except Exception as e:
-                    warnings.append(f"EVM (Moralis): {e}")
-            else:
-                warnings.append("EVM enabled but no addresses configured")
-
-        # Solana
-        if crypto_config.get("solana", {}).get("enabled"):
-            if crypto_config.get("solana", {}).get("addresses"):
-                try:
-                    from .helius_solana import SolanaPortfolioTool
-                    tool = SolanaPortfolioTool()
-                    result = tool._run()
-                    results.append(result)
-                except Exception as e:
-                    warnings.append(f"Solana (Helius): {e}")
-            else:
-                warnings.append("Solana enabled but no addresses configured")
-
-        # TON
-        if crypto_config.get("ton", {}).get("enabled"):
-            if crypto_config.get("ton", {}).get("addresses"):
-                try:
-                    from .tonapi import TONPortfolioTool
-                    tool = TONPortfolioTool()
-                    result = tool._run()
-                    results.append(result)
-                except Exception as e:
-                    warnings.append(f"TON (TonAPI): {e}")
-            else:
-                warnings.append("TON enabled but no addresses configured")
-
-        # Papaya (free API, no key needed)
+        # ── CRYPTO ──
+        for key, label, module, cls in (
+            ("evm", "EVM (Moralis)", "moralis_evm", "EVMPortfolioTool"),
+            ("solana", "Solana (Helius)", "helius_solana", "SolanaPortfolioTool"),
+            ("ton", "TON (TonAPI)", "tonapi", "TONPortfolioTool"),
+        ):
+            if crypto_config.get(key, {}).get("enabled"):
+                if crypto_config.get(key, {}).get("addresses"):
+                    add("CRYPTO", label,
+                        lambda module=module, cls=cls: _tool(module, cls)._run())
+                else:
+                    warnings.append(f"{label.split(' ')[0]} enabled but no addresses configured")
+
+        # Free APIs, no key needed
         if crypto_config.get("evm", {}).get("addresses"):
-            try:
-                from .papaya import PapayaPositionsTool
-                tool = PapayaPositionsTool()
-                result = tool._run()
-                if "позиций не найдено" not in result:
-                    results.append(result)
-            except Exception as e:
-                warnings.append(f"Papaya: {e}")
-
-        # Stacks (free API, no key needed)
+            add("CRYPTO", "Papaya", lambda: _tool("papaya", "PapayaPositionsTool")._run(),
+                empty_marker="позиций не найдено")
         if crypto_config.get("stacks", {}).get("addresses"):
-            try:
-                from .stacks import StacksPortfolioTool
-                tool = StacksPortfolioTool()
-                result = tool._run()
-                if "балансов не найдено" not in result:
-                    results.append(result)
-            except Exception as e:
-                warnings.append(f"Stacks: {e}")
-
-        # Eventum (free API, no key needed)
+            add("CRYPTO", "Stacks", lambda: _tool("stacks", "StacksPortfolioTool")._run(),
+                empty_marker="балансов не найдено")
         if crypto_config.get("eventum", {}).get("addresses"):
-            try:
-                from .eventum import EventumPortfolioTool
-                tool = EventumPortfolioTool()
-                result = tool._run()
-                if "балансов не найдено" not in result:
-                    results.append(result)
-            except Exception as e:
-                warnings.append(f"Eventum: {e}")
-
-        if results:
-            return "CRYPTO:\n" + "\n".join(results)
-        return ""
-
-    def _collect_revenue(self, config: dict, warnings: list) -> str:
-        """Collect revenue data."""
-        payments_config = config.get("payments", {})
-        results = []
+            add("CRYPTO", "Eventum", lambda: _tool("eventum", "EventumPortfolioTool")._run(),
+                empty_marker="балансов не найдено")
 
-        # Tribute
+        # ── REVENUE ──
         if payments_config.get("tribute", {}).get("enabled"):
-            try:
-                from .tribute import TributeRevenueTool
-                tool = TributeRevenueTool()
-                result = tool._run(action="revenue")
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"Tribute: {e}")
-
-        # Stripe
+            add("REVENUE", "Tribute",
+                lambda: _tool("tribute", "TributeRevenueTool")._run(action="revenue"))
         if payments_config.get("stripe", {}).get("enabled"):
-            try:
-                from .stripe_tool import StripeRevenueTool
-                tool = StripeRevenueTool()
-                result = tool._run()
-                results.append(result)
-            except Exception as e:
-                warnings.append(f"Stripe: {e}")
-
-        if results:
-            return "REVENUE:\n" + "\n".join(results)
-        return ""
+            add("REVENUE", "Stripe", lambda: _tool("stripe_tool", "StripeRevenueTool")._run())
+
+        return sources
+
+
+class _Source(NamedTuple):
+    section: str
+    label: str
+    fetch: Callable[[], str]
+    empty_marker: str  # result containing this means "nothing to report"
+    order: int
+
+
+def _tool(module: str, cls: str):
+    """Import and instantiate a source tool lazily (keeps optional deps optional)."""
+    return getattr(import_module(f".{module}", __package__), cls)()
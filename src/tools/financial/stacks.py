@@ -5,9 +5,10 @@ Public API, no key needed. STX uses 6 decimals.
 
 import logging
 
-import httpx
 from crewai.tools import BaseTool
 
+from .base import pooled_client
+
 logger = logging.getLogger(__name__)
 
 HIRO_API = "https://api.hiro.so"
@@ -25,7 +26,7 @@ def _load_stacks_addresses() -> list[str]:
 def get_stacks_balance(address: str) -> dict | None:
     """Get STX and token balances for one address."""
     url = f"{HIRO_API}/extended/v1/address/{address}/balances"
-    resp = httpx.get(url, timeout=10)
+    resp = pooled_client("stacks").get(url, timeout=10)
     resp.raise_for_status()
     data = resp.json()
 
@@ -16,7 +16,6 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional, Type
 
-import httpx
 from pydantic import BaseModel, Field
 
 from .base import FinancialBaseTool
@@ -57,11 +56,7 @@ class TBankBalanceTool(FinancialBaseTool):
             "Authorization": f"Bearer {creds['api_key']}",
             "Accept": "application/json",
         }
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
         try:
             response = client.get("/bank-accounts")
             response.raise_for_status()
@@ -161,11 +156,7 @@ class TBankStatementTool(FinancialBaseTool):
             "Authorization": f"Bearer {creds['api_key']}",
             "Accept": "application/json",
         }
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
         try:
             params = {
                 "accountNumber": account_number,
@@ -16,7 +16,6 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Type
 
-import httpx
 from pydantic import BaseModel, Field
 
 from .base import FinancialBaseTool, load_financial_config
@@ -77,16 +76,10 @@ class TONPortfolioTool(FinancialBaseTool):
             addr_short = f"{addr[:4]}...{addr[-4:]}" if len(addr) > 8 else addr
             lines = [f"  Wallet {addr_short}:"]
 
-            client = httpx.Client(
-                base_url=creds["base_url"],
-                headers=headers,
-                timeout=30.0,
-            )
+            client = self._get_client(headers=headers, base_url=creds["base_url"])
             try:
                 # 1. Get TON balance
-                acc_resp = client.get(f"/accounts/{addr}")
-                acc_resp.raise_for_status()
-                acc_data = acc_resp.json()
+                acc_data = self._cached_json(client, "get", f"/accounts/{addr}")
 
                 ton_nanotons = int(acc_data.get("balance", 0))
                 ton_balance = Decimal(ton_nanotons) / Decimal(10**9)
@@ -108,12 +101,11 @@ class TONPortfolioTool(FinancialBaseTool):
                 lines.append(f"    Status: {status}")
 
                 # 2. Get Jetton (token) balances
-                jettons_resp = client.get(
+                jettons_data = self._cached_json(
+                    client, "get",
                     f"/accounts/{addr}/jettons",
                     params={"currencies": "usd"},
                 )
-                jettons_resp.raise_for_status()
-                jettons_data = jettons_resp.json()
                 jettons = jettons_data.get("balances", jettons_data) if isinstance(jettons_data, dict) else jettons_data
 
                 jetton_lines = []
@@ -187,11 +179,7 @@ class TONTransactionsTool(FinancialBaseTool):
             "Accept": "application/json",
         }
 
-        client = httpx.Client(
-            base_url=creds["base_url"],
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url=creds["base_url"])
         try:
             response = client.get(
                 f"/accounts/{address}/events",
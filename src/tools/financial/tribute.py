@@ -22,7 +22,6 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Type
 
-import httpx
 from pydantic import BaseModel, Field
 
 from .base import FinancialBaseTool, load_financial_config
@@ -113,15 +112,9 @@ class TributeRevenueTool(FinancialBaseTool):
             "Api-Key": creds["api_key"],
             "Content-Type": "application/json",
         }
-        client = httpx.Client(
-            base_url="https://tribute.tg/api/v1",
-            headers=headers,
-            timeout=30.0,
-        )
+        client = self._get_client(headers=headers, base_url="https://tribute.tg/api/v1")
         try:
-            response = client.get("/products")
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached_json(client, "get", "/products")
         finally:
             client.close()
 
@@ -199,15 +192,9 @@ class TributeRevenueTool(FinancialBaseTool):
                 "Api-Key": creds["api_key"],
                 "Content-Type": "application/json",
             }
-            client = httpx.Client(
-                base_url="https://tribute.tg/api/v1",
-                headers=headers,
-                timeout=30.0,
-            )
+            client = self._get_client(headers=headers, base_url="https://tribute.tg/api/v1")
             try:
-                response = client.get("/subscribers")
-                response.raise_for_status()
-                data = response.json()
+                data = self._cached_json(client, "get", "/subscribers")
             finally:
                 client.close()
 
@@ -330,8 +317,8 @@ class TributeWebhookVerifier:
         return hmac.compare_digest(expected, signature)
 
     @staticmethod
-    def process_event(event_data: dict):
-        """Store a verified webhook event."""
+    def process_event(event_data: dict) -> bool:
+        """Store a verified webhook event. Returns False for a duplicate."""
         event_data["received_at"] = datetime.utcnow().isoformat()
         payments = _load_payments()
 
@@ -341,10 +328,11 @@ class TributeWebhookVerifier:
             existing_ids = {p.get("id", p.get("event_id")) for p in payments}
             if event_id in existing_ids:
                 logger.info(f"Duplicate Tribute event: {event_id}")
-                return
+                return False
 
         payments.append(event_data)
         _save_payments(payments)
         logger.info(
             f"Stored Tribute event: {event_data.get('event', 'unknown')}"
         )
+        return True
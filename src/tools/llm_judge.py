@@ -2,12 +2,20 @@
 ⚖️ Zinin Corp — LLM-as-Judge
 Quality scoring for agent responses using free LLM (Llama 3.3 70B).
 Non-blocking: failures are logged but never break the response flow.
+
+judge_response() scores one response inline (used for the reflection
+decision, behind the cheap prefilter_flags() check). Analytics scoring
+goes through JudgeQueue: a background worker that scores up to
+BATCH_SIZE queued responses in one LLM call.
 """
 
 import json
 import logging
 import re
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
 
 from pydantic import BaseModel, Field
 
@@ -62,6 +70,23 @@ AGENT ({agent_name}) RESPONSE:
 Return ONLY JSON: {{"relevance": N, "completeness": N, "accuracy": N, "format_score": N, "feedback": "..."}}"""
 
 
+_BATCH_SYSTEM = _JUDGE_SYSTEM.split("You MUST respond")[0] + """You MUST respond with ONLY a JSON array, one object per response, in order, no other text:
+[{"id": 1, "relevance": N, "completeness": N, "accuracy": N, "format_score": N, "feedback": "..."}]
+"""
+
+_BATCH_ITEM = """### RESPONSE {id}
+TASK: {task}
+
+AGENT ({agent_name}) RESPONSE:
+{response}
+"""
+
+_BATCH_PROMPT = """Evaluate each of these {count} agent responses independently:
+
+{items}
+Return ONLY a JSON array with {count} objects (ids 1..{count})."""
+
+
 # ── Core judge function ───────────────────────────────────
 
 def judge_response(
@@ -75,10 +100,7 @@ def judge_response(
     Never raises — all errors are caught and logged.
     """
     if not agent_response or len(agent_response.strip()) < 20:
-        return JudgeResult(
-            relevance=1, completeness=1, accuracy=1, format_score=1,
-            overall=1.0, feedback="Response too short or empty", passed=False,
-        )
+        return _short_verdict()
 
     try:
         from .tech_tools import _call_llm_tech
@@ -97,7 +119,7 @@ def judge_response(
     )
 
     try:
-        raw = _call_llm_tech(prompt, system=_JUDGE_SYSTEM, max_tokens=300)
+        raw = _call_llm_tech(prompt, system=_JUDGE_SYSTEM, max_tokens=300, hedge=True)
         if not raw:
             logger.warning("llm_judge: empty response from LLM")
             return None
@@ -107,24 +129,7 @@ def judge_response(
             logger.warning(f"llm_judge: failed to parse response: {raw[:200]}")
             return None
 
-        # Calculate weighted average
-        overall = (
-            scores.get("relevance", 3) * 0.30
-            + scores.get("completeness", 3) * 0.25
-            + scores.get("accuracy", 3) * 0.30
-            + scores.get("format_score", 3) * 0.15
-        )
-        overall = round(min(max(overall, 1.0), 5.0), 2)
-
-        result = JudgeResult(
-            relevance=_clamp(scores.get("relevance", 3)),
-            completeness=_clamp(scores.get("completeness", 3)),
-            accuracy=_clamp(scores.get("accuracy", 3)),
-            format_score=_clamp(scores.get("format_score", 3)),
-            overall=overall,
-            feedback=scores.get("feedback", ""),
-            passed=overall >= 3.0,
-        )
+        result = _verdict_from_scores(scores)
 
         logger.info(
             f"llm_judge [{agent_name}]: overall={result.overall} "
@@ -139,6 +144,242 @@ def judge_response(
         return None
 
 
+def _short_verdict() -> JudgeResult:
+    return JudgeResult(
+        relevance=1, completeness=1, accuracy=1, format_score=1,
+        overall=1.0, feedback="Response too short or empty", passed=False,
+    )
+
+
+def _verdict_from_scores(scores: dict) -> JudgeResult:
+    """Weighted overall score and pass flag from the judge's raw scores.
+
+    Scores are clamped to 1-5 integers first, so strings like "4" count
+    and a malformed value falls back to 3 instead of raising.
+    """
+    relevance = _clamp(scores.get("relevance", 3))
+    completeness = _clamp(scores.get("completeness", 3))
+    accuracy = _clamp(scores.get("accuracy", 3))
+    format_score = _clamp(scores.get("format_score", 3))
+    overall = round(
+        relevance * 0.30 + completeness * 0.25 + accuracy * 0.30 + format_score * 0.15, 2,
+    )
+    return JudgeResult(
+        relevance=relevance,
+        completeness=completeness,
+        accuracy=accuracy,
+        format_score=format_score,
+        overall=overall,
+        feedback=str(scores.get("feedback") or ""),
+        passed=overall >= 3.0,
+    )
+
+
+# ── Rule-based pre-filter ─────────────────────────────────
+
+PREFILTER_MIN_CHARS = 200
+
+_PREFILTER_RULES = {
+    "error": re.compile(r"^\s*❌|ошибка выполнения", re.IGNORECASE),
+    "self_intro": re.compile(r"^\s*(я\s*[—–-]|меня зовут|позвольте представиться)", re.IGNORECASE),
+    "promise": re.compile(
+        r"\b(я (подготовлю|сделаю|проверю|соберу|пришлю)|будет готово|вернусь с)", re.IGNORECASE,
+    ),
+    "placeholder": re.compile(r"\[(вставить|указать|название|сумма)[^\]]*\]|\bXXX\b|\$100K", re.IGNORECASE),
+}
+
+
+def prefilter_flags(agent_response: str) -> list[str]:
+    """Cheap red-flag check. An empty list means the response looks fine
+    and the LLM judge can be skipped for the reflection decision."""
+    text = (agent_response or "").strip()
+    flags = [name for name, rx in _PREFILTER_RULES.items() if rx.search(text)]
+    if len(text) < PREFILTER_MIN_CHARS:
+        flags.append("too_short")
+    if not re.search(r"\d", text):
+        flags.append("no_data")
+    return flags
+
+
+# ── Batch judging ─────────────────────────────────────────
+
+BATCH_SIZE = 5
+BATCH_RESPONSE_CHARS = 1500  # per response; keeps a full batch under ~10k chars
+
+
+def judge_batch(items: list[tuple[str, str, str]]) -> list[Optional[JudgeResult]]:
+    """Score (task, response, agent_name) items with one LLM call.
+
+    Returns one JudgeResult (or None if the judge skipped it) per item, in
+    order. Never raises.
+    """
+    results: list[Optional[JudgeResult]] = [None] * len(items)
+    pending = []
+    for i, (task, response, agent_name) in enumerate(items):
+        if not response or len(response.strip()) < 20:
+            results[i] = _short_verdict()
+        else:
+            pending.append(i)
+    if not pending:
+        return results
+
+    try:
+        from .tech_tools import _call_llm_tech
+    except ImportError:
+        logger.warning("llm_judge: _call_llm_tech not available")
+        return results
+
+    blocks = [
+        _BATCH_ITEM.format(
+            id=n, task=items[i][0][:500], agent_name=items[i][2],
+            response=items[i][1][:BATCH_RESPONSE_CHARS],
+        )
+        for n, i in enumerate(pending, 1)
+    ]
+    prompt = _BATCH_PROMPT.format(count=len(pending), items="\n".join(blocks))
+    try:
+        raw = _call_llm_tech(prompt, system=_BATCH_SYSTEM, max_tokens=150 * len(pending) + 100)
+    except Exception as e:
+        logger.warning(f"llm_judge: batch of {len(pending)} failed: {e}")
+        return results
+    if not raw:
+        logger.warning("llm_judge: empty batch response from LLM")
+        return results
+
+    parsed = _parse_batch_response(raw, len(pending))
+    for n, i in enumerate(pending, 1):
+        if parsed.get(n):
+            try:
+                results[i] = _verdict_from_scores(parsed[n])
+            except Exception as e:  # one bad object loses only its own verdict
+                logger.warning(f"llm_judge: bad batch score {parsed[n]!r}: {e}")
+    missing = sum(1 for i in pending if results[i] is None)
+    if missing:
+        logger.warning(f"llm_judge: {missing}/{len(pending)} batch scores missing: {raw[:200]}")
+    return results
+
+
+class JudgeQueue:
+    """Background worker that scores queued responses in batches.
+
+    submit() never blocks: items wait up to BATCH_WAIT_SEC for company,
+    then up to BATCH_SIZE of them are scored with one judge_batch() call
+    and handler(item, verdict) runs for each scored item. Verdicts already
+    known (from the inline reflection check) are reused via prime().
+    """
+
+    BATCH_WAIT_SEC = 2.0
+    MAX_QUEUED = 200
+
+    def __init__(self, handler: Callable[[dict, JudgeResult], None],
+                 batch_size: int = BATCH_SIZE):
+        self.handler = handler
+        self.batch_size = batch_size
+        self._items: deque[dict] = deque()
+        self._known: OrderedDict[int, JudgeResult] = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._flushing = False  # score what is queued without waiting for a full batch
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"queued": 0, "scored": 0, "batches": 0, "reused": 0,
+                       "dropped": 0, "unscored": 0}
+
+    def prime(self, response: str, verdict: JudgeResult):
+        """Remember a verdict for `response` so submitting it costs no LLM call."""
+        with self._cond:
+            self._known[hash(response)] = verdict
+            while len(self._known) > 64:
+                self._known.popitem(last=False)
+
+    def submit(self, task: str, response: str, agent_name: str, **context):
+        with self._cond:
+            if len(self._items) >= self.MAX_QUEUED:
+                self._items.popleft()
+                self._stats["dropped"] += 1
+            self._items.append({"task": task, "response": response,
+                                "agent_name": agent_name, **context})
+            self._stats["queued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="judge-queue", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Score everything queued now; True when the queue drained in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            while self._items or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._items) + self._busy}
+
+    def _next_batch(self) -> list[dict]:
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            deadline = time.monotonic() + self.BATCH_WAIT_SEC
+            while len(self._items) < self.batch_size and not self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+            if not self._items:
+                self._flushing = False
+            self._busy = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._score(batch)
+            except Exception as e:
+                logger.warning(f"llm_judge: queue batch failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = 0
+                    self._cond.notify_all()
+
+    def _score(self, batch: list[dict]):
+        verdicts: list[Optional[JudgeResult]] = []
+        to_judge = []
+        with self._cond:
+            for item in batch:
+                known = self._known.pop(hash(item["response"]), None)
+                if known is not None:
+                    self._stats["reused"] += 1
+                else:
+                    to_judge.append(len(verdicts))
+                verdicts.append(known)
+        if to_judge:
+            scored = judge_batch([(batch[i]["task"], batch[i]["response"], batch[i]["agent_name"])
+                                  for i in to_judge])
+            for i, verdict in zip(to_judge, scored):
+                verdicts[i] = verdict
+            with self._cond:
+                self._stats["batches"] += 1
+        for item, verdict in zip(batch, verdicts):
+            if verdict is None:
+                with self._cond:
+                    self._stats["unscored"] += 1
+                continue
+            try:
+                self.handler(item, verdict)
+            except Exception as e:
+                logger.warning(f"llm_judge: handler failed for {item.get('agent_name')}: {e}")
+            with self._cond:
+                self._stats["scored"] += 1
+
+
 # ── Helpers ───────────────────────────────────────────────
 
 def _clamp(value, lo=1, hi=5) -> int:
@@ -178,3 +419,40 @@ def _parse_judge_response(raw: str) -> Optional[dict]:
         return None
     except json.JSONDecodeError:
         return None
+
+
+def _parse_batch_response(raw: str, count: int) -> dict[int, dict]:
+    """{id: scores} from a batch judge response (JSON array; falls back to
+    the individual objects in order when the array is malformed)."""
+    text = raw.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*", "", text)
+        text = re.sub(r"\s*```$", "", text)
+
+    objects: list = []
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+            if isinstance(data, list):
+                objects = [o for o in data if isinstance(o, dict)]
+        except json.JSONDecodeError:
+            pass
+    if not objects:
+        for match in re.finditer(r"\{[^{}]+\}", text):
+            try:
+                objects.append(json.loads(match.group()))
+            except json.JSONDecodeError:
+                continue
+
+    result: dict[int, dict] = {}
+    for n, obj in enumerate(objects, 1):
+        if "relevance" not in obj and "completeness" not in obj:
+            continue
+        try:
+            key = int(obj.get("id", n))
+        except (ValueError, TypeError):
+            key = n
+        if 1 <= key <= count:
+            result.setdefault(key, obj)
+    return result
@@ -47,64 +47,15 @@ def _save_json(path: str, data: dict):
 # Helpers: LLM calls (free models)
 # ──────────────────────────────────────────────────────────
 
-def _call_llm(prompt: str, system: str = "", max_tokens: int = 2000) -> Optional[str]:
-    """Call LLM via OpenRouter (free) -> Groq (free) -> None."""
-    from urllib.request import urlopen, Request
-    from urllib.error import HTTPError
-
-    providers = []
-
-    # OpenRouter free models
-    or_key = os.getenv("OPENROUTER_API_KEY", "")
-    if or_key:
-        providers.append({
-            "url": "https://openrouter.ai/api/v1/chat/completions",
-            "key": or_key,
-            "model": "meta-llama/llama-3.3-70b-instruct:free",
-        })
-
-    # Groq free
-    groq_key = os.getenv("GROQ_API_KEY", "")
-    if groq_key:
-        providers.append({
-            "url": "https://api.groq.com/openai/v1/chat/completions",
-            "key": groq_key,
-            "model": "llama-3.3-70b-versatile",
-        })
-
-    messages = []
-    if system:
-        messages.append({"role": "system", "content": system})
-    messages.append({"role": "user", "content": prompt})
-
-    for provider in providers:
-        try:
-            payload = json.dumps({
-                "model": provider["model"],
-                "messages": messages,
-                "max_tokens": max_tokens,
-                "temperature": 0.7,
-            }).encode("utf-8")
-
-            req = Request(
-                provider["url"],
-                data=payload,
-                headers={
-                    "Authorization": f"Bearer {provider['key']}",
-                    "Content-Type": "application/json",
-                },
-                method="POST",
-            )
+def _call_llm(prompt: str, system: str = "", max_tokens: int = 2000,
+              hedge: bool = False) -> Optional[str]:
+    """Call LLM via OpenRouter (free) -> Groq (free) -> None.
 
-            with urlopen(req, timeout=60) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-                return data["choices"][0]["message"]["content"]
-
-        except Exception as e:
-            logger.warning(f"LLM call failed ({provider['model']}): {e}")
-            continue
-
-    return None
+    hedge=True asks Groq too when OpenRouter is slower than usual.
+    """
+    from ..llm_gateway import TEXT_ROUTES, complete_sync
+    return complete_sync(prompt, system, routes=TEXT_ROUTES, max_tokens=max_tokens,
+                         agent="smm", hedge=hedge)
 
 
 # ──────────────────────────────────────────────────────────
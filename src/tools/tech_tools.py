@@ -9,6 +9,7 @@ import logging
 import os
 import platform
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from datetime import datetime
 from typing import Optional, Type
 from urllib.request import urlopen, Request
@@ -17,6 +18,10 @@ from urllib.error import HTTPError, URLError
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from ..llm_gateway import TECH_ROUTES, complete_sync
+
+logger = logging.getLogger(__name__)
+
 
 def _data_path() -> str:
     for p in ["/app/data/tech_data.json", "data/tech_data.json"]:
@@ -652,6 +657,142 @@ def _check_single_api(api_key: str) -> dict:
         return {"ok": False, "configured": True, "ms": 0, "error": err_str}
 
 
+# Concurrent checks: bounded pool + one deadline for the whole sweep, so a few
+# hanging providers (urlopen timeout=12 each) no longer add up serially.
+HEALTH_CHECK_WORKERS = int(os.getenv("API_HEALTH_WORKERS", "8"))
+HEALTH_CHECK_DEADLINE_SEC = float(os.getenv("API_HEALTH_DEADLINE_SEC", "20"))
+LATENCY_SAMPLES = 50  # per-API latency samples kept in api_health.json
+
+
+class _HealthTally:
+    """Running ok/fail/not-configured counts; overall status is always current."""
+
+    def __init__(self):
+        self.ok = 0
+        self.fail = 0
+        self.not_configured = 0
+
+    def add(self, result: dict):
+        if not result.get("configured", True):
+            self.not_configured += 1
+        elif result.get("ok"):
+            self.ok += 1
+        else:
+            self.fail += 1
+
+    @property
+    def total(self) -> int:
+        return self.ok + self.fail + self.not_configured
+
+    @property
+    def status(self) -> str:
+        """healthy / degraded / critical — unconfigured APIs are not failures."""
+        if self.fail == 0:
+            return "healthy"
+        if self.fail <= 2:
+            return "degraded"
+        return "critical"
+
+    def label(self) -> str:
+        if self.fail == 0 and self.not_configured == 0:
+            return "✅ HEALTHY"
+        if self.fail == 0:
+            return "⚠️ DEGRADED (unconfigured APIs)"
+        if self.fail <= 2:
+            return "⚠️ DEGRADED"
+        return "❌ CRITICAL"
+
+
+def _check_apis(keys: list[str], deadline: Optional[float] = None,
+                max_workers: Optional[int] = None) -> tuple[dict, _HealthTally]:
+    """Check APIs concurrently. Returns ({key: result}, tally).
+
+    Results keep the order of `keys`. APIs still pending when the deadline
+    passes are reported as failed; their threads are abandoned.
+    """
+    deadline = HEALTH_CHECK_DEADLINE_SEC if deadline is None else deadline
+    workers = max(1, min(max_workers or HEALTH_CHECK_WORKERS, len(keys) or 1))
+    tally = _HealthTally()
+    results = {}
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-health")
+    futures = {executor.submit(_check_single_api, key): key for key in keys}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"ok": False, "configured": True, "ms": 0, "error": str(e)}
+            results[key] = result
+            before = tally.status
+            tally.add(result)
+            if tally.status != before and tally.status == "critical":
+                logger.warning(f"API health: critical after {tally.total}/{len(keys)} checks")
+    except FuturesTimeout:
+        pass
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for key in keys:
+        if key not in results:
+            result = {
+                "ok": False, "configured": True, "ms": round(deadline * 1000),
+                "error": f"No response within {deadline:g}s",
+            }
+            results[key] = result
+            tally.add(result)
+    return {key: results[key] for key in keys}, tally
+
+
+def _percentile(samples: list, pct: float) -> int:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return int(ordered[int(rank) - 1])
+
+
+def _record_check(action: str, timestamp: str, overall: str,
+                  tally: _HealthTally, results: dict):
+    """Append a check to api_health.json with per-API latency percentiles."""
+    health_data = _load_health_data()
+    latency = health_data.setdefault("latency", {})
+    record_results = {}
+    for key, result in results.items():
+        entry = {"ok": result["ok"], "ms": result.get("ms", 0), "error": result.get("error")}
+        samples = latency.get(key, [])
+        if result["ok"] and result.get("ms"):
+            samples = (samples + [result["ms"]])[-LATENCY_SAMPLES:]
+            latency[key] = samples
+        if samples:
+            entry["p50_ms"] = _percentile(samples, 50)
+            entry["p95_ms"] = _percentile(samples, 95)
+            entry["max_ms"] = max(samples)
+        record_results[key] = entry
+
+    health_data["checks"].append({
+        "timestamp": timestamp,
+        "action": action,
+        "overall": overall,
+        "total_ok": tally.ok,
+        "total_fail": tally.fail,
+        "total_not_configured": tally.not_configured,
+        "results": record_results,
+    })
+    health_data["checks"] = health_data["checks"][-100:]
+    health_data["last_full_check"] = timestamp
+
+    for key, result in results.items():
+        if not result["ok"] and result.get("configured", True):
+            health_data["alerts"].append({
+                "timestamp": timestamp,
+                "api": key,
+                "error": result.get("error", "Unknown"),
+            })
+    health_data["alerts"] = health_data["alerts"][-200:]
+    _save_health_data(health_data)
+
+
 class APIHealthInput(BaseModel):
     action: str = Field(
         ...,
@@ -716,10 +857,7 @@ class APIHealthMonitor(BaseTool):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         lines = [f"═══ {title} ═══", f"Timestamp: {timestamp}", ""]
 
-        results = {}
-        total_ok = 0
-        total_fail = 0
-        total_not_configured = 0
+        results, tally = _check_apis(list(apis_to_check))
 
         # Group by category
         categories = {}
@@ -738,36 +876,24 @@ class APIHealthMonitor(BaseTool):
         for cat, apis in categories.items():
             lines.append(f"▸ {cat_labels.get(cat, cat)}:")
             for key, api_info in apis:
-                result = _check_single_api(key)
-                results[key] = result
-
+                result = results[key]
+                ms = f" ({result.get('ms', 0)}ms)" if result.get("ms") else ""
                 if not result.get("configured", True):
-                    total_not_configured += 1
                     lines.append(f"  ⚠️ {api_info['name']} — NOT CONFIGURED ({result.get('error', '')})")
                 elif result["ok"]:
-                    total_ok += 1
-                    ms = f" ({result.get('ms', 0)}ms)" if result.get("ms") else ""
                     lines.append(f"  ✅ {api_info['name']}{ms}")
                 else:
-                    total_fail += 1
-                    ms = f" ({result.get('ms', 0)}ms)" if result.get("ms") else ""
                     err = result.get("error", "Unknown")
                     lines.append(f"  ❌ {api_info['name']}{ms} — {err}")
             lines.append("")
 
         # Summary
-        total = total_ok + total_fail + total_not_configured
-        if total_fail == 0 and total_not_configured == 0:
-            overall = "✅ HEALTHY"
-        elif total_fail == 0:
-            overall = "⚠️ DEGRADED (unconfigured APIs)"
-        elif total_fail <= 2:
-            overall = "⚠️ DEGRADED"
-        else:
-            overall = "❌ CRITICAL"
-
+        overall = tally.label()
         lines.append(f"═══ SUMMARY: {overall} ═══")
-        lines.append(f"  Working: {total_ok}/{total} | Failed: {total_fail} | Not configured: {total_not_configured}")
+        lines.append(
+            f"  Working: {tally.ok}/{tally.total} | Failed: {tally.fail} "
+            f"| Not configured: {tally.not_configured}"
+        )
 
         # Calculate average latency
         latencies = [r.get("ms", 0) for r in results.values() if r.get("ms", 0) > 0]
@@ -776,31 +902,7 @@ class APIHealthMonitor(BaseTool):
             max_ms = max(latencies)
             lines.append(f"  Avg latency: {avg_ms}ms | Max: {max_ms}ms")
 
-        # Save results
-        health_data = _load_health_data()
-        check_record = {
-            "timestamp": timestamp,
-            "action": action,
-            "overall": overall,
-            "total_ok": total_ok,
-            "total_fail": total_fail,
-            "total_not_configured": total_not_configured,
-            "results": {k: {"ok": v["ok"], "ms": v.get("ms", 0), "error": v.get("error")}
-                        for k, v in results.items()},
-        }
-        health_data["checks"].append(check_record)
-        health_data["checks"] = health_data["checks"][-100:]
-        health_data["last_full_check"] = timestamp
-
-        for key, result in results.items():
-            if not result["ok"] and result.get("configured", True):
-                health_data["alerts"].append({
-                    "timestamp": timestamp,
-                    "api": key,
-                    "error": result.get("error", "Unknown"),
-                })
-        health_data["alerts"] = health_data["alerts"][-200:]
-        _save_health_data(health_data)
+        _record_check(action, timestamp, overall, tally, results)
 
         return "\n".join(lines)
 
@@ -822,6 +924,8 @@ class APIHealthMonitor(BaseTool):
             info = _API_REGISTRY.get(key, {})
             icon = "✅" if result["ok"] else "❌"
             ms = f" ({result.get('ms', 0)}ms)" if result.get("ms") else ""
+            if result.get("p95_ms"):
+                ms += f" [p50 {result['p50_ms']}ms / p95 {result['p95_ms']}ms]"
             err = f" — {result.get('error', '')}" if result.get("error") else ""
             lines.append(f"  {icon} {info.get('name', key)}{ms}{err}")
         return "\n".join(lines)
@@ -850,81 +954,15 @@ class APIHealthMonitor(BaseTool):
 # Tool 4: Agent Prompt Writer (professional YAML generation)
 # ──────────────────────────────────────────────────────────
 
-def _call_llm_tech(prompt: str, system: str = "", max_tokens: int = 3000) -> Optional[str]:
-    """Call LLM via OpenRouter (free models) or Groq for prompt engineering tasks."""
-    providers = []
-    or_key = os.getenv("OPENROUTER_API_KEY", "")
-    if or_key:
-        # Primary: Llama 3.3 70B, fallbacks: Gemma 3 27B, Gemma 3 12B
-        for model in [
-            "meta-llama/llama-3.3-70b-instruct:free",
-            "google/gemma-3-27b-it:free",
-            "google/gemma-3-12b-it:free",
-        ]:
-            providers.append({
-                "url": "https://openrouter.ai/api/v1/chat/completions",
-                "key": or_key,
-                "model": model,
-            })
-    groq_key = os.getenv("GROQ_API_KEY", "")
-    if groq_key:
-        providers.append({
-            "url": "https://api.groq.com/openai/v1/chat/completions",
-            "key": groq_key,
-            "model": "llama-3.3-70b-versatile",
-        })
-
-    # Some models (Gemma) don't support system messages — merge into user prompt
-    _SYSTEM_SUPPORTED_PREFIXES = ("meta-llama/", "mistralai/", "deepseek/", "qwen/", "nvidia/")
-
-    for provider in providers:
-        # Build messages depending on model's system message support
-        model_id = provider["model"]
-        use_system = any(model_id.startswith(p) for p in _SYSTEM_SUPPORTED_PREFIXES)
-        messages = []
-        if system and use_system:
-            messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-        elif system:
-            messages.append({"role": "user", "content": f"{system}\n\n---\n\n{prompt}"})
-        else:
-            messages.append({"role": "user", "content": prompt})
+def _call_llm_tech(prompt: str, system: str = "", max_tokens: int = 3000,
+                   hedge: bool = False) -> Optional[str]:
+    """Call LLM via OpenRouter (free models) or Groq for prompt engineering tasks.
 
-        for attempt in range(2):  # retry once on 429
-            try:
-                payload = json.dumps({
-                    "model": model_id,
-                    "messages": messages,
-                    "max_tokens": max_tokens,
-                    "temperature": 0.7,
-                }).encode("utf-8")
-                req = Request(
-                    provider["url"],
-                    data=payload,
-                    headers={
-                        "Authorization": f"Bearer {provider['key']}",
-                        "Content-Type": "application/json",
-                    },
-                    method="POST",
-                )
-                with urlopen(req, timeout=90) as resp:
-                    data = json.loads(resp.read().decode("utf-8"))
-                    if "error" in data:
-                        raise ValueError(data["error"].get("message", "API error"))
-                    choices = data.get("choices", [])
-                    if not choices:
-                        raise ValueError("Empty choices in response")
-                    return choices[0]["message"]["content"]
-            except HTTPError as e:
-                if e.code == 429 and attempt == 0:
-                    time.sleep(5)  # wait 5s and retry once
-                    continue
-                logging.warning(f"LLM call failed ({provider['model']}): HTTP {e.code}")
-                break  # move to next provider
-            except Exception as e:
-                logging.warning(f"LLM call failed ({provider['model']}): {e}")
-                break  # move to next provider
-    return None
+    Primary: Llama 3.3 70B, fallbacks: Gemma 3 27B, Gemma 3 12B, Groq.
+    hedge=True asks Groq too when OpenRouter is slower than usual.
+    """
+    return complete_sync(prompt, system, routes=TECH_ROUTES, max_tokens=max_tokens,
+                         timeout=60, agent="automator", hedge=hedge)
 
 
 _AGENT_WRITER_SYSTEM = """Ты — профессиональный инженер промптов для мульти-агентных систем CrewAI.
@@ -1129,6 +1167,7 @@ def run_api_health_check(categories: list[str] = None) -> dict:
 
     Returns:
         dict with 'overall', 'total_ok', 'total_fail', 'failed_apis', 'timestamp'
+        and per-API 'results'
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     apis_to_check = _API_REGISTRY
@@ -1136,55 +1175,21 @@ def run_api_health_check(categories: list[str] = None) -> dict:
         apis_to_check = {k: v for k, v in _API_REGISTRY.items()
                          if v["category"] in categories}
 
-    results = {}
-    total_ok = 0
-    total_fail = 0
-    failed_apis = []
-
-    for key, api_info in apis_to_check.items():
-        result = _check_single_api(key)
-        results[key] = result
-        if result["ok"]:
-            total_ok += 1
-        elif result.get("configured", True):
-            total_fail += 1
-            failed_apis.append(f"{api_info['name']}: {result.get('error', '?')}")
-
-    if total_fail == 0:
-        overall = "healthy"
-    elif total_fail <= 2:
-        overall = "degraded"
-    else:
-        overall = "critical"
-
-    # Save to history
-    health_data = _load_health_data()
-    health_data["checks"].append({
-        "timestamp": timestamp,
-        "action": "scheduled",
-        "overall": overall,
-        "total_ok": total_ok,
-        "total_fail": total_fail,
-        "total_not_configured": len(apis_to_check) - total_ok - total_fail,
-        "results": {k: {"ok": v["ok"], "ms": v.get("ms", 0), "error": v.get("error")}
-                    for k, v in results.items()},
-    })
-    health_data["checks"] = health_data["checks"][-100:]
-    health_data["last_full_check"] = timestamp
-    for key, result in results.items():
-        if not result["ok"] and result.get("configured", True):
-            health_data["alerts"].append({
-                "timestamp": timestamp,
-                "api": key,
-                "error": result.get("error", "Unknown"),
-            })
-    health_data["alerts"] = health_data["alerts"][-200:]
-    _save_health_data(health_data)
+    results, tally = _check_apis(list(apis_to_check))
+    overall = tally.status
+    failed_apis = [
+        f"{apis_to_check[k]['name']}: {r.get('error', '?')}"
+        for k, r in results.items()
+        if not r["ok"] and r.get("configured", True)
+    ]
+
+    _record_check("scheduled", timestamp, overall, tally, results)
 
     return {
         "overall": overall,
-        "total_ok": total_ok,
-        "total_fail": total_fail,
+        "total_ok": tally.ok,
+        "total_fail": tally.fail,
         "failed_apis": failed_apis,
         "timestamp": timestamp,
+        "results": results,
     }
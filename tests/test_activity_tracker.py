@@ -6,6 +6,8 @@ import json
 import tempfile
 from unittest.mock import patch
 
+import pytest
+
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.activity_tracker import (
@@ -243,3 +245,118 @@ class TestTrimEvents:
         data = {"events": [{"id": i} for i in range(10)]}
         _trim_events(data, max_events=500)
         assert len(data["events"]) == 10
+
+
+# ── Buffered writer ─────────────────────────────────────
+
+class TestBufferedWriter:
+    def test_log_does_not_rewrite_snapshot(self, tmp_path):
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            log_task_start("manager", "Task")
+            assert not os.path.exists(path)
+            assert get_recent_events(hours=1)[0]["type"] == "task_start"
+
+    def test_flush_appends_journal(self, tmp_path):
+        from src.activity_tracker import flush
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            log_task_start("manager", "Task")
+            log_task_end("manager", "Task")
+            flush()
+        with open(str(tmp_path / "activity_log.jsonl"), encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        assert [r["event"]["type"] for r in records] == ["task_start", "task_end"]
+
+    def test_other_process_sees_flushed_records(self, tmp_path):
+        from src.activity_tracker import _ActivityLog, flush
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            log_task_start("smm", "Post")
+            flush()
+        other = _ActivityLog(path)
+        assert other.status_of("smm")["status"] == "working"
+        assert len(other.snapshot()["events"]) == 1
+
+    def test_own_records_not_replayed_twice(self, tmp_path):
+        from src.activity_tracker import _activity_log, flush
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            log_task_start("smm", "Post")
+            flush()
+            _activity_log()._refresh(force=True)
+            assert len(get_recent_events(hours=1)) == 1
+
+    def test_compaction_writes_legacy_snapshot(self, tmp_path):
+        from src.activity_tracker import _activity_log
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            log_task_start("cpo", "Roadmap")
+            _activity_log().compact()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["events"][0]["type"] == "task_start"
+        assert data["agent_status"]["cpo"]["status"] == "working"
+        assert os.path.getsize(str(tmp_path / "activity_log.jsonl")) == 0
+
+    def test_stale_instance_compaction_keeps_other_records(self, tmp_path):
+        from src.activity_tracker import _ActivityLog
+        path = str(tmp_path / "activity_log.json")
+        first, second = _ActivityLog(path), _ActivityLog(path)
+        first.record(event={"type": "delegation", "timestamp": "t1"})
+        first.flush()
+        second.compact()
+        assert [e["timestamp"] for e in _ActivityLog(path).snapshot()["events"]] == ["t1"]
+
+    def test_snapshot_leaves_no_temp_files(self, tmp_path):
+        from src.activity_tracker import _ActivityLog
+        path = str(tmp_path / "activity_log.json")
+        log = _ActivityLog(path)
+        log.record(event={"type": "delegation", "timestamp": "t1"})
+        log.compact()
+        assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+    def test_concurrent_processes_lose_nothing(self, tmp_path):
+        import multiprocessing
+        from src.activity_tracker import _ActivityLog
+        path = str(tmp_path / "activity_log.json")
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_record_from_process, args=(path, name, 60)) for name in "xyz"]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(30)
+        assert all(p.exitcode == 0 for p in procs)
+        assert len(_ActivityLog(path).snapshot()["events"]) == 3 * 60
+
+    def test_torn_journal_line_skipped(self, tmp_path):
+        from src.activity_tracker import _ActivityLog, flush
+        path = str(tmp_path / "activity_log.json")
+        with open(str(tmp_path / "activity_log.jsonl"), "w", encoding="utf-8") as f:
+            f.write('{"w": "x", "event": {"type": "task_st')
+        with patch("src.activity_tracker._log_path", return_value=path):
+            from src.activity_tracker import log_delegation
+            log_delegation("manager", "accountant", "Budget")
+            flush()
+        events = _ActivityLog(path).snapshot()["events"]
+        assert [e["type"] for e in events] == ["delegation"]
+
+    def test_ring_buffer_bounded(self, tmp_path):
+        from src.activity_tracker import MAX_EVENTS, log_delegation
+        path = str(tmp_path / "activity_log.json")
+        with patch("src.activity_tracker._log_path", return_value=path):
+            for i in range(MAX_EVENTS + 20):
+                log_delegation("manager", "smm", f"Task {i}")
+            events = get_recent_events(hours=1, limit=MAX_EVENTS * 2)
+        assert len(events) == MAX_EVENTS
+        assert events[-1]["description"] == f"Task {MAX_EVENTS + 19}"
+
+
+def _record_from_process(path: str, name: str, count: int):
+    import src.activity_tracker as tracker
+    tracker.COMPACT_EVERY = 7  # compact often to race with the other writers
+    log = tracker._ActivityLog(path)
+    for i in range(count):
+        log.record(event={"type": "delegation", "timestamp": f"{name}{i}"})
+        log.flush()
@@ -1,21 +1,23 @@
 """Tests for Auto-Start — automatic agent execution on task unblock."""
 
 import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+import src.auto_start as auto_start
 from src.event_bus import Event, TASK_UNBLOCKED, TASK_APPROVED, TASK_RETRY, get_event_bus, reset_event_bus
 from src.auto_start import (
     MAX_CONCURRENT_AUTO,
+    MAX_PER_AGENT,
     MAX_RETRIES,
-    _active_auto_tasks,
-    _active_lock,
+    AutoStartExecutor,
     _on_task_unblocked,
     _on_task_approved,
     _on_task_retry,
     _execute_auto_task,
-    _semaphore,
+    cancel_auto_task,
     get_auto_start_status,
     register_auto_start,
     unregister_auto_start,
@@ -24,28 +26,49 @@ from src.auto_start import (
 
 @pytest.fixture(autouse=True)
 def _clean_state():
-    """Reset EventBus and auto-start state before each test."""
+    """Reset EventBus and give each test a fresh executor."""
     reset_event_bus()
-    with _active_lock:
-        _active_auto_tasks.clear()
-    # Reset semaphore to MAX_CONCURRENT_AUTO
-    while _semaphore._value < MAX_CONCURRENT_AUTO:
-        _semaphore.release()
-    while _semaphore._value > MAX_CONCURRENT_AUTO:
-        _semaphore.acquire(blocking=False)
-    yield
+    executor = AutoStartExecutor()
+    with patch.object(auto_start, "_executor", executor):
+        yield executor
+    executor.shutdown(wait=False)
     reset_event_bus()
-    with _active_lock:
-        _active_auto_tasks.clear()
 
 
-def _make_unblocked_event(task_id="t1", assignee="smm", title="Write post"):
-    return Event(TASK_UNBLOCKED, {
+def _make_unblocked_event(task_id="t1", assignee="smm", title="Write post", priority=None):
+    payload = {
         "task_id": task_id,
         "assignee": assignee,
         "title": title,
         "unblocked_by": "t0",
-    })
+    }
+    if priority is not None:
+        payload["priority"] = priority
+    return Event(TASK_UNBLOCKED, payload)
+
+
+class _Runner:
+    """Stand-in for _execute_auto_task: records order, blocks until released."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, task_id, assignee, title):
+        with self._lock:
+            self.started.append(task_id)
+        self.release.wait(5)
+        return True
+
+    def wait_started(self, n, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.started) >= n:
+                    return True
+            time.sleep(0.01)
+        return False
 
 
 # ── Registration ──
@@ -78,60 +101,155 @@ class TestRegistration:
 
 
 class TestOnTaskUnblocked:
-    @patch("src.auto_start.threading.Thread")
-    @patch("src.agent_mutex.is_busy", return_value=False)
-    def test_with_assignee_starts_thread(self, mock_busy, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
+    @patch("src.auto_start._execute_auto_task")
+    def test_with_assignee_queues_and_runs(self, mock_exec, _clean_state):
+        runner = _Runner()
+        mock_exec.side_effect = runner
 
-        event = _make_unblocked_event(task_id="t1", assignee="smm")
-        _on_task_unblocked(event)
+        _on_task_unblocked(_make_unblocked_event(task_id="t1", assignee="smm"))
 
-        mock_thread_cls.assert_called_once()
-        mock_thread.start.assert_called_once()
-        assert "t1" in _active_auto_tasks
+        assert runner.wait_started(1)
+        assert get_auto_start_status()["active_tasks"] == ["t1"]
+        runner.release.set()
 
     def test_without_assignee_skips(self):
-        event = _make_unblocked_event(assignee="")
-        _on_task_unblocked(event)
-        assert len(_active_auto_tasks) == 0
-
-    @patch("src.auto_start.threading.Thread")
-    @patch("src.agent_mutex.is_busy", return_value=False)
-    def test_duplicate_task_id_skips(self, mock_busy, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
-
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-
-        event = _make_unblocked_event(task_id="t1")
-        _on_task_unblocked(event)
-        mock_thread_cls.assert_not_called()
-
-    @patch("src.agent_mutex.is_busy", return_value=True)
-    def test_agent_busy_skips(self, mock_busy):
-        event = _make_unblocked_event(task_id="t1", assignee="smm")
-        _on_task_unblocked(event)
-        assert "t1" not in _active_auto_tasks
-
-    @patch("src.auto_start.threading.Thread")
-    @patch("src.agent_mutex.is_busy", return_value=False)
-    def test_max_concurrent_skips(self, mock_busy, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
-
-        # Exhaust semaphore
-        for _ in range(MAX_CONCURRENT_AUTO):
-            _semaphore.acquire(blocking=False)
-
-        event = _make_unblocked_event(task_id="t99")
-        _on_task_unblocked(event)
-        mock_thread_cls.assert_not_called()
-
-        # Release semaphore back
-        for _ in range(MAX_CONCURRENT_AUTO):
-            _semaphore.release()
+        _on_task_unblocked(_make_unblocked_event(assignee=""))
+        assert get_auto_start_status()["submitted"] == 0
+
+    def test_duplicate_task_id_skips(self, _clean_state):
+        with patch.object(_clean_state, "_ensure_workers"):
+            assert _clean_state.submit("t1", "smm", "Write post")
+            assert not _clean_state.submit("t1", "smm", "Write post")
+        assert get_auto_start_status()["queue_depth"] == 1
+
+    @patch("src.auto_start._execute_auto_task")
+    def test_agent_busy_waits_in_queue(self, mock_exec):
+        runner = _Runner()
+        mock_exec.side_effect = runner
+        with patch("src.agent_mutex.get_busy_agents", return_value=["smm"]), \
+             patch.object(auto_start, "BUSY_RECHECK_SEC", 0.05):
+            _on_task_unblocked(_make_unblocked_event(task_id="t1", assignee="smm"))
+            time.sleep(0.15)
+            assert runner.started == []
+            assert get_auto_start_status()["queue_depth"] == 1
+        assert runner.wait_started(1)
+        runner.release.set()
+
+    @patch("src.auto_start._execute_auto_task")
+    def test_full_pool_queues_instead_of_dropping(self, mock_exec):
+        runner = _Runner()
+        mock_exec.side_effect = runner
+        for i in range(MAX_CONCURRENT_AUTO + 2):
+            _on_task_unblocked(_make_unblocked_event(task_id=f"t{i}", assignee=f"agent{i}"))
+        assert runner.wait_started(MAX_CONCURRENT_AUTO)
+        status = get_auto_start_status()
+        assert status["active_count"] == MAX_CONCURRENT_AUTO
+        assert status["queue_depth"] == 2
+        runner.release.set()
+        assert runner.wait_started(MAX_CONCURRENT_AUTO + 2)
+
+    def test_priority_looked_up_when_missing(self, _clean_state):
+        with patch.object(_clean_state, "_ensure_workers"), \
+             patch("src.task_pool.get_task", return_value=MagicMock(priority=1)):
+            _on_task_unblocked(_make_unblocked_event(task_id="t1"))
+        assert get_auto_start_status()["queued_tasks"][0]["priority"] == 1
+
+
+# ── Executor ──
+
+
+class TestExecutor:
+    def test_priority_order(self):
+        runner = _Runner()
+        executor = AutoStartExecutor(workers=1)
+        with patch.object(auto_start, "_execute_auto_task", side_effect=runner):
+            executor.submit("gate", "a0", "gate")
+            assert runner.wait_started(1)
+            executor.submit("low", "a1", "low", priority=4)
+            executor.submit("medium", "a2", "medium", priority=3)
+            executor.submit("critical", "a3", "critical", priority=1)
+            assert [q["task_id"] for q in executor.status()["queued_tasks"]] == ["critical", "medium", "low"]
+            runner.release.set()
+            assert runner.wait_started(4)
+        assert runner.started == ["gate", "critical", "medium", "low"]
+        executor.shutdown()
+
+    def test_aging_promotes_old_tasks(self):
+        executor = AutoStartExecutor(workers=1)
+        with patch.object(executor, "_ensure_workers"):
+            executor.submit("old_low", "a1", "old", priority=4)
+            executor.submit("new_high", "a2", "new", priority=2)
+        executor._queue[0].enqueued_at -= 3 * auto_start.AGING_SEC
+        assert executor.status()["queued_tasks"][0]["task_id"] == "old_low"
+
+    def test_per_agent_limit(self):
+        runner = _Runner()
+        executor = AutoStartExecutor(workers=3, per_agent=1)
+        with patch.object(auto_start, "_execute_auto_task", side_effect=runner):
+            executor.submit("s1", "smm", "one")
+            executor.submit("s2", "smm", "two")
+            executor.submit("a1", "accountant", "three")
+            assert runner.wait_started(2)
+            time.sleep(0.05)
+            assert sorted(runner.started) == ["a1", "s1"]
+            assert executor.status()["running_by_agent"] == {"smm": 1, "accountant": 1}
+            runner.release.set()
+            assert runner.wait_started(3)
+        executor.shutdown()
+
+    def test_cancel_queued(self, _clean_state):
+        with patch.object(_clean_state, "_ensure_workers"):
+            _clean_state.submit("t1", "smm", "x")
+        assert cancel_auto_task("t1") is True
+        assert cancel_auto_task("t1") is False
+        status = get_auto_start_status()
+        assert status["queue_depth"] == 0 and status["cancelled"] == 1
+
+    def test_shutdown_drops_queue_and_waits_for_running(self):
+        runner = _Runner()
+        executor = AutoStartExecutor(workers=1)
+        with patch.object(auto_start, "_execute_auto_task", side_effect=runner):
+            executor.submit("running", "a1", "x")
+            assert runner.wait_started(1)
+            executor.submit("queued", "a2", "y")
+            threading.Timer(0.1, runner.release.set).start()
+            dropped = executor.shutdown(wait=True, timeout=2)
+        assert dropped == ["queued"]
+        assert runner.started == ["running"]
+        status = executor.status()
+        assert status["completed"] == 1 and status["shutdown"] is True
+        assert executor.submit("late", "a1", "z") is False
+
+    def test_busy_check_error_does_not_kill_worker(self):
+        runner = _Runner()
+        runner.release.set()
+        executor = AutoStartExecutor(workers=1)
+        with patch("src.agent_mutex.get_busy_agents",
+                   side_effect=RuntimeError("dictionary changed size during iteration")), \
+             patch.object(auto_start, "_execute_auto_task", side_effect=runner):
+            executor.submit("t1", "smm", "x")
+            assert runner.wait_started(1)
+            executor.submit("t2", "smm", "y")
+            assert runner.wait_started(2)
+        assert all(t.is_alive() for t in executor._threads)
+        executor.shutdown()
+
+    def test_failed_task_retried_after_release(self):
+        executor = AutoStartExecutor(workers=1)
+        done = threading.Event()
+        seen = []
+
+        def fake_retry(task_id, assignee, title):
+            seen.append(task_id in executor.status()["active_tasks"])
+            done.set()
+
+        with patch.object(auto_start, "_execute_auto_task", return_value=False), \
+             patch.object(auto_start, "_maybe_retry", side_effect=fake_retry):
+            executor.submit("t1", "smm", "x")
+            assert done.wait(2)
+        assert seen == [False]
+        assert executor.status()["failed"] == 1
+        executor.shutdown()
 
 
 # ── Execution ──
@@ -143,10 +261,6 @@ class TestExecuteAutoTask:
         mock_run = MagicMock(return_value="Post written")
         mock_complete = MagicMock()
 
-        _semaphore.acquire(blocking=False)
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-
         with patch.dict("sys.modules", {}):
             import src.auto_start as mod
             with patch.object(mod, "_execute_auto_task", wraps=mod._execute_auto_task):
@@ -163,30 +277,16 @@ class TestExecuteAutoTask:
             use_memory=True,
             task_type="chat",
         )
-        assert "t1" not in _active_auto_tasks
 
     def test_start_fails_skips_execution(self):
-        _semaphore.acquire(blocking=False)
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-
         with patch("src.task_pool.start_task", return_value=None):
             _execute_auto_task("t1", "smm", "Write post")
 
-        assert "t1" not in _active_auto_tasks
-
-    def test_error_releases_semaphore(self):
-        initial_value = _semaphore._value
-        _semaphore.acquire(blocking=False)
-        with _active_lock:
-            _active_auto_tasks.add("t1")
 
+    def test_error_returns_false(self):
         with patch("src.task_pool.start_task", return_value=MagicMock(id="t1")), \
              patch("src.flows.run_task", side_effect=RuntimeError("LLM error")):
-            _execute_auto_task("t1", "smm", "Write post")
-
-        assert "t1" not in _active_auto_tasks
-        assert _semaphore._value == initial_value
+            assert _execute_auto_task("t1", "smm", "Write post") is False
 
 
 # ── Status ──
@@ -199,37 +299,36 @@ class TestAutoStartStatus:
         assert status["active_count"] == 0
         assert status["max_concurrent"] == MAX_CONCURRENT_AUTO
         assert status["available_slots"] == MAX_CONCURRENT_AUTO
-
-    def test_with_active_tasks(self):
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-            _active_auto_tasks.add("t2")
-
+        assert status["max_per_agent"] == MAX_PER_AGENT
+        assert status["queue_depth"] == 0
+        assert status["oldest_wait_sec"] == 0.0
+
+    def test_with_queued_tasks(self, _clean_state):
+        with patch.object(_clean_state, "_ensure_workers"):
+            _clean_state.submit("t1", "smm", "a", priority=4)
+            _clean_state.submit("t2", "cpo", "b", priority=1)
         status = get_auto_start_status()
-        assert status["active_count"] == 2
-        assert status["available_slots"] == MAX_CONCURRENT_AUTO - 2
+        assert status["queue_depth"] == 2
+        assert status["queued_by_priority"] == {4: 1, 1: 1}
+        assert [q["task_id"] for q in status["queued_tasks"]] == ["t2", "t1"]
+        assert status["submitted"] == 2
 
 
 # ── Task Approved ──
 
 
 class TestOnTaskApproved:
-    @patch("src.auto_start.threading.Thread")
-    @patch("src.agent_mutex.is_busy", return_value=False)
-    def test_approved_starts_thread(self, mock_busy, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
-
+    def test_approved_queues_task(self, _clean_state):
         event = Event(TASK_APPROVED, {
             "task_id": "t1",
             "assignee": "smm",
             "title": "Publish LinkedIn post",
+            "priority": 2,
         })
-        _on_task_approved(event)
+        with patch.object(_clean_state, "_ensure_workers"):
+            _on_task_approved(event)
 
-        mock_thread_cls.assert_called_once()
-        mock_thread.start.assert_called_once()
-        assert "t1" in _active_auto_tasks
+        assert get_auto_start_status()["queued_tasks"][0]["task_id"] == "t1"
 
     def test_approved_without_assignee_skips(self):
         event = Event(TASK_APPROVED, {
@@ -238,4 +337,4 @@ class TestOnTaskApproved:
             "title": "Test",
         })
         _on_task_approved(event)
-        assert "t1" not in _active_auto_tasks
+        assert get_auto_start_status()["submitted"] == 0
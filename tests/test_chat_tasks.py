@@ -387,7 +387,7 @@ class TestDelegationMessagesExtracted:
         """activity_tracker.py is NOT where tasks are stored.
         Task queue is in task_extractor.py."""
         from src.activity_tracker import (
-            log_task_start, log_task_end,
+            log_task_start, log_task_end, flush, _load_log,
         )
         tmp = tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False)
         tmp.write('{"events": [], "agent_status": {}}')
@@ -397,9 +397,8 @@ class TestDelegationMessagesExtracted:
             with patch("src.activity_tracker._log_path", return_value=tmp.name):
                 log_task_start("automator", "Мартин, сделай аудит API до пятницы")
                 log_task_end("automator", "Мартин, сделай аудит API до пятницы", success=True)
-
-                with open(tmp.name, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                flush()
+                data = _load_log()
 
                 event_types = {e["type"] for e in data["events"]}
                 assert event_types == {"task_start", "task_end"}
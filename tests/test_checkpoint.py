@@ -5,35 +5,27 @@ from unittest.mock import MagicMock, patch, call
 import pytest
 
 from src.event_bus import Event, TASK_RETRY, TASK_UNBLOCKED, get_event_bus, reset_event_bus
+import src.auto_start as auto_start
 from src.auto_start import (
     MAX_RETRIES,
-    _active_auto_tasks,
-    _active_lock,
+    AutoStartExecutor,
     _execute_auto_task,
     _log_checkpoint,
     _maybe_retry,
     _on_task_retry,
     _set_checkpoint,
-    _semaphore,
-    MAX_CONCURRENT_AUTO,
 )
 
 
 @pytest.fixture(autouse=True)
 def _clean_state():
-    """Reset EventBus and auto-start state before each test."""
+    """Reset EventBus and give each test a fresh auto-start executor."""
     reset_event_bus()
-    with _active_lock:
-        _active_auto_tasks.clear()
-    # Reset semaphore
-    while _semaphore._value < MAX_CONCURRENT_AUTO:
-        _semaphore.release()
-    while _semaphore._value > MAX_CONCURRENT_AUTO:
-        _semaphore.acquire(blocking=False)
-    yield
+    executor = AutoStartExecutor()
+    with patch.object(auto_start, "_executor", executor):
+        yield executor
+    executor.shutdown(wait=False)
     reset_event_bus()
-    with _active_lock:
-        _active_auto_tasks.clear()
 
 
 # ── Checkpoint helpers ──
@@ -76,10 +68,6 @@ class TestExecuteWithCheckpoints:
         mock_run = MagicMock(return_value="Post written")
         mock_complete = MagicMock()
 
-        _semaphore.acquire(blocking=False)
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-
         with patch("src.task_pool.start_task", mock_start), \
              patch("src.flows.run_task", mock_run), \
              patch("src.task_pool.complete_task", mock_complete):
@@ -97,14 +85,10 @@ class TestExecuteWithCheckpoints:
         mock_start = MagicMock(return_value=MagicMock(id="t1"))
         mock_run = MagicMock(side_effect=RuntimeError("LLM timeout"))
 
-        _semaphore.acquire(blocking=False)
-        with _active_lock:
-            _active_auto_tasks.add("t1")
-
         with patch("src.task_pool.start_task", mock_start), \
              patch("src.flows.run_task", mock_run), \
              patch("src.auto_start._maybe_retry"):
-            _execute_auto_task("t1", "smm", "Write post")
+            assert _execute_auto_task("t1", "smm", "Write post") is False
 
         # Should have failed checkpoint
         checkpoint_values = [c[0][1] for c in mock_set_cp.call_args_list]
@@ -162,22 +146,17 @@ class TestMaybeRetry:
 
 
 class TestOnTaskRetry:
-    @patch("src.auto_start.threading.Thread")
-    @patch("src.agent_mutex.is_busy", return_value=False)
-    def test_retry_starts_thread(self, mock_busy, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
-
+    def test_retry_queues_task(self, _clean_state):
         event = Event(TASK_RETRY, {
             "task_id": "t1",
             "assignee": "smm",
             "title": "Write post",
             "retry_count": 1,
         })
-        _on_task_retry(event)
+        with patch.object(_clean_state, "_ensure_workers"):
+            _on_task_retry(event)
 
-        mock_thread_cls.assert_called_once()
-        mock_thread.start.assert_called_once()
+        assert [q["task_id"] for q in _clean_state.status()["queued_tasks"]] == ["t1"]
 
 
 # ── Constants ──
@@ -3,10 +3,20 @@ Tests for Multi-Platform Content Adapter (#30).
 """
 
 import inspect
+import threading
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 
 
+@pytest.fixture(autouse=True)
+def _clear_adapter_cache():
+    from src.tools.content_adapter import clear_adapter_cache
+    clear_adapter_cache()
+    yield
+    clear_adapter_cache()
+
+
 # ── Module structure ──────────────────────────────────────
 
 class TestModuleStructure:
@@ -144,6 +154,156 @@ class TestAdaptForAllPlatforms:
         assert "#test" not in result["telegram"]
 
 
+# ── Concurrency, deadlines, cache ─────────────────────────
+
+def _llm_by_platform(delays: dict, calls: list):
+    """_call_llm_tech stand-in: sleeps per platform (matched by label in the prompt)."""
+    from src.tools.content_adapter import PLATFORM_RULES
+
+    def fake(prompt, system="", max_tokens=0, hedge=False):
+        platform = next(p for p, r in PLATFORM_RULES.items() if f"для {r['label']}" in prompt)
+        calls.append(platform)
+        time.sleep(delays.get(platform, 0))
+        return f"LLM-версия для {platform}."
+    return fake
+
+
+class TestParallelAdaptation:
+    SAMPLE = "Пост про найм. 3 инструмента, 40 минут экономии.\n\n#HR #AI"
+
+    def test_platforms_adapted_concurrently(self):
+        from src.tools.content_adapter import adapt_for_all_platforms
+        calls = []
+        fake = _llm_by_platform({"telegram": 0.3, "threads": 0.3, "facebook": 0.3, "twitter": 0.3}, calls)
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=fake):
+            start = time.monotonic()
+            result = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+            elapsed = time.monotonic() - start
+        assert sorted(calls) == ["facebook", "telegram", "threads", "twitter"]
+        assert elapsed < 0.9  # serial would take ~1.2 s
+        assert result["telegram"] == "LLM-версия для telegram."
+        assert result["linkedin"] == self.SAMPLE
+
+    def test_result_keeps_platform_order(self):
+        from src.tools.content_adapter import PLATFORM_RULES, adapt_for_all_platforms
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, [])):
+            result = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        assert list(result) == list(PLATFORM_RULES)
+
+    def test_deadline_falls_back_to_rules(self):
+        from src.tools import content_adapter as ca
+        text = self.SAMPLE + " (дедлайн)"  # the abandoned call finishes after this test
+        fake = _llm_by_platform({"telegram": 1.0}, [])
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=fake), \
+             patch.dict(ca.ADAPT_DEADLINES_SEC, {"telegram": 0.1}):
+            result = ca.adapt_for_all_platforms(text, "linkedin")
+        assert result["telegram"] == ca._rule_based_adapt(text, "telegram", ca.PLATFORM_RULES["telegram"])
+        assert result["threads"] == "LLM-версия для threads."
+        assert ca.get_adapter_cache_stats()["timeouts"] >= 1
+
+    def test_late_result_is_cached(self):
+        from src.tools import content_adapter as ca
+        text = self.SAMPLE + " (поздний ответ)"
+        calls = []
+        fake = _llm_by_platform({"telegram": 0.3}, calls)
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=fake), \
+             patch.dict(ca.ADAPT_DEADLINES_SEC, {"telegram": 0.05}):
+            ca.adapt_for_all_platforms(text, "linkedin")
+            time.sleep(0.5)
+            calls.clear()
+            result = ca.adapt_for_all_platforms(text, "linkedin")
+        assert calls == []
+        assert result["telegram"] == "LLM-версия для telegram."
+
+    def test_exception_falls_back(self):
+        from src.tools.content_adapter import adapt_for_all_platforms
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=Exception("API error")):
+            result = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        assert "#HR" not in result["telegram"]
+
+    def test_reapproval_hits_cache(self):
+        from src.tools.content_adapter import adapt_for_all_platforms, get_adapter_cache_stats
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            first = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+            assert len(calls) == 4
+            second = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        assert len(calls) == 4
+        assert first == second
+        assert get_adapter_cache_stats()["hits"] == 4
+
+    def test_adapt_content_shares_cache(self):
+        from src.tools.content_adapter import adapt_content, adapt_for_all_platforms
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            adapt_for_all_platforms(self.SAMPLE, "linkedin")
+            calls.clear()
+            assert adapt_content(self.SAMPLE, "threads", "linkedin") == "LLM-версия для threads."
+        assert calls == []
+
+    def test_fallbacks_are_not_cached(self):
+        from src.tools.content_adapter import adapt_for_all_platforms
+        with patch("src.tools.tech_tools._call_llm_tech", return_value=None):
+            adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            result = adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        assert len(calls) == 4
+        assert result["telegram"] == "LLM-версия для telegram."
+
+    def test_text_change_misses_cache(self):
+        from src.tools.content_adapter import adapt_for_all_platforms
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            adapt_for_all_platforms(self.SAMPLE, "linkedin")
+            adapt_for_all_platforms(self.SAMPLE + " Правка.", "linkedin")
+        assert len(calls) == 8
+
+    def test_rules_change_misses_cache(self):
+        from src.tools import content_adapter as ca
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            ca.adapt_for_all_platforms(self.SAMPLE, "linkedin")
+            with patch.dict(ca.PLATFORM_RULES["twitter"], {"max_chars": 250}):
+                ca.adapt_for_all_platforms(self.SAMPLE, "linkedin")
+        assert calls.count("twitter") == 2
+        assert calls.count("telegram") == 1
+
+    def test_adapter_version_bump_misses_cache(self):
+        from src.tools import content_adapter as ca
+        calls = []
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, calls)):
+            ca.adapt_content(self.SAMPLE, "telegram", "linkedin")
+            with patch.object(ca, "ADAPTER_VERSION", ca.ADAPTER_VERSION + 1):
+                ca.adapt_content(self.SAMPLE, "telegram", "linkedin")
+        assert len(calls) == 2
+
+    def test_concurrent_callers_share_inflight_call(self):
+        from src.tools.content_adapter import adapt_for_all_platforms
+        calls = []
+        fake = _llm_by_platform({"telegram": 0.2, "threads": 0.2, "facebook": 0.2, "twitter": 0.2}, calls)
+        with patch("src.tools.tech_tools._call_llm_tech", side_effect=fake):
+            threads = [threading.Thread(target=adapt_for_all_platforms, args=(self.SAMPLE,)) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert len(calls) == 4
+
+    def test_cache_is_bounded(self):
+        from src.tools import content_adapter as ca
+        with patch.object(ca, "CACHE_MAX_ENTRIES", 3), \
+             patch("src.tools.tech_tools._call_llm_tech", side_effect=_llm_by_platform({}, [])):
+            for i in range(5):
+                ca.adapt_content(f"{self.SAMPLE} {i}", "telegram", "linkedin")
+        assert ca.get_adapter_cache_stats()["entries"] == 3
+
+    def test_fallback_twitter_respects_max_chars(self):
+        from src.tools.content_adapter import PLATFORM_RULES, _rule_based_adapt
+        result = _rule_based_adapt("Длинный пост. " * 100, "twitter", PLATFORM_RULES["twitter"])
+        assert len(result) <= PLATFORM_RULES["twitter"]["max_chars"] + 5
+
+
 # ── _truncate_smart ───────────────────────────────────────
 
 class TestTruncateSmart:
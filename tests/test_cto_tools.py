@@ -250,6 +250,79 @@ class TestRunAPIHealthCheck(unittest.TestCase):
                 self.assertGreater(result["total_fail"], 2)
 
 
+class TestConcurrentHealthCheck(unittest.TestCase):
+    """Concurrent sweep: deadline, ordering, latency percentiles."""
+
+    def test_checks_run_concurrently(self):
+        import time
+        from src.tools.tech_tools import _check_apis
+
+        def slow_check(api_key):
+            time.sleep(0.3)
+            return {"ok": True, "configured": True, "ms": 300}
+
+        with patch("src.tools.tech_tools._check_single_api", side_effect=slow_check):
+            start = time.monotonic()
+            results, tally = _check_apis(["a", "b", "c", "d"], max_workers=4)
+            self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(tally.ok, 4)
+        self.assertEqual(list(results), ["a", "b", "c", "d"])
+
+    def test_deadline_marks_pending_as_failed(self):
+        import time
+        from src.tools.tech_tools import _check_apis
+
+        def check(api_key):
+            if api_key == "hang":
+                time.sleep(2)
+            return {"ok": True, "configured": True, "ms": 10}
+
+        with patch("src.tools.tech_tools._check_single_api", side_effect=check):
+            start = time.monotonic()
+            results, tally = _check_apis(["hang", "fast"], deadline=0.3)
+            self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(results["fast"]["ok"])
+        self.assertFalse(results["hang"]["ok"])
+        self.assertIn("No response within", results["hang"]["error"])
+        self.assertEqual(tally.status, "degraded")
+
+    def test_tally_ignores_unconfigured(self):
+        from src.tools.tech_tools import _HealthTally
+        tally = _HealthTally()
+        tally.add({"ok": False, "configured": False})
+        tally.add({"ok": True, "configured": True})
+        self.assertEqual(tally.status, "healthy")
+        self.assertIn("unconfigured", tally.label())
+        for _ in range(3):
+            tally.add({"ok": False, "configured": True})
+        self.assertEqual(tally.status, "critical")
+
+    def test_history_keeps_latency_percentiles(self):
+        from src.tools.tech_tools import run_api_health_check, _load_health_data
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "api_health.json")
+            with patch("src.tools.tech_tools._health_data_path", return_value=path):
+                for ms in (100, 200, 900):
+                    mock_result = {"ok": True, "configured": True, "ms": ms}
+                    with patch("src.tools.tech_tools._check_single_api", return_value=mock_result):
+                        run_api_health_check(categories=["ai"])
+                data = _load_health_data()
+        self.assertEqual(len(data["checks"]), 3)
+        entry = data["checks"][-1]["results"]["openrouter"]
+        self.assertEqual(entry["ms"], 900)
+        self.assertEqual(entry["p50_ms"], 200)
+        self.assertEqual(entry["p95_ms"], 900)
+        self.assertEqual(data["latency"]["openrouter"], [100, 200, 900])
+
+    def test_returns_per_api_results(self):
+        from src.tools.tech_tools import run_api_health_check
+        mock_result = {"ok": False, "configured": True, "ms": 0, "error": "Down", "code": 503}
+        with patch("src.tools.tech_tools._check_single_api", return_value=mock_result):
+            with patch("src.tools.tech_tools._save_health_data"):
+                result = run_api_health_check(categories=["ai"])
+        self.assertEqual(result["results"]["openrouter"]["code"], 503)
+
+
 class TestAgentPromptWriter(unittest.TestCase):
     """Test AgentPromptWriter tool."""
 
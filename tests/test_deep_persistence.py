@@ -168,92 +168,98 @@ class TestDataIntegrity:
 # 3. PostgreSQL mocked scenarios
 # ═══════════════════════════════════════════════════════════════
 
+def _mock_pool(cursor):
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__ = lambda s: cursor
+    conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    return pool
+
+
+@pytest.fixture
+def schema_ready(monkeypatch):
+    from src import chat_storage
+    monkeypatch.setattr(chat_storage, "_schema_ready", True)
+
+
 class TestPostgresMocked:
 
-    def test_save_to_postgres_serializes_json(self):
-        """Verify JSON serialization is passed to execute."""
+    def test_save_to_postgres_serializes_json(self, schema_ready):
+        """Verify each message is passed to its INSERT as JSON."""
         from src.chat_storage import save_to_postgres
         msgs = [{"role": "user", "content": "тест"}]
 
-        mock_conn = MagicMock()
         mock_cur = MagicMock()
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cur
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
-
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
+        mock_cur.fetchone.return_value = (1,)
+        with patch("src.chat_storage._get_pool", return_value=_mock_pool(mock_cur)):
             result = save_to_postgres(msgs)
 
         assert result is True
-        # Check the JSON was passed correctly
-        call_args = mock_cur.execute.call_args_list
-        # Second call is the UPSERT (first is CREATE TABLE)
-        upsert_call = call_args[1]
-        json_str = upsert_call[0][1][0]
-        parsed = json.loads(json_str)
-        assert parsed == msgs
-
-    def test_load_from_postgres_handles_string_data(self):
-        """If PostgreSQL returns string instead of JSONB, it should be parsed."""
-        from src.chat_storage import load_from_postgres
-        expected = [{"role": "user", "content": "test"}]
+        json_str = mock_cur.execute.call_args_list[0][0][1][0]
+        assert json.loads(json_str) == {"role": "user", "content": "тест"}
+        assert "\\u" not in json_str  # ensure_ascii=False
 
-        mock_conn = MagicMock()
+    def test_msg_id_not_stored_in_payload(self, schema_ready):
+        from src.chat_storage import save_to_postgres
         mock_cur = MagicMock()
-        # Return as string (some drivers do this)
-        mock_cur.fetchone.return_value = (json.dumps(expected),)
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cur
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
-
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
-            result = load_from_postgres()
+        mock_cur.fetchone.return_value = (5,)
+        with patch("src.chat_storage._get_pool", return_value=_mock_pool(mock_cur)):
+            save_to_postgres([{"role": "user", "content": "x", "msg_id": 99}])
+        assert "msg_id" not in json.loads(mock_cur.execute.call_args[0][1][0])
 
-        assert result == expected
-
-    def test_load_from_postgres_handles_list_data(self):
-        """If PostgreSQL returns native list (JSONB), use directly."""
+    def test_load_from_postgres_handles_string_data(self, schema_ready):
+        """If PostgreSQL returns string instead of JSONB, it should be parsed."""
         from src.chat_storage import load_from_postgres
-        expected = [{"role": "user", "content": "test"}]
-
-        mock_conn = MagicMock()
         mock_cur = MagicMock()
-        mock_cur.fetchone.return_value = (expected,)
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cur
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
-
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
+        mock_cur.fetchall.return_value = [(3, json.dumps({"role": "user", "content": "test"}))]
+        with patch("src.chat_storage._get_pool", return_value=_mock_pool(mock_cur)):
             result = load_from_postgres()
+        assert result == [{"role": "user", "content": "test", "msg_id": 3}]
 
-        assert result == expected
-
-    def test_load_from_postgres_empty_table_returns_empty_list(self):
-        """If no row exists, return []."""
+    def test_load_from_postgres_pages_before_id(self, schema_ready):
         from src.chat_storage import load_from_postgres
-
-        mock_conn = MagicMock()
         mock_cur = MagicMock()
-        mock_cur.fetchone.return_value = None
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cur
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
-
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
+        mock_cur.fetchall.return_value = []
+        with patch("src.chat_storage._get_pool", return_value=_mock_pool(mock_cur)):
+            load_from_postgres(limit=50, before_id=120)
+        sql, params = mock_cur.execute.call_args[0]
+        assert "id < %s" in sql
+        assert params == (120, 50)
+
+    def test_load_from_postgres_empty_table_returns_empty_list(self, schema_ready):
+        """If no rows exist, return []."""
+        from src.chat_storage import load_from_postgres
+        mock_cur = MagicMock()
+        mock_cur.fetchall.return_value = []
+        with patch("src.chat_storage._get_pool", return_value=_mock_pool(mock_cur)):
             result = load_from_postgres()
-
         assert result == []
 
+    def test_schema_and_legacy_migration_run_once(self, monkeypatch):
+        from src import chat_storage
+        monkeypatch.setattr(chat_storage, "_schema_ready", False)
+        legacy = [{"role": "user", "content": "old"}]
+        mock_cur = MagicMock()
+        # EXISTS(chat_messages) → False, legacy table → True, legacy row, then INSERT ids
+        mock_cur.fetchone.side_effect = [(False,), (True,), (legacy,), (1,), (2,)]
+        pool = _mock_pool(mock_cur)
+        with patch("src.chat_storage._get_pool", return_value=pool):
+            chat_storage.save_to_postgres([{"role": "user", "content": "a"}])
+            chat_storage.save_to_postgres([{"role": "user", "content": "b"}])
+        sqls = [c[0][0] for c in mock_cur.execute.call_args_list]
+        assert sum("CREATE TABLE" in q for q in sqls) == 1
+        assert sum("INSERT" in q for q in sqls) == 3  # 1 migrated + 2 new
+        assert sum("RENAME TO chat_history_legacy" in q for q in sqls) == 1
+
     def test_save_to_postgres_exception_returns_false(self):
         from src.chat_storage import save_to_postgres
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", side_effect=Exception("boom")):
+        with patch("src.chat_storage._get_pool", side_effect=Exception("boom")):
             assert save_to_postgres([]) is False
 
     def test_load_from_postgres_exception_returns_none(self):
         from src.chat_storage import load_from_postgres
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://x"), \
-             patch("src.chat_storage._get_connection", side_effect=Exception("boom")):
+        with patch("src.chat_storage._get_pool", side_effect=Exception("boom")):
             assert load_from_postgres() is None
 
 
@@ -263,35 +269,34 @@ class TestPostgresMocked:
 
 class TestFallbackChain:
 
-    def test_save_pg_success_also_saves_json(self):
-        """When PG succeeds, JSON is also written as local cache."""
+    def test_save_pg_success_skips_local_log(self):
+        """When PG succeeds, nothing is rewritten locally."""
         from src import chat_storage
         msgs = [{"role": "user", "content": "x"}]
         with patch.object(chat_storage, "_get_db_url", return_value="pg://x"), \
              patch.object(chat_storage, "save_to_postgres", return_value=True) as pg, \
-             patch.object(chat_storage, "save_to_json", return_value=True) as js:
+             patch.object(chat_storage, "append_to_log") as log:
             chat_storage.save_chat_history(msgs)
         pg.assert_called_once_with(msgs)
-        js.assert_called_once_with(msgs)
+        log.assert_not_called()
 
-    def test_save_pg_fail_falls_back_to_json(self):
+    def test_save_no_pg_uses_log_only(self):
         from src import chat_storage
         msgs = [{"role": "user", "content": "x"}]
-        with patch.object(chat_storage, "_get_db_url", return_value="pg://x"), \
-             patch.object(chat_storage, "save_to_postgres", return_value=False), \
-             patch.object(chat_storage, "save_to_json", return_value=True) as js:
+        with patch.object(chat_storage, "_get_db_url", return_value=None), \
+             patch.object(chat_storage, "save_to_postgres") as pg, \
+             patch.object(chat_storage, "append_to_log", return_value=True) as log:
             chat_storage.save_chat_history(msgs)
-        js.assert_called_once_with(msgs)
+        pg.assert_not_called()
+        log.assert_called_once()
 
-    def test_save_no_pg_uses_json_only(self):
+    def test_save_nothing_pending_is_noop(self):
         from src import chat_storage
-        msgs = [{"role": "user", "content": "x"}]
-        with patch.object(chat_storage, "_get_db_url", return_value=None), \
-             patch.object(chat_storage, "save_to_postgres") as pg, \
-             patch.object(chat_storage, "save_to_json", return_value=True) as js:
+        msgs = [{"role": "user", "content": "x", "msg_id": 1}]
+        with patch.object(chat_storage, "_get_db_url", return_value="pg://x"), \
+             patch.object(chat_storage, "save_to_postgres") as pg:
             chat_storage.save_chat_history(msgs)
         pg.assert_not_called()
-        js.assert_called_once()
 
     def test_load_pg_success_returns_pg_data(self):
         from src import chat_storage
@@ -300,18 +305,18 @@ class TestFallbackChain:
             result = chat_storage.load_chat_history()
         assert result == [{"x": 1}]
 
-    def test_load_pg_returns_none_falls_to_json(self):
+    def test_load_pg_returns_none_falls_to_log(self):
         from src import chat_storage
         with patch.object(chat_storage, "_get_db_url", return_value="pg://x"), \
              patch.object(chat_storage, "load_from_postgres", return_value=None), \
-             patch.object(chat_storage, "load_from_json", return_value=[{"y": 2}]):
+             patch.object(chat_storage, "load_from_log", return_value=[{"y": 2}]):
             result = chat_storage.load_chat_history()
         assert result == [{"y": 2}]
 
-    def test_load_no_pg_uses_json(self):
+    def test_load_no_pg_uses_log(self):
         from src import chat_storage
         with patch.object(chat_storage, "_get_db_url", return_value=None), \
-             patch.object(chat_storage, "load_from_json", return_value=[{"z": 3}]):
+             patch.object(chat_storage, "load_from_log", return_value=[{"z": 3}]):
             result = chat_storage.load_chat_history()
         assert result == [{"z": 3}]
 
@@ -327,6 +332,84 @@ class TestFallbackChain:
                 assert is_persistent() is False
 
 
+# ═══════════════════════════════════════════════════════════════
+# 4b. Local append-only log + paging
+# ═══════════════════════════════════════════════════════════════
+
+class TestLocalLog:
+
+    @pytest.fixture
+    def local(self, tmp_path):
+        from src import chat_storage
+        log = tmp_path / "chat_messages.jsonl"
+        legacy = tmp_path / "chat_history.json"
+        with patch.object(chat_storage, "_get_db_url", return_value=None), \
+             patch.object(chat_storage, "_log_path", return_value=str(log)), \
+             patch.object(chat_storage, "_chat_path", return_value=str(legacy)):
+            yield chat_storage, log, legacy
+
+    def test_save_appends_only_new_messages(self, local):
+        cs, log, _ = local
+        msgs = [{"role": "user", "content": "a"}]
+        cs.save_chat_history(msgs)
+        msgs.append({"role": "assistant", "content": "b"})
+        cs.save_chat_history(msgs)
+        cs.save_chat_history(msgs)
+        lines = log.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(l)["content"] for l in lines] == ["a", "b"]
+        assert [m["msg_id"] for m in msgs] == [1, 2]
+
+    def test_load_returns_last_window(self, local):
+        cs, _, _ = local
+        cs.save_chat_history([{"role": "user", "content": f"m{i}"} for i in range(30)])
+        result = cs.load_chat_history(limit=5)
+        assert [m["content"] for m in result] == ["m25", "m26", "m27", "m28", "m29"]
+        assert result[0]["msg_id"] == 26
+
+    def test_tail_spans_read_blocks(self, local):
+        cs, _, _ = local
+        big = "x" * 3000
+        cs.save_chat_history([{"role": "user", "content": f"{i}{big}"} for i in range(100)])
+        result = cs.load_chat_history(limit=40)
+        assert len(result) == 40
+        assert result[0]["content"].startswith("60")
+        assert result[-1]["msg_id"] == 100
+
+    def test_older_pages(self, local):
+        cs, _, _ = local
+        cs.save_chat_history([{"role": "user", "content": f"m{i}"} for i in range(10)])
+        window = cs.load_chat_history(limit=3)
+        older = cs.load_older_messages(window[0]["msg_id"], limit=4)
+        assert [m["content"] for m in older] == ["m3", "m4", "m5", "m6"]
+        oldest = cs.load_older_messages(older[0]["msg_id"], limit=4)
+        assert [m["content"] for m in oldest] == ["m0", "m1", "m2"]
+
+    def test_torn_line_skipped(self, local):
+        cs, log, _ = local
+        cs.save_chat_history([{"role": "user", "content": "a"}])
+        with open(log, "a", encoding="utf-8") as f:
+            f.write('{"role": "user", "cont\n')
+        cs.save_chat_history([{"role": "user", "content": "c"}])
+        result = cs.load_chat_history()
+        assert [m["content"] for m in result] == ["a", "c"]
+        assert result[-1]["msg_id"] == 3
+
+    def test_migrates_legacy_snapshot(self, local):
+        cs, log, legacy = local
+        legacy.write_text(json.dumps([{"role": "user", "content": "old"}]), encoding="utf-8")
+        cs.save_chat_history([{"role": "user", "content": "new"}])
+        assert [m["content"] for m in cs.load_chat_history()] == ["old", "new"]
+
+    def test_clear(self, local):
+        cs, _, _ = local
+        cs.save_chat_history([{"role": "user", "content": "a"}])
+        assert cs.clear_chat_history() is True
+        assert cs.load_chat_history() == []
+        fresh = [{"role": "assistant", "content": "hi"}]
+        cs.save_chat_history(fresh)
+        assert fresh[0]["msg_id"] == 1
+
+
 # ═══════════════════════════════════════════════════════════════
 # 5. Thread safety
 # ═══════════════════════════════════════════════════════════════
@@ -563,3 +563,264 @@ class TestPortfolioSummary:
             result = tool._run()
             # Should have warnings about missing data
             assert "⚠️" in result or "WARNING" in result or "PORTFOLIO" in result
+
+    def _fake_tool(self, text, delay=0.0, error=None):
+        import time
+
+        class _Fake:
+            def _run(self, **kwargs):
+                time.sleep(delay)
+                if error:
+                    raise error
+                return text
+        return _Fake()
+
+    def test_sources_fetched_concurrently(self):
+        """Total time is the slowest source, not the sum."""
+        import time
+        from src.tools.financial.portfolio_summary import PortfolioSummaryTool
+        config = {
+            "banks": {"tbank": {"enabled": True}, "tbc": {"enabled": True}},
+            "payments": {"tribute": {"enabled": True}},
+        }
+        fakes = {
+            "TBankBalanceTool": self._fake_tool("T-Bank: 100 RUB", 0.3),
+            "TBCBalanceTool": self._fake_tool("TBC: 50 GEL", 0.3),
+            "TributeRevenueTool": self._fake_tool("Tribute: $10", 0.3),
+        }
+        with patch("src.tools.financial.portfolio_summary.load_financial_config",
+                   return_value=config), \
+             patch("src.tools.financial.portfolio_summary._tool",
+                   side_effect=lambda module, cls: fakes[cls]):
+            t0 = time.monotonic()
+            result = PortfolioSummaryTool()._run()
+            assert time.monotonic() - t0 < 0.8
+        assert result.index("T-Bank") < result.index("TBC") < result.index("Tribute")
+        assert "REVENUE:" in result
+
+    def test_deadline_reports_slow_source(self):
+        from src.tools.financial.portfolio_summary import PortfolioSummaryTool
+        config = {
+            "banks": {"tbank": {"enabled": True}, "tbc": {"enabled": True}},
+            "portfolio": {"deadline_seconds": 0.2},
+        }
+        fakes = {
+            "TBankBalanceTool": self._fake_tool("T-Bank: 100 RUB"),
+            "TBCBalanceTool": self._fake_tool("TBC: 50 GEL", 2.0),
+        }
+        with patch("src.tools.financial.portfolio_summary.load_financial_config",
+                   return_value=config), \
+             patch("src.tools.financial.portfolio_summary._tool",
+                   side_effect=lambda module, cls: fakes[cls]):
+            result = PortfolioSummaryTool()._run()
+        assert "T-Bank: 100 RUB" in result
+        assert "TBC Bank: no response" in result
+
+    def test_iter_sources_streams_and_warns(self):
+        from src.tools.financial.portfolio_summary import PortfolioSummaryTool
+        config = {
+            "banks": {"tbank": {"enabled": True}},
+            "crypto_wallets": {"stacks": {"addresses": ["SP1"]}},
+            "payments": {"stripe": {"enabled": True}},
+        }
+        fakes = {
+            "TBankBalanceTool": self._fake_tool("T-Bank: 100 RUB"),
+            "StacksPortfolioTool": self._fake_tool("Stacks: балансов не найдено"),
+            "StripeRevenueTool": self._fake_tool("", error=RuntimeError("down")),
+        }
+        warnings = []
+        with patch("src.tools.financial.portfolio_summary._tool",
+                   side_effect=lambda module, cls: fakes[cls]):
+            got = list(PortfolioSummaryTool().iter_sources(config, warnings))
+        assert [(s.label, text) for s, text in got] == [("T-Bank", "T-Bank: 100 RUB")]
+        assert warnings == ["Stripe: down"]
+
+
+# ══════════════════════════════════════════════════════════
+# 8. Pooled HTTP Transport Tests
+# ══════════════════════════════════════════════════════════
+
+class TestPooledTransport:
+    def test_token_bucket_burst_then_paces(self):
+        from src.tools.financial.base import _TokenBucket
+        bucket = _TokenBucket(rate_per_sec=10.0, burst=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert 0.05 < bucket.reserve() <= 0.1
+
+    def test_block_for_delays_callers(self):
+        from src.tools.financial.base import _TokenBucket
+        bucket = _TokenBucket(rate_per_sec=100.0, burst=10)
+        bucket.block_for(5)
+        assert bucket.reserve() > 4
+
+    def test_retry_after_parsing(self):
+        import httpx
+        from src.tools.financial.base import MAX_RETRY_AFTER_SEC, _retry_after_seconds
+        assert _retry_after_seconds(httpx.Response(429, headers={"Retry-After": "3"})) == 3
+        assert _retry_after_seconds(httpx.Response(429, headers={"Retry-After": "9999"})) == MAX_RETRY_AFTER_SEC
+        assert _retry_after_seconds(httpx.Response(429)) == 60
+
+    def test_clients_share_pool_and_close_is_harmless(self):
+        from src.tools.financial.base import _transport, pooled_client
+        a = pooled_client("pool-test")
+        b = pooled_client("pool-test")
+        assert a._transport is b._transport is _transport("pool-test")
+        a.close()
+        assert b._transport.inner._pool is not None
+
+    def test_429_pauses_only_that_service(self):
+        import httpx
+        from src.tools.financial.base import _PooledTransport, _ServiceGate
+        limited = _ServiceGate("limited-svc")
+        other = _ServiceGate("other-svc")
+        transport = _PooledTransport(
+            limited, httpx.MockTransport(lambda r: httpx.Response(429, headers={"Retry-After": "30"})),
+        )
+        with httpx.Client(transport=transport) as client:
+            assert client.get("https://example.test/").status_code == 429
+        assert limited.bucket.reserve() > 25
+        assert other.bucket.reserve() == 0
+
+    def test_arequest_uses_async_pool(self):
+        import asyncio
+        import httpx
+        from src.tools.financial.base import _AsyncPooledTransport, _gate
+        from src.tools.financial.coingecko import CryptoPriceTool
+
+        transport = _AsyncPooledTransport(
+            _gate("coingecko"),
+            httpx.MockTransport(lambda r: httpx.Response(200, json={"path": r.url.path})),
+        )
+        os.environ["COINGECKO_API_KEY"] = "test"
+        try:
+            with patch("src.tools.financial.base._async_transport", return_value=transport):
+                data = asyncio.run(CryptoPriceTool()._arequest("get", "/ping"))
+            assert data == {"path": "/api/v3/ping"}
+        finally:
+            del os.environ["COINGECKO_API_KEY"]
+
+
+# ══════════════════════════════════════════════════════════
+# 9. Response Cache Tests
+# ══════════════════════════════════════════════════════════
+
+class TestResponseCache:
+    def _counter(self, value="v"):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return f"{value}{len(calls)}"
+        return fetch, calls
+
+    def test_fresh_hit(self):
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 60})
+        fetch, calls = self._counter()
+        assert cache.get_or_fetch("src", "k", fetch) == "v1"
+        assert cache.get_or_fetch("src", "k", fetch) == "v1"
+        assert len(calls) == 1
+        assert cache.stats()["src"]["hits"] == 1
+        assert cache.stats()["src"]["misses"] == 1
+
+    def test_stale_while_revalidate(self):
+        import time
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 0.05}, stale_seconds=60)
+        fetch, calls = self._counter()
+        cache.get_or_fetch("src", "k", fetch)
+        time.sleep(0.1)
+        assert cache.get_or_fetch("src", "k", fetch) == "v1"  # stale, refresh started
+        for _ in range(50):
+            if len(calls) == 2 and not cache._inflight:
+                break
+            time.sleep(0.01)
+        assert cache.get_or_fetch("src", "k", fetch) == "v2"
+        assert cache.stats()["src"]["stale"] == 1
+
+    def test_expired_refetched_synchronously(self):
+        import time
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 0.01}, stale_seconds=0)
+        fetch, calls = self._counter()
+        cache.get_or_fetch("src", "k", fetch)
+        time.sleep(0.03)
+        assert cache.get_or_fetch("src", "k", fetch) == "v2"
+
+    def test_lru_eviction(self):
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 60}, max_entries=2)
+        cache.get_or_fetch("src", "a", lambda: 1)
+        cache.get_or_fetch("src", "b", lambda: 2)
+        cache.get_or_fetch("src", "a", lambda: 0)  # touch a
+        cache.get_or_fetch("src", "c", lambda: 3)  # evicts b
+        assert cache.get_or_fetch("src", "a", lambda: 0) == 1
+        assert cache.get_or_fetch("src", "b", lambda: 22) == 22
+        assert cache.stats()["src"]["evictions"] >= 1
+
+    def test_concurrent_requests_coalesced(self):
+        import threading
+        import time
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 60})
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return "shared"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_fetch("src", "k", slow_fetch)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == ["shared"] * 5
+        assert len(calls) == 1
+        assert cache.stats()["src"]["coalesced"] == 4
+
+    def test_errors_not_cached(self):
+        from src.tools.financial.cache import ResponseCache
+        cache = ResponseCache(ttls={"src": 60})
+
+        def boom():
+            raise RuntimeError("upstream down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_fetch("src", "k", boom)
+        assert cache.get_or_fetch("src", "k", lambda: "ok") == "ok"
+        assert cache.stats()["src"]["errors"] == 1
+
+    def test_ttls_from_config(self):
+        from src.tools.financial import cache as cache_mod
+        config = {
+            "cache": {"ttl_seconds": {"forex": 120}, "max_entries": 7},
+            "prices": {"cache_ttl_seconds": 30},
+        }
+        with patch.object(cache_mod, "load_financial_config", return_value=config):
+            built = cache_mod._build_cache()
+        assert built.ttl_for("forex") == 120
+        assert built.ttl_for("coingecko") == 30
+        assert built.ttl_for("moralis") == cache_mod.DEFAULT_TTL_SEC["moralis"]
+        assert built.max_entries == 7
+
+    def test_forex_rates_cached(self):
+        from src.tools.financial import forex
+        from src.tools.financial.cache import reset_response_cache
+        reset_response_cache()
+        resp = MagicMock()
+        resp.json.return_value = {"result": "success", "rates": {"RUB": 90.0}}
+        client = MagicMock()
+        client.get.return_value = resp
+        try:
+            with patch("src.tools.financial.forex.pooled_client", return_value=client):
+                assert forex.get_rates("usd")["rates"]["RUB"] == 90.0
+                assert forex.get_rates("USD")["rates"]["RUB"] == 90.0
+            assert client.get.call_count == 1
+        finally:
+            reset_response_cache()
@@ -130,43 +130,57 @@ class TestJsonFallback:
 # 3. PostgreSQL integration (mocked)
 # ──────────────────────────────────────────────────────────
 
+def _mock_pool(cursor):
+    """Pool whose connections hand out `cursor`; schema setup already done."""
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__ = lambda s: cursor
+    conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    return pool, conn
+
+
+@pytest.fixture
+def schema_ready(monkeypatch):
+    from src import chat_storage
+    monkeypatch.setattr(chat_storage, "_schema_ready", True)
+
+
 class TestPostgresIntegration:
-    """Verify PostgreSQL save/load with mocked psycopg2."""
+    """Verify PostgreSQL save/load with a mocked connection pool."""
 
-    def test_save_to_postgres_calls_execute(self):
+    def test_save_to_postgres_inserts_one_row_per_message(self, schema_ready):
         from src.chat_storage import save_to_postgres
-        messages = [{"role": "user", "content": "test"}]
+        messages = [{"role": "user", "content": "a"}, {"role": "user", "content": "b"}]
 
-        mock_conn = MagicMock()
         mock_cursor = MagicMock()
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cursor
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+        mock_cursor.fetchone.side_effect = [(7,), (8,)]
+        pool, conn = _mock_pool(mock_cursor)
 
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://test"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
+        with patch("src.chat_storage._get_pool", return_value=pool):
             result = save_to_postgres(messages)
 
         assert result is True
-        # Should have called execute at least twice (CREATE TABLE + UPSERT)
-        assert mock_cursor.execute.call_count >= 2
-        mock_conn.commit.assert_called()
-        mock_conn.close.assert_called_once()
-
-    def test_load_from_postgres_returns_data(self):
+        # One INSERT per message, no CREATE TABLE on the hot path
+        assert mock_cursor.execute.call_count == 2
+        assert all("INSERT" in c[0][0] for c in mock_cursor.execute.call_args_list)
+        assert [m["msg_id"] for m in messages] == [7, 8]
+        conn.commit.assert_called()
+        pool.putconn.assert_called_once_with(conn, close=False)
+
+    def test_load_from_postgres_returns_data(self, schema_ready):
         from src.chat_storage import load_from_postgres
-        expected = [{"role": "user", "content": "saved"}]
 
-        mock_conn = MagicMock()
         mock_cursor = MagicMock()
-        mock_cursor.fetchone.return_value = (expected,)
-        mock_conn.cursor.return_value.__enter__ = lambda s: mock_cursor
-        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+        mock_cursor.fetchall.return_value = [(2, {"role": "user", "content": "new"}),
+                                             (1, {"role": "user", "content": "old"})]
+        pool, _ = _mock_pool(mock_cursor)
 
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://test"), \
-             patch("src.chat_storage._get_connection", return_value=mock_conn):
+        with patch("src.chat_storage._get_pool", return_value=pool):
             result = load_from_postgres()
 
-        assert result == expected
+        assert [m["content"] for m in result] == ["old", "new"]
+        assert [m["msg_id"] for m in result] == [1, 2]
 
     def test_load_from_postgres_no_url_returns_none(self):
         from src.chat_storage import load_from_postgres
@@ -182,10 +196,23 @@ class TestPostgresIntegration:
 
     def test_save_to_postgres_connection_error_returns_false(self):
         from src.chat_storage import save_to_postgres
-        with patch("src.chat_storage._get_db_url", return_value="postgresql://test"), \
-             patch("src.chat_storage._get_connection", side_effect=Exception("conn failed")):
-            result = save_to_postgres([{"role": "user", "content": "test"}])
+        with patch("src.chat_storage._get_pool", side_effect=Exception("conn failed")):
+            messages = [{"role": "user", "content": "test"}]
+            result = save_to_postgres(messages)
             assert result is False
+            assert "msg_id" not in messages[0]
+
+    def test_failed_connection_not_returned_to_pool(self, schema_ready):
+        from src.chat_storage import save_to_postgres
+        mock_cursor = MagicMock()
+        mock_cursor.execute.side_effect = Exception("server closed the connection")
+        pool, conn = _mock_pool(mock_cursor)
+
+        with patch("src.chat_storage._get_pool", return_value=pool):
+            assert save_to_postgres([{"role": "user", "content": "x"}]) is False
+
+        conn.rollback.assert_called()
+        pool.putconn.assert_called_once_with(conn, close=True)
 
     def test_is_persistent_with_url(self):
         from src.chat_storage import is_persistent
@@ -205,7 +232,7 @@ class TestPostgresIntegration:
 # ──────────────────────────────────────────────────────────
 
 class TestPublicAPIFallback:
-    """Verify save/load_chat_history use PostgreSQL first, then JSON."""
+    """Verify save/load_chat_history use PostgreSQL first, then the local log."""
 
     def test_save_uses_postgres_when_available(self, tmp_path):
         from src import chat_storage
@@ -213,34 +240,122 @@ class TestPublicAPIFallback:
 
         with patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
              patch.object(chat_storage, "save_to_postgres", return_value=True) as mock_pg, \
-             patch.object(chat_storage, "save_to_json", return_value=True) as mock_json:
+             patch.object(chat_storage, "append_to_log", return_value=True) as mock_log:
             chat_storage.save_chat_history(messages)
 
         mock_pg.assert_called_once_with(messages)
-        mock_json.assert_called_once_with(messages)  # also saves to JSON as cache
+        mock_log.assert_not_called()  # no local rewrite on every message
 
-    def test_save_falls_back_to_json_on_postgres_failure(self):
+    def test_save_falls_back_to_log_on_postgres_failure(self, tmp_path):
         from src import chat_storage
         messages = [{"role": "user", "content": "test"}]
 
-        with patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
-             patch.object(chat_storage, "save_to_postgres", return_value=False), \
-             patch.object(chat_storage, "save_to_json", return_value=True) as mock_json:
+        with patch.object(chat_storage, "_log_path", return_value=str(tmp_path / "chat.jsonl")), \
+             patch.object(chat_storage, "_chat_path", return_value=str(tmp_path / "legacy.json")), \
+             patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
+             patch.object(chat_storage, "save_to_postgres", return_value=False):
+            chat_storage.save_chat_history(messages)
+            loaded = chat_storage.load_from_log()
+
+        assert [m["content"] for m in loaded] == ["test"]
+        assert messages[0]["msg_id"] == "log:1"  # saved, not retried from memory
+
+    def test_fallback_messages_synced_on_next_save(self, tmp_path):
+        from src import chat_storage
+        messages = [{"role": "user", "content": "offline"}]
+        stored = []
+
+        def pg_up(msgs):
+            for msg in msgs:
+                stored.append(msg["content"])
+                msg["msg_id"] = 100 + len(stored)
+            return True
+
+        with patch.object(chat_storage, "_log_path", return_value=str(tmp_path / "chat.jsonl")), \
+             patch.object(chat_storage, "_chat_path", return_value=str(tmp_path / "legacy.json")), \
+             patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"):
+            with patch.object(chat_storage, "save_to_postgres", return_value=False):
+                chat_storage.save_chat_history(messages)
+            messages.append({"role": "assistant", "content": "online"})
+            with patch.object(chat_storage, "save_to_postgres", side_effect=pg_up):
+                chat_storage.save_chat_history(messages)
+                messages.append({"role": "user", "content": "again"})
+                chat_storage.save_chat_history(messages)
+
+        assert stored == ["offline", "online", "again"]
+
+    def test_paging_after_sync_uses_postgres_ids(self, tmp_path):
+        from src import chat_storage
+        messages = [{"role": "user", "content": "offline"}]
+
+        stored = []
+
+        def pg_up(msgs):
+            for msg in msgs:
+                stored.append(msg["content"])
+                msg["msg_id"] = 500 + len(stored)
+            return True
+
+        with patch.object(chat_storage, "_log_path", return_value=str(tmp_path / "chat.jsonl")), \
+             patch.object(chat_storage, "_chat_path", return_value=str(tmp_path / "legacy.json")), \
+             patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"):
+            with patch.object(chat_storage, "save_to_postgres", return_value=False):
+                chat_storage.save_chat_history(messages)
+            assert messages[0]["msg_id"] == "log:1"
+            with patch.object(chat_storage, "load_from_postgres") as mock_load:
+                chat_storage.load_older_messages(messages[0]["msg_id"])
+            mock_load.assert_not_called()  # fallback ids page the local log
+
+            messages.append({"role": "assistant", "content": "online"})
+            with patch.object(chat_storage, "save_to_postgres", side_effect=pg_up):
+                chat_storage.save_chat_history(messages)
+            with patch.object(chat_storage, "load_from_postgres", return_value=[]) as mock_load:
+                chat_storage.load_older_messages(messages[0]["msg_id"], limit=10)
+
+        assert stored == ["offline", "online"]
+        assert [m["msg_id"] for m in messages] == [501, 502]
+        mock_load.assert_called_once_with(10, before_id=501)
+
+    def test_fallback_log_not_synced_while_postgres_down(self, tmp_path):
+        from src import chat_storage
+        messages = [{"role": "user", "content": "one"}]
+
+        with patch.object(chat_storage, "_log_path", return_value=str(tmp_path / "chat.jsonl")), \
+             patch.object(chat_storage, "_chat_path", return_value=str(tmp_path / "legacy.json")), \
+             patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
+             patch.object(chat_storage, "save_to_postgres", return_value=False):
             chat_storage.save_chat_history(messages)
+            messages.append({"role": "assistant", "content": "two"})
+            chat_storage.save_chat_history(messages)
+            loaded = chat_storage.load_chat_history()
 
-        mock_json.assert_called_once_with(messages)
+        assert [m["content"] for m in loaded] == ["one", "two"]
 
-    def test_save_uses_json_only_without_database_url(self):
+    def test_save_uses_log_only_without_database_url(self):
         from src import chat_storage
         messages = [{"role": "user", "content": "test"}]
 
         with patch.object(chat_storage, "_get_db_url", return_value=None), \
              patch.object(chat_storage, "save_to_postgres") as mock_pg, \
-             patch.object(chat_storage, "save_to_json", return_value=True) as mock_json:
+             patch.object(chat_storage, "append_to_log", return_value=True) as mock_log:
             chat_storage.save_chat_history(messages)
 
         mock_pg.assert_not_called()
-        mock_json.assert_called_once_with(messages)
+        mock_log.assert_called_once_with(messages)
+
+    def test_save_writes_only_unsaved_tail(self):
+        from src import chat_storage
+        messages = [
+            {"role": "user", "content": "old", "msg_id": 1},
+            {"role": "assistant", "content": "old reply", "msg_id": 2},
+            {"role": "user", "content": "new"},
+        ]
+
+        with patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
+             patch.object(chat_storage, "save_to_postgres", return_value=True) as mock_pg:
+            chat_storage.save_chat_history(messages)
+
+        mock_pg.assert_called_once_with([messages[2]])
 
     def test_load_uses_postgres_when_available(self):
         from src import chat_storage
@@ -252,16 +367,16 @@ class TestPublicAPIFallback:
 
         assert result == expected
 
-    def test_load_falls_back_to_json_on_postgres_failure(self):
+    def test_load_falls_back_to_log_on_postgres_failure(self):
         from src import chat_storage
-        json_data = [{"role": "user", "content": "from_json"}]
+        log_data = [{"role": "user", "content": "from_log"}]
 
         with patch.object(chat_storage, "_get_db_url", return_value="postgresql://test"), \
              patch.object(chat_storage, "load_from_postgres", return_value=None), \
-             patch.object(chat_storage, "load_from_json", return_value=json_data):
+             patch.object(chat_storage, "load_from_log", return_value=log_data):
             result = chat_storage.load_chat_history()
 
-        assert result == json_data
+        assert result == log_data
 
 
 # ──────────────────────────────────────────────────────────
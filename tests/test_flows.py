@@ -5,6 +5,8 @@ Tests for CorporationFlow (#1) — CrewAI Flows migration.
 import os
 import ast
 import inspect
+from unittest.mock import MagicMock
+
 import pytest
 
 
@@ -194,6 +196,143 @@ class TestAgentPool:
         pool = _AgentPool()
         assert pool.all_agents() == []
 
+    def test_agents_created_on_first_use(self, monkeypatch):
+        from src import flows
+        factories = {name: MagicMock(name=name) for name in flows._AGENT_FACTORIES}
+        monkeypatch.setattr(flows, "_AGENT_FACTORIES", factories)
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        pool = flows._AgentPool()
+        assert pool.initialize() is True
+        assert not any(f.called for f in factories.values())
+
+        smm = pool.get("smm")
+        assert pool.get("smm") is smm
+        factories["smm"].assert_called_once()
+        assert [n for n, f in factories.items() if f.called] == ["smm"]
+        assert pool.all_agents() == [smm]
+
+    def test_failed_agent_not_rebuilt(self, monkeypatch):
+        from src import flows
+        factory = MagicMock(side_effect=RuntimeError("bad config"))
+        monkeypatch.setattr(flows, "_AGENT_FACTORIES", {"cpo": factory})
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        pool = flows._AgentPool()
+        pool.initialize()
+        assert pool.get("cpo") is None
+        assert pool.get("cpo") is None
+        factory.assert_called_once()
+
+
+# ── Crew cache ────────────────────────────────────────────
+
+@pytest.fixture
+def crew_cache(monkeypatch):
+    """Fresh crew cache with Crew replaced by a mock class."""
+    from src import flows
+    cache = flows._CrewCache()
+    built = []
+
+    def _crew(**kwargs):
+        crew = MagicMock(name="crew")
+        crew.agents = kwargs["agents"]
+        crew.tasks = kwargs["tasks"]
+        crew.kwargs = kwargs
+        crew.kickoff.side_effect = lambda: f"done: {crew.tasks[0]}"
+        built.append(crew)
+        return crew
+
+    monkeypatch.setattr(flows, "Crew", _crew)
+    monkeypatch.setattr(flows, "_crews", cache)
+    return cache, built
+
+
+class TestCrewCache:
+    def test_crew_reused_with_new_task(self, crew_cache):
+        cache, built = crew_cache
+        agent = MagicMock()
+        assert cache.run(agent, "task 1", "smm", memory=True) == "done: task 1"
+        assert cache.run(agent, "task 2", "smm", memory=True) == "done: task 2"
+        assert len(built) == 1
+        assert built[0].kwargs["memory"] is True
+        stats = cache.snapshot()
+        assert stats["builds"] == 1 and stats["reused"] == 1 and stats["runs"] == 2
+
+    def test_separate_crews_per_agent_and_memory(self, crew_cache):
+        cache, built = crew_cache
+        agent = MagicMock()
+        cache.run(agent, "t", "smm", memory=True)
+        cache.run(agent, "t", "smm", memory=False)
+        cache.run(MagicMock(), "t", "cpo", memory=False)
+        assert len(built) == 3
+        assert built[1].kwargs["memory"] is False
+
+    def test_concurrent_run_gets_throwaway_crew(self, crew_cache):
+        import threading
+        cache, built = crew_cache
+        agent = MagicMock()
+        cache.run(agent, "warm", "smm", memory=False)
+        inside = threading.Event()
+        release = threading.Event()
+
+        def _slow():
+            inside.set()
+            release.wait(2)
+            return "slow"
+
+        built[0].kickoff.side_effect = _slow
+        worker = threading.Thread(target=cache.run, args=(agent, "a", "smm", False))
+        worker.start()
+        assert inside.wait(2)
+        assert cache.run(agent, "b", "smm", memory=False) == "done: b"
+        release.set()
+        worker.join(2)
+        assert len(built) == 2
+        assert cache.snapshot()["cached"] == 1
+
+    def test_kickoff_error_drops_crew(self, crew_cache):
+        cache, built = crew_cache
+        agent = MagicMock()
+        cache.run(agent, "t", "smm", memory=False)
+        built[0].kickoff.side_effect = RuntimeError("LLM down")
+        with pytest.raises(RuntimeError):
+            cache.run(agent, "t", "smm", memory=False)
+        cache.run(agent, "t", "smm", memory=False)
+        assert len(built) == 2
+
+    def test_memory_build_failure_falls_back(self, crew_cache, monkeypatch):
+        from src import flows
+        cache, built = crew_cache
+        real_build = flows._build_crew
+
+        def _build(agent, task, memory):
+            if memory:
+                raise RuntimeError("onnx missing")
+            return real_build(agent, task, memory)
+
+        monkeypatch.setattr(flows, "_build_crew", _build)
+        monkeypatch.setattr(flows, "create_task", lambda **kw: kw["description"])
+        agent = MagicMock()
+        result = flows._execute_crew(agent, "hello", "smm", use_memory=True)
+        assert "восстановлено" in result
+        assert not cache.memory_available("smm")
+        # Next message goes straight to the no-memory crew
+        assert "восстановлено" not in flows._execute_crew(agent, "again", "smm", use_memory=True)
+        assert len(built) == 1
+
+    def test_executor_kept_for_same_crew(self):
+        from types import SimpleNamespace
+        from src.flows import _reset_agent
+        crew = object()
+        executor = SimpleNamespace(crew=crew, messages=["old"], iterations=4)
+        agent = SimpleNamespace(agent_executor=executor, tools_results=["x"])
+        _reset_agent(agent, crew)
+        assert agent.agent_executor is executor
+        assert executor.messages == [] and executor.iterations == 0
+        assert agent.tools_results == []
+
+        _reset_agent(agent, object())
+        assert agent.agent_executor is None
+
 
 # ── _run_agent_crew helper ────────────────────────────────
 
@@ -213,6 +352,112 @@ class TestRunAgentCrew:
         assert "guardrail" in params
 
 
+# ── Fan-out / fan-in ──────────────────────────────────────
+
+def _branch(key):
+    from src.flows import FanOutBranch
+    return FanOutBranch(key=key, activity=f"{key} task", description="d",
+                        expected_output="e", done_message="готово")
+
+
+@pytest.fixture
+def fan_out_env(monkeypatch):
+    """Stub agent pool, activity logging and progress for fan-out tests."""
+    from unittest.mock import MagicMock
+    pool = MagicMock()
+    pool.get.side_effect = lambda key: MagicMock(name=key)
+    progress = []
+    monkeypatch.setattr("src.flows.get_agent_pool", lambda: pool)
+    monkeypatch.setattr("src.flows._send_progress", progress.append)
+    for fn in ("log_task_start", "log_task_end", "log_communication",
+               "log_communication_end"):
+        monkeypatch.setattr(f"src.flows.{fn}", MagicMock())
+    return progress
+
+
+class TestFanOut:
+    def test_branches_run_concurrently(self, fan_out_env, monkeypatch):
+        import time
+        from src.flows import _fan_out
+
+        def _slow(agent, branch):
+            time.sleep(0.3)
+            return f"{branch.key} ok"
+
+        monkeypatch.setattr("src.flows._run_branch", _slow)
+        t0 = time.monotonic()
+        results = _fan_out([_branch("accountant"), _branch("automator"), _branch("smm")])
+        assert time.monotonic() - t0 < 0.8
+        assert [r.output for r in results.values()] == ["accountant ok", "automator ok", "smm ok"]
+
+    def test_failed_branch_degrades(self, fan_out_env, monkeypatch):
+        from src.flows import _fan_out
+
+        def _run(agent, branch):
+            if branch.key == "automator":
+                raise RuntimeError("boom")
+            return "ok"
+
+        monkeypatch.setattr("src.flows._run_branch", _run)
+        results = _fan_out([_branch("accountant"), _branch("automator")])
+        assert results["accountant"].success is True
+        assert results["automator"].success is False
+        assert "boom" in results["automator"].error
+        assert any("⚠️" in m and "boom" in m for m in fan_out_env)
+
+    def test_branch_timeout(self, fan_out_env, monkeypatch):
+        import time
+        from src.flows import _fan_out
+
+        def _run(agent, branch):
+            if branch.key == "smm":
+                time.sleep(2)
+            return "ok"
+
+        monkeypatch.setattr("src.flows._run_branch", _run)
+        t0 = time.monotonic()
+        results = _fan_out([_branch("accountant"), _branch("smm")], timeout=0.2)
+        assert time.monotonic() - t0 < 1.5
+        assert results["accountant"].success is True
+        assert "таймаут" in results["smm"].error
+
+    def test_progress_per_branch(self, fan_out_env, monkeypatch):
+        from src.flows import _fan_out
+        monkeypatch.setattr("src.flows._run_branch", lambda agent, branch: "ok")
+        _fan_out([_branch("accountant"), _branch("automator")])
+        assert sum(m.startswith("✅") for m in fan_out_env) == 2
+
+    def test_fan_in_passes_outputs_to_manager(self, fan_out_env, monkeypatch):
+        from unittest.mock import MagicMock
+        from src.flows import _fan_out_fan_in
+
+        monkeypatch.setattr("src.flows._run_branch",
+                            lambda agent, branch: f"data from {branch.key}")
+        create_task = MagicMock()
+        crew_cls = MagicMock()
+        crew_cls.return_value.kickoff.return_value = "CEO synthesis"
+        monkeypatch.setattr("src.flows.create_task", create_task)
+        monkeypatch.setattr("src.flows.Crew", crew_cls)
+
+        results, synthesis = _fan_out_fan_in(
+            [_branch("accountant"), _branch("automator")],
+            synthesis_prompt="Сделай обзор", synthesis_activity="синтез",
+            expected_output="e",
+        )
+        assert synthesis.success and synthesis.output == "CEO synthesis"
+        description = create_task.call_args.kwargs["description"]
+        assert "data from accountant" in description
+        assert "data from automator" in description
+
+    def test_fallback_returns_branch_outputs(self):
+        from src.flows import AgentResult, _fan_in_fallback
+        branches = [_branch("accountant")]
+        ok = {"accountant": AgentResult(agent_name="accountant", output="цифры")}
+        failed = {"accountant": AgentResult(agent_name="accountant", success=False, error="x")}
+        assert "цифры" in _fan_in_fallback(branches, ok, "❌ err")
+        assert _fan_in_fallback(branches, failed, "❌ err") == "❌ err"
+
+
 # ── Crew.py integration ──────────────────────────────────
 
 class TestCrewIntegration:
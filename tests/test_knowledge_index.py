@@ -0,0 +1,108 @@
+"""Tests for the in-memory knowledge base index (src/knowledge_index.py)."""
+
+import os
+import time
+
+import pytest
+
+from src import knowledge_index
+from src.knowledge_index import KnowledgeIndex, get_index, normalize
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_index, "CHECK_INTERVAL_SEC", 0)
+    (tmp_path / "company.md").write_text(
+        "# Zinin Corporation\n\n"
+        "AI multi-agent system for revenue.\n\n"
+        "Компания развивает продукты для клиентов компании.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "team.md").write_text(
+        "# Team\n\nCEO Alexey, CFO Matthias, CTO Martin.\n\n"
+        "Юки отвечает за контент и публикации.\n",
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+class TestNormalize:
+
+    def test_russian_word_forms_share_stem(self):
+        assert normalize("компания") == normalize("компании") == normalize("компанию")
+        assert normalize("агентов") == normalize("агенты") == normalize("агент")
+
+    def test_yo_folded(self):
+        assert normalize("Ёлка") == normalize("елка")
+
+    def test_english_plural(self):
+        assert normalize("Agents") == normalize("agent")
+        assert normalize("class") == "class"
+
+
+class TestSearch:
+
+    def test_finds_term_with_line_and_snippet(self, kb):
+        hits = KnowledgeIndex(str(kb)).search("Matthias")
+        assert len(hits) == 1
+        assert hits[0].filename == "team.md"
+        assert hits[0].line == 3
+        assert "CFO Matthias" in hits[0].snippet
+
+    def test_russian_inflection_matches(self, kb):
+        hits = KnowledgeIndex(str(kb)).search("компаниями")
+        assert [h.filename for h in hits] == ["company.md"]
+
+    def test_bm25_prefers_more_occurrences(self, kb):
+        (kb / "extra.md").write_text("revenue once\n\nrevenue revenue revenue\n", encoding="utf-8")
+        hits = KnowledgeIndex(str(kb)).search("revenue")
+        assert hits[0].filename == "extra.md"
+        assert hits[0].line == 3
+
+    def test_phrase_requires_adjacent_terms(self, kb):
+        index = KnowledgeIndex(str(kb))
+        assert index.search('"CFO Matthias"')
+        assert index.search('"Matthias CFO"') == []
+
+    def test_prefix_fallback(self, kb):
+        hits = KnowledgeIndex(str(kb)).search("Corp")
+        assert hits and hits[0].filename == "company.md"
+
+    def test_no_match(self, kb):
+        assert KnowledgeIndex(str(kb)).search("xyznonexistent") == []
+
+    def test_long_passage_snippet_is_windowed(self, kb):
+        (kb / "long.md").write_text("filler " * 200 + "needle " + "filler " * 200, encoding="utf-8")
+        hit = KnowledgeIndex(str(kb)).search("needle")[0]
+        assert "needle" in hit.snippet
+        assert hit.snippet.startswith("…") and hit.snippet.endswith("…")
+        assert len(hit.snippet) <= knowledge_index.SNIPPET_CHARS + 20
+
+
+class TestRefresh:
+
+    def test_rebuilds_on_change(self, kb):
+        index = KnowledgeIndex(str(kb))
+        assert index.search("podcast") == []
+        path = kb / "team.md"
+        path.write_text(path.read_text(encoding="utf-8") + "\nNew podcast.\n", encoding="utf-8")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert index.search("podcast")
+
+    def test_removed_file_dropped(self, kb):
+        index = KnowledgeIndex(str(kb))
+        assert index.search("Matthias")
+        (kb / "team.md").unlink()
+        assert index.search("Matthias") == []
+
+    def test_unchanged_files_not_reindexed(self, kb, monkeypatch):
+        index = KnowledgeIndex(str(kb))
+        index.refresh()
+        calls = []
+        monkeypatch.setattr(index, "_build", lambda sig: calls.append(sig))
+        index.search("Zinin")
+        assert calls == []
+
+    def test_shared_instance_per_directory(self, kb):
+        assert get_index(str(kb)) is get_index(str(kb))
+        assert get_index(str(kb)).file_paths == [str(kb / "company.md"), str(kb / "team.md")]
@@ -236,6 +236,58 @@ class TestContextInjection:
         os.unlink(path)
 
 
+    def test_ranks_by_relevance_to_task(self):
+        path = _tmp_store()
+        with patch("src.lessons_learned._store_path", return_value=path):
+            add_lesson("Проверяй баланс кошелька через API", agent="accountant")
+            for i in range(6):
+                add_lesson(f"Unrelated lesson {i}", agent="accountant")
+            ctx = get_lessons_for_context(agent="accountant", task_text="Покажи баланс", limit=2)
+            assert "Проверяй баланс кошелька" in ctx
+            assert ctx.count("•") == 2
+        os.unlink(path)
+
+    def test_useful_count_breaks_ties(self):
+        path = _tmp_store()
+        with patch("src.lessons_learned._store_path", return_value=path):
+            old_id = add_lesson("Old but useful")
+            add_lesson("Newer lesson")
+            for _ in range(5):
+                mark_useful(old_id)
+            ctx = get_lessons_for_context(limit=1)
+            assert "Old but useful" in ctx
+        os.unlink(path)
+
+    def test_context_cache_invalidated_on_write(self):
+        path = _tmp_store()
+        with patch("src.lessons_learned._store_path", return_value=path):
+            add_lesson("First lesson", agent="smm")
+            assert "Second" not in get_lessons_for_context(agent="smm", task_text="пост")
+            add_lesson("Second lesson", agent="smm")
+            assert "Second lesson" in get_lessons_for_context(agent="smm", task_text="пост")
+        os.unlink(path)
+
+    def test_store_parsed_once_between_writes(self):
+        path = _tmp_store()
+        with patch("src.lessons_learned._store_path", return_value=path):
+            add_lesson("Cached lesson", agent="smm")
+            with patch("src.lessons_learned._read_store", side_effect=AssertionError("reparsed")):
+                for _ in range(3):
+                    assert "Cached lesson" in get_lessons_for_context(agent="smm", task_text="x")
+                    get_lessons(agent="smm")
+        os.unlink(path)
+
+    def test_external_file_change_reloaded(self):
+        path = _tmp_store()
+        with patch("src.lessons_learned._store_path", return_value=path):
+            add_lesson("Original lesson")
+            store = LessonsStore(lessons=[Lesson(id="L0100", summary="Written elsewhere lesson")])
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(store.model_dump_json())
+            assert "Written elsewhere lesson" in get_lessons_for_context()
+        os.unlink(path)
+
+
 # ── Stats ─────────────────────────────────────────────────
 
 class TestStats:
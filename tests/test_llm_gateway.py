@@ -0,0 +1,349 @@
+"""Tests for src/llm_gateway.py — pooled LLM client with failover."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src import llm_gateway
+from src.llm_gateway import (
+    LLMGateway,
+    LLMUnavailable,
+    Route,
+    TECH_ROUTES,
+    TEXT_ROUTES,
+    _TokenBudget,
+)
+
+KEYS = {"OPENROUTER_API_KEY": "or-key", "GROQ_API_KEY": "groq-key"}
+
+
+def _ok(text="ok", tokens_in=10, tokens_out=5):
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": text}}],
+        "usage": {"prompt_tokens": tokens_in, "completion_tokens": tokens_out},
+    })
+
+
+class _Server:
+    """MockTransport handler: answers from a per-model queue, records requests."""
+
+    def __init__(self, **responses):
+        self.responses = {model: list(r) for model, r in responses.items()}
+        self.requests: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append({"url": str(request.url), "headers": request.headers, **body})
+        queue = self.responses.get(body["model"]) or [_ok(body["model"])]
+        resp = queue.pop(0) if len(queue) > 1 else queue[0]
+        return resp(request) if callable(resp) else resp
+
+    def models(self):
+        return [r["model"] for r in self.requests]
+
+
+@pytest.fixture
+def gateway():
+    made = []
+
+    def make(server):
+        gw = LLMGateway(transport=httpx.MockTransport(server))
+        made.append(gw)
+        return gw
+
+    with patch.dict(os.environ, KEYS), \
+         patch("src.llm_gateway._record") as record, \
+         patch("src.llm_gateway.BACKOFF_SEC", 0):
+        yield make, record
+    for gw in made:
+        gw.shutdown()
+
+
+class TestFailover:
+
+    def test_first_route_answers(self, gateway):
+        make, _ = gateway
+        server = _Server()
+        resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES)
+        assert resp.provider == "openrouter"
+        assert resp.text == TEXT_ROUTES[0].model
+        assert (resp.tokens_in, resp.tokens_out) == (10, 5)
+        assert server.requests[0]["headers"]["authorization"] == "Bearer or-key"
+
+    def test_server_error_fails_over_to_next_route(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [httpx.Response(502)]})
+        resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES,
+                                      retries=1)
+        assert resp.provider == "groq"
+        assert server.models() == [TEXT_ROUTES[0].model, TEXT_ROUTES[0].model, TEXT_ROUTES[1].model]
+
+    def test_long_retry_after_moves_on_without_waiting(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [httpx.Response(429, headers={"Retry-After": "60"})]})
+        start = time.monotonic()
+        resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES)
+        assert resp.provider == "groq"
+        assert time.monotonic() - start < 2
+        assert server.models().count(TEXT_ROUTES[0].model) == 1
+
+    def test_short_retry_after_is_honoured(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [
+            httpx.Response(429, headers={"Retry-After": "0"}), _ok("second try"),
+        ]})
+        resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES)
+        assert resp.text == "second try"
+
+    def test_error_body_counts_as_failure(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [httpx.Response(200, json={"error": {"message": "busy"}})]})
+        resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES,
+                                      retries=0)
+        assert resp.provider == "groq"
+
+    def test_all_routes_fail(self, gateway):
+        make, _ = gateway
+        server = _Server(**{r.model: [httpx.Response(500)] for r in TEXT_ROUTES})
+        gw = make(server)
+        with pytest.raises(LLMUnavailable, match="HTTP 500"):
+            gw.chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES, retries=0)
+        assert gw.status()["unavailable"] == 1
+
+    def test_routes_without_key_are_skipped(self, gateway):
+        make, _ = gateway
+        server = _Server()
+        with patch.dict(os.environ, {"OPENROUTER_API_KEY": ""}):
+            resp = make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TECH_ROUTES)
+        assert resp.provider == "groq"
+        assert server.models() == ["llama-3.3-70b-versatile"]
+
+    def test_no_keys(self, gateway):
+        make, _ = gateway
+        with patch.dict(os.environ, {}, clear=True):
+            with pytest.raises(LLMUnavailable, match="no LLM provider"):
+                make(_Server()).chat_sync([{"role": "user", "content": "hi"}])
+
+
+class TestRequestShape:
+
+    def test_system_merged_for_routes_without_system_role(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TECH_ROUTES[0].model: [httpx.Response(503)]})
+        make(server).chat_sync(llm_gateway.build_messages("prompt", "sys"),
+                               routes=TECH_ROUTES[:2], retries=0)
+        assert [m["role"] for m in server.requests[0]["messages"]] == ["system", "user"]
+        assert server.requests[1]["messages"] == [{"role": "user", "content": "sys\n\n---\n\nprompt"}]
+
+    def test_extra_fields_headers_and_optional_params(self, gateway):
+        make, _ = gateway
+        server = _Server()
+        make(server).chat_sync([{"role": "user", "content": "draw"}], routes=llm_gateway.IMAGE_ROUTES,
+                               max_tokens=None, temperature=None,
+                               extra={"modalities": ["image", "text"]}, headers={"X-Title": "Bot"})
+        req = server.requests[0]
+        assert req["modalities"] == ["image", "text"]
+        assert "max_tokens" not in req and "temperature" not in req
+        assert req["headers"]["x-title"] == "Bot"
+        assert req["headers"]["http-referer"] == "https://zinin.corp"
+
+
+class TestLimits:
+
+    def test_concurrency_limit_per_provider(self, gateway):
+        make, _ = gateway
+        active, peak = [0], [0]
+
+        async def slow(request):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+            return _ok()
+
+        gw = LLMGateway(transport=httpx.MockTransport(slow))
+        try:
+            with patch.dict(os.environ, {"LLM_CONCURRENCY_GROQ": "2"}):
+                routes = (Route("groq", "llama-3.3-70b-versatile"),)
+                futures = [gw.submit(gw.chat([{"role": "user", "content": "x"}], routes=routes,
+                                             max_tokens=1))
+                           for _ in range(6)]
+                for f in futures:
+                    f.result(timeout=5)
+        finally:
+            gw.shutdown()
+        assert peak[0] == 2
+
+    def test_token_budget_skips_provider(self, gateway):
+        make, _ = gateway
+        server = _Server(**{"llama-3.3-70b-versatile": [_ok(tokens_in=500, tokens_out=400)]})
+        with patch.dict(os.environ, {"LLM_TPM_GROQ": "1000"}):
+            gw = make(server)
+        routes = (Route("groq", "llama-3.3-70b-versatile"), Route("openrouter", "fallback"))
+        first = gw.chat_sync([{"role": "user", "content": "x"}], routes=routes, max_tokens=900)
+        second = gw.chat_sync([{"role": "user", "content": "x"}], routes=routes, max_tokens=900)
+        assert first.provider == "groq"
+        assert second.provider == "openrouter"
+        assert gw.status()["budget_skips"] == 1
+
+    def test_budget_settles_to_reported_usage(self):
+        budget = _TokenBudget(1000)
+        assert budget.try_reserve(900, now=0)
+        budget.settle(900, 15, now=1)
+        assert budget.used(now=2) == 15
+        assert budget.try_reserve(900, now=2)
+        assert budget.used(now=61.5) == 900  # the first reservation expired
+
+    def test_oversized_request_allowed_when_idle(self):
+        assert _TokenBudget(100).try_reserve(500, now=0)
+
+
+class TestMetrics:
+
+    def test_each_attempt_recorded(self, gateway):
+        make, record = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [httpx.Response(500)]})
+        make(server).chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES, retries=0,
+                               agent="smm")
+        failed, ok = [c.args for c in record.call_args_list]
+        assert failed[0].provider == "openrouter" and failed[2:4] == (False, 500)
+        assert ok[0].provider == "groq" and ok[1:4] == ("smm", True, 200)
+        assert ok[5:] == (10, 5)
+
+    def test_records_into_rate_monitor(self, tmp_path):
+        server = _Server()
+        gw = LLMGateway(transport=httpx.MockTransport(server))
+        try:
+            with patch.dict(os.environ, KEYS), \
+                 patch("src.rate_monitor._store_path", return_value=str(tmp_path / "rm.json")):
+                from src.rate_monitor import get_provider_usage
+                gw.chat_sync([{"role": "user", "content": "hi"}], routes=TEXT_ROUTES)
+                usage = get_provider_usage("openrouter")
+        finally:
+            gw.shutdown()
+        assert usage["total_calls"] == 1
+        assert (usage["tokens_in"], usage["tokens_out"]) == (10, 5)
+
+
+class TestApi:
+
+    def test_pool_shared_between_threads_and_loops(self, gateway):
+        make, _ = gateway
+        gw = make(_Server())
+        results = []
+
+        def worker():
+            results.append(gw.chat_sync([{"role": "user", "content": "hi"}]).text)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client = gw._client
+
+        async def from_other_loop():
+            return await gw.chat([{"role": "user", "content": "hi"}])
+
+        assert asyncio.run(from_other_loop()).provider == "openrouter"
+        assert len(results) == 4
+        assert gw._client is client
+
+    def test_complete_sync_returns_none_when_unavailable(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert llm_gateway.complete_sync("hi") is None
+
+    def test_restart_after_shutdown(self, gateway):
+        make, _ = gateway
+        gw = make(_Server())
+        gw.chat_sync([{"role": "user", "content": "hi"}])
+        gw.shutdown()
+        assert gw.chat_sync([{"role": "user", "content": "hi"}]).text
+
+
+class TestHedging:
+
+    @pytest.fixture
+    def slow_gateway(self, gateway):
+        make, _ = gateway
+        delays = {}
+        seen = []
+
+        async def handler(request):
+            model = json.loads(request.content)["model"]
+            seen.append(model)
+            await asyncio.sleep(delays.get(model, 0))
+            return _ok(model)
+
+        with patch("src.llm_gateway.HEDGE_DEFAULT_DELAY_SEC", 0.05), \
+             patch("src.llm_gateway.HEDGE_MIN_DELAY_SEC", 0.01):
+            yield make(handler), delays, seen
+
+    def test_slow_primary_is_hedged_to_next_provider(self, slow_gateway):
+        gw, delays, seen = slow_gateway
+        delays[TECH_ROUTES[0].model] = 2.0
+        start = time.monotonic()
+        resp = gw.chat_sync([{"role": "user", "content": "x"}], routes=TECH_ROUTES, hedge=True)
+        assert resp.provider == "groq"
+        assert time.monotonic() - start < 1.0
+        assert seen == [TECH_ROUTES[0].model, "llama-3.3-70b-versatile"]  # Gemma skipped
+        status = gw.status()
+        assert (status["hedges"], status["hedge_wins"]) == (1, 1)
+        assert status["providers"]["openrouter"]["inflight"] == 0  # loser cancelled
+
+    def test_fast_primary_not_hedged(self, slow_gateway):
+        gw, _, seen = slow_gateway
+        resp = gw.chat_sync([{"role": "user", "content": "x"}], routes=TEXT_ROUTES, hedge=True)
+        assert resp.provider == "openrouter"
+        assert seen == [TEXT_ROUTES[0].model]
+        assert gw.status()["hedges"] == 0
+
+    def test_hedge_not_used_without_opt_in(self, slow_gateway):
+        gw, delays, seen = slow_gateway
+        delays[TEXT_ROUTES[0].model] = 0.3
+        assert gw.chat_sync([{"role": "user", "content": "x"}], routes=TEXT_ROUTES).provider == "openrouter"
+        assert seen == [TEXT_ROUTES[0].model]
+
+    def test_duplicate_budget_caps_hedges(self, slow_gateway):
+        gw, delays, _ = slow_gateway
+        delays[TEXT_ROUTES[0].model] = 0.2
+        gw._hedges.ratio = 0
+        with patch("src.llm_gateway.HEDGE_BURST", 1):
+            providers = [gw.chat_sync([{"role": "user", "content": "x"}], routes=TEXT_ROUTES,
+                                      hedge=True).provider for _ in range(3)]
+        assert providers == ["groq", "openrouter", "openrouter"]
+        assert gw.status()["hedges"] == 1
+
+    def test_primary_failure_falls_back_to_failover(self, gateway):
+        make, _ = gateway
+        server = _Server(**{TEXT_ROUTES[0].model: [httpx.Response(500)]})
+        resp = make(server).chat_sync([{"role": "user", "content": "x"}], routes=TEXT_ROUTES,
+                                      retries=0, hedge=True)
+        assert resp.provider == "groq"
+
+    def test_delay_learned_from_recent_latency(self, gateway):
+        make, _ = gateway
+        gw = make(_Server())
+        route = TEXT_ROUTES[0]
+        assert gw._hedge_delay(route, None) == llm_gateway.HEDGE_DEFAULT_DELAY_SEC
+        gw._latency[(route.provider, route.model)] = [1000] * 9 + [20000]
+        assert gw._hedge_delay(route, None) == 20.0
+        gw._latency[(route.provider, route.model)] = [1000] * 18 + [20000] * 2
+        assert gw._hedge_delay(route, None) == 20.0
+        gw._latency[(route.provider, route.model)] = [1000] * 19 + [20000]
+        assert gw._hedge_delay(route, None) == 1.0
+        assert gw._hedge_delay(route, 0.6) == 0.6
+
+    def test_hedge_budget_ratio(self):
+        budget = llm_gateway._HedgeBudget(0.1)
+        for _ in range(10):
+            budget.note_call(now=0)
+        spent = sum(budget.try_spend(now=0) for _ in range(10))
+        assert spent == llm_gateway.HEDGE_BURST + 1
+        assert budget.try_spend(now=llm_gateway.HEDGE_WINDOW_SEC)
@@ -4,6 +4,7 @@ Tests for LLM-as-Judge (#7) — Quality scoring for agent responses.
 
 import json
 import inspect
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 from pydantic import BaseModel
@@ -280,21 +281,203 @@ class TestActivityTrackerIntegration:
 
     def test_log_quality_score_writes_event(self, tmp_path):
         """log_quality_score should add quality_score event to log."""
-        import json
         from unittest.mock import patch as p
         log_file = tmp_path / "activity_log.json"
         log_file.write_text('{"events": [], "agent_status": {}}')
 
         with p("src.activity_tracker._log_path", return_value=str(log_file)):
-            from src.activity_tracker import log_quality_score
+            from src.activity_tracker import log_quality_score, flush, _load_log
             log_quality_score("accountant", "финансовый отчёт", 4.2, {
                 "relevance": 4, "accuracy": 5,
             })
+            flush()
+            data = _load_log()
 
-        data = json.loads(log_file.read_text())
         events = data["events"]
         assert len(events) == 1
         assert events[0]["type"] == "quality_score"
         assert events[0]["agent"] == "accountant"
         assert events[0]["score"] == 4.2
         assert events[0]["details"]["accuracy"] == 5
+
+
+# ── Rule-based pre-filter ─────────────────────────────────
+
+CLEAN_REPORT = (
+    "Выручка за январь: 1 250 000 ₽ (+12% к декабрю). Расходы: 830 000 ₽, из них "
+    "маркетинг 310 000 ₽. Подписчики Крипто Маркетологов: 412 (+37). MRR вырос до $4 120. "
+    "Рекомендация: перенести 50 000 ₽ из маркетинга в удержание — отток 6% выше нормы."
+)
+
+
+class TestPrefilter:
+    def test_clean_response_has_no_flags(self):
+        from src.tools.llm_judge import prefilter_flags
+        assert prefilter_flags(CLEAN_REPORT) == []
+
+    @pytest.mark.parametrize("text,flag", [
+        ("❌ Ошибка выполнения: timeout " + CLEAN_REPORT, "error"),
+        ("Я — Маттиас Бруннер, CFO. " + CLEAN_REPORT, "self_intro"),
+        (CLEAN_REPORT + " Я подготовлю подробный отчёт завтра.", "promise"),
+        (CLEAN_REPORT + " Итого: [указать сумму].", "placeholder"),
+        ("Всё хорошо.", "too_short"),
+        ("Выручка выросла, расходы снизились. " * 8, "no_data"),
+    ])
+    def test_red_flags(self, text, flag):
+        from src.tools.llm_judge import prefilter_flags
+        assert flag in prefilter_flags(text)
+
+
+# ── Batch judging ─────────────────────────────────────────
+
+def _scores(i, score):
+    return {"id": i, "relevance": score, "completeness": score, "accuracy": score,
+            "format_score": score, "feedback": f"#{i}"}
+
+
+class TestJudgeBatch:
+    @patch("src.tools.tech_tools._call_llm_tech")
+    def test_one_call_for_many_responses(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        mock_llm.return_value = json.dumps([_scores(1, 5), _scores(2, 2)])
+        results = judge_batch([("t1", "A" * 100, "manager"), ("t2", "B" * 100, "smm")])
+        assert mock_llm.call_count == 1
+        prompt = mock_llm.call_args[0][0]
+        assert "RESPONSE 1" in prompt and "RESPONSE 2" in prompt and "(smm)" in prompt
+        assert [r.overall for r in results] == [5.0, 2.0]
+        assert results[1].feedback == "#2" and results[1].passed is False
+
+    @patch("src.tools.tech_tools._call_llm_tech")
+    def test_short_responses_skip_the_llm(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        mock_llm.return_value = json.dumps([_scores(1, 4)])
+        results = judge_batch([("t", "ok", "manager"), ("t", "A" * 100, "manager")])
+        assert results[0].overall == 1.0
+        assert results[1].overall == 4.0
+        assert "RESPONSE 2" not in mock_llm.call_args[0][0]
+
+    @patch("src.tools.tech_tools._call_llm_tech")
+    def test_ids_map_out_of_order_and_missing(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        mock_llm.return_value = "```json\n" + json.dumps([_scores(3, 4), _scores(1, 2)]) + "\n```"
+        results = judge_batch([("t", "A" * 100, "a")] * 3)
+        assert results[0].overall == 2.0
+        assert results[1] is None
+        assert results[2].overall == 4.0
+
+    @patch("src.tools.tech_tools._call_llm_tech")
+    def test_malformed_array_falls_back_to_objects(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        mock_llm.return_value = json.dumps(_scores(1, 4)) + ",\n" + json.dumps(_scores(2, 3)) + ", ...]"
+        results = judge_batch([("t", "A" * 100, "a")] * 2)
+        assert [r.overall for r in results] == [4.0, 3.0]
+
+    @patch("src.tools.tech_tools._call_llm_tech")
+    def test_string_and_bad_scores_keep_the_batch(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        as_strings = {k: str(v) if k != "id" else v for k, v in _scores(1, 4).items()}
+        bad = {**_scores(2, 4), "relevance": None, "accuracy": [5]}
+        mock_llm.return_value = json.dumps([as_strings, bad, _scores(3, 2)])
+        results = judge_batch([("t", "A" * 100, "a")] * 3)
+        assert results[0].overall == 4.0 and results[0].relevance == 4
+        assert results[1].relevance == 3 and results[1].accuracy == 3
+        assert results[2].overall == 2.0
+
+    @patch("src.tools.tech_tools._call_llm_tech", side_effect=Exception("API down"))
+    def test_llm_failure_returns_none(self, mock_llm):
+        from src.tools.llm_judge import judge_batch
+        assert judge_batch([("t", "A" * 100, "a")]) == [None]
+
+
+class TestJudgeQueue:
+    def _queue(self, handled, batch_size=5):
+        from src.tools.llm_judge import JudgeQueue
+        queue = JudgeQueue(lambda item, verdict: handled.append((item, verdict)), batch_size)
+        queue.BATCH_WAIT_SEC = 5.0
+        return queue
+
+    def test_submit_does_not_wait_and_batches(self):
+        from src.tools.llm_judge import JudgeResult
+        handled = []
+        queue = self._queue(handled)
+        with patch("src.tools.llm_judge.judge_batch",
+                   side_effect=lambda items: [JudgeResult(overall=4.0)] * len(items)) as mock_batch:
+            start = time.monotonic()
+            for i in range(3):
+                queue.submit(f"task {i}", "A" * 100, "manager", short_desc=f"d{i}")
+            assert time.monotonic() - start < 0.5
+            assert queue.flush(timeout=5)
+        assert mock_batch.call_count == 1
+        assert len(mock_batch.call_args[0][0]) == 3
+        assert [item["short_desc"] for item, _ in handled] == ["d0", "d1", "d2"]
+        assert queue.stats()["scored"] == 3 and queue.stats()["pending"] == 0
+
+    def test_full_batch_does_not_wait(self):
+        from src.tools.llm_judge import JudgeResult
+        handled = []
+        queue = self._queue(handled, batch_size=2)
+        with patch("src.tools.llm_judge.judge_batch",
+                   side_effect=lambda items: [JudgeResult()] * len(items)) as mock_batch:
+            queue.submit("t", "A" * 100, "a")
+            queue.submit("t", "B" * 100, "a")
+            for _ in range(50):
+                if len(handled) == 2:
+                    break
+                time.sleep(0.05)
+        assert len(handled) == 2
+        assert mock_batch.call_count == 1
+
+    def test_primed_verdict_reused(self):
+        from src.tools.llm_judge import JudgeResult
+        handled = []
+        queue = self._queue(handled)
+        verdict = JudgeResult(overall=2.0, passed=False)
+        queue.prime("A" * 100, verdict)
+        with patch("src.tools.llm_judge.judge_batch") as mock_batch:
+            queue.submit("t", "A" * 100, "a")
+            assert queue.flush(timeout=5)
+        mock_batch.assert_not_called()
+        assert handled[0][1] is verdict
+        assert queue.stats()["reused"] == 1
+
+    def test_unscored_items_skip_handler(self):
+        handled = []
+        queue = self._queue(handled)
+        with patch("src.tools.llm_judge.judge_batch", return_value=[None]):
+            queue.submit("t", "A" * 100, "a")
+            assert queue.flush(timeout=5)
+        assert handled == []
+        assert queue.stats()["unscored"] == 1
+
+    def test_handler_errors_are_contained(self):
+        from src.tools.llm_judge import JudgeQueue, JudgeResult
+        queue = JudgeQueue(MagicMock(side_effect=RuntimeError("boom")))
+        with patch("src.tools.llm_judge.judge_batch", return_value=[JudgeResult()]):
+            queue.submit("t", "A" * 100, "a")
+            assert queue.flush(timeout=5)
+        assert queue._thread.is_alive()
+
+
+class TestJudgeAndLogQueue:
+    def test_judge_and_log_does_not_call_llm_inline(self):
+        from src import flows
+        from src.tools.llm_judge import JudgeQueue, JudgeResult
+        queue = JudgeQueue(flows._log_verdict)
+        with patch("src.flows._judge_queue", queue), \
+             patch("src.tools.llm_judge.judge_batch",
+                   return_value=[JudgeResult(overall=4.5)]) as mock_batch, \
+             patch("src.flows.log_quality_score") as mock_log:
+            flows._judge_and_log("accountant", "отчёт", "сделай отчёт", "A" * 100)
+            mock_batch.assert_not_called()
+            assert queue.flush(timeout=5)
+        mock_log.assert_called_once()
+        assert mock_log.call_args[0][:3] == ("accountant", "отчёт", 4.5)
+
+    def test_low_score_creates_lesson(self):
+        from src import flows
+        from src.tools.llm_judge import JudgeResult
+        verdict = JudgeResult(relevance=1, completeness=1, accuracy=1, format_score=1,
+                              overall=1.0, feedback="выдумано", passed=False)
+        with patch("src.flows.log_quality_score"), patch("src.flows.add_lesson") as mock_lesson:
+            flows._log_verdict({"agent_name": "smm", "short_desc": "пост"}, verdict)
+        assert mock_lesson.call_args.kwargs["detail"] == "выдумано"
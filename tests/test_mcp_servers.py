@@ -403,6 +403,11 @@ class TestKBMCPServer:
         result = kb_search("zinin")
         assert "company.md" in result
 
+    def test_kb_search_phrase(self):
+        from src.mcp_servers.kb_server import kb_search
+        assert "team.md" in kb_search('"CFO Matthias"')
+        assert "No matches" in kb_search('"Matthias CFO"')
+
     def test_kb_list_topics(self):
         from src.mcp_servers.kb_server import kb_list_topics
         result = kb_list_topics()
@@ -1,11 +1,11 @@
 """Tests for the real-time monitoring dashboard."""
 
+import asyncio
 import sys
 import os
 import json
 import pytest
 from unittest.mock import patch, MagicMock
-from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -169,29 +169,143 @@ class TestBuildSnapshot:
             assert snapshot["task_pool"] == {}
 
 
-class TestHashSnapshot:
-    """Test the snapshot hash function."""
+class TestJsonPatch:
+    """Test the snapshot delta helpers."""
 
-    def test_same_data_same_hash(self):
-        from src.monitor.server import _hash_snapshot
+    def test_same_data_no_ops(self):
+        from src.monitor.snapshot_hub import json_diff
 
         data = {"agents": {"a": 1}, "events": []}
-        assert _hash_snapshot(data) == _hash_snapshot(data)
-
-    def test_different_data_different_hash(self):
-        from src.monitor.server import _hash_snapshot
-
-        d1 = {"agents": {"a": 1}}
-        d2 = {"agents": {"a": 2}}
-        assert _hash_snapshot(d1) != _hash_snapshot(d2)
-
-    def test_handles_datetime(self):
-        from src.monitor.server import _hash_snapshot
-
-        data = {"ts": datetime(2026, 1, 1)}
-        result = _hash_snapshot(data)
-        assert isinstance(result, str)
-        assert len(result) == 32  # MD5 hex length
+        assert json_diff(data, json.loads(json.dumps(data))) == []
+
+    def test_nested_change_is_one_replace(self):
+        from src.monitor.snapshot_hub import json_diff
+
+        ops = json_diff({"agents": {"a": {"status": "idle"}}},
+                        {"agents": {"a": {"status": "working"}}})
+        assert ops == [{"op": "replace", "path": "/agents/a/status", "value": "working"}]
+
+    def test_add_remove_and_escaping(self):
+        from src.monitor.snapshot_hub import json_diff
+
+        ops = json_diff({"x/y": 1, "gone": 2}, {"x/y": 1, "a~b": 3})
+        assert {"op": "remove", "path": "/gone"} in ops
+        assert {"op": "add", "path": "/a~0b", "value": 3} in ops
+
+    def test_roundtrip(self):
+        from src.monitor.snapshot_hub import apply_patch, json_diff
+
+        old = {"agents": {"a": {"s": 1}, "b": {"s": 2}}, "events": [1, 2], "q": {"avg": 0.5}}
+        new = {"agents": {"a": {"s": 3}}, "events": [0, 1, 2], "q": {"avg": 0.5, "n": 4}}
+        assert apply_patch(json.loads(json.dumps(old)), json_diff(old, new)) == new
+
+    def test_timestamp_only_change_is_empty(self):
+        from src.monitor.snapshot_hub import snapshot_patch
+
+        assert snapshot_patch({"timestamp": "1", "a": 1}, {"timestamp": "2", "a": 1}) == []
+        ops = snapshot_patch({"timestamp": "1", "a": 1}, {"timestamp": "2", "a": 2})
+        assert ops[-1] == {"op": "replace", "path": "/timestamp", "value": "2"}
+
+
+class TestSnapshotHub:
+    """Test the shared SSE snapshot producer."""
+
+    @pytest.fixture(autouse=True)
+    def bus(self):
+        from src.event_bus import get_event_bus, reset_event_bus
+        reset_event_bus()
+        yield get_event_bus()
+        reset_event_bus()
+
+    def test_one_build_for_many_clients(self):
+        from src.monitor.snapshot_hub import SnapshotHub
+
+        async def scenario():
+            hub = SnapshotHub(lambda: {"a": 1}, interval=60)
+            queues = await asyncio.gather(*(hub.subscribe() for _ in range(20)))
+            firsts = [q.get_nowait() for q in queues]
+            for q in queues:
+                hub.unsubscribe(q)
+            return hub, firsts
+
+        hub, firsts = asyncio.run(scenario())
+        assert hub.builds == 1
+        assert all(f == ("update", '{"a": 1}') for f in firsts)
+
+    def test_event_bus_wakes_producer_with_patch(self, bus):
+        from src.event_bus import TASK_COMPLETED
+        from src.monitor.snapshot_hub import SnapshotHub
+
+        state = {"done": 0}
+
+        async def scenario():
+            hub = SnapshotHub(lambda: dict(state), interval=60, debounce=0)
+            q1, q2 = await hub.subscribe(), await hub.subscribe()
+            q1.get_nowait(), q2.get_nowait()
+            state["done"] = 1
+            bus.emit(TASK_COMPLETED, {"task_id": "t1"})
+            got = await asyncio.wait_for(q1.get(), 2), await asyncio.wait_for(q2.get(), 2)
+            hub.unsubscribe(q1)
+            hub.unsubscribe(q2)
+            return got
+
+        for event, data in asyncio.run(scenario()):
+            assert event == "patch"
+            assert json.loads(data) == [{"op": "replace", "path": "/done", "value": 1}]
+
+    def test_unchanged_snapshot_sends_nothing(self):
+        from src.monitor.snapshot_hub import SnapshotHub
+
+        async def scenario():
+            hub = SnapshotHub(lambda: {"a": 1}, interval=0.01)
+            q = await hub.subscribe()
+            q.get_nowait()
+            await asyncio.sleep(0.1)
+            hub.unsubscribe(q)
+            return hub, q
+
+        hub, q = asyncio.run(scenario())
+        assert hub.builds > 1
+        assert q.empty()
+
+    def test_slow_client_gets_full_resync(self):
+        from src.monitor import snapshot_hub
+        from src.monitor.snapshot_hub import SnapshotHub
+
+        counter = iter(range(1000))
+
+        async def scenario():
+            hub = SnapshotHub(lambda: {"n": next(counter)}, interval=60)
+            q = await hub.subscribe()
+            for _ in range(snapshot_hub.CLIENT_QUEUE_SIZE + 1):
+                await hub._refresh()
+            items = [q.get_nowait() for _ in range(q.qsize())]
+            hub.unsubscribe(q)
+            return items
+
+        items = asyncio.run(scenario())
+        # Backlog was replaced by one full snapshot; later deltas follow it
+        assert items[0][0] == "update"
+        assert all(event == "patch" for event, _ in items[1:])
+        doc = json.loads(items[0][1])
+        for _, data in items[1:]:
+            doc = snapshot_hub.apply_patch(doc, json.loads(data))
+        assert doc == {"n": snapshot_hub.CLIENT_QUEUE_SIZE + 1}
+
+    def test_last_unsubscribe_stops_and_detaches(self, bus):
+        from src.monitor.snapshot_hub import SnapshotHub
+
+        async def scenario():
+            hub = SnapshotHub(lambda: {}, interval=60)
+            q = await hub.subscribe()
+            subscribed = bus.subscriber_count()
+            hub.unsubscribe(q)
+            return hub, subscribed
+
+        hub, subscribed = asyncio.run(scenario())
+        assert subscribed > 0
+        assert bus.subscriber_count() == 0
+        assert hub.latest() is None
 
 
 class TestCreateApp:
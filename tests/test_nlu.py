@@ -254,3 +254,31 @@ class TestIntentMapCoverage:
     def test_intent_map_commands_start_with_slash(self):
         for cmd in INTENT_MAP:
             assert cmd.startswith("/"), f"{cmd} doesn't start with /"
+
+
+# ──────────────────────────────────────────────────────────
+# Compiled matcher
+# ──────────────────────────────────────────────────────────
+
+class TestCompiledMatcher:
+    def test_earlier_command_wins_tie(self):
+        # "финансы" is only a /balance phrase; equal-length ties keep map order
+        result = detect_intent("финансы")
+        assert result.command == "/balance"
+        assert result.confidence == 1.0
+
+    def test_tag_fallback_matches_auto_tag(self):
+        from src.task_pool import auto_tag
+        from src.telegram_ceo.nlu import _candidates
+        text = "настроить docker и webhook"
+        assert list(_candidates(_normalize_text(text)).tags) == auto_tag(text)
+
+    def test_message_scanned_once_for_intent_and_agent(self):
+        from src.telegram_ceo import nlu
+        nlu._candidates.cache_clear()
+        matcher = nlu._get_matcher()
+        with patch.object(type(matcher), "find_all", autospec=True,
+                          side_effect=type(matcher).find_all) as scan:
+            detect_intent("маттиас посчитай бюджет на квартал")
+            detect_agent("маттиас посчитай бюджет на квартал")
+        assert scan.call_count == 1
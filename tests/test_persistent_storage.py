@@ -0,0 +1,258 @@
+"""Tests for the telegram KV store (src/telegram/persistent_storage.py)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.telegram import persistent_storage as ps
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.delenv("VAULT_PASSWORD", raising=False)
+    ps.close()
+    yield
+    ps.close()
+
+
+# ──────────────────────────────────────────────────────────
+# File backend (no DATABASE_URL)
+# ──────────────────────────────────────────────────────────
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    def path(key, ext="json"):
+        return str(tmp_path / f"{key}.{ext}")
+
+    with patch.object(ps, "_file_path", side_effect=path):
+        yield tmp_path
+
+
+class TestFileBackend:
+
+    def test_save_load_roundtrip(self, files):
+        assert ps.save("k", {"a": 1}) is True
+        ps.invalidate()
+        assert ps.load("k") == {"a": 1}
+
+    def test_load_missing_returns_default(self, files):
+        assert ps.load("nope", []) == []
+
+    def test_append_writes_one_line_per_item(self, files):
+        for i in range(3):
+            ps.append_to_list("events", {"n": i})
+        lines = (files / "events.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(l)["n"] for l in lines] == [0, 1, 2]
+        assert (files / "events.json").read_text(encoding="utf-8") == ps.LIST_MARKER
+        ps.invalidate()
+        assert ps.load("events") == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+    def test_append_migrates_existing_blob_list(self, files):
+        ps.save("events", [{"n": 0}])
+        ps.append_to_list("events", {"n": 1})
+        ps.invalidate()
+        assert ps.load("events") == [{"n": 0}, {"n": 1}]
+
+    def test_append_respects_max_items(self, files):
+        for i in range(25):
+            ps.append_to_list("events", {"n": i}, max_items=5)
+        assert [e["n"] for e in ps.load("events")] == [20, 21, 22, 23, 24]
+        ps.invalidate()
+        assert [e["n"] for e in ps.load("events")][-5:] == [20, 21, 22, 23, 24]
+
+    def test_save_replaces_list(self, files):
+        ps.append_to_list("events", {"n": 0})
+        ps.save("events", [{"n": 9}])
+        ps.invalidate()
+        assert ps.load("events") == [{"n": 9}]
+        assert not (files / "events.jsonl").exists()
+
+    def test_save_many_load_many(self, files):
+        assert ps.save_many({"a": 1, "b": [2]}) is True
+        ps.invalidate()
+        assert ps.load_many(["a", "b", "c"], default=None) == {"a": 1, "b": [2], "c": None}
+
+
+class TestCache:
+
+    def test_load_served_from_cache(self, files):
+        ps.save("k", {"a": 1})
+        with patch.object(ps, "_file_load") as disk:
+            assert ps.load("k") == {"a": 1}
+        disk.assert_not_called()
+
+    def test_loaded_value_is_a_copy(self, files):
+        ps.save("k", [1])
+        ps.load("k").append(2)
+        assert ps.load("k") == [1]
+
+    def test_cache_holds_stored_form(self, files):
+        ps.save("k", {"t": (1, 2)})
+        assert ps.load("k") == {"t": [1, 2]}
+
+    def test_ttl_expiry(self, files, monkeypatch):
+        ps.save("k", 1)
+        monkeypatch.setattr(ps, "CACHE_TTL_SEC", -1)
+        with patch.object(ps, "_file_load", return_value=2):
+            assert ps.load("k") == 2
+
+    def test_append_updates_cached_list(self, files):
+        ps.save("events", [])
+        ps.load("events")
+        ps.append_to_list("events", {"n": 1})
+        with patch.object(ps, "_file_load") as disk:
+            assert ps.load("events") == [{"n": 1}]
+        disk.assert_not_called()
+
+
+# ──────────────────────────────────────────────────────────
+# PostgreSQL backend (mocked pool)
+# ──────────────────────────────────────────────────────────
+
+@pytest.fixture
+def db(monkeypatch):
+    cur = MagicMock()
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__ = lambda s: cur
+    conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+    pool = MagicMock()
+    pool.getconn.return_value = conn
+    monkeypatch.setattr(ps, "_pool", pool)
+    monkeypatch.setattr(ps, "_engine", True)
+    monkeypatch.setattr(ps, "_use_db", True)
+    return cur, conn, pool
+
+
+def _sqls(cur):
+    return [c[0][0] for c in cur.execute.call_args_list] + \
+           [c[0][0] for c in cur.executemany.call_args_list]
+
+
+class TestPostgresBackend:
+
+    def test_save_upserts_and_returns_connection(self, db):
+        cur, conn, pool = db
+        assert ps.save("k", {"a": 1}) is True
+        (sql, rows), _ = cur.executemany.call_args
+        assert "ON CONFLICT" in sql
+        assert rows == [("k", json.dumps({"a": 1}))]
+        conn.commit.assert_called_once()
+        pool.putconn.assert_called_once_with(conn, close=False)
+
+    def test_load_many_single_query(self, db):
+        cur, _, pool = db
+        cur.fetchall.return_value = [("a", "1", "t1"), ("b", '{"x": 2}', "t1")]
+        assert ps.load_many(["a", "b", "c"]) == {"a": 1, "b": {"x": 2}, "c": None}
+        assert cur.execute.call_count == 1
+        assert cur.execute.call_args[0][1] == (["a", "b", "c"],)
+        # Second call only checks versions, including the miss for "c"
+        cur.fetchall.return_value = [("a", "t1"), ("b", "t1")]
+        with patch.object(ps, "_db_load_many") as full:
+            assert ps.load_many(["a", "b", "c"]) == {"a": 1, "b": {"x": 2}, "c": None}
+        full.assert_not_called()
+        assert cur.execute.call_args[0][0] == ps._VERSIONS
+        assert pool.getconn.call_count == 2
+
+    def test_write_from_other_process_not_served_from_cache(self, db):
+        cur, _, _ = db
+        cur.fetchall.return_value = [("tribute_stats", '{"n": 1}', "t1")]
+        assert ps.load("tribute_stats") == {"n": 1}
+        # Another process saved the key: updated_at moved on
+        cur.fetchall.side_effect = [
+            [("tribute_stats", "t2")],
+            [("tribute_stats", '{"n": 2}', "t2")],
+        ]
+        assert ps.load("tribute_stats") == {"n": 2}
+
+    def test_deleted_by_other_process_not_served_from_cache(self, db):
+        cur, _, _ = db
+        cur.fetchall.return_value = [("k", "1", "t1")]
+        assert ps.load("k") == 1
+        cur.fetchall.return_value = []
+        assert ps.load("k", "gone") == "gone"
+
+    def test_save_caches_new_version(self, db):
+        cur, _, _ = db
+        cur.fetchall.return_value = [("k", "t5")]
+        ps.save("k", {"a": 1})
+        assert ps._cache_get("k")[2] == "t5"
+        with patch.object(ps, "_db_load_many") as full:
+            assert ps.load("k") == {"a": 1}
+        full.assert_not_called()
+
+    def test_version_check_error_refetches(self, db):
+        cur, _, _ = db
+        cur.fetchall.return_value = [("k", "1", "t1")]
+        ps.load("k")
+        with patch.object(ps, "_db_versions", return_value=None), \
+             patch.object(ps, "_db_load_many", return_value={"k": 2}) as full:
+            assert ps.load("k") == 2
+        full.assert_called_once()
+
+    def test_load_reads_list_rows(self, db):
+        cur, _, _ = db
+        cur.fetchall.side_effect = [
+            [("events", ps.LIST_MARKER, "t1")],
+            [("events", '{"n": 0}'), ("events", '{"n": 1}')],
+        ]
+        assert ps.load("events") == [{"n": 0}, {"n": 1}]
+
+    def test_append_inserts_only_new_item(self, db):
+        cur, _, _ = db
+        cur.fetchone.side_effect = [(ps.LIST_MARKER, "t1"), ("t2",)]
+        assert ps.append_to_list("events", {"n": 5}, max_items=10) is True
+        inserts = [c for c in cur.execute.call_args_list if "INSERT INTO kv_list" in c[0][0]]
+        assert len(inserts) == 1
+        assert inserts[0][0][1] == ("events", json.dumps({"n": 5}))
+        assert any("DELETE FROM kv_list" in q for q in _sqls(cur))
+        cur.executemany.assert_not_called()
+
+    def test_first_append_migrates_blob(self, db):
+        cur, _, _ = db
+        cur.fetchone.side_effect = [(json.dumps([{"n": 0}, {"n": 1}]), "t1"), ("t2",)]
+        ps.append_to_list("events", {"n": 2})
+        (sql, rows), _ = cur.executemany.call_args
+        assert "INSERT INTO kv_list" in sql
+        assert [json.loads(v)["n"] for _, v in rows] == [0, 1]
+        marker = [c for c in cur.execute.call_args_list if c[0][1] == ("events", ps.LIST_MARKER)]
+        assert marker
+
+    def test_sensitive_items_encrypted_individually(self, db):
+        cur, _, _ = db
+        cur.fetchone.side_effect = [(ps.LIST_MARKER, "t1"), ("t2",)]
+        with patch.object(ps.vault, "encrypt", return_value="ENC:x") as enc:
+            ps.append_to_list("tribute_payments", {"id": "evt"})
+        enc.assert_called_once_with({"id": "evt"})
+
+    def test_append_extends_cache_only_if_unchanged(self, db):
+        cur, _, _ = db
+        cur.fetchall.side_effect = [
+            [("events", ps.LIST_MARKER, "t1")],
+            [("events", '{"n": 0}')],
+        ]
+        ps.load("events")
+        cur.fetchone.side_effect = [(ps.LIST_MARKER, "t1"), ("t2",)]
+        ps.append_to_list("events", {"n": 1})
+        assert ps._cache_get("events")[1:] == ([{"n": 0}, {"n": 1}], "t2")
+        # Another process appended in between: drop the cached list
+        cur.fetchone.side_effect = [(ps.LIST_MARKER, "t3"), ("t4",)]
+        ps.append_to_list("events", {"n": 3})
+        assert ps._cache_get("events") is None
+
+    def test_load_error_falls_back_without_caching(self, db):
+        _, _, pool = db
+        pool.getconn.side_effect = Exception("down")
+        with patch.object(ps, "_file_load", return_value=[1]):
+            assert ps.load("k") == [1]
+        assert ps._cache_get("k") is None
+
+    def test_failed_connection_discarded(self, db):
+        cur, conn, pool = db
+        cur.executemany.side_effect = Exception("server closed the connection")
+        with patch.object(ps, "_file_save", return_value=True):
+            ps.save("k", 1)
+        conn.rollback.assert_called_once()
+        pool.putconn.assert_called_once_with(conn, close=True)
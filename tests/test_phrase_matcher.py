@@ -0,0 +1,44 @@
+"""Tests for the Aho-Corasick phrase matcher used by the CEO bot NLU."""
+
+import random
+
+from src.telegram_ceo.phrase_matcher import PhraseMatcher
+
+
+def _naive(phrases, text):
+    found = []
+    for phrase, payload in phrases:
+        start = text.find(phrase)
+        while start != -1:
+            found.append((start, start + len(phrase), payload))
+            start = text.find(phrase, start + 1)
+    return sorted(found)
+
+
+class TestPhraseMatcher:
+
+    def test_finds_overlapping_and_nested(self):
+        m = PhraseMatcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+        assert sorted(m.find_all("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+    def test_cyrillic_phrases(self):
+        m = PhraseMatcher([("баланс", "b"), ("покажи баланс", "pb")])
+        assert sorted(m.find_all("покажи баланс")) == [(0, 13, "pb"), (7, 13, "b")]
+
+    def test_multiple_payloads_per_phrase(self):
+        m = PhraseMatcher([("пост", "smm"), ("пост", "content")])
+        assert sorted(p for _, _, p in m.find_all("новый пост")) == ["content", "smm"]
+
+    def test_empty_phrase_ignored(self):
+        assert PhraseMatcher([("", 1)]).find_all("abc") == []
+
+    def test_matches_naive_search(self):
+        rng = random.Random(7)
+        alphabet = "абвг ab"
+        for _ in range(200):
+            phrases = [
+                ("".join(rng.choices(alphabet, k=rng.randint(1, 4))), i)
+                for i in range(rng.randint(1, 8))
+            ]
+            text = "".join(rng.choices(alphabet, k=rng.randint(0, 30)))
+            assert sorted(PhraseMatcher(phrases).find_all(text)) == _naive(phrases, text)
@@ -184,6 +184,126 @@ class TestHardSplitWords:
         assert result == []
 
 
+# ──────────────────────────────────────────────────────────
+# Test: podcast_gen — parallel cached TTS + streaming assembly
+# ──────────────────────────────────────────────────────────
+
+class TestSplitScriptChunks:
+    def test_chunks_follow_paragraphs(self):
+        from src.telegram_yuki.podcast_gen import _split_script_chunks
+        result = _split_script_chunks("Первый абзац. Ещё.\n\nВторой абзац.\n\n\nТретий.")
+        assert result == ["Первый абзац. Ещё.", "Второй абзац.", "Третий."]
+
+    def test_edit_keeps_other_chunks(self):
+        from src.telegram_yuki.podcast_gen import _split_script_chunks
+        before = _split_script_chunks("Раз.\n\nДва.\n\nТри.")
+        after = _split_script_chunks("Раз.\n\nДва, но длиннее.\n\nТри.")
+        assert [before[0], before[2]] == [after[0], after[2]]
+
+
+class TestSynthesizeChunks:
+    @pytest.fixture(autouse=True)
+    def tts_env(self, tmp_path, monkeypatch):
+        import src.telegram_yuki.podcast_gen as pg
+        monkeypatch.setattr(pg, "TTS_CACHE_DIR", str(tmp_path / "tts_cache"))
+        monkeypatch.setattr(pg, "TTS_RETRY_BASE_SEC", 0)
+        return pg
+
+    def test_order_kept_with_parallel_calls(self, tts_env):
+        import threading
+        import time
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def fake_tts(text, voice_id, api_key):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05 if text != "a" else 0.15)
+            with lock:
+                active[0] -= 1
+            return text.encode()
+
+        with patch.object(tts_env, "TTS_CONCURRENCY", 2), \
+                patch.object(tts_env, "_tts_chunk", side_effect=fake_tts):
+            out = list(tts_env._synthesize_chunks(["a", "b", "c", "d"], "v", "k"))
+        assert out == [b"a", b"b", b"c", b"d"]
+        assert peak[0] == 2
+
+    def test_cache_only_resynthesizes_changed(self, tts_env):
+        calls = []
+
+        def fake_tts(text, voice_id, api_key):
+            calls.append(text)
+            return text.encode()
+
+        with patch.object(tts_env, "_tts_chunk", side_effect=fake_tts):
+            list(tts_env._synthesize_chunks(["one", "two", "three"], "v", "k"))
+            stats = {}
+            out = list(tts_env._synthesize_chunks(["one", "TWO", "three"], "v", "k", stats))
+        assert calls == ["one", "two", "three", "TWO"]
+        assert out == [b"one", b"TWO", b"three"]
+        assert stats == {"cached": 2, "synthesized": 1}
+
+    def test_voice_change_misses_cache(self, tts_env):
+        with patch.object(tts_env, "_tts_chunk", return_value=b"x") as mock_tts:
+            list(tts_env._synthesize_chunks(["one"], "voice-a", "k"))
+            list(tts_env._synthesize_chunks(["one"], "voice-b", "k"))
+        assert mock_tts.call_count == 2
+
+    def test_transient_error_retried(self, tts_env):
+        with patch.object(tts_env, "_tts_chunk",
+                          side_effect=[RuntimeError("HTTP 503"), b"ok"]) as mock_tts:
+            out = list(tts_env._synthesize_chunks(["one"], "v", "k"))
+        assert out == [b"ok"]
+        assert mock_tts.call_count == 2
+
+    def test_auth_error_not_retried(self, tts_env):
+        from urllib.error import HTTPError
+        err = RuntimeError("ElevenLabs TTS failed: HTTP 401")
+        err.__cause__ = HTTPError("u", 401, "Unauthorized", {}, None)
+        with patch.object(tts_env, "_tts_chunk", side_effect=err) as mock_tts:
+            with pytest.raises(RuntimeError, match="401"):
+                list(tts_env._synthesize_chunks(["one"], "v", "k"))
+        assert mock_tts.call_count == 1
+
+    def test_prune_keeps_most_recent(self, tts_env):
+        os.makedirs(tts_env.TTS_CACHE_DIR)
+        for i in range(5):
+            path = os.path.join(tts_env.TTS_CACHE_DIR, f"{i}.mp3")
+            with open(path, "wb") as f:
+                f.write(b"x")
+            os.utime(path, (1000 + i, 1000 + i))
+        tts_env._prune_tts_cache(max_files=2)
+        assert sorted(os.listdir(tts_env.TTS_CACHE_DIR)) == ["3.mp3", "4.mp3"]
+
+
+class TestPcmSpool:
+    def test_loudness_and_duration_match_in_memory_concat(self, tmp_path):
+        import wave
+        from pydub import AudioSegment
+        from pydub.generators import Sine
+        from src.telegram_yuki.podcast_gen import _PcmSpool
+
+        loud = Sine(440).to_audio_segment(duration=400, volume=-3)
+        quiet = Sine(220).to_audio_segment(duration=600, volume=-20)
+        expected = (AudioSegment.silent(duration=500, frame_rate=44100) + loud
+                    + AudioSegment.silent(duration=300, frame_rate=44100) + quiet)
+
+        spool = _PcmSpool(str(tmp_path / "out.wav"))
+        spool.append_silence(500)
+        spool.append(loud)
+        spool.append_silence(300)
+        spool.append(quiet.set_frame_rate(22050))  # converted to first chunk's rate
+        spool.close()
+
+        assert spool.duration_sec == pytest.approx(expected.duration_seconds, abs=0.01)
+        assert spool.dbfs == pytest.approx(expected.dBFS, abs=0.1)
+        with wave.open(str(tmp_path / "out.wav"), "rb") as w:
+            assert w.getframerate() == 44100
+            assert w.getnframes() == spool.frames
+
+
 # ──────────────────────────────────────────────────────────
 # Test: rss_feed — PodcastRSSManager
 # ──────────────────────────────────────────────────────────
@@ -1,7 +1,9 @@
 """Tests for src/rate_monitor.py — Rate Limit Monitor."""
 
+import json
 import sys
 import os
+import time
 import tempfile
 from unittest.mock import patch
 from datetime import datetime, timedelta
@@ -20,6 +22,9 @@ from src.rate_monitor import (
     get_usage_summary,
     MAX_CALLS,
     MAX_ALERTS,
+    LATENCY_BOUNDS_MS,
+    _RateState,
+    flush,
     _load_store,
     _save_store,
     _count_calls,
@@ -237,6 +242,19 @@ class TestUsageSummary:
             assert "2 запросов" in summary
         os.unlink(path)
 
+    def test_summary_shows_tokens(self):
+        path = _tmp_store()
+        with patch("src.rate_monitor._store_path", return_value=path):
+            record_api_call("groq", model="llama", tokens_in=120, tokens_out=30)
+            record_api_call("groq", tokens_in=50)
+            usage = get_provider_usage("groq")
+            assert (usage["tokens_in"], usage["tokens_out"]) == (170, 30)
+            assert "200 токенов" in get_usage_summary()
+            flush()
+            store = _load_store()
+            assert store.calls[0].model == "llama" and store.calls[0].tokens_out == 30
+        os.unlink(path)
+
     def test_summary_shows_errors(self):
         path = _tmp_store()
         with patch("src.rate_monitor._store_path", return_value=path):
@@ -256,14 +274,22 @@ class TestCountCalls:
         assert count == 0
 
     def test_count_calls_filters_provider(self):
-        store = RateMonitorStore(calls=[
-            ApiCall(provider="openrouter"),
-            ApiCall(provider="elevenlabs"),
-            ApiCall(provider="openrouter"),
-        ])
+        minute = str(int(datetime.now().timestamp() // 60))
+        store = RateMonitorStore(buckets={
+            "openrouter": {minute: [2, 0, 0, 0]},
+            "elevenlabs": {minute: [1, 0, 0, 0]},
+        })
         count = _count_calls(store, "openrouter", datetime.now() - timedelta(hours=1))
         assert count == 2
 
+    def test_count_calls_skips_old_buckets(self):
+        now = int(datetime.now().timestamp() // 60)
+        store = RateMonitorStore(buckets={
+            "openrouter": {str(now): [1, 0, 0, 0], str(now - 120): [5, 0, 0, 0]},
+        })
+        count = _count_calls(store, "openrouter", datetime.now() - timedelta(hours=1))
+        assert count == 1
+
 
 # ── Persistence ───────────────────────────────────────────
 
@@ -293,3 +319,85 @@ class TestPersistence:
             assert store.calls[0].provider == "openrouter"
             assert store.calls[1].status_code == 429
         os.unlink(path)
+
+
+# ── Buckets & snapshots ───────────────────────────────────
+
+class TestBuckets:
+    def test_record_does_not_touch_disk(self):
+        path = _tmp_store()
+        with patch("src.rate_monitor._store_path", return_value=path):
+            record_api_call("openrouter")
+            assert os.path.getsize(path) == 0
+            flush()
+            assert os.path.getsize(path) > 0
+        os.unlink(path)
+
+    def test_flushed_snapshot_is_bucketed(self):
+        path = _tmp_store()
+        with patch("src.rate_monitor._store_path", return_value=path):
+            record_api_call("openrouter", latency_ms=120)
+            record_api_call("openrouter", success=False)
+            flush()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = list(data["buckets"]["openrouter"].values())
+        assert len(rows) == 1
+        assert rows[0][:4] == [2, 1, 120, 1]
+        os.unlink(path)
+
+    def test_usage_survives_restart(self):
+        path = _tmp_store()
+        with patch("src.rate_monitor._store_path", return_value=path):
+            record_api_call("groq")
+            flush()
+        assert _RateState(path).window("groq", 60, int(time.time() // 60))[0] == 1
+        os.unlink(path)
+
+    def test_flush_merges_other_process_counts(self):
+        path = _tmp_store()
+        a, b = _RateState(path), _RateState(path)
+        now = time.time()
+        a.record("openai", "", True, 200, 0, now)
+        b.record("openai", "", True, 200, 0, now)
+        b.record("openai", "", True, 200, 0, now)
+        a.flush()
+        b.flush()
+        assert _RateState(path).window("openai", 1, int(now // 60))[0] == 3
+        os.unlink(path)
+
+    def test_window_excludes_old_buckets(self):
+        path = _tmp_store()
+        state = _RateState(path)
+        now = time.time()
+        state.record("openai", "", True, 200, 0, now - 2 * 3600)
+        state.record("openai", "", True, 200, 0, now)
+        minute = int(now // 60)
+        assert state.window("openai", 60, minute)[0] == 1
+        assert state.window("openai", 1440, minute)[0] == 2
+        os.unlink(path)
+
+    def test_latency_percentiles(self):
+        path = _tmp_store()
+        with patch("src.rate_monitor._store_path", return_value=path):
+            for _ in range(9):
+                record_api_call("openai", latency_ms=80)
+            record_api_call("openai", latency_ms=4000)
+            usage = get_provider_usage("openai")
+            assert usage["p50_latency_ms"] == LATENCY_BOUNDS_MS[0]
+            assert usage["p95_latency_ms"] == 5000
+            assert usage["avg_latency_ms"] == (9 * 80 + 4000) // 10
+        os.unlink(path)
+
+    def test_migrates_per_call_store(self):
+        path = _tmp_store()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"calls": [
+                ApiCall(provider="openrouter").model_dump(),
+                ApiCall(provider="openrouter", success=False).model_dump(),
+            ], "alerts": []}, f)
+        with patch("src.rate_monitor._store_path", return_value=path):
+            usage = get_provider_usage("openrouter")
+            assert usage["total_calls"] == 2
+            assert usage["failed"] == 1
+        os.unlink(path)
@@ -223,3 +223,57 @@ class TestBackwardCompat:
         src = inspect.getsource(_execute_crew)
         assert "memory=False" in src
         assert "восстановлено" in src
+
+
+# ── Inline judge: pre-filter and deadline ─────────────────
+
+CLEAN_REPORT = (
+    "Выручка за январь: 1 250 000 ₽ (+12% к декабрю). Расходы: 830 000 ₽, из них "
+    "маркетинг 310 000 ₽. Подписчики Крипто Маркетологов: 412 (+37). MRR вырос до $4 120. "
+    "Рекомендация: перенести 50 000 ₽ из маркетинга в удержание — отток 6% выше нормы."
+)
+
+
+class TestInlineJudge:
+    def test_clean_response_skips_llm_judge(self):
+        from src.flows import _run_agent_crew
+        with patch("src.flows._execute_crew", return_value=CLEAN_REPORT) as mock_exec:
+            with patch("src.tools.llm_judge.judge_response") as mock_judge:
+                result = _run_agent_crew(MagicMock(), "отчёт", "accountant",
+                                         use_memory=False, reflect=True)
+        assert result == CLEAN_REPORT
+        mock_judge.assert_not_called()
+        mock_exec.assert_called_once()
+
+    def test_slow_judge_does_not_hold_the_reply(self):
+        import time
+        from src.flows import _run_agent_crew
+        from src.tools.llm_judge import JudgeResult
+
+        def slow_judge(*args):
+            time.sleep(0.5)
+            return JudgeResult(overall=1.0, passed=False)
+
+        with patch("src.flows.REFLECTION_JUDGE_DEADLINE_SEC", 0.05), \
+             patch("src.flows._execute_crew", return_value="short answer") as mock_exec, \
+             patch("src.tools.llm_judge.judge_response", side_effect=slow_judge):
+            start = time.monotonic()
+            result = _run_agent_crew(MagicMock(), "отчёт", "accountant",
+                                     use_memory=False, reflect=True)
+            assert time.monotonic() - start < 0.4
+        assert result == "short answer"
+        mock_exec.assert_called_once()
+
+    def test_inline_verdict_reused_by_queue(self):
+        from src import flows
+        from src.tools.llm_judge import JudgeQueue, JudgeResult
+        verdict = JudgeResult(overall=3.5, passed=True)
+        queue = JudgeQueue(MagicMock())
+        with patch("src.flows._judge_queue", queue), \
+             patch("src.tools.llm_judge.judge_response", return_value=verdict):
+            assert flows._reflection_verdict("отчёт", "short answer", "accountant") is verdict
+            with patch("src.tools.llm_judge.judge_batch") as mock_batch:
+                flows._judge_and_log("accountant", "отчёт", "отчёт", "short answer")
+                assert queue.flush(timeout=5)
+        mock_batch.assert_not_called()
+        queue.handler.assert_called_once()
@@ -584,6 +584,75 @@ class TestDependencyEngine:
         assert get_task(t3.id).status == TaskStatus.ASSIGNED
 
 
+class TestDependencyGraph:
+    @pytest.fixture(autouse=True)
+    def _setup(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "pool.json")
+        monkeypatch.setattr("src.task_pool._pool_path", lambda: path)
+
+    def test_engine_returns_unblocked(self):
+        from src.task_pool import _store
+        a = create_task("A", assignee="automator")
+        b = create_task("B", blocked_by=[a.id], assignee="smm")
+        raw = _store().get(a.id)
+        raw["status"] = "DONE"
+        _store().put(raw)
+        unblocked = _run_dependency_engine(_store(), a.id)
+        assert [t["id"] for t in unblocked] == [b.id]
+        assert get_task(b.id).status == TaskStatus.ASSIGNED
+
+    def test_ready_tasks_after_unblock(self):
+        a = create_task("A", assignee="automator")
+        b = create_task("B", blocked_by=[a.id])
+        assert b.id not in [t.id for t in get_ready_tasks()]
+        complete_task(a.id)
+        assert b.id in [t.id for t in get_ready_tasks()]
+
+    def test_execution_order_respects_dependencies(self):
+        from src.task_pool import get_execution_order
+        c = create_task("C", priority=TaskPriority.LOW)
+        a = create_task("A", priority=TaskPriority.LOW)
+        b = create_task("B", blocked_by=[a.id], priority=TaskPriority.CRITICAL)
+        d = create_task("D", priority=TaskPriority.CRITICAL)
+        order = [t.id for t in get_execution_order()]
+        assert order.index(a.id) < order.index(b.id)
+        assert order[0] == d.id
+        assert set(order) == {a.id, b.id, c.id, d.id}
+
+    def test_execution_order_skips_done(self):
+        from src.task_pool import get_execution_order
+        a = create_task("A", assignee="smm")
+        complete_task(a.id)
+        b = create_task("B")
+        assert [t.id for t in get_execution_order()] == [b.id]
+
+    def test_execution_order_subset(self):
+        from src.task_pool import get_execution_order
+        a = create_task("A")
+        create_task("B")
+        assert [t.id for t in get_execution_order([a.id])] == [a.id]
+
+    def test_cycle_detection(self):
+        from src.task_pool import _store, find_dependency_cycles, get_execution_order
+        a = create_task("A")
+        b = create_task("B", blocked_by=[a.id])
+        raw = _store().get(a.id)
+        raw["blocked_by"] = [b.id]
+        _store().put(raw)
+        free = create_task("Free")
+
+        cycles = find_dependency_cycles()
+        assert len(cycles) == 1
+        assert set(cycles[0]) == {a.id, b.id}
+        assert [t.id for t in get_execution_order()] == [free.id]
+
+    def test_no_cycles(self):
+        from src.task_pool import find_dependency_cycles
+        a = create_task("A")
+        create_task("B", blocked_by=[a.id])
+        assert find_dependency_cycles() == []
+
+
 # ──────────────────────────────────────────────────────────
 # Query tests
 # ──────────────────────────────────────────────────────────
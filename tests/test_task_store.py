@@ -0,0 +1,272 @@
+"""Tests for src/task_store.py — Task Pool storage backends."""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from src.task_store import (
+    JsonWalTaskStore,
+    SqliteTaskStore,
+    TaskStore,
+    open_store,
+    reset_stores,
+)
+
+
+def _task(task_id: str, status: str = "TODO", assignee: str = "", **extra) -> dict:
+    return {"id": task_id, "title": f"Task {task_id}", "status": status,
+            "assignee": assignee, "blocked_by": [], "blocks": [], **extra}
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    reset_stores()
+    yield
+    reset_stores()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        return JsonWalTaskStore(str(tmp_path / "pool.json"))
+    return SqliteTaskStore(str(tmp_path / "pool.sqlite3"))
+
+
+class TestStoreApi:
+    def test_put_and_get(self, store):
+        store.put(_task("a"))
+        assert store.get("a")["title"] == "Task a"
+        assert store.get("missing") is None
+
+    def test_get_returns_copy(self, store):
+        store.put(_task("a"))
+        t = store.get("a")
+        t["blocked_by"].append("x")
+        assert store.get("a")["blocked_by"] == []
+
+    def test_update_reindexes_status(self, store):
+        store.put(_task("a"))
+        t = store.get("a")
+        t["status"] = "DONE"
+        store.put(t)
+        assert store.by_status("TODO") == []
+        assert [t["id"] for t in store.by_status("DONE")] == ["a"]
+
+    def test_by_status_keeps_pool_order(self, store):
+        store.put_many([_task("c"), _task("a"), _task("b", status="DONE")])
+        store.put(store.get("c"))  # update must not move it
+        assert [t["id"] for t in store.by_status("TODO", "DONE")] == ["c", "a", "b"]
+
+    def test_by_assignee(self, store):
+        store.put_many([_task("a", assignee="smm"), _task("b", assignee="cpo"),
+                        _task("c", assignee="smm")])
+        assert [t["id"] for t in store.by_assignee("smm")] == ["a", "c"]
+
+    def test_count_by_status(self, store):
+        store.put_many([_task("a"), _task("b"), _task("c", status="DONE")])
+        assert store.count_by_status() == {"TODO": 2, "DONE": 1}
+
+    def test_delete(self, store):
+        store.put_many([_task("a"), _task("b")])
+        assert store.delete("a") is True
+        assert store.delete("a") is False
+        assert [t["id"] for t in store.all()] == ["b"]
+        assert len(store) == 1
+
+    def test_replace_all(self, store):
+        store.put_many([_task("a"), _task("b")])
+        store.replace_all([_task("z")])
+        assert [t["id"] for t in store.all()] == ["z"]
+
+
+class TestDependencyIndex:
+    def test_dependents(self, store):
+        store.put_many([_task("a"), _task("b", blocked_by=["a"]), _task("c", blocked_by=["a"])])
+        assert [t["id"] for t in store.dependents("a")] == ["b", "c"]
+        assert store.dependents("b") == []
+
+    def test_unmet_count_follows_status(self, store):
+        store.put_many([_task("a"), _task("b"), _task("c", blocked_by=["a", "b"])])
+        assert store.unmet_count("c") == 2
+        store.put(_task("a", status="DONE"))
+        assert store.unmet_count("c") == 1
+
+    def test_missing_dependency_is_met(self, store):
+        store.put(_task("c", blocked_by=["ghost"]))
+        assert store.unmet_count("c") == 0
+        store.put(_task("ghost"))  # dependency appears later
+        assert store.unmet_count("c") == 1
+        store.delete("ghost")
+        assert store.unmet_count("c") == 0
+
+    def test_changing_blocked_by_updates_edges(self, store):
+        store.put_many([_task("a"), _task("b", blocked_by=["a"])])
+        store.put(_task("b"))
+        assert store.dependents("a") == []
+        assert store.unmet_count("b") == 0
+
+    def test_ready(self, store):
+        store.put_many([_task("a"), _task("b", blocked_by=["a"]), _task("c", status="DONE")])
+        assert [t["id"] for t in store.ready()] == ["a"]
+
+
+class TestJsonWal:
+    def test_mutations_append_to_wal_not_snapshot(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        store = JsonWalTaskStore(path)
+        store.put(_task("a"))
+        assert not os.path.exists(path)
+        with open(path + ".wal", encoding="utf-8") as f:
+            assert json.loads(f.readline())["op"] == "put"
+
+    def test_reopen_replays_wal(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        store = JsonWalTaskStore(path)
+        store.put_many([_task("a"), _task("b")])
+        store.delete("a")
+        reopened = JsonWalTaskStore(path)
+        assert [t["id"] for t in reopened.all()] == ["b"]
+
+    def test_compaction_writes_legacy_snapshot(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        store = JsonWalTaskStore(path, compact_every=3)
+        for i in range(3):
+            store.put(_task(f"t{i}"))
+        with open(path, encoding="utf-8") as f:
+            assert [t["id"] for t in json.load(f)] == ["t0", "t1", "t2"]
+        assert os.path.getsize(path + ".wal") == 0
+
+    def test_legacy_json_loaded_as_snapshot(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([_task("old", status="DONE")], f)
+        store = JsonWalTaskStore(path)
+        assert store.get("old")["status"] == "DONE"
+
+    def test_torn_wal_tail_is_ignored(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        store = JsonWalTaskStore(path)
+        store.put(_task("a"))
+        with open(path + ".wal", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "task": {"id": "b"')
+        assert [t["id"] for t in JsonWalTaskStore(path).all()] == ["a"]
+
+    def test_append_after_torn_tail(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        JsonWalTaskStore(path).put(_task("a"))
+        with open(path + ".wal", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "task": {"id": "b"')
+        JsonWalTaskStore(path).put(_task("c"))
+        assert [t["id"] for t in JsonWalTaskStore(path).all()] == ["a", "c"]
+
+    def test_dependency_index_rebuilt_on_reopen(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        JsonWalTaskStore(path).put_many([_task("a"), _task("b", blocked_by=["a"])])
+        reopened = JsonWalTaskStore(path)
+        assert reopened.unmet_count("b") == 1
+        assert [t["id"] for t in reopened.dependents("a")] == ["b"]
+
+    def test_picks_up_writes_from_other_instance(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        reader = JsonWalTaskStore(path)
+        writer = JsonWalTaskStore(path)
+        writer.put(_task("a"))
+        assert reader.get("a") is not None
+        writer.compact()
+        writer.put(_task("b"))
+        assert [t["id"] for t in reader.all()] == ["a", "b"]
+
+    def test_stale_instance_append_keeps_other_records(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        first = JsonWalTaskStore(path)
+        second = JsonWalTaskStore(path)
+        first.put(_task("a"))
+        second.put(_task("b"))  # second has not read "a" yet
+        first.put(_task("c"))
+        assert [t["id"] for t in JsonWalTaskStore(path).all()] == ["a", "b", "c"]
+
+    def test_stale_instance_compaction_keeps_other_records(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        first = JsonWalTaskStore(path)
+        second = JsonWalTaskStore(path)
+        first.put(_task("a"))
+        second.compact()
+        assert [t["id"] for t in JsonWalTaskStore(path).all()] == ["a"]
+
+    def test_complete_tail_without_newline_is_kept(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        JsonWalTaskStore(path).put(_task("a"))
+        with open(path + ".wal", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "put", "task": _task("b")}))
+        JsonWalTaskStore(path).put(_task("c"))
+        assert [t["id"] for t in JsonWalTaskStore(path).all()] == ["a", "b", "c"]
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+    def test_concurrent_processes_lose_nothing(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        JsonWalTaskStore(path, compact_every=25).put(_task("seed"))
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=_put_from_process, args=(path, name, 40)) for name in "xyz"]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(30)
+        assert all(p.exitcode == 0 for p in procs)
+        assert len(JsonWalTaskStore(path)) == 1 + 3 * 40
+
+
+def _put_from_process(path: str, name: str, count: int):
+    store = JsonWalTaskStore(path, compact_every=25)
+    for i in range(count):
+        store.put(_task(f"{name}{i}"))
+
+
+class TestBaseClass:
+    def test_incomplete_backend_fails_on_instantiation(self):
+        class Partial(TaskStore):
+            def get(self, task_id):
+                return None
+
+        with pytest.raises(TypeError):
+            Partial()
+
+
+class TestSqlite:
+    def test_migrates_legacy_json(self, tmp_path):
+        legacy = str(tmp_path / "pool.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([_task("a"), _task("b", assignee="smm")], f)
+        store = SqliteTaskStore(str(tmp_path / "pool.sqlite3"), legacy_json_path=legacy)
+        assert len(store) == 2
+        assert store.by_assignee("smm")[0]["id"] == "b"
+
+    def test_migration_runs_once(self, tmp_path):
+        legacy = str(tmp_path / "pool.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([_task("a")], f)
+        db = str(tmp_path / "pool.sqlite3")
+        store = SqliteTaskStore(db, legacy_json_path=legacy)
+        store.delete("a")
+        store.close()
+        assert len(SqliteTaskStore(db, legacy_json_path=legacy)) == 0
+
+
+class TestRegistry:
+    def test_same_instance_per_path(self, tmp_path):
+        path = str(tmp_path / "pool.json")
+        assert open_store(path) is open_store(path)
+
+    def test_unknown_backend(self, tmp_path):
+        with pytest.raises(ValueError):
+            open_store(str(tmp_path / "pool.json"), "redis")
+
+    def test_task_pool_sqlite_backend(self, tmp_path, monkeypatch):
+        from src import task_pool
+        monkeypatch.setattr("src.task_pool._pool_path", lambda: str(tmp_path / "pool.json"))
+        monkeypatch.setattr("src.task_pool.TASK_POOL_BACKEND", "sqlite")
+        t = task_pool.create_task("SQLite task", assignee="smm")
+        task_pool.start_task(t.id)
+        assert task_pool.get_task(t.id).status == task_pool.TaskStatus.IN_PROGRESS
+        assert os.path.exists(tmp_path / "pool.sqlite3")
@@ -4,6 +4,7 @@ import asyncio
 import json
 import os
 import tempfile
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -167,6 +168,13 @@ class TestConfig:
 # Test: Vision (mocked)
 # ──────────────────────────────────────────────────────────
 
+def _llm_response(data: dict):
+    from src.llm_gateway import LLMResponse
+    return LLMResponse(text=data["choices"][0]["message"]["content"], provider="openrouter",
+                       model="anthropic/claude-sonnet-4", latency_ms=1, tokens_in=0,
+                       tokens_out=0, data=data)
+
+
 class TestVision:
     @pytest.mark.asyncio
     async def test_extract_financial_data_success(self):
@@ -189,15 +197,8 @@ class TestVision:
         }
 
         with patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"}):
-            with patch("src.telegram.vision.httpx.AsyncClient") as mock_client_cls:
-                mock_client = AsyncMock()
-                mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-                mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
-                mock_resp = MagicMock()
-                mock_resp.json.return_value = mock_response
-                mock_resp.raise_for_status = MagicMock()
-                mock_client.post = AsyncMock(return_value=mock_resp)
+            with patch("src.telegram.vision.llm_gateway.chat",
+                       AsyncMock(return_value=_llm_response(mock_response))):
 
                 result = await extract_financial_data("base64data", "TBC Bank баланс")
 
@@ -221,15 +222,8 @@ class TestVision:
         }
 
         with patch.dict(os.environ, {"OPENROUTER_API_KEY": "test-key"}):
-            with patch("src.telegram.vision.httpx.AsyncClient") as mock_client_cls:
-                mock_client = AsyncMock()
-                mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-                mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-
-                mock_resp = MagicMock()
-                mock_resp.json.return_value = mock_response
-                mock_resp.raise_for_status = MagicMock()
-                mock_client.post = AsyncMock(return_value=mock_resp)
+            with patch("src.telegram.vision.llm_gateway.chat",
+                       AsyncMock(return_value=_llm_response(mock_response))):
 
                 result = await extract_financial_data("base64data")
 
@@ -510,6 +504,109 @@ class TestCharts:
         assert render_financial_dashboard(data) == b""
 
 
+class TestChartRenderer:
+    @pytest.fixture
+    def renderer(self):
+        from src.telegram.charts import ChartRenderer
+        r = ChartRenderer(mode="thread")
+        yield r
+        r.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_repeat_served_from_cache(self, renderer):
+        data = {"BTC": 100, "ETH": 50}
+        first = await renderer.render("portfolio_pie", data, "Test")
+        with patch("src.telegram.charts._render_job") as job:
+            second = await renderer.render("portfolio_pie", data, "Test")
+        job.assert_not_called()
+        assert first == second and first[:8] == b"\x89PNG\r\n\x1a\n"
+        assert renderer.status()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_render_once(self, renderer):
+        data = {"BTC": 100, "ETH": 50}
+        results = await asyncio.gather(*[renderer.render("portfolio_pie", data) for _ in range(4)])
+        assert len(set(results)) == 1
+        status = renderer.status()
+        assert status["renders"] == 1 and status["shared"] + status["hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_render(self, renderer):
+        from src.telegram import charts
+        real_job = charts._render_job
+
+        def slow_job(*args):
+            time.sleep(0.3)
+            return real_job(*args)
+
+        data = {"BTC": 100, "ETH": 50}
+        with patch("src.telegram.charts._render_job", side_effect=slow_job):
+            # Occupy the single render thread so the shared render is still queued
+            busy = renderer.render("portfolio_pie", {"BTC": 1})
+            impatient = asyncio.wait_for(renderer.render("portfolio_pie", data), timeout=0.05)
+            patient = renderer.render("portfolio_pie", data)
+            results = await asyncio.gather(busy, impatient, patient, return_exceptions=True)
+        assert isinstance(results[1], asyncio.TimeoutError)
+        assert results[2][:8] == b"\x89PNG\r\n\x1a\n"
+        assert renderer.status()["renders"] == 2
+
+    def test_cancelled_render_reported_to_waiters(self, renderer):
+        from concurrent.futures import CancelledError, Future
+        shared = Future()
+        with patch.object(renderer, "_get_executor") as executor:
+            executor.return_value.submit.return_value = shared
+            waiter = renderer.submit("portfolio_pie", ({"BTC": 1},), {})
+            shared.cancel()
+        with pytest.raises(CancelledError):
+            waiter.result(timeout=1)
+        status = renderer.status()
+        assert status["errors"] == 1 and status["inflight"] == 0
+
+    def test_cache_key_covers_data_style_and_profile(self):
+        from src.telegram import charts
+        key = charts.chart_cache_key("portfolio_pie", ({"BTC": 1},), {}, "telegram")
+        assert key == charts.chart_cache_key("portfolio_pie", ({"BTC": 1},), {}, "telegram")
+        assert key != charts.chart_cache_key("portfolio_pie", ({"BTC": 2},), {}, "telegram")
+        assert key != charts.chart_cache_key("portfolio_pie", ({"BTC": 1},), {}, "full")
+        with patch.object(charts, "STYLE_VERSION", charts.STYLE_VERSION + 1):
+            assert key != charts.chart_cache_key("portfolio_pie", ({"BTC": 1},), {}, "telegram")
+
+    @pytest.mark.asyncio
+    async def test_telegram_profile_caps_pixels(self, renderer):
+        import struct
+        png = await renderer.render("dashboard", {"BTC": 100, "ETH": 50}, {"Еда": 10, "Такси": 5},
+                                    profile="telegram")
+        width, height = struct.unpack(">II", png[16:24])
+        assert max(width, height) <= 1280 * 1.05
+        from src.telegram.charts import PROFILES
+        assert PROFILES["full"].dpi_for((12, 10)) == 200
+        assert PROFILES["telegram"].dpi_for((12, 10)) < 200
+
+    def test_lru_evicts_by_bytes(self):
+        from src.telegram.charts import ChartRenderer
+        r = ChartRenderer(mode="thread", cache_max_bytes=10)
+        r._cache_put("a", b"12345")
+        r._cache_put("b", b"12345")
+        r._cache_put("c", b"12345")
+        assert list(r._cache) == ["b", "c"] and r.status()["cache_bytes"] == 10
+
+    def test_unknown_chart_rejected(self, renderer):
+        with pytest.raises(ValueError):
+            renderer.submit("nope", (), {})
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self):
+        from src.telegram.charts import ChartRenderer
+        r = ChartRenderer(mode="process")
+        try:
+            await asyncio.to_thread(r.start)
+            png = await r.render("expense_bars", {"Еда": 10, "Такси": 5}, "Расходы")
+            assert png[:8] == b"\x89PNG\r\n\x1a\n"
+            assert r.status()["mode"] == "process"
+        finally:
+            r.shutdown()
+
+
 class TestChartCaption:
     def test_build_chart_caption(self):
         import importlib
@@ -791,9 +888,12 @@ class TestCommandHandlers:
         }
 
         with patch.object(mod, "_collect_all_financial_data", return_value=mock_data), \
-             patch("src.telegram.charts.render_financial_dashboard", return_value=b"\x89PNG" + b"\x00" * 1000):
+             patch("src.telegram.charts.render_chart",
+                   AsyncMock(return_value=b"\x89PNG" + b"\x00" * 1000)) as render:
             await cmd_chart(msg)
 
+        assert render.call_args[0][0] == "render_financial_dashboard"
+
         msg.answer_photo.assert_called_once()
         photo_kwargs = msg.answer_photo.call_args[1]
         assert "caption" in photo_kwargs
@@ -0,0 +1,145 @@
+"""Tests for the partitioned Tinkoff transaction store (src/telegram/transaction_storage.py)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.telegram import transaction_storage as ts
+from src.telegram.tinkoff_parser import iter_tinkoff_csv
+from src.telegram.vault import is_sensitive
+
+HEADER = (
+    '"Дата операции";"Дата платежа";"Номер карты";"Статус";"Сумма операции";"Валюта операции";'
+    '"Сумма платежа";"Валюта платежа";"Кэшбэк";"Категория";"MCC";"Описание";'
+    '"Бонусы (включая кэшбэк)";"Округление на инвесткопилку";"Сумма операции с округлением"\n'
+)
+
+
+def _tx(date, amount, category="Супермаркеты", card="*1234", description="Магнит"):
+    op_type = "credit" if amount > 0 else "debit"
+    return {"date": date, "amount": amount, "category": category, "card": card,
+            "description": description, "op_type": op_type}
+
+
+@pytest.fixture
+def storage():
+    data = {}
+    loads = []
+
+    def mock_load(key, default=None):
+        loads.append(key)
+        return data.get(key, default)
+
+    def mock_save(key, value):
+        data[key] = value
+
+    with patch("src.telegram.transaction_storage.store.load", side_effect=mock_load), \
+         patch("src.telegram.transaction_storage.store.save", side_effect=mock_save):
+        yield data, loads
+
+
+class TestPartitions:
+
+    def test_rows_stored_per_month(self, storage):
+        data, _ = storage
+        ts.save_transactions([_tx("2026-01-05T10:00:00", -100), _tx("2026-02-01T10:00:00", -50)])
+        assert [t["amount"] for t in data["tinkoff_transactions:2026-01"]] == [-100]
+        assert [t["amount"] for t in data["tinkoff_transactions:2026-02"]] == [-50]
+        assert "transactions" not in data["tinkoff_transactions"]
+
+    def test_reupload_touches_only_months_with_new_rows(self, storage):
+        data, loads = storage
+        old = [_tx(f"2025-{m:02d}-10T10:00:00", -m) for m in range(1, 13)]
+        ts.save_transactions(old)
+        loads.clear()
+        added = ts.save_transactions(old + [_tx("2026-01-02T10:00:00", -7)])
+        assert added == 1
+        assert [k for k in loads if ":" in k] == ["tinkoff_transactions:2026-01"]
+
+    def test_dedup_survives_across_uploads(self, storage):
+        ts.save_transactions([_tx("2026-01-05T10:00:00", -100)])
+        assert ts.save_transactions([_tx("2026-01-05T10:00:00", -100)]) == 0
+        assert ts.get_summary()["total_count"] == 1
+
+    def test_accepts_generator(self, storage):
+        rows = (_tx(f"2026-01-{d:02d}T10:00:00", -d) for d in range(1, 6))
+        assert ts.save_transactions(rows) == 5
+
+
+class TestQueries:
+
+    def test_newest_first_across_months(self, storage):
+        ts.save_transactions([_tx("2026-01-05T10:00:00", -1), _tx("2026-03-01T10:00:00", -3),
+                              _tx("2026-02-01T10:00:00", -2)])
+        assert [t["amount"] for t in ts.load_transactions()] == [-3, -2, -1]
+
+    def test_limit_stops_loading_older_months(self, storage):
+        _, loads = storage
+        ts.save_transactions([_tx(f"2025-{m:02d}-10T10:00:00", -m) for m in range(1, 13)])
+        loads.clear()
+        assert len(ts.load_transactions(limit=2)) == 2
+        assert [k for k in loads if ":" in k] == ["tinkoff_transactions:2025-12", "tinkoff_transactions:2025-11"]
+
+    def test_filters(self, storage):
+        ts.save_transactions([
+            _tx("2026-01-05T10:00:00", -100, card="*1111"),
+            _tx("2026-01-06T10:00:00", -200, category="ЖКХ", card="*2222"),
+            _tx("2026-02-06T10:00:00", -300, category="ЖКХ", card="*2222"),
+        ])
+        assert [t["amount"] for t in ts.load_transactions(card="*1111")] == [-100]
+        assert [t["amount"] for t in ts.load_transactions(category="жкх")] == [-300, -200]
+        assert [t["amount"] for t in ts.load_transactions(date_to="2026-01-31")] == [-200, -100]
+
+    def test_summary_from_index(self, storage):
+        ts.save_transactions([
+            _tx("2026-01-05T10:00:00", -100), _tx("2026-01-06T10:00:00", 1000, category="Пополнения"),
+            _tx("2026-02-06T10:00:00", -300, category="ЖКХ", card="*9999"),
+        ])
+        _, loads = storage
+        loads.clear()
+        summary = ts.get_summary()
+        assert loads == ["tinkoff_transactions"]
+        assert summary["income"] == 1000 and summary["expenses"] == 400 and summary["net"] == 600
+        assert summary["cards"] == ["*1234", "*9999"]
+        assert summary["period"] == {"start": "2026-01-05T10:00:00", "end": "2026-02-06T10:00:00"}
+        assert summary["monthly"]["2026-02"] == {"income": 0.0, "expenses": 300}
+        assert summary["top_categories"][0] == ("ЖКХ", 300)
+
+    def test_category_totals(self, storage):
+        ts.save_transactions([_tx("2026-01-05T10:00:00", -100), _tx("2026-01-07T10:00:00", -50),
+                              _tx("2026-02-06T10:00:00", -300, category="ЖКХ")])
+        assert ts.category_totals() == {"2026-01": {"Супермаркеты": 150}, "2026-02": {"ЖКХ": 300}}
+        assert ts.category_totals(month_from="2026-02") == {"2026-02": {"ЖКХ": 300}}
+
+
+class TestMigration:
+
+    def test_legacy_blob_migrated(self, storage):
+        data, _ = storage
+        data["tinkoff_transactions"] = {
+            "transactions": [_tx("2026-01-05T10:00:00", -100), _tx("2025-12-05T10:00:00", -50)],
+            "cards": ["*1234"], "period": {},
+        }
+        assert [t["amount"] for t in ts.load_transactions()] == [-100, -50]
+        assert data["tinkoff_transactions"]["version"] == ts.INDEX_VERSION
+        assert ts.save_transactions([_tx("2026-01-05T10:00:00", -100)]) == 0
+
+
+class TestStreamingParser:
+
+    def test_iter_yields_rows_and_collects_errors(self):
+        csv_text = HEADER + (
+            '"01.02.2026 17:23:58";"01.02.2026";"*5736";"OK";"-500,00";"RUB";"-500,00";"RUB";"";'
+            '"Мобильная связь";"";"Билайн";"0,00";"0,00";"-500,00"\n'
+            '"05.01.2026 11:55:21";"";"*5736";"FAILED";"-400,00";"RUB";"-400,00";"RUB";"";'
+            '"Фастфуд";"";"Покупка";"0,00";"0,00";"-400,00"\n'
+        )
+        errors = []
+        rows = list(iter_tinkoff_csv(csv_text.splitlines(keepends=True), errors))
+        assert [r["amount"] for r in rows] == [-500.0]
+        assert errors == []
+
+
+def test_partition_keys_are_sensitive():
+    assert is_sensitive("tinkoff_transactions:2026-01")
+    assert not is_sensitive("chat_history:2026-01")
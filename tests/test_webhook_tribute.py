@@ -29,7 +29,7 @@ from src.monitor.webhook_notifier import (
     _send_telegram,
 )
 from src.tools.financial.tribute import TributeWebhookVerifier
-from src.revenue_tracker import recalculate_channel_from_events
+from src.revenue_tracker import apply_subscription_event, recalculate_channel_from_events
 
 
 # ── Fixtures ─────────────────────────────────────────────
@@ -403,6 +403,131 @@ class TestRevenueRecalculation:
         os.unlink(tmp.name)
 
 
+class TestIncrementalRevenue:
+    """Per-event updates of the channel subscriber table."""
+
+    @pytest.fixture
+    def revenue_path(self, tmp_path):
+        path = tmp_path / "revenue.json"
+        path.write_text("{}")
+        with patch("src.revenue_tracker._REVENUE_PATH", str(path)), \
+             patch("src.tools.financial.forex.get_rates", return_value={"rates": {"RUB": 80.0}}):
+            yield path
+
+    def _event(self, event_id, event_type="newSubscription", user=1, amount=10, currency="USD"):
+        return {"id": event_id, "event": event_type, "telegram_user_id": user,
+                "amount": amount, "currency": currency, "_channel": "krmktl",
+                "received_at": f"2026-02-01T10:00:{event_id[-2:]}"}
+
+    def test_events_update_table_without_replay(self, revenue_path):
+        history = [self._event("evt_01")]
+        with patch("src.tools.financial.tribute._load_payments", return_value=history):
+            apply_subscription_event(history[0], "krmktl")  # seeds the table
+        with patch("src.tools.financial.tribute._load_payments", side_effect=AssertionError("replayed")):
+            apply_subscription_event(self._event("evt_02", user=2, amount=20), "krmktl")
+            result = apply_subscription_event(self._event("evt_03", "cancelledSubscription", user=1), "krmktl")
+        assert result == {"mrr": 20.0, "members": 1, "applied": True}
+        channel = json.loads(revenue_path.read_text())["channels"]["krmktl"]
+        assert channel["mrr"] == 20.0 and channel["members"] == 1
+
+    def test_duplicate_event_id_ignored(self, revenue_path):
+        event = self._event("evt_01")
+        with patch("src.tools.financial.tribute._load_payments", return_value=[event]):
+            apply_subscription_event(event, "krmktl")
+            result = apply_subscription_event(self._event("evt_02", user=2), "krmktl")
+            again = apply_subscription_event(self._event("evt_02", user=2), "krmktl")
+        assert again["applied"] is False
+        assert again["mrr"] == result["mrr"] == 20.0
+
+    def test_renewal_replaces_price(self, revenue_path):
+        event = self._event("evt_01")
+        with patch("src.tools.financial.tribute._load_payments", return_value=[event]):
+            apply_subscription_event(event, "krmktl")
+            result = apply_subscription_event(self._event("evt_02", "renewedSubscription", amount=15), "krmktl")
+        assert result["mrr"] == 15.0 and result["members"] == 1
+
+    def test_rub_converted_with_forex_rate(self, revenue_path):
+        event = self._event("evt_01", amount=1600, currency="RUB")
+        with patch("src.tools.financial.tribute._load_payments", return_value=[event]):
+            result = apply_subscription_event(event, "krmktl")
+        assert result["mrr"] == 20.0  # 1600 RUB at 80 RUB/USD
+
+    def test_forex_fetch_outside_revenue_lock(self, revenue_path):
+        from src import revenue_tracker
+
+        def rates(*args, **kwargs):
+            assert not revenue_tracker._lock.locked()
+            return {"rates": {"RUB": 80.0}}
+
+        event = self._event("evt_01")
+        with patch("src.tools.financial.tribute._load_payments", return_value=[event]):
+            apply_subscription_event(event, "krmktl")
+        with patch("src.tools.financial.forex.get_rates", side_effect=rates):
+            result = apply_subscription_event(
+                self._event("evt_02", user=2, amount=1600, currency="RUB"), "krmktl")
+        assert result["mrr"] == 30.0
+
+    @pytest.mark.asyncio
+    async def test_webhook_updates_revenue_off_event_loop(self):
+        import threading
+        event = _make_event()
+        body = json.dumps(event).encode()
+        sig = _make_signature(body)
+        loop_thread = threading.get_ident()
+        threads = []
+        with patch.dict(os.environ, {"TRIBUTE_API_KEY_KRMKTL": TEST_API_KEY}), \
+             patch("src.tools.financial.tribute._load_payments", return_value=[]), \
+             patch("src.tools.financial.tribute._save_payments"), \
+             patch("src.monitor.webhook_tribute.notify_ceo", new_callable=AsyncMock), \
+             patch("src.monitor.webhook_tribute.notify_cfo", new_callable=AsyncMock), \
+             patch("src.monitor.webhook_tribute._update_revenue_from_event",
+                   side_effect=lambda *a: threads.append(threading.get_ident())):
+            req = FakeRequest(body, headers={"trbt-signature": sig}, query_params={"project": "krmktl"})
+            resp = await tribute_webhook(req)
+        assert resp.status_code == 200
+        assert threads and threads[0] != loop_thread
+
+    def test_replay_matches_incremental(self, revenue_path):
+        events = [self._event("evt_01"), self._event("evt_02", user=2, amount=20),
+                  self._event("evt_03", "cancelledSubscription", user=1)]
+        with patch("src.tools.financial.tribute._load_payments", return_value=events[:1]):
+            apply_subscription_event(events[0], "krmktl")
+        for event in events[1:]:
+            apply_subscription_event(event, "krmktl")
+        with patch("src.tools.financial.tribute._load_payments", return_value=events):
+            audit = recalculate_channel_from_events("krmktl")
+        assert audit["mrr"] == 20.0 and audit["members"] == 1
+        assert audit["drift"] == 0.0
+
+    def test_rounding_does_not_accumulate(self, revenue_path):
+        # 1003 RUB at 80 RUB/USD is $12.5375: rounding per event would drift
+        events = [self._event(f"evt_0{i}", user=i, amount=1003, currency="RUB") for i in range(1, 8)]
+        with patch("src.tools.financial.tribute._load_payments", return_value=events[:1]):
+            apply_subscription_event(events[0], "krmktl")
+        for event in events[1:]:
+            result = apply_subscription_event(event, "krmktl")
+        with patch("src.tools.financial.tribute._load_payments", return_value=events):
+            audit = recalculate_channel_from_events("krmktl")
+        assert result["mrr"] == audit["mrr"] == 87.76
+        assert audit["drift"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_webhook_skips_revenue_for_duplicate(self):
+        event = _make_event()
+        body = json.dumps(event).encode()
+        sig = _make_signature(body)
+        with patch.dict(os.environ, {"TRIBUTE_API_KEY_KRMKTL": TEST_API_KEY}), \
+             patch("src.tools.financial.tribute._load_payments", return_value=[dict(event)]), \
+             patch("src.tools.financial.tribute._save_payments"), \
+             patch("src.monitor.webhook_tribute.notify_ceo", new_callable=AsyncMock), \
+             patch("src.monitor.webhook_tribute.notify_cfo", new_callable=AsyncMock), \
+             patch("src.monitor.webhook_tribute._update_revenue_from_event") as mock_update:
+            req = FakeRequest(body, headers={"trbt-signature": sig}, query_params={"project": "krmktl"})
+            resp = await tribute_webhook(req)
+            assert resp.status_code == 200
+            mock_update.assert_not_called()
+
+
 # ── Webhook Notifier ─────────────────────────────────────
 
 class TestWebhookNotifier: